@@ -1,21 +1,20 @@
 import copy
 import logging
 import os
-import urllib.parse
+from collections import defaultdict
 from datetime import datetime, timezone
 from os.path import basename
 from pathlib import PurePath, Path
-import boto3
 
-from data_subscriber import ionosphere_download
 from data_subscriber.asf_rtc_download import AsfDaacRtcDownload
 from data_subscriber.cmr import Collection
 from data_subscriber.cslc.cslc_catalog import CSLCStaticProductCatalog, KCSLCProductCatalog
 from data_subscriber.cslc.cslc_static_query import CslcStaticCmrQuery
 from data_subscriber.download import SessionWithHeaderRedirection
 from data_subscriber.url import cslc_unique_id
-from util.aws_util import concurrent_s3_client_try_upload_file
-from util.conf_util import SettingsConf
+from tools.stage_ionosphere_file import IonosphereResolver
+from util.aws_util import concurrent_s3_client_try_upload_file, get_s3_objects_metadata
+from util.conf_util import get_settings_conf
 from util.job_submitter import try_submit_mozart_job
 
 from data_subscriber.cslc_utils import (CSLCDependency, localize_disp_frame_burst_hist, split_download_batch_id,
@@ -36,7 +35,7 @@ class AsfDaacCslcDownload(AsfDaacRtcDownload):
 
     def run_download(self, args, token, es_conn, netloc, username, password, cmr, job_id, rm_downloads_dir=True):
 
-        settings = SettingsConf().cfg
+        settings = get_settings_conf().cfg
         product_id = "_".join([batch_id for batch_id in args.batch_ids])
         logger.info(f"{product_id=}")
         cslc_s3paths = []
@@ -50,6 +49,12 @@ class AsfDaacCslcDownload(AsfDaacRtcDownload):
         # All batches should have the same frame_id so we pick the first one
         frame_id, _ = split_download_batch_id(args.batch_ids[0])
 
+        # Shared by all batches, so that each day's ionosphere file is fetched at most once per job
+        ionosphere_resolver = IonosphereResolver(
+            output_directory=str(self.downloads_dir),
+            s3_url_prefix=f"s3://{settings['DATASET_BUCKET']}/tmp/disp_s1/ionosphere"
+        )
+
         # We need these info later when we query CMR which is needed for k-cycle determination, etc
         # These are automatically set in query but not in download jobs
         args.bbox = "-180,-90,180,90"
@@ -91,23 +96,12 @@ class AsfDaacCslcDownload(AsfDaacRtcDownload):
                 if len(cslc_s3paths) == 0:
                     raise Exception(f"No s3_path found for {batch_id}. You probably should specify https transfer protocol.")
 
+                # e.g. 's3://asf-cumulus-prod-opera-products/OPERA_L2_CSLC-S1/OPERA_L2_CSLC-S1_T122-260026-IW3_20231214T011435Z_20231215T075814Z_S1A_VV_v1.0/OPERA_L2_CSLC-S1_T122-260026-IW3_20231214T011435Z_20231215T075814Z_S1A_VV_v1.0.h5'
+                s3_objects_metadata = get_s3_objects_metadata(cslc_s3paths)
                 for p in cslc_s3paths:
-                    # Split the following into bucket name and key
-                    # 's3://asf-cumulus-prod-opera-products/OPERA_L2_CSLC-S1/OPERA_L2_CSLC-S1_T122-260026-IW3_20231214T011435Z_20231215T075814Z_S1A_VV_v1.0/OPERA_L2_CSLC-S1_T122-260026-IW3_20231214T011435Z_20231215T075814Z_S1A_VV_v1.0.h5'
-                    parsed_url = urllib.parse.urlparse(p)
-                    bucket = parsed_url.netloc
-                    key = parsed_url.path[1:]
                     granule_id = p.split("/")[-1]
-
-                    try:
-                        head_object = boto3.client("s3").head_object(Bucket=bucket, Key=key)
-                        logger.info(f"Adding CSLC file: {p}")
-                    except Exception as e:
-                        logger.error("Failed when accessing the S3 object:" + p)
-                        raise e
-                    file_size = int(head_object["ContentLength"])
-
-                    granule_sizes.append((granule_id, file_size))
+                    logger.info(f"Adding CSLC file: {p}")
+                    granule_sizes.append((granule_id, s3_objects_metadata[p]["ContentLength"]))
 
                 cslc_files_to_upload = [Path(p) for p in cslc_s3paths] # Need this for querying static CSLCs
 
@@ -154,18 +148,10 @@ class AsfDaacCslcDownload(AsfDaacRtcDownload):
                 if len(cslc_static_s3paths) == 0:
                     raise Exception(f"No s3_path found for static files for {batch_id}. You probably should specify https transfer protocol.")
 
-            # Download all Ionosphere files corresponding to the dates covered by the input CSLC set
-            # We always download ionosphere files, there is no direct S3 ingestion option
-            logger.info(f"Downloading Ionosphere files for {batch_id}")
-            ionosphere_paths = self.download_ionosphere_files_for_cslc_batch(cslc_files_to_upload,
-                                                                             self.downloads_dir)
-
-            logger.info(f"Uploading Ionosphere files to S3")
-            # TODO: since all ionosphere files now go to the same S3 location,
-            #  it should be possible to do a lookup before redownloading a file
-            ionosphere_s3paths.extend(concurrent_s3_client_try_upload_file(bucket=settings["DATASET_BUCKET"],
-                                                                           key_prefix=f"tmp/disp_s1/ionosphere",
-                                                                           files=ionosphere_paths))
+            # Stage all Ionosphere files corresponding to the dates covered by the input CSLC set
+            # We always stage ionosphere files, there is no direct S3 ingestion option
+            logger.info(f"Staging Ionosphere files for {batch_id}")
+            ionosphere_s3paths.extend(ionosphere_resolver.resolve_all(map(basename, cslc_files_to_upload)))
 
             # Delete the files from the file system after uploading to S3
             if rm_downloads_dir:
@@ -178,9 +164,6 @@ class AsfDaacCslcDownload(AsfDaacRtcDownload):
                     for fp in fp_set:
                         os.remove(fp)
 
-                for iono_file in ionosphere_paths:
-                    os.remove(iono_file)
-
         # Determine M Compressed CSLCs by querying compressed cslc GRQ ES   -------------->
         k, m = es_conn.get_k_and_m(args.batch_ids[0])
         logger.info(f"{k=}, {m=}")
@@ -197,18 +180,11 @@ class AsfDaacCslcDownload(AsfDaacRtcDownload):
             logger.info(f"Adding {cslc_path} to c_cslc_s3paths")
 
         # Now acquire the Ionosphere files for the reference dates of the Compressed CSLC products
-        logger.info(f"Downloading Ionosphere files for Compressed CSLCs")
-        ionosphere_paths = self.download_ionosphere_files_for_cslc_batch(c_cslc_s3paths,
-                                                                         self.downloads_dir)
+        logger.info(f"Staging Ionosphere files for Compressed CSLCs")
+        ionosphere_s3paths.extend(ionosphere_resolver.resolve_all(map(basename, c_cslc_s3paths)))
 
-        logger.info(f"Uploading Ionosphere files for Compressed CSLCs to S3")
-        ionosphere_s3paths.extend(concurrent_s3_client_try_upload_file(bucket=settings["DATASET_BUCKET"],
-                                                                       key_prefix=f"tmp/disp_s1/ionosphere",
-                                                                       files=ionosphere_paths))
-
-        # Remove potential duplicate ionosphere entries
-        # TODO: rework ionosphere download logic to check for files that have already been downloaded for a previous batch_id
-        ionosphere_s3paths = list(set(ionosphere_s3paths))
+        # Batches may share acquisition dates, and so ionosphere files
+        ionosphere_s3paths = list(dict.fromkeys(ionosphere_s3paths))
 
         # Look up bounding box for frame
         bounding_box = get_bounding_box_for_frame(int(frame_id), self.frame_geo_map)
@@ -270,8 +246,10 @@ class AsfDaacCslcDownload(AsfDaacRtcDownload):
         )
 
         # Mark the CSLC files as downloaded in the CSLC ES with the file size only after SCIFLO job has been submitted
-        for unique_id, file_size in to_mark_downloaded:
-            es_conn.mark_product_as_downloaded(unique_id, job_id, filesize=file_size)
+        es_conn.mark_products_as_downloaded(
+            [unique_id for unique_id, _ in to_mark_downloaded], job_id,
+            filesizes=[file_size for _, file_size in to_mark_downloaded]
+        )
 
         return submitted
 
@@ -281,36 +259,39 @@ class AsfDaacCslcDownload(AsfDaacRtcDownload):
         Granules are stored in either cslc_catalog or k_cslc_catalog index. We assume that the latest batch_id (defined
         as the one with the greatest acq_cycle_index) is stored in cslc_catalog. The rest are stored in k_cslc_catalog.'''
 
-        k_es_conn = KCSLCProductCatalog(logging.getLogger(__name__))
-
         # Sort the batch_ids by acq_cycle_index
         batch_ids = sorted(args.batch_ids, key = lambda batch_id: split_download_batch_id(batch_id)[1])
 
-        all_downloads = []
-
         # Historical mode stores all granules in normal cslc_catalog
         if "proc_mode" in args and args.proc_mode == "historical":
             logger.info("Downloading cslc files for historical mode")
-            for batch_id in batch_ids:
-                downloads = es_conn.get_download_granule_revision(batch_id)
-                logger.info(f"Got {len(downloads)=} cslc downloads for {batch_id=}")
-                assert len(downloads) > 0, f"No downloads found for batch_id={batch_id}!"
-                all_downloads.extend(downloads)
+            batch_id_to_k_catalog = {batch_id: False for batch_id in batch_ids}
 
-        # Forward and reprocessing modes store all granules in k_cslc_catalog
+        # Forward and reprocessing modes store the latest batch in cslc_catalog and the K-CSLC granules in k_cslc_catalog
         else:
             logger.info("Downloading cslc files for forward/reprocessing mode")
-            downloads = es_conn.get_download_granule_revision(batch_ids[-1])
-            logger.info(f"Got {len(downloads)=} cslc granules downloads for batch_id={batch_ids[-1]}")
-            assert len(downloads) > 0, f"No downloads found for batch_id={batch_ids[-1]}!"
-            all_downloads.extend(downloads)
+            batch_id_to_k_catalog = {batch_id: True for batch_id in batch_ids[:-1]}
+            batch_id_to_k_catalog[batch_ids[-1]] = False
 
-            # Download K-CSLC granules
-            for batch_id in batch_ids[:-1]:
-                downloads = k_es_conn.get_download_granule_revision(batch_id)
-                logger.info(f"Got {len(downloads)=} k cslc downloads for {batch_id=}")
-                assert len(downloads) > 0, f"No downloads found for batch_id={batch_id}!"
-                all_downloads.extend(downloads)
+        # Resolve the granules of every batch, from both catalogs, at once
+        downloads = es_conn.get_download_granule_revisions(
+            batch_ids, index=f"{es_conn.ES_INDEX_PATTERNS},{KCSLCProductCatalog.ES_INDEX_PATTERNS}"
+        )
+
+        batch_id_to_downloads = defaultdict(list)
+        for download in downloads:
+            batch_id = download["_source"]["download_batch_id"]
+            from_k_catalog = download["_index"].startswith(KCSLCProductCatalog.NAME)
+            if batch_id_to_k_catalog.get(batch_id) == from_k_catalog:
+                batch_id_to_downloads[batch_id].append(download["_source"])
+
+        all_downloads = []
+        for batch_id in batch_ids:
+            downloads = batch_id_to_downloads[batch_id]
+            catalog_name = KCSLCProductCatalog.NAME if batch_id_to_k_catalog[batch_id] else es_conn.NAME
+            logger.info(f"Got {len(downloads)=} {catalog_name} downloads for {batch_id=}")
+            assert len(downloads) > 0, f"No downloads found for batch_id={batch_id}!"
+            all_downloads.extend(downloads)
 
         return all_downloads
 
@@ -373,34 +354,6 @@ class AsfDaacCslcDownload(AsfDaacRtcDownload):
         return product_to_product_filepaths_map
 
 
-    def download_ionosphere_files_for_cslc_batch(self, cslc_files, download_dir):
-        # Reduce the provided CSLC paths to just the filenames
-        cslc_files = list(map(lambda path: basename(path), cslc_files))
-
-        downloaded_ionosphere_dates = set()
-        downloaded_ionosphere_files = set()
-
-        for cslc_file in cslc_files:
-            logger.info(f'Downloading Ionosphere file for CSLC granule {cslc_file}')
-
-            cslc_file_tokens = cslc_file.split('_')
-            acq_datetime = cslc_file_tokens[4]
-            acq_date = acq_datetime.split('T')[0]
-
-            logger.debug(f'{acq_date=}')
-
-            if acq_date not in downloaded_ionosphere_dates:
-                ionosphere_filepath = ionosphere_download.download_ionosphere_correction_file(
-                    dataset_dir=download_dir, product_filepath=cslc_file
-                )
-
-                downloaded_ionosphere_dates.add(acq_date)
-                downloaded_ionosphere_files.add(ionosphere_filepath)
-            else:
-                logger.info(f'Already downloaded Ionosphere file for date {acq_date}, skipping...')
-
-        return downloaded_ionosphere_files
-
     def create_job_params(self, product):
         return [
             {
@@ -25,6 +25,9 @@ class AsfDaacSlcDownload(DaacDownloadAsf):
         # Get the PCM username/password for authentication to Copernicus Dataspace
         username, _, password = netrc.netrc().authenticators('dataspace.copernicus.eu')
 
+        # Share the Orbit file catalog and cache with the other jobs on this node
+        cache_directory = self.cfg.get("ORBIT_CACHE_DIRECTORY", stage_orbit_file.DEFAULT_CACHE_DIRECTORY)
+
         (_, safe_start_time, safe_stop_time) = parse_orbit_time_range_from_safe(product_filepath)
         safe_start_datetime = datetime.strptime(safe_start_time, "%Y%m%dT%H%M%S")
         safe_stop_datetime = datetime.strptime(safe_stop_time, "%Y%m%dT%H%M%S")
@@ -41,6 +44,7 @@ class AsfDaacSlcDownload(DaacDownloadAsf):
                     "--orbit-type=POEORB",
                     f"--username={username}",
                     f"--password={password}",
+                    f"--cache-directory={cache_directory}",
                     f"--sensing-start-range={sensing_start_range.strftime('%Y%m%dT%H%M%S')}",
                     f"--sensing-stop-range={sensing_stop_range.strftime('%Y%m%dT%H%M%S')}",
                     str(product_filepath)
@@ -56,6 +60,7 @@ class AsfDaacSlcDownload(DaacDownloadAsf):
                         "--orbit-type=RESORB",
                         f"--username={username}",
                         f"--password={password}",
+                        f"--cache-directory={cache_directory}",
                         f"--sensing-start-range={sensing_start_range.strftime('%Y%m%dT%H%M%S')}",
                         f"--sensing-stop-range={sensing_stop_range.strftime('%Y%m%dT%H%M%S')}",
                         str(product_filepath)
@@ -75,6 +80,7 @@ class AsfDaacSlcDownload(DaacDownloadAsf):
                         "--orbit-type=RESORB",
                         f"--username={username}",
                         f"--password={password}",
+                        f"--cache-directory={cache_directory}",
                         f"--sensing-start-range={sensing_start_range.strftime('%Y%m%dT%H%M%S')}",
                         f"--sensing-stop-range={sensing_stop_range.strftime('%Y%m%dT%H%M%S')}",
                         str(product_filepath)
@@ -92,6 +98,7 @@ class AsfDaacSlcDownload(DaacDownloadAsf):
                         "--orbit-type=RESORB",
                         f"--username={username}",
                         f"--password={password}",
+                        f"--cache-directory={cache_directory}",
                         f"--sensing-start-range={sensing_start_range.strftime('%Y%m%dT%H%M%S')}",
                         f"--sensing-stop-range={sensing_stop_range.strftime('%Y%m%dT%H%M%S')}",
                         str(product_filepath)
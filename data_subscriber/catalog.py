@@ -5,7 +5,9 @@ from datetime import datetime
 from pathlib import Path
 
 import elasticsearch
+import elasticsearch.helpers
 import backoff
+from more_itertools import chunked
 
 from data_subscriber import es_conn_util
 from data_subscriber.url import form_batch_id
@@ -85,10 +87,10 @@ class ProductCatalog(ABC):
         fieldname_for_range_filter = "temporal_extent_beginning_datetime" if use_temporal else "revision_date"
 
         try:
-            results = self.es_util.query(
+            results = list(es_conn_util.sliced_scan(
+                self.es_util.es,
                 index=self.ES_INDEX_PATTERNS,
                 body={
-                    "sort": [{"creation_timestamp": "asc"}],
                     "query": {
                         "bool": {
                             "must": [
@@ -104,7 +106,9 @@ class ProductCatalog(ABC):
                         }
                     }
                 }
-            )
+            ))
+            # sliced scans are unordered. restore creation order
+            results.sort(key=lambda result: result["_source"].get("creation_timestamp") or "")
             self.logger.debug(f"get_all_between query result: {results}")
         except Exception as err:
             self.logger.error(f"get_all_between query Error: {err}")
@@ -184,6 +188,63 @@ class ProductCatalog(ABC):
 
         self.logger.info(f"Document updated: {result}")
 
+    def mark_products_as_downloaded(self, urls: list[str], job_id, filesize=None, doc=None, filesizes=None):
+        """
+        Batched form of mark_product_as_downloaded. Resolves the index of every product with a single query per 1024
+        products, then marks them all with one bulk request. `filesizes`, if given, holds the file size of each
+        product in the same order as `urls`, and takes precedence over `filesize`.
+        """
+        filenames = [url.split("/")[-1] for url in urls]
+        if not filenames:
+            return
+
+        doc = dict(doc) if doc else {}
+        doc["downloaded"] = True
+        doc["download_datetime"] = datetime.now()
+        doc["download_job_id"] = job_id
+
+        if filesize:
+            doc["metadata"] = {"FileSize": filesize}
+
+        filename_to_index = {}
+        for filenames_chunk in chunked(dict.fromkeys(filenames), 1024):
+            try:
+                results = self.es_util.query(
+                    index=self.ES_INDEX_PATTERNS,
+                    body={
+                        "query": {"ids": {"values": filenames_chunk}},
+                        "sort": [{"creation_timestamp": "desc"}],
+                        "_source": {"includes": "false", "excludes": []}
+                    },
+                )
+            except Exception:
+                self.logger.info(f"{filenames_chunk} do not exist in {self.ES_INDEX_PATTERNS}")
+                results = []
+
+            # results are sorted most recent first. keep the index of the most recent record of each product
+            for result in results or []:
+                filename_to_index.setdefault(result["_id"], result["_index"])
+
+        filename_to_doc = {}
+        for filename, product_filesize in zip(filenames, filesizes or [None] * len(filenames)):
+            filename_to_doc[filename] = {**doc, "metadata": {"FileSize": product_filesize}} if product_filesize else doc
+
+        default_index = self.generate_es_index_name()
+        operations = [
+            {
+                "_op_type": "update",
+                "_index": filename_to_index.get(filename, default_index),
+                "_id": filename,
+                "doc_as_upsert": True,
+                "doc": filename_doc
+            }
+            for filename, filename_doc in filename_to_doc.items()
+        ]
+
+        self.logger.info(f"Marking {len(operations)} products as downloaded, in bulk")
+        successes, _ = elasticsearch.helpers.bulk(self.es_util.es, operations)
+        self.logger.info(f"Documents updated: {successes}")
+
     def process_granule(self, granule):
         if self._query_existence(granule["granule_id"]):
             self.logger.warning(f'Granule {granule["granule_id"]} already exists in DB. No additional indexing needed.')
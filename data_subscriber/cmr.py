@@ -102,7 +102,7 @@ def get_cmr_token(endpoint, settings):
 
     return cmr, token, username, password, edl
 
-async def async_query_cmr(args, token, cmr, settings, timerange, now: datetime, silent=False) -> list:
+async def async_query_cmr(args, token, cmr, settings, timerange, now: datetime, silent=False, session=None) -> list:
     request_url = f"https://{cmr}/search/granules.umm_json"
     bounding_box = args.bbox
 
@@ -177,7 +177,7 @@ async def async_query_cmr(args, token, cmr, settings, timerange, now: datetime,
     if not silent:
         logger.info(f"Querying CMR. {request_url=} {params=}")
 
-    product_granules = await _async_request_search_cmr_granules(args, request_url, [params])
+    product_granules = await _async_request_search_cmr_granules(args, request_url, [params], session)
     search_results_count = len(product_granules)
 
     if not silent:
@@ -241,8 +241,8 @@ def _get_temporal_range(start: str, end: str, now: str):
     return "{},{}".format(start, end)
 
 
-async def _async_request_search_cmr_granules(args, request_url, paramss: Iterable[dict]):
-    response_jsons = await async_cmr_posts(request_url, cmr_client.paramss_to_request_body(paramss))
+async def _async_request_search_cmr_granules(args, request_url, paramss: Iterable[dict], session=None):
+    response_jsons = await async_cmr_posts(request_url, cmr_client.paramss_to_request_body(paramss), session)
     return response_jsons_to_cmr_granules(args, response_jsons)
 
 
@@ -1,6 +1,8 @@
 
 from datetime import datetime
 
+from more_itertools import chunked
+
 from data_subscriber.catalog import ProductCatalog
 
 class KCSLCProductCatalog(ProductCatalog):
@@ -41,6 +43,31 @@ class KCSLCProductCatalog(ProductCatalog):
         )
 
         return self.process_query_result(downloads)
+
+    def get_download_granule_revisions(self, download_batch_ids: list[str], index: str = None) -> list[dict]:
+        """
+        Batched form of get_download_granule_revision. Returns the ES hits (including their _index) of the granules of
+        all given download_batch_ids with a single terms query per 1024 batch_ids. `index` defaults to this catalog's
+        ES_INDEX_PATTERNS, and may name several comma-separated patterns to search multiple catalogs at once.
+        """
+        downloads = []
+        for download_batch_ids_chunk in chunked(dict.fromkeys(download_batch_ids), 1024):
+            downloads.extend(self.es_util.query(
+                index=index or self.ES_INDEX_PATTERNS,
+                body={
+                    "query": {
+                        "bool": {
+                            "must": [
+                                {"terms": {"download_batch_id": download_batch_ids_chunk}}
+                            ]
+                        }
+                    }
+                }
+            ) or [])
+
+        return downloads
+
+
 class CSLCProductCatalog(KCSLCProductCatalog):
     """Cataloging class for downloaded Coregistered Single Look Complex (CSLC) products."""
     NAME = "cslc_catalog"
@@ -118,6 +145,12 @@ class CSLCProductCatalog(KCSLCProductCatalog):
 
         super().mark_product_as_downloaded(url, job_id, filesize, doc)
 
+    def mark_products_as_downloaded(self, urls, job_id, filesize=None, doc=None, filesizes=None):
+        doc = dict(doc) if doc else {}
+        doc["latest_download_job_ts"] = datetime.now().isoformat(timespec="seconds").replace("+00:00", "Z")
+
+        super().mark_products_as_downloaded(urls, job_id, filesize, doc, filesizes)
+
 
 class CSLCStaticProductCatalog(ProductCatalog):
     """Cataloging class for downloaded CSLC Static Layer Products."""
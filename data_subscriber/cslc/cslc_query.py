@@ -372,6 +372,14 @@ since the first CSLC file for the batch was ingested which is greater than the g
     def query_cmr_by_frame_and_dates(self, args, token, cmr, settings, now, timerange, silent=False):
 
         frame_id = int(self.args.frame_id)
+        return asyncio.run(self.async_query_cmr_by_frame_and_dates(frame_id, args, token, cmr, settings, now, timerange, silent))
+
+    async def async_query_cmr_by_frame_and_dates(self, frame_id, args, token, cmr, settings, now, timerange, silent=False, session=None):
+        """
+        Same as query_cmr_by_frame_and_dates, for the given frame. Lets many frames be queried in one event loop,
+        sharing the given aiohttp session, if any, for their CMR requests.
+        """
+
         if frame_id not in self.disp_burst_map_hist:
             raise Exception(f"Frame number {frame_id} not found in the historical database. \
         OPERA does not process this frame for DISP-S1.")
@@ -382,7 +390,7 @@ since the first CSLC file for the batch was ingested which is greater than the g
         if count == 0:
             return all_granules
         new_args.native_id = native_id
-        new_granules = asyncio.run(async_query_cmr(new_args, token, cmr, settings, timerange, now, silent))
+        new_granules = await async_query_cmr(new_args, token, cmr, settings, timerange, now, silent, session)
         self.extend_additional_records(new_granules, no_duplicate=True, force_frame_id=frame_id)
         all_granules.extend(new_granules)
 
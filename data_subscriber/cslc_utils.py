@@ -1,5 +1,4 @@
 import json
-import re
 from copy import deepcopy
 from collections import defaultdict
 import asyncio
@@ -11,7 +10,8 @@ from functools import cache
 import elasticsearch
 
 from util import datasets_json_util
-from util.conf_util import SettingsConf
+from util.conf_util import get_settings_conf
+from util.ecmwf_util import DEFAULT_ECMWF_S3_PREFIX, get_ecmwf_availability_index
 from data_subscriber.cmr import async_query_cmr, CMR_TIME_FORMAT, DateTimeRange
 
 
@@ -33,7 +33,7 @@ class _HistBursts(object):
         self.sensing_datetime_days_index = [] # Sensing time in days since the first sensing time, rounded to the nearest day
 
 def localize_anc_json(file):
-    settings = SettingsConf().cfg
+    settings = get_settings_conf().cfg
     bucket = settings["GEOJSON_BUCKET"]
     try:
         s3 = boto3.resource('s3')
@@ -156,9 +156,8 @@ def process_frame_geo_json(file = FRAME_GEO_SIMPLE_JSON):
     return frame_geo_map
 
 def parse_cslc_file_name(native_id):
-    dataset_json = datasets_json_util.DatasetsJson()
-    cslc_granule_regex = dataset_json.get("L2_CSLC_S1")["match_pattern"]
-    match_product_id = re.match(cslc_granule_regex, native_id)
+    cslc_granule_regex = datasets_json_util.get_match_pattern("L2_CSLC_S1")
+    match_product_id = cslc_granule_regex.match(native_id)
 
     if not match_product_id:
         raise ValueError(f"CSLC native ID {native_id} could not be parsed with regex from datasets.json")
@@ -169,9 +168,8 @@ def parse_cslc_file_name(native_id):
 
 
 def parse_compressed_cslc_file_name(native_id):
-    dataset_json = datasets_json_util.DatasetsJson()
-    ccslc_granule_regex = dataset_json.get("L2_CSLC_S1_COMPRESSED")["match_pattern"]
-    match_product_id = re.match(ccslc_granule_regex, native_id)
+    ccslc_granule_regex = datasets_json_util.get_match_pattern("L2_CSLC_S1_COMPRESSED")
+    match_product_id = ccslc_granule_regex.match(native_id)
 
     if not match_product_id:
         raise ValueError(f"Compressed CSLC native ID {native_id} could not be parsed with regex from datasets.json")
@@ -412,11 +410,17 @@ def get_pending_download_jobs(es):
 
     return result
 
-def ecmwf_satisfied(acq_time_list):
-    for acq_time in acq_time_list:
-        # TODO: perform actual lookup
-        logger.info(f"Looking up ECMWF for acquisition time: {acq_time}")
-    return False
+def ecmwf_satisfied(acq_time_list, s3_prefix=DEFAULT_ECMWF_S3_PREFIX):
+    '''Returns True if an ECMWF file exists for every acquisition time (YYYYMMDDTHHMMSSZ) in the list'''
+    acq_datetimes = [datetime.strptime(acq_time, "%Y%m%dT%H%M%SZ") for acq_time in acq_time_list]
+    logger.info(f"Looking up ECMWF for {len(acq_datetimes)} acquisition times")
+
+    ecmwf_s3_paths = get_ecmwf_availability_index(s3_prefix).find_ecmwf_for_datetimes(acq_datetimes)
+    for acq_datetime, ecmwf_s3_path in sorted(ecmwf_s3_paths.items()):
+        if ecmwf_s3_path is None:
+            logger.info(f"ECMWF not available for acquisition time: {acq_datetime}")
+
+    return all(ecmwf_s3_paths.values())
 
 def mark_pending_download_job_submitted(es, doc_id, download_job_id):
     return es.update_document(
@@ -41,7 +41,7 @@ from data_subscriber.slc.slc_query import SlcCmrQuery
 from data_subscriber.survey import run_survey
 from rtc_utils import rtc_product_file_revision_regex
 from util.aws_util import concurrent_s3_client_try_upload_file
-from util.conf_util import SettingsConf
+from util.conf_util import get_settings_conf
 from util.ctx_util import JobContext
 from util.exec_util import exec_wrapper
 from util.job_util import supply_job_id, is_running_outside_verdi_worker_context
@@ -87,7 +87,7 @@ def run(argv: list[str]):
     job_id = supply_job_id()
     logger.info(f"{job_id=}")
 
-    settings = SettingsConf().cfg
+    settings = get_settings_conf().cfg
     cmr, token, username, password, edl = get_cmr_token(args.endpoint, settings)
 
     results = {}
@@ -158,7 +158,7 @@ def run_download(args, token, es_conn, netloc, username, password, cmr, job_id):
 
 def run_rtc_download(args, token, es_conn, netloc, username, password, cmr, job_id):
     provider = args.provider  # "ASF-RTC"
-    settings = SettingsConf().cfg
+    settings = get_settings_conf().cfg
 
     if not is_running_outside_verdi_worker_context():
         job_context = JobContext("_context.json").ctx
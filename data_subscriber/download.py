@@ -1,5 +1,7 @@
 import logging
+import os
 import shutil
+import threading
 from datetime import datetime
 from pathlib import PurePath, Path
 from typing import Iterable
@@ -7,6 +9,7 @@ from typing import Iterable
 import backoff
 import boto3
 import dateutil.parser
+from botocore.config import Config
 import requests
 import requests.utils
 import validators
@@ -16,13 +19,16 @@ import extractor.extract
 from data_subscriber.cmr import Provider, CMR_TIME_FORMAT
 from data_subscriber.query import DateTimeRange
 from data_subscriber.url import _to_batch_id, _to_orbit_number
-from util.conf_util import SettingsConf
+from util.conf_util import get_settings_conf
 from tools.stage_orbit_file import fatal_code
 
 logger = logging.getLogger(__name__)
 
 AWS_REGION = "us-west-2"
 
+DOWNLOAD_MAX_WORKERS = min(8, os.cpu_count() + 4)
+"""Maximum number of files downloaded concurrently"""
+
 class SessionWithHeaderRedirection(requests.Session):
     """
     Borrowed from https://wiki.earthdata.nasa.gov/display/EL/How+To+Access+Data+With+Python
@@ -53,7 +59,10 @@ class DaacDownload:
     def __init__(self, provider):
         self.provider = provider
         self.daac_s3_cred_settings_key = None
-        self.cfg = SettingsConf().cfg  # has metadata extractor config
+        self.cfg = get_settings_conf().cfg  # has metadata extractor config
+        self._s3_client = None
+        self._s3_client_credentials = None
+        self._s3_client_lock = threading.Lock()
 
         logger.info("Creating directories to process products")
 
@@ -147,19 +156,36 @@ class DaacDownload:
         return PurePath(dataset_dir)
 
     def download_product_using_s3(self, url, token, target_dirpath: Path, args) -> Path:
+        s3 = self.get_s3_client(token)
+
+        product_download_path = self._s3_download(url, s3, str(target_dirpath))
+        return product_download_path.resolve()
 
+    def get_s3_client(self, token):
+        """
+        Returns an S3 client shared by all downloads of this downloader. Clients are thread-safe, so concurrent
+        downloads reuse the same client and its connection pool. A new client is created only when the DAAC S3
+        credentials are refreshed.
+        """
+        aws_creds = None
         if self.cfg["USE_DAAC_S3_CREDENTIALS"] is True:
             aws_creds = self.get_aws_creds(token)
             logger.debug(f"{self.get_aws_creds.cache_info()=}")
-            s3 = boto3.Session(aws_access_key_id=aws_creds['accessKeyId'],
-                               aws_secret_access_key=aws_creds['secretAccessKey'],
-                               aws_session_token=aws_creds['sessionToken'],
-                               region_name=AWS_REGION).client("s3")
-        else:
-            s3 = boto3.Session(region_name=AWS_REGION).client("s3")
 
-        product_download_path = self._s3_download(url, s3, str(target_dirpath))
-        return product_download_path.resolve()
+        with self._s3_client_lock:
+            if self._s3_client is None or aws_creds != self._s3_client_credentials:
+                if aws_creds:
+                    session = boto3.Session(aws_access_key_id=aws_creds['accessKeyId'],
+                                            aws_secret_access_key=aws_creds['secretAccessKey'],
+                                            aws_session_token=aws_creds['sessionToken'],
+                                            region_name=AWS_REGION)
+                else:
+                    session = boto3.Session(region_name=AWS_REGION)
+
+                self._s3_client = session.client("s3", config=Config(max_pool_connections=DOWNLOAD_MAX_WORKERS))
+                self._s3_client_credentials = aws_creds
+
+            return self._s3_client
 
     @backoff.on_exception(backoff.expo, exception=Exception, max_tries=3, jitter=None)
     def _handle_url_redirect(self, url, token):
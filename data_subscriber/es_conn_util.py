@@ -3,6 +3,8 @@ from elasticsearch import RequestsHttpConnection
 from hysds.celery import app
 from hysds_commons.elasticsearch_utils import ElasticsearchUtility
 
+from util.es_util import MAX_SCAN_SLICES, get_scan_slice_count, sliced_scan  # noqa: F401 (re-exported)
+
 CONN = None
 
 
@@ -2,8 +2,10 @@ import boto3
 import logging
 import os
 
-from geo.geo_util import does_bbox_intersect_region
-from util.conf_util import SettingsConf
+import numpy as np
+
+from geo.geo_util import do_bboxes_intersect_region, does_bbox_intersect_region
+from util.conf_util import get_settings_conf
 
 def localize_include_exclude(args):
 
@@ -17,7 +19,7 @@ def localize_include_exclude(args):
     localize_geojsons(geojsons)
 
 def localize_geojsons(geojsons):
-    settings = SettingsConf().cfg
+    settings = get_settings_conf().cfg
     bucket = settings["GEOJSON_BUCKET"]
 
     # First try to get the geojsons from the official S3 location. If not found, try to use one in the current working directory
@@ -43,28 +45,43 @@ def does_granule_intersect_regions(granule, intersect_regions):
 
     return False, None
 
+def first_intersecting_regions(granules, intersect_regions) -> list:
+    """Returns, for each granule, the first of the comma-separated regions its bounding box intersects, or None.
+    Each region is tested against all granules at once."""
+    bboxes = [granule["bounding_box"] for granule in granules]
+    intersecting_regions = [None] * len(granules)
+    for region in intersect_regions.split(','):
+        region = region.strip()
+        for i in np.flatnonzero(do_bboxes_intersect_region(bboxes, region)):
+            if intersecting_regions[i] is None:
+                intersecting_regions[i] = region
+
+    return intersecting_regions
+
 def filter_granules_by_regions(granules, include_regions, exclude_regions):
     '''Filters granules based on include and exclude regions lists'''
+    if not granules:
+        return []
+
+    include_intersections = first_intersecting_regions(granules, include_regions) if include_regions is not None else None
+    exclude_intersections = first_intersecting_regions(granules, exclude_regions) if exclude_regions is not None else None
+
     filtered = []
 
-    for granule in granules:
+    for i, granule in enumerate(granules):
 
         # Skip this granule if it's not in the include list
-        if include_regions is not None:
-            (result, region) = does_granule_intersect_regions(granule, include_regions)
-            if result is False:
-                logging.info(
-                    f"The following granule does not intersect with any include regions. Skipping processing %s"
-                    % granule.get("granule_id"))
-                continue
+        if include_intersections is not None and include_intersections[i] is None:
+            logging.info(
+                f"The following granule does not intersect with any include regions. Skipping processing %s"
+                % granule.get("granule_id"))
+            continue
 
         # Skip this granule if it's in the exclude list
-        if exclude_regions is not None:
-            (result, region) = does_granule_intersect_regions(granule, exclude_regions)
-            if result is True:
-                logging.info(f"The following granule intersects with the exclude region %s. Skipping processing %s"
-                             % (region, granule.get("granule_id")))
-                continue
+        if exclude_intersections is not None and exclude_intersections[i] is not None:
+            logging.info(f"The following granule intersects with the exclude region %s. Skipping processing %s"
+                         % (exclude_intersections[i], granule.get("granule_id")))
+            continue
 
         # If both filters don't apply, add this granule to the list
         filtered.append(granule)
@@ -1,25 +1,28 @@
 import argparse
-import asyncio
+import concurrent.futures
 import logging
+import os
 import shutil
 import sys
+import threading
 from collections import namedtuple, defaultdict
 from datetime import datetime, timezone
 from functools import partial
 from pathlib import Path, PurePath
+from typing import Optional
 
 import backoff
 import boto3
 import dateutil.parser
 import dateutil.parser
 from hysds_commons.job_utils import submit_mozart_job
-from more_itertools import chunked, partition
 from mypy_boto3_s3 import S3Client
 
 from commons.logger import NoJobUtilsFilter, NoBaseFilter
 from tools import stage_ionosphere_file
 from tools.stage_ionosphere_file import IonosphereFileNotFoundException
 from util import grq_client as grq_client, job_util
+from util.aws_util import split_s3_url
 from util.exec_util import exec_wrapper
 from util.grq_client import try_update_slc_dataset_with_ionosphere_metadata
 
@@ -35,10 +38,10 @@ def main():
     logger_elasticsearch = logging.getLogger("elasticsearch")
     logger_elasticsearch.addFilter(NoBaseFilter())
 
-    asyncio.run(run(sys.argv))
+    run(sys.argv)
 
 
-async def run(argv: list[str]):
+def run(argv: list[str]):
     logger.info(f"{argv=}")
     parser = create_parser()
     args = parser.parse_args(argv[1:])
@@ -46,71 +49,43 @@ async def run(argv: list[str]):
     results = defaultdict(list)
     exceptions = []
 
-    slc_datasets = get_pending_slc_datasets(args)
-    logger.info(f"{len(slc_datasets)=}")
-
     logger.info("Creating directories to process products")
     downloads_dir = Path("downloads")  # house all file downloads
     downloads_dir.mkdir(exist_ok=True)
 
-    for i, slc_dataset in enumerate(slc_datasets, start=1):
-        db_id = slc_dataset["_id"]
-        product_id = slc_dataset["_source"]["metadata"]["id"]
-        logger.info(f"Processing {product_id=}. {i} of {len(slc_datasets)} products")
-        dataset_dir = downloads_dir / product_id
+    ionosphere_cache = IonosphereDayCache(downloads_dir / "ionosphere")
+    s3_client: S3Client = boto3.client("s3")
 
-        try:
-            dataset_dir.mkdir(exist_ok=True)
-
-            if not slc_dataset["_source"]["metadata"].get("intersects_north_america"):
-                logger.info("dataset doesn't cover North America. Skipping.")
-                continue
-
-            if not slc_dataset["_source"]["metadata"].get("processing_mode") == "forward":
-                logger.info("dataset not captured in forward processing mode. Skipping.")
-                continue
-
-            if slc_dataset["_source"]["metadata"].get("intersects_north_america") \
-                    and slc_dataset["_source"]["metadata"].get("processing_mode") == "forward":
-
-                logger.info("Downloading ionosphere correction file")
-                try:
-                    output_ionosphere_filepath = download_ionosphere_correction_file(dataset_dir, product_id)
-                except IonosphereFileNotFoundException:
-                    logger.info("Couldn't find an ionosphere correction file. Skipping to next SLC dataset.")
-                    continue
-                ionosphere_url = get_ionosphere_correction_file_url(dataset_dir, product_id)
-                logger.info(f"{output_ionosphere_filepath=}")
-                logger.info(f"{ionosphere_url=}")
-
-                slc_dataset_s3_url: str = next(iter(filter(lambda url: url.startswith("s3"), slc_dataset["_source"]["browse_urls"])))
-                logger.info(f"{slc_dataset_s3_url=}")
-
-                s3_bucket, s3_key = try_s3_upload_file(slc_dataset_s3_url, output_ionosphere_filepath)
-
-                job_submission_results = await submit_cslc_jobs([slc_dataset], args)
-
-                if job_submission_results["success"]:
-                    results["success"].extend(job_submission_results["success"])
-                elif job_submission_results["fail"]:
-                    results["fail"].extend(job_submission_results["fail"])
-                else:
-                    pass
-
-                if job_submission_results["fail"]:
-                    logger.info(f"Job submission failure result for {product_id=}. Collecting exception result. Skipping to next SLC dataset.")
-                    exceptions.extend(job_submission_results["fail"])
-                    continue
-
-                ionosphere_metadata = generate_ionosphere_metadata(output_ionosphere_filepath, ionosphere_url, s3_bucket, s3_key)
-                try_update_slc_dataset_with_ionosphere_metadata(index=slc_dataset["_index"], product_id=db_id, ionosphere_metadata=ionosphere_metadata)
-        except Exception as e:
-            logger.info(f"An exception occurred while processing {product_id=}. Collecting exception. Skipping to next SLC dataset.")
-            exceptions.append(e)
+    # Stream the pending datasets, processing each as soon as its page arrives. Bound the number of datasets in flight,
+    # so that at most a page or so of them is held in memory, no matter how long the backlog is.
+    slc_datasets = filter(is_pending_ionosphere_download, get_pending_slc_datasets(args))
+
+    max_workers = min(8, os.cpu_count() + 4)
+    sem = threading.Semaphore(max_workers * 2)
+    product_id_futures = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for slc_dataset in slc_datasets:
+            sem.acquire()
+            future = executor.submit(
+                partial(process_slc_dataset, slc_dataset, args=args, ionosphere_cache=ionosphere_cache, s3_client=s3_client)
+            )
+            future.add_done_callback(lambda _: sem.release())
+            product_id_futures.append((slc_dataset["_source"]["metadata"]["id"], future))
+    logger.info(f"Processed {len(product_id_futures)} SLC datasets covering North America in forward processing mode")
+
+    for product_id, future in product_id_futures:
+        task_result = future.exception() or future.result()
+        if task_result is None:
+            continue
+        if isinstance(task_result, Exception):
+            logger.info(f"An exception occurred while processing {product_id=}. Collecting exception.")
+            if isinstance(task_result, JobSubmissionException):
+                results["fail"].append(task_result.__cause__)
+                exceptions.append(task_result.__cause__)
+            else:
+                exceptions.append(task_result)
             continue
-        finally:
-            logger.info(f"Removing {dataset_dir=}")
-            shutil.rmtree(dataset_dir)
+        results["success"].append(task_result)
 
     if exceptions:
         logger.error(f"During job execution, {len(exceptions)} exceptions occurred. Wrapping and raising.")
@@ -126,6 +101,115 @@ async def run(argv: list[str]):
     return results
 
 
+def is_pending_ionosphere_download(slc_dataset) -> bool:
+    product_id = slc_dataset["_source"]["metadata"]["id"]
+
+    if not slc_dataset["_source"]["metadata"].get("intersects_north_america"):
+        logger.info(f"{product_id=} doesn't cover North America. Skipping.")
+        return False
+
+    if not slc_dataset["_source"]["metadata"].get("processing_mode") == "forward":
+        logger.info(f"{product_id=} not captured in forward processing mode. Skipping.")
+        return False
+
+    return True
+
+
+class JobSubmissionException(Exception):
+    """Raised (from the underlying error) when the CSLC job of an SLC dataset could not be submitted"""
+    pass
+
+
+def process_slc_dataset(slc_dataset, *, args, ionosphere_cache: "IonosphereDayCache", s3_client: S3Client) -> Optional[str]:
+    """
+    Stages the ionosphere correction file of the given SLC dataset next to it in S3, submits its CSLC job and records
+    the ionosphere metadata on the dataset.
+
+    :return: the submitted CSLC job ID, or None if no ionosphere correction file is available for the dataset yet.
+    """
+    db_id = slc_dataset["_id"]
+    product_id = slc_dataset["_source"]["metadata"]["id"]
+    logger.info(f"Processing {product_id=}")
+
+    try:
+        output_ionosphere_filepath, ionosphere_url = ionosphere_cache.get(product_id)
+    except IonosphereFileNotFoundException:
+        logger.info(f"Couldn't find an ionosphere correction file for {product_id=}. Skipping.")
+        return None
+    logger.info(f"{output_ionosphere_filepath=}")
+    logger.info(f"{ionosphere_url=}")
+
+    slc_dataset_s3_url: str = next(iter(filter(lambda url: url.startswith("s3"), slc_dataset["_source"]["urls"])))
+    logger.info(f"{slc_dataset_s3_url=}")
+
+    s3_bucket, s3_key = ionosphere_cache.upload(product_id, slc_dataset_s3_url, s3_client=s3_client)
+
+    try:
+        cslc_job_id = submit_cslc_job_helper(release_version=args.release_version, product=slc_dataset)
+    except Exception as e:
+        logger.info(f"Job submission failure result for {product_id=}.")
+        raise JobSubmissionException(product_id) from e
+
+    ionosphere_metadata = generate_ionosphere_metadata(output_ionosphere_filepath, ionosphere_url, s3_bucket, s3_key)
+    try_update_slc_dataset_with_ionosphere_metadata(index=slc_dataset["_index"], product_id=db_id, ionosphere_metadata=ionosphere_metadata)
+
+    return cslc_job_id
+
+
+class IonosphereDayCache:
+    """
+    Day-keyed cache of ionosphere correction files.
+
+    Ionosphere correction files cover a whole day, so every SLC acquired on the same day shares one file. The file of
+    each day is resolved at most once, into `cache_dir`, by a shared IonosphereResolver, no matter how many threads ask
+    for it. Likewise, it is uploaded to S3 once and server-side copied next to every other SLC of that day.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.resolver = stage_ionosphere_file.IonosphereResolver(output_directory=str(cache_dir))
+        self._lock = threading.Lock()
+        self._day_locks: dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._s3_sources: dict[str, dict] = {}
+
+    @staticmethod
+    def day_key(product_id: str) -> str:
+        """Returns the day (YYYYMMDD) of the ionosphere correction file that applies to the given SLC or CSLC product"""
+        return stage_ionosphere_file.parse_start_date_from_archive(product_id)
+
+    def _day_lock(self, day: str) -> threading.Lock:
+        with self._lock:
+            return self._day_locks[day]
+
+    def get(self, product_id: str) -> tuple[PurePath, str]:
+        """
+        Returns the local path and source URL of the ionosphere correction file for the given product, downloading it
+        if it is not cached yet.
+
+        :raises IonosphereFileNotFoundException: if no ionosphere correction file is available for the product's day.
+        """
+        output_ionosphere_filepath = PurePath(self.resolver.resolve(product_id))
+        return output_ionosphere_filepath, self.resolver.source_url(product_id)
+
+    def upload(self, product_id: str, slc_dataset_s3_url: str, s3_client: S3Client) -> tuple[str, str]:
+        """
+        Stages the ionosphere correction file for the given product next to the product's dataset in S3. The first
+        product of a day uploads the file, later ones copy it server-side.
+        """
+        day = self.day_key(product_id)
+        output_ionosphere_filepath, _ = self.get(product_id)
+
+        with self._day_lock(day):
+            copy_source = self._s3_sources.get(day)
+            if copy_source is None:
+                s3_bucket, s3_key = try_s3_upload_file(slc_dataset_s3_url, output_ionosphere_filepath, s3_client=s3_client)
+                self._s3_sources[day] = {"Bucket": s3_bucket, "Key": f"{s3_key}/{output_ionosphere_filepath.name}"}
+                return s3_bucket, s3_key
+
+        return try_s3_upload_file(slc_dataset_s3_url, output_ionosphere_filepath, s3_client=s3_client, copy_source=copy_source)
+
+
 def generate_ionosphere_metadata(output_ionosphere_filepath, ionosphere_url, s3_bucket, s3_key):
     ionosphere_metadata = {
         "ionosphere": {
@@ -144,12 +228,17 @@ def generate_ionosphere_metadata(output_ionosphere_filepath, ionosphere_url, s3_
 
 
 @backoff.on_exception(backoff.expo, exception=Exception, max_tries=3, jitter=None)
-def try_s3_upload_file(slc_dataset_s3_url, output_ionosphere_filepath):
-    s3_uri_tokens = slc_dataset_s3_url.split('/')
-    s3_bucket = s3_uri_tokens[3]
-    s3_key = '/'.join(s3_uri_tokens[5:])  # skip redundant `/browse/` fragment at index 4
-    s3_client: S3Client = boto3.client("s3")
-    s3_client.upload_file(Filename=str(output_ionosphere_filepath), Bucket=s3_bucket, Key=f"{s3_key}/{output_ionosphere_filepath.name}")
+def try_s3_upload_file(slc_dataset_s3_url, output_ionosphere_filepath, s3_client: S3Client = None, copy_source: dict = None):
+    """
+    Uploads the ionosphere file next to the given SLC dataset in S3. When `copy_source` (a dict with "Bucket" and "Key")
+    refers to an identical, already uploaded file, that object is copied server-side instead.
+    """
+    s3_bucket, s3_key = split_s3_url(slc_dataset_s3_url)
+    s3_client: S3Client = s3_client or boto3.client("s3")
+    if copy_source:
+        s3_client.copy_object(CopySource=copy_source, Bucket=s3_bucket, Key=f"{s3_key}/{output_ionosphere_filepath.name}")
+    else:
+        s3_client.upload_file(Filename=str(output_ionosphere_filepath), Bucket=s3_bucket, Key=f"{s3_key}/{output_ionosphere_filepath.name}")
     return s3_bucket, s3_key
 
 
@@ -157,57 +246,13 @@ def get_pending_slc_datasets(args):
     slc_dataset_timerange = get_arg_timerange(args)
     slc_datasets = grq_client.get_slc_datasets_without_ionosphere_data(
         dateutil.parser.isoparse(slc_dataset_timerange.start_date),
-        dateutil.parser.isoparse(slc_dataset_timerange.end_date)
+        dateutil.parser.isoparse(slc_dataset_timerange.end_date),
+        page_size=args.page_size,
+        scroll=args.scroll_keep_alive
     )
     return slc_datasets
 
 
-async def submit_cslc_jobs(products, args):
-    job_submission_tasks = _create_job_submission_tasks(args, products)
-    job_submission_task_results = await _execute_job_submission_tasks(job_submission_tasks)
-
-    logger.info(f"{len(job_submission_task_results)=}")
-    logger.debug(f"{job_submission_task_results=}")
-
-    task_successes, task_failures = partition(lambda it: isinstance(it, Exception), job_submission_task_results)
-    cslc_job_ids = list(task_successes)
-    task_exceptions = list(task_failures)
-
-    results = {
-        "success": cslc_job_ids,
-        "fail": task_exceptions
-    }
-    return results
-
-
-async def _execute_job_submission_tasks(job_submission_tasks):
-    job_submission_task_results = []
-    task_chunks = list(chunked(job_submission_tasks, 1))
-    for i, task_chunk in enumerate(task_chunks, start=1):  # CMR recommends 2-5 threads.
-        logger.info(f"Processing batch {i} of {len(task_chunks)}")
-        task_results = await asyncio.gather(*task_chunk, return_exceptions=True)
-        job_submission_task_results.extend(task_results)
-
-    return job_submission_task_results
-
-
-def _create_job_submission_tasks(args, products):
-    job_submission_tasks = []
-    for product in products:
-        job_submission_tasks.append(_create_job_submission_task(args, product))
-
-    return job_submission_tasks
-
-
-def _create_job_submission_task(args, product):
-    logger.info(f'Creating CSLC job submission task for {product["_id"]=}')
-    loop = asyncio.get_event_loop()
-    job_submission_task = loop.run_in_executor(
-        executor=None,
-        func=partial(submit_cslc_job_helper, release_version=args.release_version, product=product))
-    return job_submission_task
-
-
 def submit_cslc_job_helper(*, release_version=None, product: dict) -> str:
     return _try_submit_mozart_job_minimal(release_version=release_version, product=product)
 
@@ -258,7 +303,20 @@ def create_parser():
                        "kwargs": {"dest": "release_version",
                                   "help": "The release version of the CSLC job-spec."}}
 
-    parser_arg_list = [start_date, end_date, release_version]
+    page_size = {"positionals": ["--page-size"],
+                 "kwargs": {"dest": "page_size",
+                            "type": int,
+                            "default": grq_client.DEFAULT_SCAN_PAGE_SIZE,
+                            "help": "The number of SLC datasets fetched from GRQ per request."}}
+
+    scroll_keep_alive = {"positionals": ["--scroll-keep-alive"],
+                         "kwargs": {"dest": "scroll_keep_alive",
+                                    "default": grq_client.DEFAULT_SCROLL_KEEP_ALIVE,
+                                    "help": "How long GRQ keeps the SLC dataset scroll alive between requests, as an "
+                                            "Elasticsearch time unit. Must cover the time taken to process a page of "
+                                            "--page-size datasets. For Example, --scroll-keep-alive 30m"}}
+
+    parser_arg_list = [start_date, end_date, release_version, page_size, scroll_keep_alive]
     _add_arguments(parser, parser_arg_list)
 
     return parser
@@ -1,3 +1,4 @@
+import concurrent.futures
 import itertools
 import logging
 import json
@@ -6,12 +7,13 @@ from pathlib import PurePath, Path
 from collections import defaultdict
 import shutil
 import requests
+import requests.adapters
 import requests.utils
 from datetime import datetime
 from product2dataset import product2dataset
 from data_subscriber.url import _to_batch_id, _to_orbit_number, _has_url, _to_urls, _to_https_urls, form_batch_id
 
-from data_subscriber.download import DaacDownload
+from data_subscriber.download import DaacDownload, DOWNLOAD_MAX_WORKERS
 
 logger = logging.getLogger(__name__)
 
@@ -54,37 +56,50 @@ class DaacDownloadLpdaac(DaacDownload):
         if args.smoke_run:
             download_map = dict(itertools.islice(download_map.items(), 1))
 
-        # One HLSDownload object contains multiple es_id and url pairs
-        for key, downloads in download_map.items():
-            logger.info(f"Processing {key=}")
-
-            granule_download_dir = self.downloads_dir / key
-            granule_download_dir.mkdir(exist_ok=True)
-
-            # download products in granule
-            products = []
-            product_urls_downloaded = []
-            for download in downloads.es_ids_urls:
-                product_url = download[1]
-                if args.dry_run:
-                    logger.info(f"{args.dry_run=}. Skipping download.")
-                    break
-                product_filepath = self.download_product(product_url, session, token, args, granule_download_dir)
-                products.append(product_filepath)
-                product_urls_downloaded.append(product_url)
-
-                # Mark as downloaded
-                es_id = download[0]
-                es_conn.mark_product_as_downloaded(es_id, job_id)
-            logger.info(f"{products=}")
-
-
-            logger.info(f"{len(product_urls_downloaded)=}, {product_urls_downloaded=}")
-
-            self.extract_many_to_one(products, key, self.cfg)
-
-            logger.info(f"Removing directory {granule_download_dir}")
-            shutil.rmtree(granule_download_dir)
+        if args.dry_run:
+            logger.info(f"{args.dry_run=}. Skipping download.")
+            return
+
+        # Size the session's connection pool for the concurrent band downloads
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=DOWNLOAD_MAX_WORKERS)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        # Bands of all granules share one bounded pool of download workers. Granules are extracted, one at a time and
+        # in order, as soon as all of their bands are downloaded, so extraction overlaps the remaining downloads.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=DOWNLOAD_MAX_WORKERS) as executor:
+            key_to_futures = {}
+            for key, downloads in download_map.items():
+                granule_download_dir = self.downloads_dir / key
+                granule_download_dir.mkdir(exist_ok=True)
+
+                key_to_futures[key] = [
+                    executor.submit(self.download_product, product_url, session, token, args, granule_download_dir)
+                    for _, product_url in downloads.es_ids_urls
+                ]
+
+            try:
+                # One HLSDownload object contains multiple es_id and url pairs
+                for key, downloads in download_map.items():
+                    logger.info(f"Processing {key=}")
+
+                    # download products in granule
+                    products = [future.result() for future in key_to_futures[key]]
+                    product_urls_downloaded = [product_url for _, product_url in downloads.es_ids_urls]
+                    logger.info(f"{products=}")
+                    logger.info(f"{len(product_urls_downloaded)=}, {product_urls_downloaded=}")
+
+                    # Mark as downloaded
+                    es_conn.mark_products_as_downloaded([es_id for es_id, _ in downloads.es_ids_urls], job_id)
+
+                    self.extract_many_to_one(products, key, self.cfg)
+
+                    granule_download_dir = self.downloads_dir / key
+                    logger.info(f"Removing directory {granule_download_dir}")
+                    shutil.rmtree(granule_download_dir)
+            except BaseException:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
 
 
     def download_product(self, product_url, session, token: str, args, target_dirpath: Path):
@@ -22,7 +22,8 @@ from data_subscriber.cslc_utils import (split_download_batch_id, save_pending_do
                                         ecmwf_satisfied, parse_cslc_file_name)
 from data_subscriber.url import form_batch_id, _slc_url_to_chunk_id
 from hysds_commons.job_utils import submit_mozart_job
-from util.conf_util import SettingsConf
+from util.conf_util import get_settings_conf
+from util.ecmwf_util import DEFAULT_ECMWF_S3_PREFIX
 
 logger = logging.getLogger(__name__)
 
@@ -294,7 +295,7 @@ class CmrQuery:
                 if not cslc_dependency.compressed_cslc_satisfied(frame_id, acq_indices[0], self.es_conn.es_util):
                     logger.info(f"Not all compressed CSLCs are satisfied so this download job is in pending state until they are satisfied")
                     block_download = True
-                if not ecmwf_satisfied(acq_time_list):
+                if not ecmwf_satisfied(acq_time_list, self.settings.get("ECMWF_S3_PREFIX", DEFAULT_ECMWF_S3_PREFIX)):
                     logger.info(f"Not all ECMWF data is satisfied so this download job is in pending state until they are satisfied")
                     block_download = True
 
@@ -463,7 +464,7 @@ def get_query_timerange(args, now: datetime, silent=False):
     return query_timerange
 
 def process_frame_burst_db():
-    settings = SettingsConf().cfg
+    settings = get_settings_conf().cfg
     bucket = settings["GEOJSON_BUCKET"]
 
     try:
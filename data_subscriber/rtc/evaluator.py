@@ -63,14 +63,14 @@ def main(
         # query 1: query for unsubmitted docs
         body = get_body(match_all=False)
         body["query"]["bool"]["must_not"].append({"exists": {"field": "download_job_ids"}})
-        unsubmitted_docs = grq_es.query(body=body, index=RTCProductCatalog.ES_INDEX_PATTERNS)
+        unsubmitted_docs = list(es_conn_util.sliced_scan(grq_es.es, body=body, index=RTCProductCatalog.ES_INDEX_PATTERNS))
         logger.info(f"Found {len(unsubmitted_docs)=}")
 
         # query 2: query for submitted but not 100%
         body = get_body(match_all=False)
         body["query"]["bool"]["must"].append({"exists": {"field": "download_job_ids"}})
         body["query"]["bool"]["must"].append({"range": {"coverage": {"gte": 0, "lt": 100}}})
-        submitted_but_incomplete_docs = grq_es.query(body=body, index=RTCProductCatalog.ES_INDEX_PATTERNS)
+        submitted_but_incomplete_docs = list(es_conn_util.sliced_scan(grq_es.es, body=body, index=RTCProductCatalog.ES_INDEX_PATTERNS))
         logger.info(f"Found {len(submitted_but_incomplete_docs)=}")
 
         es_docs = unsubmitted_docs + submitted_but_incomplete_docs
@@ -18,7 +18,6 @@ from data_subscriber.rtc import mgrs_bursts_collection_db_client as mbc_client,
 from data_subscriber.rtc.rtc_catalog import RTCProductCatalog
 from data_subscriber.rtc.rtc_download_job_submitter import submit_rtc_download_job_submissions_tasks
 from data_subscriber.url import determine_acquisition_cycle
-from geo.geo_util import does_bbox_intersect_region
 from rtc_utils import rtc_granule_regex
 
 logger = logging.getLogger(__name__)
@@ -289,16 +288,6 @@ def update_granule_index(es_spatial_conn, granule, *args, **kwargs):
     es_spatial_conn.process_granule(granule, *args, **kwargs)
 
 
-def does_granule_intersect_regions(granule, intersect_regions):
-    regions = intersect_regions.split(',')
-    for region in regions:
-        region = region.strip()
-        if does_bbox_intersect_region(granule["bounding_box"], region):
-            return True, region
-
-    return False, None
-
-
 def filter_granules_rtc(granules, args):
     logger.info("Applying land/water filter on CMR granules")
 
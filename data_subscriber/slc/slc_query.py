@@ -4,7 +4,7 @@ import logging
 from data_subscriber.geojson_utils import localize_geojsons
 from data_subscriber.query import CmrQuery
 from data_subscriber.slc.slc_catalog import SLCSpatialProductCatalog
-from geo.geo_util import _NORTH_AMERICA, does_bbox_intersect_north_america
+from geo.geo_util import _NORTH_AMERICA, do_bboxes_intersect_region, does_bbox_intersect_north_america
 
 logger = logging.getLogger(__name__)
 
@@ -15,14 +15,28 @@ class SlcCmrQuery(CmrQuery):
 
         # For SLC downloads we need to mark whether the granule intersects with North America
         localize_geojsons([_NORTH_AMERICA])
+        self.granule_id_to_intersects_north_america = {}
 
     def update_granule_index(self, granule):
         spatial_catalog_conn = SLCSpatialProductCatalog(logger)
         spatial_catalog_conn.process_granule(granule)
 
+    def catalog_granules(self, granules, query_dt, force_es_conn = None):
+        # Test the whole page of granules against North America at once, rather than one granule at a time
+        intersects_north_america = do_bboxes_intersect_region([granule["bounding_box"] for granule in granules], _NORTH_AMERICA)
+        self.granule_id_to_intersects_north_america = {
+            granule["granule_id"]: bool(intersects)
+            for granule, intersects in zip(granules, intersects_north_america)
+        }
+
+        super().catalog_granules(granules, query_dt, force_es_conn)
+
     def prepare_additional_fields(self, granule, args, granule_id):
         additional_fields = super().prepare_additional_fields(granule, args, granule_id)
-        if does_bbox_intersect_north_america(granule["bounding_box"]):
+        intersects_north_america = self.granule_id_to_intersects_north_america.get(granule_id)
+        if intersects_north_america is None:
+            intersects_north_america = does_bbox_intersect_north_america(granule["bounding_box"])
+        if intersects_north_america:
             additional_fields["intersects_north_america"] = True
 
         return additional_fields
@@ -16,6 +16,7 @@ from data_subscriber import es_conn_util
 from cslc_utils import (get_pending_download_jobs, localize_disp_frame_burst_hist, mark_pending_download_job_submitted,
                         CSLCDependency, ecmwf_satisfied)
 from data_subscriber.cslc.cslc_catalog import CSLCProductCatalog
+from util.ecmwf_util import DEFAULT_ECMWF_S3_PREFIX
 
 
 from util.exec_util import exec_wrapper
@@ -60,7 +61,7 @@ def condition_satisfied(job_source, es, disp_burst_map, query_args, token, cmr,
 
     if "acq_time_list" in job_source:
         logger.info("Evaluating ECMWF availability")
-        if ecmwf_satisfied(job_source['acq_time_list']):
+        if ecmwf_satisfied(job_source['acq_time_list'], settings.get("ECMWF_S3_PREFIX", DEFAULT_ECMWF_S3_PREFIX)):
             logger.info("ECMWF satisfied for frame_id: %s, acq_index: %s", frame_id, acq_index)
         else:
             logger.info("ECMWF NOT satisfied for frame_id: %s, acq_index: %s", frame_id, acq_index)
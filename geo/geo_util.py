@@ -2,9 +2,11 @@ import json
 import logging
 from functools import cache
 from pathlib import Path
-from typing import TypedDict
+from typing import Sequence, TypedDict
 
-from osgeo import ogr
+import numpy as np
+import shapely
+import shapely.geometry
 
 logger = logging.getLogger(__name__)
 
@@ -53,29 +55,64 @@ def does_bbox_intersect_region(bbox: list[Coordinate], region) -> bool:
     """
     logger.info(f"{bbox=}")
 
-    bbox_ring = ogr.Geometry(ogr.wkbLinearRing)
-    for coordinate in bbox:
-        bbox_ring.AddPoint(coordinate["lon"], coordinate["lat"])
-    bbox_poly = ogr.Geometry(ogr.wkbPolygon)
-    bbox_poly.AddGeometry(bbox_ring)
-
-    na_geom = _load_region_opera_geometry_collection(region)
-
-    is_bbox_in_region = na_geom.Intersects(bbox_poly)
+    is_bbox_in_region = bool(get_region_index(region).intersects([bbox])[0])
     logger.info(f"{is_bbox_in_region=}")
     return is_bbox_in_region
 
 
-@cache
-def _load_region_opera_geometry_collection(region) -> ogr.Geometry:
-    region_opera_geojson = _cached_load_region_opera_geojson(region)
+def do_bboxes_intersect_region(bboxes: Sequence[list[Coordinate]], region) -> np.ndarray:
+    """
+    Vectorized form of `does_bbox_intersect_region`. Check which of many bboxes (e.g. a page of CMR granules) intersect
+    a particular region defined by a geojson file.
+
+    :param bboxes: a sequence of bboxes, each a list of coordinate dicts.
+           region: string name of the geojson file without the extension
+    :return: a boolean mask, aligned with `bboxes`, that is True where the bbox intersects the region.
+    """
+    return get_region_index(region).intersects(bboxes)
+
+
+class RegionIndex:
+    """
+    A spatial index over the features of a region geojson file.
+
+    Feature geometries are parsed once, prepared, and bulk-loaded into an STRtree. Bboxes are tested a page at a time:
+    the tree narrows each bbox down to the features whose envelopes it overlaps, and only those candidate pairs are
+    tested exactly against the prepared feature geometries.
+    """
+
+    def __init__(self, region_geojson: dict):
+        self.geometries = np.array(
+            [shapely.geometry.shape(feature["geometry"]) for feature in region_geojson["features"]], dtype=object
+        )
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+
+    def intersects(self, bboxes: Sequence[list[Coordinate]]) -> np.ndarray:
+        """Returns a boolean mask, aligned with `bboxes`, that is True where the bbox intersects any feature."""
+        mask = np.zeros(len(bboxes), dtype=bool)
+        if not len(bboxes):
+            return mask
 
-    na_geoms = ogr.Geometry(ogr.wkbGeometryCollection)
-    for feature in region_opera_geojson["features"]:
-        na_geoms.AddGeometry(ogr.CreateGeometryFromJson(json.dumps(feature["geometry"])))
+        bbox_polygons = _bboxes_to_polygons(bboxes)
+        bbox_idxs, feature_idxs = self.tree.query(bbox_polygons)
+        hits = shapely.intersects(self.geometries[feature_idxs], bbox_polygons[bbox_idxs])
+        mask[bbox_idxs[hits]] = True
+        return mask
 
-    logger.info("Loaded geojson as osgeo GeometryCollection")
-    return na_geoms
+
+def _bboxes_to_polygons(bboxes: Sequence[list[Coordinate]]) -> np.ndarray:
+    """Builds one polygon per bbox in a single vectorized call. Rings are closed automatically when needed."""
+    coords = np.array([(coordinate["lon"], coordinate["lat"]) for bbox in bboxes for coordinate in bbox], dtype=float)
+    ring_idxs = np.repeat(np.arange(len(bboxes)), [len(bbox) for bbox in bboxes])
+    return shapely.polygons(shapely.linearrings(coords, indices=ring_idxs))
+
+
+@cache
+def get_region_index(region) -> RegionIndex:
+    region_index = RegionIndex(_cached_load_region_opera_geojson(region))
+    logger.info(f"Loaded {region} geojson as a spatial index of {len(region_index.geometries)} features")
+    return region_index
 
 
 @cache
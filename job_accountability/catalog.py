@@ -1,5 +1,6 @@
 from datetime import datetime
 
+import elasticsearch.helpers
 from hysds_commons.elasticsearch_utils import ElasticsearchUtility
 
 REFREC_ID = "refrec_id"
@@ -29,14 +30,16 @@ class JobAccountabilityCatalog(ElasticsearchUtility):
 
     def post(self, records, header=None):
         """
-        Post records into ElasticSearch.
+        Post records into ElasticSearch with a single bulk request.
 
         :param records: A list of Pass Accountability records to ingest.
         :param header: Header information associated with the records.
         If present, they will get included with each record document posted.
-        :param index: Specify the index where the documents will get posted to.
-        :return:
+        :return: the number of records indexed.
+        :raises RuntimeError: if any record fails to index. Each failure is logged individually.
         """
+        index = generate_es_index_name()
+        operations = []
         for record in records:
             if header:
                 record[HEADER] = header
@@ -44,16 +47,20 @@ class JobAccountabilityCatalog(ElasticsearchUtility):
                 record[HEADER] = {}
             if self.logger:
                 self.logger.info("record: {}".format(record))
-            self.__post_to_es(record, generate_es_index_name())
+            operations.append({"_op_type": "index", "_index": index, "_id": record[REFREC_ID], "_source": record})
 
-    def __post_to_es(self, document, index):
-        """
-        Posts the given document to ElasticSearch.
+        if not operations:
+            return 0
 
-        :param document: The document to ingest.
-        :return:
-        """
-        _id = document[REFREC_ID]
-        result = self.index_document(index=index, id=_id, body=document)
+        success_count, errors = elasticsearch.helpers.bulk(self.es, operations, raise_on_error=False, raise_on_exception=False)
         if self.logger:
-            self.logger.info("document indexed: {}".format(result))
+            self.logger.info("documents indexed: {}".format(success_count))
+
+        if errors:
+            for error in errors:
+                if self.logger:
+                    self.logger.error("failed to index document: {}".format(error))
+            failed_ids = [next(iter(error.values())).get("_id") for error in errors]
+            raise RuntimeError("Failed to index {} of {} records: {}".format(len(errors), len(operations), failed_ids))
+
+        return success_count
@@ -6,6 +6,7 @@ from typing import Dict
 
 import backoff
 from chimera.commons.accountability import Accountability
+from more_itertools import chunked
 from chimera.logger import logger
 
 import job_accountability.catalog
@@ -13,7 +14,7 @@ from data_subscriber.es_conn_util import get_es_connection
 from opera_chimera.constants.opera_chimera_const import (
     OperaChimeraConstants as oc_const,
 )
-from util.conf_util import SettingsConf
+from util.conf_util import get_settings_conf
 
 grq_es = get_es_connection(logger)
 
@@ -34,7 +35,7 @@ def get_dataset(key, datasets_cfg):
 
 
 def get_dataset_type(file):
-    cfg = SettingsConf().cfg
+    cfg = get_settings_conf().cfg
     data_name = None
     for type, type_cfg in list(cfg["PRODUCT_TYPES"].items()):
         matched = type_cfg["Pattern"].match(file)
@@ -125,14 +126,22 @@ class OperaAccountability(Accountability):
             raise Exception("Unable to create job_accountability_catalog entry: {}".format(self.product_paths))
 
     def get_entries(self):
-        entries = []
-        for input_path in self.product_paths:
-            input = os.path.basename(input_path)
-            results = grq_es.query(body={
-                            "query": {"bool": {"must": [{"term": {"_id": input}}]}}
-                        }, index="grq")
-            entries.extend(results)
-        return entries
+        inputs = list(dict.fromkeys(os.path.basename(input_path) for input_path in self.product_paths))
+
+        # Batch requests for larger number of inputs
+        # see Elasticsearch documentation regarding "indices.query.bool.max_clause_count". Minimum is 1024
+        id_to_entries = {}
+        for inputs_chunk in chunked(inputs, 1024):
+            results = grq_es.query(body={"query": {"ids": {"values": inputs_chunk}}}, index="grq")
+            for result in results:
+                id_to_entries.setdefault(result["_id"], []).append(result)
+
+        missing_inputs = [input for input in inputs if input not in id_to_entries]
+        if missing_inputs:
+            logger.info(f"No GRQ entries found for {len(missing_inputs)} of {len(inputs)} inputs: {missing_inputs}")
+
+        # preserve input order so that merged accountability is deterministic
+        return [entry for input in inputs for entry in id_to_entries.get(input, [])]
 
     def flatten_and_merge_accountability(self):
         entries = self.get_entries()
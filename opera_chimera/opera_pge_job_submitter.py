@@ -13,6 +13,7 @@ from opera_chimera.constants.opera_chimera_const import (
     OperaChimeraConstants as oc_const,
 )
 
+from util.telemetry_util import get_job_telemetry
 from wrapper.opera_pge_wrapper import run_pipeline
 
 from hysds.utils import download_file, get_disk_usage, makedirs
@@ -77,48 +78,52 @@ class OperaPgeJobSubmitter(PgeJobSubmitter):
             pge_metrics = {"download": [], "upload": []}
             print('job_json["localize_urls"] : {}'.format(job_json["localize_urls"]))
 
-            for localize_url in job_json["localize_urls"]:
-                url = localize_url["url"]
-                path = localize_url.get("local_path", None)
-                if url.startswith("/"):
-                    if os.path.isfile(url):
-                        logger.info("{} already exists, not localizing".format(url))
-                        continue
-                if path is None:
-                    path = "%s/" % self._base_work_dir
-                else:
-                    if path.startswith("/"):
-                        pass
+            job_telemetry = get_job_telemetry()
+            with job_telemetry.stage("localize_urls", category="wrapper"):
+                for localize_url in job_json["localize_urls"]:
+                    url = localize_url["url"]
+                    path = localize_url.get("local_path", None)
+                    if url.startswith("/"):
+                        if os.path.isfile(url):
+                            logger.info("{} already exists, not localizing".format(url))
+                            continue
+                    if path is None:
+                        path = "%s/" % self._base_work_dir
                     else:
-                        path = os.path.join(self._base_work_dir, path)
-                if os.path.isdir(path) or path.endswith("/"):
-                    path = os.path.join(path, os.path.basename(url))
-                dir_path = os.path.dirname(path)
-                makedirs(dir_path)
-                logger.info("Localizing {}".format(url))
-                loc_t1 = datetime.utcnow()
-                try:
-                    download_file(url, path)
-                except Exception as e:
-                    trace = traceback.format_exc()
-                    error = str(e)
-                    raise RuntimeError(
-                        "Failed to download {}: {}\n{}".format(url, error, trace)
+                        if path.startswith("/"):
+                            pass
+                        else:
+                            path = os.path.join(self._base_work_dir, path)
+                    if os.path.isdir(path) or path.endswith("/"):
+                        path = os.path.join(path, os.path.basename(url))
+                    dir_path = os.path.dirname(path)
+                    makedirs(dir_path)
+                    logger.info("Localizing {}".format(url))
+                    loc_t1 = datetime.utcnow()
+                    try:
+                        download_file(url, path)
+                    except Exception as e:
+                        trace = traceback.format_exc()
+                        error = str(e)
+                        raise RuntimeError(
+                            "Failed to download {}: {}\n{}".format(url, error, trace)
+                        )
+                    loc_t2 = datetime.utcnow()
+                    loc_dur = (loc_t2 - loc_t1).total_seconds()
+                    path_disk_usage = get_disk_usage(path)
+                    job_telemetry.record_request("localize")
+                    job_telemetry.record_transfer(downloaded=path_disk_usage)
+                    pge_metrics["download"].append(
+                        {
+                            "url": url,
+                            "path": path,
+                            "disk_usage": path_disk_usage,
+                            "time_start": loc_t1.isoformat() + "Z",
+                            "time_end": loc_t2.isoformat() + "Z",
+                            "duration": loc_dur,
+                            "transfer_rate": path_disk_usage / loc_dur,
+                        }
                     )
-                loc_t2 = datetime.utcnow()
-                loc_dur = (loc_t2 - loc_t1).total_seconds()
-                path_disk_usage = get_disk_usage(path)
-                pge_metrics["download"].append(
-                    {
-                        "url": url,
-                        "path": path,
-                        "disk_usage": path_disk_usage,
-                        "time_start": loc_t1.isoformat() + "Z",
-                        "time_end": loc_t2.isoformat() + "Z",
-                        "duration": loc_dur,
-                        "transfer_rate": path_disk_usage / loc_dur,
-                    }
-                )
             old_pge_metrics = {}
             if os.path.exists(os.path.join(self._base_work_dir, "pge_metrics.json")):
                 with open(os.path.join(self._base_work_dir, "pge_metrics.json"), "r") as f:
@@ -0,0 +1,102 @@
+"""
+Dependency-aware, concurrent execution of PGE precondition functions.
+
+Precondition functions declare which other preconditions they depend on with the `depends_on` decorator. Those that
+declare no dependencies are assumed to only read the job context and PGE config, and may run concurrently with any
+other precondition. The result of each precondition is merged into the job parameters in the order the preconditions
+are listed in the PGE config, regardless of the order in which they finish.
+"""
+import concurrent.futures
+import logging
+import os
+from typing import Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+ALL_PRECEDING = "*"
+"""
+Dependency on every precondition listed before the decorated one. Such preconditions act as barriers: they run alone,
+after every preceding precondition has finished and before any following precondition starts.
+"""
+
+MAX_WORKERS = min(8, os.cpu_count() + 4)
+"""Maximum number of precondition functions run at the same time"""
+
+
+def depends_on(*function_names: str):
+    """
+    Declares the precondition functions whose results the decorated precondition function reads, e.g. from
+    `_job_params` or from files they stage. Pass ALL_PRECEDING to depend on every precondition listed before it.
+    """
+    def decorator(func):
+        func.precondition_dependencies = tuple(function_names)
+        return func
+
+    return decorator
+
+
+def get_dependencies(function_list: Sequence[str], get_function: Callable[[str], Callable]) -> list[set[int]]:
+    """
+    Returns the indices of the preconditions that each precondition in the list must wait for. Only dependencies listed
+    before a precondition are honored, as those are the only ones it would have seen when run one after another.
+    """
+    barriers = [
+        ALL_PRECEDING in getattr(get_function(function_name), "precondition_dependencies", ())
+        for function_name in function_list
+    ]
+
+    dependencies = []
+    for i, function_name in enumerate(function_list):
+        declared = getattr(get_function(function_name), "precondition_dependencies", ())
+        if barriers[i]:
+            dependencies.append(set(range(i)))
+            continue
+
+        dependencies.append({
+            j for j in range(i)
+            if function_list[j] in declared or barriers[j]
+        })
+
+    return dependencies
+
+
+def run_preconditions(function_list: Sequence[str], dependencies: list[set[int]], run_function: Callable[[str], dict],
+                      on_complete: Callable[[str, dict], None] = None, max_workers=MAX_WORKERS) -> list[dict]:
+    """
+    Runs the listed precondition functions with bounded concurrency, starting each one as soon as its dependencies
+    have finished, in list order. The first failure is raised once the functions already running have finished;
+    functions not yet started are skipped.
+
+    :param run_function: runs the named precondition function and returns its result.
+    :param on_complete: called from the calling thread with the name and result of each function as it finishes,
+    before any of its dependents start.
+    :return: the results of the functions, in list order.
+    """
+    results = {}
+    pending = list(range(len(function_list)))
+    running: dict[concurrent.futures.Future, int] = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            while pending or running:
+                for i in [i for i in pending if dependencies[i] <= results.keys()]:
+                    pending.remove(i)
+                    logger.debug(f"Starting precondition {function_list[i]}")
+                    running[executor.submit(run_function, function_list[i])] = i
+
+                if not running:
+                    raise RuntimeError(f"Unsatisfiable precondition dependencies: "
+                                       f"{[function_list[i] for i in pending]}")
+
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in sorted(done, key=running.get):
+                    i = running.pop(future)
+                    results[i] = future.result()
+                    if on_complete:
+                        on_complete(function_list[i], results[i])
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+
+    return [results[i] for i in range(len(function_list))]
@@ -15,8 +15,6 @@ from pathlib import PurePath
 from typing import Dict, List
 from urllib.parse import urlparse
 
-import boto3
-
 from chimera.precondition_functions import PreConditionFunctions
 from commons.constants import product_metadata
 from commons.logger import LogLevels
@@ -25,18 +23,23 @@ from data_subscriber.cslc_utils import parse_cslc_file_name, parse_compressed_cs
 from opera_chimera.constants.opera_chimera_const import (
     OperaChimeraConstants as oc_const,
 )
+from opera_chimera.precondition_executor import ALL_PRECEDING, depends_on, get_dependencies, run_preconditions
 from tools.stage_ancillary_map import main as stage_ancillary_map
 from tools.stage_dem import main as stage_dem
-from tools.stage_ionosphere_file import VALID_IONOSPHERE_TYPES
+from tools.stage_ionosphere_file import IONOSPHERE_TYPE_JPLG, IonosphereResolver
 from tools.stage_worldcover import main as stage_worldcover
 from util import datasets_json_util
+from util.aws_util import S3PrefixInventory
 from util.common_util import get_working_dir
-from util.ecmwf_util import check_s3_for_ecmwf, ecmwf_key_for_datetime
+from util.ecmwf_util import get_ecmwf_availability_index
 from util.geo_util import bounding_box_from_slc_granule
-from util.pge_util import (download_object_from_s3,
+from util.pge_util import (ANCILLARY_CACHE_DIRECTORY,
+                           download_object_from_s3,
                            get_disk_usage,
                            get_input_hls_dataset_tile_code,
+                           get_s3_client,
                            write_pge_metrics)
+from util.telemetry_util import get_job_telemetry, instrument_boto3
 
 
 class OperaPreConditionFunctions(PreConditionFunctions):
@@ -45,6 +48,52 @@ class OperaPreConditionFunctions(PreConditionFunctions):
             self, context, pge_config, settings, job_params
         )
 
+        # Listings of the S3 product locations, shared by all preconditions of this job
+        self._s3_inventory = S3PrefixInventory()
+
+    def run(self, function_list):
+        """
+        Runs the precondition functions concurrently where their declared
+        dependencies allow (see opera_chimera.precondition_executor), each as
+        its own telemetry stage, then writes the collected telemetry next to
+        pge_metrics.json. Results are merged into the job parameters in the
+        order the functions are listed.
+        """
+        job_telemetry = get_job_telemetry()
+        instrument_boto3()
+
+        # Create the shared S3 client up front, rather than racing to create it from several threads
+        get_s3_client()
+
+        job_params = self._job_params
+
+        def run_function(function_name):
+            with job_telemetry.stage(function_name, category="precondition"):
+                return getattr(self, function_name)()
+
+        def on_complete(function_name, rc_params):
+            # Rebind rather than update in place, so functions still running never see the dict change under them
+            self._job_params = {**self._job_params, **rc_params}
+
+        try:
+            results = run_preconditions(
+                function_list,
+                get_dependencies(function_list, lambda function_name: getattr(self, function_name)),
+                run_function,
+                on_complete=on_complete
+            )
+        finally:
+            try:
+                job_telemetry.write(get_working_dir())
+            except Exception as err:
+                logger.warning(f"Failed to write precondition telemetry: {str(err)}")
+
+        for rc_params in results:
+            job_params.update(rc_params)
+        self._job_params = job_params
+
+        return job_params
+
     def __get_keys_from_dict(self, input_dict, keys, attribute_names=None):
         """
         Returns a dict with the requested keys from the input dict
@@ -539,14 +588,12 @@ class OperaPreConditionFunctions(PreConditionFunctions):
 
             acquisition_datetimes.add(acquisition_datetime)
 
-        troposphere_s3_paths = [f"s3://{s3_bucket}/{s3_key}/{ecmwf_key_for_datetime(acquisition_datetime)}"
-                                for acquisition_datetime in acquisition_datetimes]
+        ecmwf_index = get_ecmwf_availability_index(f"s3://{s3_bucket}/{s3_key}")
+        troposphere_s3_path_map = ecmwf_index.find_ecmwf_for_datetimes(acquisition_datetimes)
 
-        troposphere_s3_paths = list(set(troposphere_s3_paths))  # Remove any potential duplicates
+        troposphere_s3_paths = list(set(troposphere_s3_path_map.values()))  # Remove any potential duplicates
 
-        if not all(
-            check_s3_for_ecmwf(troposphere_s3_path) for troposphere_s3_path in troposphere_s3_paths
-        ):
+        if not all(troposphere_s3_paths):
             if strict_mode:
                 raise RuntimeError(f"One or more expected ECMWF files is missing from {s3_bucket}/{s3_key}")
             else:
@@ -982,7 +1029,8 @@ class OperaPreConditionFunctions(PreConditionFunctions):
         s3_key = self._pge_config.get(oc_const.GET_LANDCOVER, {}).get(oc_const.S3_KEY)
 
         pge_metrics = download_object_from_s3(
-            s3_bucket, s3_key, output_filepath, filetype="Landcover"
+            s3_bucket, s3_key, output_filepath, filetype="Landcover",
+            cache=True, cache_directory=self._settings.get("ANCILLARY_CACHE_DIRECTORY", ANCILLARY_CACHE_DIRECTORY)
         )
 
         write_pge_metrics(os.path.join(working_dir, "pge_metrics.json"), pge_metrics)
@@ -1227,7 +1275,8 @@ class OperaPreConditionFunctions(PreConditionFunctions):
             output_filepath = os.path.join(working_dir, os.path.basename(s3_key))
 
             pge_metrics = download_object_from_s3(
-                s3_bucket, s3_key, output_filepath, filetype="Shoreline Shapefile"
+                s3_bucket, s3_key, output_filepath, filetype="Shoreline Shapefile",
+                cache=True, cache_directory=self._settings.get("ANCILLARY_CACHE_DIRECTORY", ANCILLARY_CACHE_DIRECTORY)
             )
 
             write_pge_metrics(os.path.join(working_dir, "pge_metrics.json"), pge_metrics)
@@ -1305,7 +1354,8 @@ class OperaPreConditionFunctions(PreConditionFunctions):
         s3_key = self._pge_config.get(oc_const.GET_SLC_S1_BURST_DATABASE, {}).get(oc_const.S3_KEY)
 
         pge_metrics = download_object_from_s3(
-            s3_bucket, s3_key, output_filepath, filetype="Burst Database"
+            s3_bucket, s3_key, output_filepath, filetype="Burst Database",
+            cache=True, cache_directory=self._settings.get("ANCILLARY_CACHE_DIRECTORY", ANCILLARY_CACHE_DIRECTORY)
         )
 
         write_pge_metrics(os.path.join(working_dir, "pge_metrics.json"), pge_metrics)
@@ -1318,6 +1368,7 @@ class OperaPreConditionFunctions(PreConditionFunctions):
 
         return rc_params
 
+    @depends_on("get_slc_s1_safe_file")
     def get_slc_s1_dem(self):
         """
         Stages a DEM file corresponding to the region covered by an input
@@ -1404,34 +1455,13 @@ class OperaPreConditionFunctions(PreConditionFunctions):
 
         s3_product_path = self._context['product_path']
 
-        parsed_s3_url = urlparse(s3_product_path)
-        s3_path = parsed_s3_url.path
-
-        # Strip leading forward slash from url path
-        if s3_path.startswith('/'):
-            s3_path = s3_path[1:]
-
-        # Bucket name should be first part of url path, the key is the rest
-        s3_bucket_name = s3_path.split('/')[0]
-        s3_key = '/'.join(s3_path.split('/')[1:])
-
-        s3 = boto3.resource('s3')
-
-        bucket = s3.Bucket(s3_bucket_name)
-        s3_objects = bucket.objects.filter(Prefix=s3_key)
+        s3_orbit_file_paths = self._s3_inventory.find(s3_product_path, suffix='.EOF')
 
-        orbit_file_objects = list(
-            filter(lambda s3_object: s3_object.key.endswith('.EOF'), s3_objects)
-        )
-
-        if len(orbit_file_objects) < 1:
+        if len(s3_orbit_file_paths) < 1:
             raise RuntimeError(
                 f'Could not find any orbit files within the S3 location {s3_product_path}'
             )
 
-        s3_orbit_file_paths = [f"s3://{s3_bucket_name}/{orbit_file_object.key}"
-                               for orbit_file_object in orbit_file_objects]
-
         # Assign the s3 location of the orbit file to the chimera config,
         # it will be localized for us automatically
         rc_params = {
@@ -1503,41 +1533,26 @@ class OperaPreConditionFunctions(PreConditionFunctions):
 
         s3_product_path = self._context['product_path']
 
-        parsed_s3_url = urlparse(s3_product_path)
-        s3_path = parsed_s3_url.path
-
-        # Strip leading forward slash from url path
-        if s3_path.startswith('/'):
-            s3_path = s3_path[1:]
+        # Find the final Ionosphere file staged by the download job, if any
+        ionosphere_resolver = IonosphereResolver(output_directory=get_working_dir(), s3_url_prefix=s3_product_path,
+                                                 s3_inventory=self._s3_inventory)
+        s3_ionosphere_file_path = ionosphere_resolver.find_staged_file(ionosphere_file_types=[IONOSPHERE_TYPE_JPLG])
+        logger.info(f"{s3_ionosphere_file_path=}")
 
-        # Bucket name should be first part of url path, the key is the rest
-        s3_bucket_name = s3_path.split('/')[0]
-        s3_key = '/'.join(s3_path.split('/')[1:])
-
-        s3 = boto3.resource('s3')
-
-        bucket = s3.Bucket(s3_bucket_name)
-        s3_objects = bucket.objects.filter(Prefix=s3_key)
-
-        # Find the available Ionosphere files staged by the download job
-        ionosphere_file_objects = []
-        for ionosphere_file_type in VALID_IONOSPHERE_TYPES + ['RAP', 'FIN']:
-            ionosphere_file_objects.extend(
-                list(filter(lambda s3_object: ionosphere_file_type in s3_object.key, s3_objects))
-            )
-        logger.info(f"{ionosphere_file_objects}=")
-
-        # May not of found any Ionosphere files during download phase, so check now
-        if len(ionosphere_file_objects) < 1:
-            raise RuntimeError(
-                f'Could not find an Ionosphere file within the S3 location {s3_product_path}'
-            )
-
-        # There should only have been one file downloaded, but any should
-        # work so just take the first
-        ionosphere_file_object = ionosphere_file_objects[0]
+        # May not of found a final Ionosphere file during download phase, so
+        # check now. A rapid file staged by the download job is only used if
+        # the final file is still unavailable.
+        if s3_ionosphere_file_path is None:
+            try:
+                s3_ionosphere_file_path = ionosphere_resolver.resolve(os.path.basename(s3_product_path.rstrip('/')))
+            except Exception as err:
+                logger.warning(f"Failed to resolve Ionosphere file, falling back to any staged file: {err}")
+                s3_ionosphere_file_path = ionosphere_resolver.find_staged_file()
 
-        s3_ionosphere_file_path = f"s3://{s3_bucket_name}/{ionosphere_file_object.key}"
+                if s3_ionosphere_file_path is None:
+                    raise RuntimeError(
+                        f'Could not find an Ionosphere file within the S3 location {s3_product_path}'
+                    ) from err
 
         # Assign the s3 location of the Ionosphere file to the chimera config,
         # it will be localized for us automatically
@@ -1670,6 +1685,7 @@ class OperaPreConditionFunctions(PreConditionFunctions):
 
         return rc_params
 
+    @depends_on(ALL_PRECEDING)
     def instantiate_algorithm_parameters_template(self):
         """
         Downloads a template algorithm parameters yaml file from S3, then
@@ -1724,6 +1740,7 @@ class OperaPreConditionFunctions(PreConditionFunctions):
 
         return rc_params
 
+    @depends_on(ALL_PRECEDING)
     def set_daac_product_type(self):
         """
         Sets the DAAC product type
@@ -1745,6 +1762,7 @@ class OperaPreConditionFunctions(PreConditionFunctions):
                 )
             )
 
+    @depends_on(ALL_PRECEDING)
     def set_extra_pge_output_metadata(self):
         logger.info(
             "Calling {} pre-condition function".format(
@@ -1763,6 +1781,7 @@ class OperaPreConditionFunctions(PreConditionFunctions):
                 )
         return {oc_const.EXTRA_PGE_OUTPUT_METADATA: extra_met}
 
+    @depends_on(ALL_PRECEDING)
     def set_sample_product_metadata(self):
         """
         Overwrites the "product_metadata" field of the context dictionary with
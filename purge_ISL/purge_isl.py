@@ -3,9 +3,11 @@
 Purge files from the ISL
 """
 
+import concurrent.futures
 import os
 import logging
 import json
+from collections import defaultdict
 from functools import cache
 from typing import Union
 
@@ -13,7 +15,7 @@ import boto3
 
 from urllib.parse import urlparse
 
-from more_itertools import always_iterable
+from more_itertools import always_iterable, chunked
 
 from util.ctx_util import JobContext
 from util.exec_util import exec_wrapper
@@ -25,6 +27,8 @@ logger = logging.getLogger(os.path.splitext(os.path.basename(__file__))[0])
 
 BASE_PATH = os.path.dirname(__file__)
 
+DELETE_OBJECTS_MAX_KEYS = 1000  # S3 DeleteObjects limit
+
 
 @exec_wrapper
 def checked_main():
@@ -41,24 +45,70 @@ def main():
 
 
 def purge_isl_urls(isl_urls: Union[str, list[str]]):
+    """
+    Delete the given ISL objects, batching keys per (region, bucket) into DeleteObjects requests that are
+    submitted concurrently. Raises after all batches are attempted if any key failed to delete.
+    """
     isl_urls = [isl_url for isl_url in always_iterable(isl_urls) if isl_url]
+    if not isl_urls:
+        return
+
+    region_bucket_to_keys_map = defaultdict(list)
     for isl_url in isl_urls:
-        purge_isl_url(isl_url)
+        logger.info(f"Purging ISL: {isl_url}")
+        region, bucket, key = parse_isl_url(isl_url)
+        region_bucket_to_keys_map[(region, bucket)].append(key)
+
+    # boto3 client creation is not thread-safe, so create each region's client before handing work to the threads
+    s3_clients = {region: get_cached_s3_client(region) for region, _ in region_bucket_to_keys_map}
+
+    failed_keys = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, os.cpu_count() + 4)) as executor:
+        futures = [
+            executor.submit(purge_isl_keys, s3_clients[region], region, bucket, keys)
+            for (region, bucket), all_keys in region_bucket_to_keys_map.items()
+            for keys in chunked(all_keys, DELETE_OBJECTS_MAX_KEYS)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            failed_keys.extend(future.result())
+
+    logger.info(f"Purged {len(isl_urls) - len(failed_keys)} of {len(isl_urls)} ISL objects")
+    if failed_keys:
+        raise Exception(f"Failed to purge {len(failed_keys)} ISL objects: {failed_keys}")
 
 
 def purge_isl_url(isl_url: str):
-    logger.info(f"Purging ISL: {isl_url}")
+    purge_isl_urls([isl_url])
+
 
+def parse_isl_url(isl_url: str) -> tuple[str, str, str]:
     parsed_url = urlparse(isl_url)
     region = parsed_url.netloc.split(".", 1)[0].split("s3-")[1]
     tokens = parsed_url.path.strip("/").split("/", 1)
     bucket = tokens[0]
     key = tokens[1]
-    logger.info(f"region={region}, bucket={bucket}, key={key}")
-    s3 = get_cached_s3_client(region)
-
-    response = s3.delete_object(Bucket=bucket, Key=key)
-    logging.info(f"Delete object response: {response}")
+    logger.debug(f"region={region}, bucket={bucket}, key={key}")
+    return region, bucket, key
+
+
+def purge_isl_keys(s3, region: str, bucket: str, keys: list[str]) -> list[str]:
+    """Delete up to 1000 keys from a single bucket, returning the s3 paths of any keys that failed to delete."""
+    logger.info(f"Deleting {len(keys)} objects. region={region}, bucket={bucket}")
+
+    try:
+        response = s3.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+        )
+    except Exception:
+        logger.exception(f"Failed to delete objects. region={region}, bucket={bucket}")
+        return [f"s3://{bucket}/{key}" for key in keys]
+
+    failed_keys = []
+    for error in response.get("Errors", []):
+        logger.error(f"Failed to delete s3://{bucket}/{error['Key']}. code={error.get('Code')}, message={error.get('Message')}")
+        failed_keys.append(f"s3://{bucket}/{error['Key']}")
+    return failed_keys
 
 
 @cache
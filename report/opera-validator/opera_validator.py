@@ -1,15 +1,18 @@
 import argparse
 import concurrent.futures
+import contextlib
+import hashlib
 import json
 import logging
-import multiprocessing
+import os
+import queue
 import re
 import sqlite3
 import sys
+import threading
 import time
 from datetime import datetime
 from datetime import timedelta
-from urllib.parse import urlencode
 
 import pandas as pd
 import requests
@@ -23,6 +26,12 @@ CMR_GRANULES_API_ENDPOINT = "https://cmr.earthdata.nasa.gov/search/granules.umm_
 CMR_UAT_GRANULES_API_ENDPOINT = (
     "https://cmr.uat.earthdata.nasa.gov/search/granules.umm_json")
 BURST_AND_DATE_GRANULE_PATTERN = r"_T(\d+)-(\d+)-([A-Z]+\d+)_(\d+T\d+Z)_(\d+T\d+Z)"
+CMR_PAGE_SIZE = 2000  # max page size supported by CMR
+CMR_MAX_WORKERS = 5  # CMR recommends 2-5 concurrent requests
+RTC_NATIVE_ID_PATTERN = r"(OPERA_L2_RTC-S1_[\w-]+_\d+T\d+Z_\d+T\d+Z_S1[AB]_30_v\d+\.\d+)"
+MGRS_INDEX_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "opera_validator")
 
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
@@ -92,42 +101,6 @@ def fetch_with_backoff(url, params):
             )
 
 
-def parallel_fetch(url, params, page_num, page_size, downloaded_batches):
-    """Fetches granules in parallel using the provided API.
-
-    :url: Base url to query cmr
-
-    :param s: The parameter arguments for the given url
-    :page_num (int): The page number of the granule query.
-    :page_size (int): The number of granules to fetch per page.
-    :downloaded_batches (multiprocessing.Value): A shared integer value representing
-        the number of batches that have been successfully downloaded.
-    :param url:
-    :param params:
-    :param page_num:
-    :param page_size:
-    :param downloaded_batches:
-    :returns: list): A list of batch granules fetched from the API.
-
-    """
-
-    params["page_num"] = page_num
-    params["page_size"] = page_size
-
-    try:
-        logging.debug(f"Fetching {url} with {params}")
-        batch_granules = fetch_with_backoff(url, params)
-        logging.debug(
-            f"Fetch success: {len(batch_granules)} batch granules downloaded.")
-    except Exception as e:
-        logging.error(f"Failed to fetch granules for page {page_num}: {e}")
-        batch_granules = []
-    finally:
-        with downloaded_batches.get_lock():  # Safely increment the count
-            downloaded_batches.value += 1
-        return batch_granules
-
-
 def get_burst_id(granule_id):
     """Extracts the burst ID from a given granule ID string.
 
@@ -197,6 +170,158 @@ def get_total_granules(url, params, retries=5, backoff_factor=1):
                     "Failed to get total granules after several attempts.")
 
 
+def fetch_search_after_pages(url, params, session=None, retries=5, backoff_factor=1):
+    """Generator that pages through a CMR granule search using the CMR-Search-After header.
+
+    Unlike page_num paging, search-after paging is stable and does not degrade at deep offsets.
+    Each page is retried with exponential backoff and jitter before the last error is raised.
+
+    :param url: Base url to query cmr
+    :param params: The parameter arguments for the given url. Not modified.
+    :param session: Optional requests.Session to reuse connections across pages
+    :param retries:  (Default value = 5)
+    :param backoff_factor:  (Default value = 1)
+    :returns: Iterator of pages, where each page is a list of granules (json/dict objects)
+
+    """
+    session = session if session is not None else requests.Session()
+    params = {k: v for k, v in params.items() if k != "page_num"}  # page_num may not be combined with search-after
+    params["page_size"] = CMR_PAGE_SIZE
+    headers = {}
+
+    while True:
+        for attempt in range(retries):
+            try:
+                response = session.get(url, params=params, headers=headers)
+                logging.debug(response.url)
+                response.raise_for_status()
+                break
+            except requests.exceptions.RequestException as e:
+                if attempt == retries - 1:
+                    raise
+                sleep_time = backoff_factor * (2**attempt) + secrets.SystemRandom().uniform(0, 1)
+                logging.warning(f"Retrying CMR page after delay of {sleep_time} seconds due to error: {e}")
+                time.sleep(sleep_time)
+
+        items = response.json()["items"]
+        if items:
+            yield items
+
+        search_after = response.headers.get("CMR-Search-After")
+        if not search_after or len(items) < CMR_PAGE_SIZE:
+            return
+        headers["CMR-Search-After"] = search_after
+
+
+def split_time_range(start, end, shards):
+    """Splits an ISO 8601 time range into contiguous sub-ranges.
+
+    :param start: The starting date-time for the range (ISO 8601 format).
+    :param end: The ending date-time for the range (ISO 8601 format).
+    :param shards: The maximum number of sub-ranges to return.
+    :returns: List of (start, end) string tuples covering the original range.
+
+    """
+    start_datetime = datetime.fromisoformat(start.replace("Z", "+00:00"))
+    end_datetime = datetime.fromisoformat(end.replace("Z", "+00:00"))
+    if shards <= 1 or end_datetime <= start_datetime:
+        return [(start, end)]
+
+    step = (end_datetime - start_datetime) / shards
+    boundaries = [start] + [
+        (start_datetime + step * i).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+        for i in range(1, shards)
+    ] + [end]
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def shard_params(params, shards):
+    """Splits CMR query parameters into temporally sharded sub-queries.
+
+    The sharded parameter is whichever time range the query is filtered by (see generate_url_params).
+    Queries without a bounded time range are returned as a single shard.
+
+    :param params: The parameter arguments for the CMR query. Not modified.
+    :param shards: The maximum number of sub-queries to return.
+    :returns: List of parameter dicts.
+
+    """
+    range_key = next((key for key in ("production_date", "revision_date", "created_at") if key in params), None)
+    if range_key is None and "," in params.get("temporal", ""):
+        range_key = "temporal"
+    if range_key is None:
+        return [dict(params)]
+
+    start, end = params[range_key].split(",")
+    return [{**params, range_key: f"{shard_start},{shard_end}"}
+            for shard_start, shard_end in split_time_range(start, end, shards)]
+
+
+def stream_cmr_granules(url, params, max_workers=CMR_MAX_WORKERS, shards=None):
+    """Generator that streams granules from temporally sharded CMR sub-queries executed concurrently.
+
+    Each shard is paged with search-after on its own worker thread. Granules are yielded as pages arrive, so callers can
+    process results incrementally without holding every page in memory. Granules that match more than one shard
+    (e.g. temporal extents crossing a shard boundary) are yielded once.
+
+    :param url: Base url to query cmr
+    :param params: The parameter arguments for the given url. Not modified.
+    :param max_workers: Maximum number of concurrent CMR requests.  (Default value = CMR_MAX_WORKERS)
+    :param shards: Number of temporal sub-queries. Defaults to max_workers.
+    :returns: Iterator of granules (json/dict objects)
+
+    """
+    paramss = shard_params(params, shards or max_workers)
+    pages = queue.Queue(maxsize=max_workers * 2)  # bounded, so slow consumers apply backpressure to fetching
+    done = object()
+    cancelled = threading.Event()
+
+    def put(item):
+        while not cancelled.is_set():
+            try:
+                pages.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch_shard(shard_params_):
+        try:
+            with requests.Session() as session:
+                for page in fetch_search_after_pages(url, shard_params_, session=session):
+                    if not put(page):
+                        return
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+
+    seen_concept_ids = set()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for shard_params_ in paramss:
+            executor.submit(fetch_shard, shard_params_)
+
+        try:
+            remaining_shards = len(paramss)
+            while remaining_shards:
+                page = pages.get()
+                if page is done:
+                    remaining_shards -= 1
+                    continue
+                if isinstance(page, Exception):
+                    raise page
+                for granule in page:
+                    concept_id = granule.get("meta", {}).get("concept-id")
+                    if concept_id:
+                        if concept_id in seen_concept_ids:
+                            continue
+                        seen_concept_ids.add(concept_id)
+                    yield granule
+        finally:
+            # stop any workers still producing pages if the consumer exits early
+            cancelled.set()
+
+
 def get_burst_ids_from_file(filename):
     """Reads a file containing granule IDs and extracts both burst IDs and sensing date-times from them.
 
@@ -313,7 +438,35 @@ def get_granules_from_query(start,
 
     """
 
-    granules = []
+    return list(
+        iter_granules_from_query(
+            start=start,
+            end=end,
+            timestamp=timestamp,
+            endpoint=endpoint,
+            provider=provider,
+            shortname=shortname,
+        ))
+
+
+def iter_granules_from_query(start,
+                             end,
+                             timestamp,
+                             endpoint,
+                             provider="ASF",
+                             shortname="OPERA_L2_RTC-S1_V1"):
+    """Streams granule metadata from the CMR API within a specified temporal range using concurrent, temporally sharded
+    search-after queries. Exits with an error code if the number of granules streamed does not match the CMR hit count.
+
+    :param start: Start time in ISO 8601 format.
+    :param end: End time in ISO 8601 format.
+    :param timestamp: Type of timestamp to filter granules (e.g., 'TEMPORAL', 'PRODUCTION').
+    :param endpoint: CMR API endpoint ('OPS' or 'UAT').
+    :param provider:  (Default value = "ASF")
+    :param shortname:  (Default value = "OPERA_L2_RTC-S1_V1")
+    :returns: Iterator of granule metadata.
+
+    """
 
     base_url, params = generate_url_params(
         start=start,
@@ -325,7 +478,7 @@ def get_granules_from_query(start,
     )
 
     # Construct the URL for the total granules query
-    total_granules = get_total_granules(base_url, params)
+    total_granules = get_total_granules(base_url, dict(params))
     print(f"Total granules: {total_granules}")
     print(f"Querying CMR for time range {start} to {end}.")
 
@@ -334,58 +487,28 @@ def get_granules_from_query(start,
         print(f"Error: no granules to process.")
         sys.exit(1)
 
-    # Optimize page_size and number of workers based on total_granules
-    page_size = min(1000, total_granules)
-
     # Initialize progress bar
     tqdm.tqdm._instances.clear()  # Clear any existing tqdm instances
     print()
 
-    # Main loop to fetch granules, update progress bar, and extract burst_ids
+    # Main loop to stream granules and update progress bar
+    total_downloaded = 0
     with tqdm.tqdm(total=total_granules, desc="Fetching granules",
                    position=0) as pbar_global:
-        downloaded_batches = multiprocessing.Value(
-            "i", 0)  # For counting downloaded batches
-        total_batches = (total_granules + page_size - 1) // page_size
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            # NOTE: parallelized workers beyond 5 not working well, but here's some code to make it work in the future
-            # max_workers = min(5, (total_granules + page_size - 1) // page_size)
-            # futures = [executor.submit(parallel_fetch, base_url, params, page_num, page_size, downloaded_batches, total_batches) for page_num in range(1, total_batches + 1)]
-            futures = []
-            for page_num in range(1, total_batches + 1):
-                future = executor.submit(
-                    parallel_fetch,
-                    base_url,
-                    params,
-                    page_num,
-                    page_size,
-                    downloaded_batches,
-                )
-                futures.append(future)
-                random_delay = secrets.SystemRandom().uniform(0, 0.1)
-                # Stagger the submission of function calls for CMR optimization
-                time.sleep(random_delay)
-                logging.debug(f"Scheduled granule fetch for batch {page_num}")
-
-            for future in concurrent.futures.as_completed(futures):
-                granules_result = future.result()
-                pbar_global.update(len(granules_result))
-
-                granules.extend(granules_result)
+        for granule in stream_cmr_granules(base_url, params):
+            total_downloaded += 1
+            pbar_global.update(1)
+            yield granule
 
     print("\nGranule fetching complete.")
 
     # Integrity check for total granules
-    total_downloaded = sum(len(future.result()) for future in futures)
     if total_downloaded != total_granules:
         print(
             f"\nError: Expected {total_granules} granules, but downloaded {total_downloaded}. Try running again after some delay."
         )
         sys.exit(1)
 
-    return granules
-
 
 def get_granule_ids_from_granules(granules):
     """Extracts granule IDs from a list of granule metadata.
@@ -431,25 +554,19 @@ def get_burst_ids_and_sensing_times_from_query(start,
 
     """
 
-    granules = get_granules_from_query(
-        start=start,
-        end=end,
-        timestamp=timestamp,
-        endpoint=endpoint,
-        provider=provider,
-        shortname=shortname,
-    )
-    if granules:
-        granule_ids = get_granule_ids_from_granules(granules)
-    else:
-        logging.error("Problem querying for granules. Unable to proceed.")
-        sys.exit(1)
-
     burst_ids = {}
     burst_dates = {}
 
-    # Extract burst IDs, dates from granule IDs
-    for granule_id in granule_ids:
+    # Extract burst IDs, dates from granule IDs as granules are streamed from CMR
+    for granule in iter_granules_from_query(
+            start=start,
+            end=end,
+            timestamp=timestamp,
+            endpoint=endpoint,
+            provider=provider,
+            shortname=shortname,
+    ):
+        granule_id = granule.get("umm").get("GranuleUR")
         burst_id = get_burst_id(granule_id)
         burst_date = get_burst_sensing_datetime(granule_id)
         if burst_id and burst_date:
@@ -460,9 +577,163 @@ def get_burst_ids_and_sensing_times_from_query(start,
                 f"\nWarning: Could not extract burst ID from malformed granule ID {granule_id}."
             )
 
+    if not burst_ids:
+        logging.error("Problem querying for granules. Unable to proceed.")
+        sys.exit(1)
+
     return burst_ids, burst_dates
 
 
+def find_unprocessed_rtc_native_ids(df, mgrs_tiles_to_rtc_native_ids):
+    """Finds the covered RTC native IDs of each row that are missing from the InputGranules of the row's DSWx-S1 tiles.
+
+    Both the DataFrame's comma-joined columns and the tile mapping are exploded into (row, tile) and
+    (tile, native ID) pairs, so the comparison is a pair of joins rather than per-row set arithmetic.
+
+    :param df: pandas.DataFrame
+        A DataFrame with comma-joined 'Covered RTC Native IDs' and 'MGRS Tiles' columns.
+    :param mgrs_tiles_to_rtc_native_ids: dict
+        Mapping of DSWx-S1 MGRS tile IDs (e.g. 'T15SXR') to the RTC native IDs found in their InputGranules.
+    :returns: pandas.Series
+        The comma-joined unprocessed RTC native IDs, indexed by the DataFrame rows that have any.
+
+    """
+    covered = (df["Covered RTC Native IDs"].str.split(", ").explode().rename(
+        "native_id").rename_axis("row").reset_index().drop_duplicates())
+    tiles = (("T" + df["MGRS Tiles"].str.split(", ").explode()).rename(
+        "mgrs_tile_id").rename_axis("row").reset_index())
+    available = pd.DataFrame(
+        [(mgrs_tile_id, native_id)
+         for mgrs_tile_id, native_ids in mgrs_tiles_to_rtc_native_ids.items()
+         for native_id in native_ids],
+        columns=["mgrs_tile_id", "native_id"],
+    ).drop_duplicates()
+
+    available_by_row = tiles.merge(available, on="mgrs_tile_id")[[
+        "row", "native_id"
+    ]].drop_duplicates()
+    merged = covered.merge(available_by_row,
+                           on=["row", "native_id"],
+                           how="left",
+                           indicator=True)
+    unprocessed = merged[merged["_merge"] == "left_only"]
+    return unprocessed.groupby("row")["native_id"].agg(", ".join)
+
+
+def _parse_db_list_column(column):
+    """Parses a column of stringified lists (e.g. "['T001-000001-IW1', 'T001-000002-IW1']") into lists of strings."""
+    return column.str.strip("[]").str.replace("'", "").str.replace(" ", "").str.split(",")
+
+
+def _file_checksum(filename, chunk_size=1024 * 1024):
+    """Returns the SHA-256 hex digest of the given file."""
+    sha256 = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def load_mgrs_burst_index(mgrs_db_file, cache_dir=MGRS_INDEX_CACHE_DIR):
+    """Loads the non-water MGRS Tile Sets of the MGRS Tile Set SQLite database along with an inverted burst index.
+
+    Parsing the stringified burst and tile lists of every MGRS Tile Set is done once per database, the result being
+    cached as JSON under `cache_dir` by the database's checksum, so later runs against the same database load it
+    directly.
+
+    :param mgrs_db_file: str
+        Path to the MGRS Tile Set SQLite database file.
+    :param cache_dir: str
+        Directory to cache the parsed database in. Caching is disabled if None.
+    :returns: tuple of pandas.DataFrame
+        1. mgrs_sets: One row per MGRS Tile Set, with 'mgrs_set_id', 'bursts' and 'mgrs_tiles' (lists) columns.
+        2. burst_index: One row per (MGRS Tile Set row, burst ID) pair, with 'row' and 'burst_id' columns.
+
+    """
+    cache_file = None
+    mgrs_sets = None
+    if cache_dir:
+        cache_file = os.path.join(cache_dir, f"mgrs_burst_index_{_file_checksum(mgrs_db_file)}.json")
+        if os.path.exists(cache_file):
+            logging.info(f"Loading MGRS burst index from cache {cache_file}")
+            with open(cache_file) as file:
+                mgrs_sets = pd.DataFrame(json.load(file))
+
+    if mgrs_sets is None:
+        query = "SELECT mgrs_set_id, bursts, mgrs_tiles FROM mgrs_burst_db WHERE land_ocean_flag <> 'water'"
+        with contextlib.closing(sqlite3.connect(mgrs_db_file)) as conn:
+            mgrs_sets = pd.read_sql_query(query, conn)
+
+        mgrs_sets["bursts"] = _parse_db_list_column(mgrs_sets["bursts"])
+        mgrs_sets["mgrs_tiles"] = _parse_db_list_column(mgrs_sets["mgrs_tiles"])
+
+        if cache_file:
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            tmp_cache_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_cache_file, "w") as file:
+                json.dump(mgrs_sets.to_dict(orient="list"), file)
+            os.replace(tmp_cache_file, cache_file)
+
+    burst_index = (mgrs_sets["bursts"].explode().rename("burst_id").rename_axis(
+        "row").reset_index().drop_duplicates())
+
+    return mgrs_sets, burst_index
+
+
+def compute_mgrs_set_coverage(mgrs_sets, burst_index, burst_ids, burst_dates):
+    """Computes how much of each MGRS Tile Set is covered by the given RTC bursts.
+
+    The bursts are joined against the inverted burst index, and aggregated per MGRS Tile Set, rather than testing each
+    burst against each MGRS Tile Set's burst list.
+
+    :param mgrs_sets: pandas.DataFrame
+        The MGRS Tile Sets, as returned by load_mgrs_burst_index.
+    :param burst_index: pandas.DataFrame
+        The inverted burst index, as returned by load_mgrs_burst_index.
+    :param burst_ids: dict
+        Mapping of burst IDs to RTC native IDs.
+    :param burst_dates: dict
+        Mapping of burst IDs to their sensing date-times (e.g. '20231101T013115Z').
+    :returns: pandas.DataFrame
+        One row per MGRS Tile Set, with its coverage percentage, covered and total bursts, and MGRS tiles.
+
+    """
+    rtc_bursts = pd.DataFrame({
+        "burst_id": list(burst_ids.keys()),
+        "native_id": list(burst_ids.values()),
+        "date": [burst_dates[burst_id] for burst_id in burst_ids],
+    }).rename_axis("order").reset_index()
+
+    # Keep the matched bursts of each MGRS Tile Set in the order the bursts were provided
+    matches = (burst_index.merge(rtc_bursts, on="burst_id").sort_values(["row", "order"]))
+    matches["date"] = pd.to_datetime(matches["date"], format="%Y%m%dT%H%M%SZ")
+    covered = matches.groupby("row").agg(
+        native_ids=("native_id", ", ".join),
+        covered_burst_ids=("burst_id", ", ".join),
+        covered_count=("burst_id", "size"),
+        dates=("date", list),
+    ).reindex(mgrs_sets.index)
+
+    total_counts = mgrs_sets["bursts"].str.len()
+    covered_counts = covered["covered_count"].fillna(0).astype(int)
+    no_dates = pd.Series([[] for _ in range(len(mgrs_sets))], index=mgrs_sets.index)
+
+    return pd.DataFrame({
+        "MGRS Set ID": mgrs_sets["mgrs_set_id"],
+        "Coverage Percentage": (covered_counts / total_counts * 100).round(2),
+        "Covered RTC Native IDs": covered["native_ids"].fillna(""),
+        "Covered RTC Burst IDs": covered["covered_burst_ids"].fillna(""),
+        "Total RTC Burst IDs": mgrs_sets["bursts"].str.join(", "),
+        "Covered RTC Burst ID Count": covered_counts,
+        "Total RTC Burst IDs Count": total_counts,
+        "MGRS Tiles": mgrs_sets["mgrs_tiles"].str.join(", "),
+        "MGRS Tiles Count": mgrs_sets["mgrs_tiles"].str.len(),
+        "RTC Burst ID Dates": covered["dates"].where(covered["dates"].notna(), no_dates),
+        "Unprocessed RTC Native IDs": "",
+        "Unprocessed RTC Native IDs Count": 0,
+    }).reset_index(drop=True)
+
+
 def validate_dswx_s1(smallest_date, greatest_date, endpoint, df):
     """Validates that the granules from the CMR query are accurately reflected in the DataFrame provided.
     It extracts granule information based on the input dates and checks which granules are missing from the DataFrame.
@@ -504,37 +775,12 @@ def validate_dswx_s1(smallest_date, greatest_date, endpoint, df):
         timestamp_type="temporal",  # Ensure this matches the query requirements
     )
 
-    # Update the params dictionary directly to include any specific parameters needed
-    params["page_size"] = 1000  # Set the page size to 1000
-    params["page_num"] = 1  # Start with the first page
-
-    all_granules = []
     dswx_s1_mgrs_tiles_to_rtc_bursts = {}
 
     try:
-        while True:
-            # Construct the full URL for the request
-            full_url = f"{base_url}?{urlencode(params)}"
-
-            # Make the HTTP request
-            response = requests.get(full_url)
-            response.raise_for_status()  # Raises a HTTPError for bad responses
-            granules = response.json()
-
-            # Append the current page's granules to the all_granules list
-            all_granules.extend(granules["items"])
-
-            # Check if we've retrieved all pages
-            if len(all_granules) >= granules["hits"]:
-                break
-
-            # Increment the page number for the next iteration
-            params["page_num"] += 1
-
-        # Extract MGRS tiles and create the mapping to InputGranules
+        # Extract MGRS tiles and create the mapping to InputGranules as granules are streamed from CMR
         available_rtc_bursts = []
-        pattern = r"(OPERA_L2_RTC-S1_[\w-]+_\d+T\d+Z_\d+T\d+Z_S1[AB]_30_v\d+\.\d+)"
-        for item in all_granules:
+        for item in stream_cmr_granules(base_url, params):
             input_granules = item["umm"]["InputGranules"]
             # native_id = item['meta']['native-id']
             mgrs_tile_id = None
@@ -547,7 +793,7 @@ def validate_dswx_s1(smallest_date, greatest_date, endpoint, df):
 
             # Extract the granule burst ID from the full path
             for path in input_granules:
-                match = re.search(pattern, path)
+                match = re.search(RTC_NATIVE_ID_PATTERN, path)
                 if match:
                     if mgrs_tile_id:
                         # Add the MGRS Tile ID and associated InputGranules to the dictionary
@@ -560,49 +806,13 @@ def validate_dswx_s1(smallest_date, greatest_date, endpoint, df):
                             ]
                     available_rtc_bursts.append(match.group(1))
 
-        # unique_available_rtc_bursts = set(available_rtc_bursts)
-
-        # Function to identify missing bursts
-        def filter_and_find_missing(row):
-            """
-
-            :param row:
-
-            """
-            rtc_bursts_in_df_row = set(
-                row["Covered RTC Native IDs"].split(", "))
-            mgrs_tiles_in_df_row = set(row["MGRS Tiles"].split(", "))
-
-            unique_available_rtc_bursts = {
-                item
-                for key in mgrs_tiles_in_df_row
-                if f"T{key}" in dswx_s1_mgrs_tiles_to_rtc_bursts
-                for item in dswx_s1_mgrs_tiles_to_rtc_bursts[f"T{key}"]
-            }
-
-            unprocessed_rtc_bursts = rtc_bursts_in_df_row - unique_available_rtc_bursts
-            if unprocessed_rtc_bursts:
-                return ", ".join(unprocessed_rtc_bursts)
-            return None  # or pd.NA
-
-        # Function to count missing bursts
-        def count_missing(row):
-            """
-
-            :param row:
-
-            """
-            count = len(row["Unprocessed RTC Native IDs"].split(", "))
-            return count
-
-        # Apply the function and create a new column 'Unprocessed RTC Native IDs'
-        df["Unprocessed RTC Native IDs"] = df.apply(filter_and_find_missing,
-                                                    axis=1)
-        df = df.dropna(subset=["Unprocessed RTC Native IDs"])
-
-        # Using loc to safely modify the DataFrame without triggering SettingWithCopyWarning
-        df.loc[:, "Unprocessed RTC Native IDs Count"] = df.apply(count_missing,
-                                                                 axis=1)
+        # Identify missing bursts per row with exploded joins rather than row-by-row set arithmetic
+        unprocessed_rtc_native_ids = find_unprocessed_rtc_native_ids(
+            df, dswx_s1_mgrs_tiles_to_rtc_bursts)
+        df = df[df.index.isin(unprocessed_rtc_native_ids.index)].copy()
+        df["Unprocessed RTC Native IDs"] = unprocessed_rtc_native_ids
+        df["Unprocessed RTC Native IDs Count"] = (
+            df["Unprocessed RTC Native IDs"].str.split(", ").str.len())
 
         return df
 
@@ -653,81 +863,29 @@ def validate_disp_s1(smallest_date, greatest_date, endpoint, df):
         timestamp_type="temporal",  # Ensure this matches the query requirements
     )
 
-    # Update the params dictionary directly to include any specific parameters needed
-    params["page_size"] = 1000  # Set the page size to 1000
-    params["page_num"] = 1  # Start with the first page
-
-    all_granules = []
-
     try:
-        while True:
-            # Construct the full URL for the request
-            full_url = f"{base_url}?{urlencode(params)}"
-
-            # Make the HTTP request
-            response = requests.get(full_url)
-            response.raise_for_status()  # Raises a HTTPError for bad responses
-            granules = response.json()
-
-            # Append the current page's granules to the all_granules list
-            all_granules.extend(granules["items"])
-
-            # Check if we've retrieved all pages
-            if len(all_granules) >= granules["hits"]:
-                break
-
-            # Increment the page number for the next iteration
-            params["page_num"] += 1
-
-        # Extract MGRS tiles and create the mapping to InputGranules
-        available_cslc_bursts = []
-        for item in all_granules:
+        # Extract the CSLC burst IDs from InputGranules as granules are streamed from CMR
+        available_cslc_bursts = set()
+        for item in stream_cmr_granules(base_url, params):
             input_granules = item["umm"]["InputGranules"]
 
             # Extract the granule burst ID from the full path
             for path in input_granules:
-                match = re.search(BURST_AND_DATE_GRANULE_PATTERN, path)
-                if match:
-                    t_number = match.group(1)
-                    orbit_number = match.group(2)
-                    iw_number = match.group(3).lower()
-                    burst_id = f"t{t_number}_{orbit_number}_{iw_number}"
-                    available_cslc_bursts.append(burst_id)
-
-        # Function to identify missing bursts
-        def filter_and_find_missing(row):
-            """
-
-            :param row:
-
-            """
-            cslc_bursts_in_df_row = set(
-                row["Covered CSLC Native IDs"].split(", "))
-
-            unprocessed_rtc_bursts = cslc_bursts_in_df_row - available_cslc_bursts
-            if unprocessed_rtc_bursts:
-                return ", ".join(unprocessed_rtc_bursts)
-            return None  # or pd.NA
-
-        # Function to count missing bursts
-        def count_missing(row):
-            """
-
-            :param row:
-
-            """
-            count = len(row["Unprocessed CSLC Native IDs"].split(", "))
-            return count
-
-        # Apply the function and create a new column 'Unprocessed CSLC Native IDs'
-        df["Unprocessed CSLC Native IDs"] = df.apply(filter_and_find_missing,
-                                                     axis=1)
-        df = df.dropna(subset=["Unprocessed CSLC Native IDs"])
-
-        # Using loc to safely modify the DataFrame without triggering SettingWithCopyWarning
-        df.loc[:,
-               "Unprocessed CSLC Native IDs Count"] = df.apply(count_missing,
-                                                               axis=1)
+                burst_id = get_burst_id(path)
+                if burst_id:
+                    available_cslc_bursts.add(burst_id)
+
+        # Identify missing bursts per row with an exploded membership test against the available burst set
+        cslc_bursts_in_df = (df["Covered CSLC Native IDs"].str.split(
+            ", ").explode())
+        unprocessed_cslc_bursts = cslc_bursts_in_df[~cslc_bursts_in_df.isin(
+            available_cslc_bursts)]
+        unprocessed_cslc_bursts = unprocessed_cslc_bursts.groupby(
+            level=0).agg(lambda bursts: ", ".join(dict.fromkeys(bursts)))
+        df = df[df.index.isin(unprocessed_cslc_bursts.index)].copy()
+        df["Unprocessed CSLC Native IDs"] = unprocessed_cslc_bursts
+        df["Unprocessed CSLC Native IDs Count"] = (
+            df["Unprocessed CSLC Native IDs"].str.split(", ").str.len())
 
         return df
 
@@ -765,9 +923,12 @@ def map_cslc_bursts_to_frames(burst_ids, bursts_to_frames_file,
     with open(frames_to_bursts_file, "r") as f:
         frames_to_bursts_data = json.load(f)["data"]
 
+    # Build a set of the input burst IDs once so that membership tests below are O(1)
+    burst_ids_set = set(burst_ids)
+
     # Step 1: Map the burst IDs to their corresponding frame IDs
     frame_ids = set()
-    for burst_id in burst_ids:
+    for burst_id in burst_ids_set:
         frames = bursts_to_frames_data.get(burst_id, {}).get("frame_ids", [])
         frame_ids.update(frames)
 
@@ -780,7 +941,7 @@ def map_cslc_bursts_to_frames(burst_ids, bursts_to_frames_file,
 
         # Find the intersection of associated bursts and the input burst_ids
         matching_bursts = [
-            burst for burst in burst_ids if burst in associated_bursts
+            burst for burst in associated_bursts if burst in burst_ids_set
         ]
 
         # Append the result to the data list
@@ -820,6 +981,12 @@ if __name__ == "__main__":
         required=False,
         help="Path to the MGRS Tile Set SQLite database file",
     )
+    parser.add_argument(
+        "--mgrs_index_cache_dir",
+        required=False,
+        default=MGRS_INDEX_CACHE_DIR,
+        help="Directory to cache the parsed MGRS Tile Set SQLite database in, by checksum",
+    )
     parser.add_argument("--file",
                         required=False,
                         help="Optional file path containing granule IDs")
@@ -892,93 +1059,11 @@ if __name__ == "__main__":
             burst_ids, burst_dates = get_burst_ids_and_sensing_times_from_query(
                 args.start, args.end, args.timestamp, args.endpoint_daac_input)
 
-        # Connect to the MGRS Tile Set SQLITE database
-        conn = sqlite3.connect(args.dswx_s1_mgrs_db)
-        cursor = conn.cursor()
-
-        # Query to retrieve all mgrs_set_id and their bursts
-        query = "SELECT mgrs_set_id, bursts, mgrs_tiles FROM mgrs_burst_db WHERE land_ocean_flag <> 'water'"
-        cursor.execute(query)
-        mgrs_data = cursor.fetchall()
-
-        # Initialize DataFrame to store results
-        df = pd.DataFrame(columns=[
-            "MGRS Set ID",
-            "Coverage Percentage",
-            "Covered RTC Native IDs",
-            "Covered RTC Burst IDs",
-            "Total RTC Burst IDs",
-            "Covered RTC Burst ID Count",
-            "Total RTC Burst IDs Count",
-            "MGRS Tiles",
-            "MGRS Tiles Count",
-            "RTC Burst ID Dates",
-        ])
-
-        # Initialize a list to store data for DataFrame
-        data_for_df = []
-
-        # Iterate through each mgrs_set_id and calculate coverage, also update a progress bar
-        print()
-        for mgrs_set_id, bursts_string, mgrs_tiles_string in tqdm.tqdm(
-                mgrs_data, desc="Calculating coverage"):
-
-            # Main logic for coverage calculation:
-            # 1. Identify RTC burst IDs we want to check (i.e. bursts_list)
-            # 2. For each MGRS Set ID (i.e. mgrs_set_id), find the matching intersection (i.e. match_count) of RTC burst IDs (i.e. bursts_list) that map to the tile's burst IDs (i.e. burst_ids)
-            # 3. Return the percentage of matches compared to the total number of bursts associated with the MGRS Tile Set ID (i.e. mgrs_set_id)
-            bursts_list = (bursts_string.strip("[]").replace("'", "").replace(
-                " ", "").split(","))
-            mgrs_tiles_list = (mgrs_tiles_string.strip("[]").replace(
-                "'", "").replace(" ", "").split(","))
-            matching_burst_ids = {}
-            matching_burst_dates = {}
-
-            for burst in burst_ids:
-                if burst in bursts_list:
-                    matching_burst_ids[burst] = burst_ids[burst]
-                    matching_burst_dates[burst] = burst_dates[burst]
-
-            match_burst_count = len(matching_burst_ids)
-            coverage_percentage = (round(
-                (match_burst_count / len(bursts_list)) *
-                100, 2) if bursts_list else 0.0)
-
-            # Collect the db data we will need later
-            data_for_df.append({
-                "MGRS Set ID":
-                mgrs_set_id,
-                "Coverage Percentage":
-                coverage_percentage,
-                "Covered RTC Native IDs":
-                ", ".join(list(matching_burst_ids.values())),
-                "Covered RTC Burst IDs":
-                ", ".join(list(matching_burst_ids.keys())),
-                "Total RTC Burst IDs":
-                ", ".join(bursts_list),
-                "Covered RTC Burst ID Count":
-                len(matching_burst_ids),
-                "Total RTC Burst IDs Count":
-                len(bursts_list),
-                "MGRS Tiles":
-                ", ".join(mgrs_tiles_list),
-                "MGRS Tiles Count":
-                len(mgrs_tiles_list),
-                "RTC Burst ID Dates": [
-                    pd.to_datetime(date, format="%Y%m%dT%H%M%SZ")
-                    for date in matching_burst_dates.values()
-                ],
-                "Unprocessed RTC Native IDs":
-                "",
-                "Unprocessed RTC Native IDs Count":
-                0,
-            })
-
-        # Close the database connection safely
-        conn.close()
-
-        # Create DataFrame from the collected data to use for fancy stuff
-        df = pd.DataFrame(data_for_df)
+        # Load the MGRS Tile Sets and their inverted burst index (cached by database checksum) and calculate coverage
+        mgrs_sets, burst_index = load_mgrs_burst_index(
+            args.dswx_s1_mgrs_db, cache_dir=args.mgrs_index_cache_dir)
+        df = compute_mgrs_set_coverage(mgrs_sets, burst_index, burst_ids,
+                                       burst_dates)
 
         # Apply threshold filtering if provided or use a minimum burst count match for filtering if provided. This is the place for more fancy logic if needed.
         if args.threshold:
@@ -1,14 +1,21 @@
 import json
+import sqlite3
 from datetime import datetime
 from datetime import timedelta
 
 import pandas as pd
 import pytest
 import requests
+from opera_validator import compute_mgrs_set_coverage
+from opera_validator import find_unprocessed_rtc_native_ids
 from opera_validator import generate_url_params
 from opera_validator import get_burst_id
 from opera_validator import get_burst_sensing_datetime
+from opera_validator import load_mgrs_burst_index
 from opera_validator import map_cslc_bursts_to_frames
+from opera_validator import shard_params
+from opera_validator import split_time_range
+from opera_validator import stream_cmr_granules
 from opera_validator import validate_disp_s1
 from opera_validator import validate_dswx_s1
 
@@ -165,3 +172,123 @@ def test_map_cslc_bursts_to_frames(mocker):
 
     # Assert that the Matching Bursts column contains the correct matching bursts for frame 2
     assert set(df.loc[1, "Matching Bursts"]) == {"t001_000003_iw1"}
+
+
+def test_split_time_range():
+    """ """
+    shards = split_time_range("2024-08-23T00:00:00Z", "2024-08-24T00:00:00Z", 4)
+
+    assert shards == [
+        ("2024-08-23T00:00:00Z", "2024-08-23T06:00:00.000Z"),
+        ("2024-08-23T06:00:00.000Z", "2024-08-23T12:00:00.000Z"),
+        ("2024-08-23T12:00:00.000Z", "2024-08-23T18:00:00.000Z"),
+        ("2024-08-23T18:00:00.000Z", "2024-08-24T00:00:00Z"),
+    ]
+    assert split_time_range("2024-08-23T00:00:00Z", "2024-08-24T00:00:00Z", 1) == [
+        ("2024-08-23T00:00:00Z", "2024-08-24T00:00:00Z")
+    ]
+
+
+def test_shard_params():
+    """ """
+    _, params = generate_url_params("2024-08-23T00:00:00Z", "2024-08-24T00:00:00Z", timestamp_type="revision")
+
+    paramss = shard_params(params, 2)
+
+    assert [p["revision_date"] for p in paramss] == [
+        "2024-08-23T00:00:00Z,2024-08-23T12:00:00.000Z",
+        "2024-08-23T12:00:00.000Z,2024-08-24T00:00:00Z",
+    ]
+    # the open-ended temporal filter is left unchanged
+    assert all(p["temporal"] == params["temporal"] for p in paramss)
+
+
+def test_stream_cmr_granules(mocker):
+    """
+
+    :param mocker:
+
+    """
+    def mock_get(url, params, headers):
+        response = mocker.Mock()
+        start = params["temporal"].split(",")[0]
+        if "CMR-Search-After" not in headers:
+            # first page for each shard. The shared granule simulates a temporal extent crossing shard boundaries
+            response.json.return_value = {"items": [{"meta": {"concept-id": f"G-{start}-1"}},
+                                                    {"meta": {"concept-id": "G-shared"}}]}
+            response.headers = {"CMR-Search-After": f"{start}-after"}
+        else:
+            response.json.return_value = {"items": [{"meta": {"concept-id": f"G-{start}-2"}}]}
+            response.headers = {}
+        return response
+
+    mocker.patch("opera_validator.CMR_PAGE_SIZE", 2)
+    mocker.patch("requests.Session.get", side_effect=mock_get)
+    _, params = generate_url_params("2024-08-23T00:00:00Z", "2024-08-24T00:00:00Z")
+
+    granules = list(stream_cmr_granules("https://cmr.earthdata.nasa.gov/search/granules.umm_json", params, shards=3))
+
+    concept_ids = [granule["meta"]["concept-id"] for granule in granules]
+    assert len(concept_ids) == len(set(concept_ids)) == 7
+    assert "G-shared" in concept_ids
+
+
+def test_find_unprocessed_rtc_native_ids():
+    """ """
+    df = pd.DataFrame([
+        {"Covered RTC Native IDs": "rtc_a, rtc_b", "MGRS Tiles": "15SXR, 15SXS"},
+        {"Covered RTC Native IDs": "rtc_c", "MGRS Tiles": "16SXR"},
+        {"Covered RTC Native IDs": "rtc_d, rtc_e", "MGRS Tiles": "17SXR"},
+    ])
+    mgrs_tiles_to_rtc_native_ids = {
+        "T15SXR": ["rtc_a"],
+        "T15SXS": ["rtc_b", "rtc_c"],
+        "T17SXR": ["rtc_e"],
+    }
+
+    unprocessed = find_unprocessed_rtc_native_ids(df, mgrs_tiles_to_rtc_native_ids)
+
+    assert unprocessed.to_dict() == {1: "rtc_c", 2: "rtc_d"}
+
+
+def test_mgrs_set_coverage(tmp_path):
+    """Tests MGRS Tile Set coverage computed from the (cached) inverted burst index, excluding water-only sets."""
+    mgrs_db_file = str(tmp_path / "mgrs_burst_db.sqlite")
+    with sqlite3.connect(mgrs_db_file) as conn:
+        conn.execute("CREATE TABLE mgrs_burst_db (mgrs_set_id TEXT, bursts TEXT, mgrs_tiles TEXT, land_ocean_flag TEXT)")
+        conn.executemany("INSERT INTO mgrs_burst_db VALUES (?, ?, ?, ?)", [
+            ("MS_1_1", "['t001_000001_iw1', 't001_000001_iw2']", "['15SXR', '15SXS']", "land"),
+            ("MS_1_2", "['t001_000001_iw2', 't001_000002_iw1', 't001_000003_iw1', 't001_000004_iw1']", "['16SXR']", "water/land"),
+            ("MS_1_3", "['t001_000001_iw3']", "['17SXR']", "water"),
+            ("MS_1_4", "['t001_000005_iw1']", "['18SXR']", "land"),
+        ])
+    conn.close()
+
+    burst_ids = {
+        "t001_000002_iw1": "OPERA_L2_RTC-S1_T001-000002-IW1_20231102T013115Z_20231102T060000Z_S1A_30_v1.0",
+        "t001_000001_iw2": "OPERA_L2_RTC-S1_T001-000001-IW2_20231101T013115Z_20231101T060000Z_S1A_30_v1.0",
+    }
+    burst_dates = {"t001_000002_iw1": "20231102T013115Z", "t001_000001_iw2": "20231101T013115Z"}
+
+    mgrs_sets, burst_index = load_mgrs_burst_index(mgrs_db_file, cache_dir=str(tmp_path / "cache"))
+    # a second load is served from the cache
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    cached_mgrs_sets, cached_burst_index = load_mgrs_burst_index(mgrs_db_file, cache_dir=str(tmp_path / "cache"))
+    pd.testing.assert_frame_equal(mgrs_sets, cached_mgrs_sets)
+    pd.testing.assert_frame_equal(burst_index, cached_burst_index)
+
+    df = compute_mgrs_set_coverage(mgrs_sets, burst_index, burst_ids, burst_dates)
+
+    assert df["MGRS Set ID"].tolist() == ["MS_1_1", "MS_1_2", "MS_1_4"]
+    assert df["Coverage Percentage"].tolist() == [50.0, 50.0, 0.0]
+    assert df["Covered RTC Burst IDs"].tolist() == ["t001_000001_iw2", "t001_000002_iw1, t001_000001_iw2", ""]
+    assert df["Covered RTC Native IDs"][1] == ", ".join(burst_ids.values())
+    assert df["Covered RTC Burst ID Count"].tolist() == [1, 2, 0]
+    assert df["Total RTC Burst IDs Count"].tolist() == [2, 4, 1]
+    assert df["MGRS Tiles"].tolist() == ["15SXR, 15SXS", "16SXR", "18SXR"]
+    assert df["MGRS Tiles Count"].tolist() == [2, 1, 1]
+    assert df["RTC Burst ID Dates"].tolist() == [
+        [pd.Timestamp("2023-11-01T01:31:15")],
+        [pd.Timestamp("2023-11-02T01:31:15"), pd.Timestamp("2023-11-01T01:31:15")],
+        [],
+    ]
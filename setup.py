@@ -124,7 +124,12 @@ setup(
             "botocore",
             "elasticsearch[async]",
             "more-itertools==8.13.0",
-            'pytest-asyncio==0.20.3'
+            'pytest-asyncio==0.20.3',
+            "filelock==3.6.0",
+            "moto[s3]==5.1.22",
+            "psutil==7.2.2",
+            "pytest-xdist==3.1.0",
+            "python-dotenv==0.20.0"
         ],
         "audit": [
             # The list of dependencies required for the (internal) audit tools.
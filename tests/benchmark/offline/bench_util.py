@@ -0,0 +1,154 @@
+"""Measurement and reporting helpers for the offline benchmarks."""
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    scale: int
+    operations: int
+    """Units of work (e.g. granules, files) processed across all iterations"""
+    latencies: list[float]
+    """Wall-clock seconds of each iteration"""
+    peak_rss_mb: float
+    round_trips: dict = field(default_factory=dict)
+    """Simulated service requests issued, keyed by service"""
+
+    @property
+    def total_seconds(self):
+        return sum(self.latencies)
+
+    @property
+    def throughput(self):
+        """Operations per second"""
+        return self.operations / self.total_seconds if self.total_seconds else float("inf")
+
+    def percentile(self, p: int) -> float:
+        if len(self.latencies) == 1:
+            return self.latencies[0]
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[p - 1]
+
+    def to_dict(self):
+        return {
+            **asdict(self),
+            "total_seconds": self.total_seconds,
+            "throughput": self.throughput,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+    def __str__(self):
+        round_trips = ", ".join(f"{service}={n:,}" for service, n in self.round_trips.items())
+        return (f"{self.name:<36} scale={self.scale:<7,} {self.throughput:>10,.1f} ops/s "
+                f"p50={self.percentile(50) * 1000:>9,.1f}ms p95={self.percentile(95) * 1000:>9,.1f}ms "
+                f"p99={self.percentile(99) * 1000:>9,.1f}ms peak_rss={self.peak_rss_mb:>8,.1f}MB {round_trips}")
+
+
+class RssSampler:
+    """Samples the resident set size of this process in the background and records the peak."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current_rss():
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        # ru_maxrss is the process high-water mark, in KiB on Linux and bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_rss = max(self.peak_rss, self.current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_rss = self.current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, self.current_rss())
+
+
+def run_benchmark(name: str, func: Callable[[], object], *, scale: int, operations_per_iteration: int,
+                  iterations=1, setup: Optional[Callable[[], None]] = None,
+                  round_trips: Optional[Callable[[], dict]] = None) -> BenchmarkResult:
+    """
+    Runs `func` the given number of iterations, timing each one.
+
+    :param setup: called before each iteration, outside of the timed region.
+    :param round_trips: called after the last iteration to collect simulated request counts.
+    """
+    latencies = []
+    with RssSampler() as rss_sampler:
+        for _ in range(iterations):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - start)
+
+    result = BenchmarkResult(
+        name=name,
+        scale=scale,
+        operations=operations_per_iteration * iterations,
+        latencies=latencies,
+        peak_rss_mb=rss_sampler.peak_rss / 2 ** 20,
+        round_trips=round_trips() if round_trips else {},
+    )
+    logger.info(str(result))
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def write_report(results: list[BenchmarkResult], report_dir: Path) -> Path:
+    """Writes the results to a JSON report named after the current commit, for comparison with compare.py"""
+    revision = git_revision()
+    report = {
+        "revision": revision,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": [result.to_dict() for result in results],
+    }
+
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_path = report_dir / f"offline_benchmark_{revision}_{datetime.now():%Y%m%dT%H%M%S}.json"
+    report_path.write_text(json.dumps(report, indent=2))
+    return report_path
@@ -0,0 +1,53 @@
+"""
+Compares two offline benchmark reports and exits non-zero when any benchmark regressed.
+
+Usage: python -m tests.benchmark.offline.compare BASELINE.json CANDIDATE.json [--threshold 0.10]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def load_results(report_path: Path) -> dict[str, dict]:
+    report = json.loads(report_path.read_text())
+    return {result["name"]: result for result in report["results"]}
+
+
+def compare(baseline: dict[str, dict], candidate: dict[str, dict], threshold: float) -> list[str]:
+    """Prints a comparison table and returns the names of benchmarks whose throughput dropped by more than `threshold`"""
+    regressions = []
+    print(f"{'benchmark':<36} {'baseline ops/s':>15} {'candidate ops/s':>16} {'change':>8} {'p95 change':>11}")
+    for name in sorted(baseline.keys() & candidate.keys()):
+        base, cand = baseline[name], candidate[name]
+        throughput_change = cand["throughput"] / base["throughput"] - 1 if base["throughput"] else 0.0
+        p95_change = cand["p95"] / base["p95"] - 1 if base["p95"] else 0.0
+        regressed = throughput_change < -threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<36} {base['throughput']:>15,.1f} {cand['throughput']:>16,.1f} "
+              f"{throughput_change:>+8.1%} {p95_change:>+11.1%}{'  REGRESSION' if regressed else ''}")
+
+    for name in sorted(baseline.keys() ^ candidate.keys()):
+        print(f"{name:<36} only present in {'baseline' if name in baseline else 'candidate'}")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Maximum tolerated fractional drop in throughput. Defaults to %(default)s.")
+    args = parser.parse_args(argv)
+
+    regressions = compare(load_results(args.baseline), load_results(args.candidate), args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {regressions}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import logging
+import os
+from pathlib import Path
+
+import pytest
+
+from tests.benchmark.conftest import config
+from .bench_util import write_report
+from .fakes import FakeElasticsearchUtility, install_hysds_stand_ins
+
+# must run before any data_subscriber module is imported by the benchmarks
+install_hysds_stand_ins()
+
+logging.getLogger("data_subscriber").setLevel(logging.WARNING)
+logging.getLogger("tools.ops.cmr_audit").setLevel(logging.WARNING)
+
+_results = []
+
+
+@pytest.fixture(scope="session")
+def benchmark_config():
+    """Benchmark scale and simulated service latencies. Override via environment variables or .env"""
+    return {
+        "scale": int(config.get("OFFLINE_BENCHMARK_SCALE", 1000)),
+        "iterations": int(config.get("OFFLINE_BENCHMARK_ITERATIONS", 3)),
+        "es_latency": float(config.get("OFFLINE_BENCHMARK_ES_LATENCY_MS", 1)) / 1000,
+        "cmr_latency": float(config.get("OFFLINE_BENCHMARK_CMR_LATENCY_MS", 50)) / 1000,
+        "file_size": int(config.get("OFFLINE_BENCHMARK_FILE_SIZE_BYTES", 64 * 1024)),
+    }
+
+
+@pytest.fixture
+def benchmark_results():
+    """Benchmarks append their BenchmarkResults here. They are written to a JSON report at the end of the session."""
+    return _results
+
+
+@pytest.fixture
+def fake_es(benchmark_config):
+    """Installs an in-memory Elasticsearch as the data subscriber's ES connection."""
+    from data_subscriber import es_conn_util
+
+    es_util = FakeElasticsearchUtility(logger=logging.getLogger(__name__), latency=benchmark_config["es_latency"])
+    es_conn_util.CONN = es_util
+    yield es_util
+    es_conn_util.CONN = None
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Local S3 backed by moto"""
+    from moto import mock_aws
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_SESSION_TOKEN", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-west-2")
+    with mock_aws():
+        yield
+
+
+@pytest.fixture(autouse=True)
+def working_dir(tmp_path, monkeypatch):
+    """Runs each benchmark in a scratch directory, as the subscriber writes downloads to the working directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("USER", os.environ.get("USER", "benchmark"))
+    return tmp_path
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+
+    terminalreporter.section("offline benchmark results")
+    for result in _results:
+        terminalreporter.write_line(str(result))
+
+    report_path = write_report(_results, Path(config.get("OFFLINE_BENCHMARK_REPORT_DIR", "target/reports/benchmark")))
+    terminalreporter.write_line(f"Report written to {report_path}")
@@ -0,0 +1,592 @@
+"""
+In-process stand-ins for the external services the data subscriber talks to, for offline benchmarking.
+
+* FakeCmrServer replays canned UMM-JSON granule pages over HTTP, paging with the CMR-Search-After header.
+* FakeElasticsearch implements the subset of the low-level Elasticsearch client used by the PCM (search/scroll with
+  slices, bulk, update_by_query, mget), backed by in-memory indices.
+* FakeElasticsearchUtility wraps FakeElasticsearch with the hysds_commons ElasticsearchUtility interface.
+
+Every simulated request sleeps for a configurable latency and is counted, so benchmarks can report round trips as well
+as wall-clock time. S3 is provided by moto (see conftest.py).
+"""
+import copy
+import fnmatch
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import types
+import uuid
+import zlib
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from elasticsearch.serializer import JSONSerializer
+
+logger = logging.getLogger(__name__)
+
+
+#######################################################################
+# CMR
+#######################################################################
+
+class FakeCmrServer:
+    """Replays canned UMM-JSON granule items from an in-process HTTP server, paging with CMR-Search-After."""
+
+    def __init__(self, items: list[dict], latency: float = 0.0):
+        self.items = items
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = None
+
+    @property
+    def netloc(self):
+        return "{}:{}".format(*self._httpd.server_address)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def page(self, search_after: Optional[str], page_size: int):
+        with self._lock:
+            self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        offset = int(search_after or 0)
+        items = self.items[offset:offset + page_size]
+        next_search_after = str(offset + len(items)) if offset + len(items) < len(self.items) else None
+        return items, next_search_after
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond(parse_qs(urlparse(self.path).query))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                self._respond(parse_qs(body))
+
+            def _respond(self, params):
+                page_size = int(params.get("page_size", ["10"])[-1])
+                items, next_search_after = server.page(self.headers.get("CMR-Search-After"), page_size)
+
+                payload = json.dumps({"hits": len(server.items), "took": 1, "items": items}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/vnd.nasa.cmr.umm_results+json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("CMR-Hits", str(len(server.items)))
+                if next_search_after:
+                    self.send_header("CMR-Search-After", next_search_after)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        return Handler
+
+
+HLS_L30_BANDS = ["B02", "B03", "B04", "B05", "B06", "B07", "Fmask"]
+
+
+def make_hls_l30_umm_items(n: int, start_dt: datetime, revision_dt: datetime, bucket="lp-prod-protected") -> list[dict]:
+    """Creates n synthetic HLSL30 UMM-JSON granule items with one https and one s3 URL per band."""
+    items = []
+    for i in range(n):
+        acquisition_dt = start_dt + timedelta(minutes=i)
+        tile = "T{:02d}{}{}{}".format(i % 60 + 1, "CDEFGHJKLMNPQRSTUVWX"[i % 20], "ABCDEFGH"[i % 8], "ABCDEFGH"[i // 8 % 8])
+        granule_id = "HLS.L30.{}.{}.v2.0".format(tile, acquisition_dt.strftime("%Y%jT%H%M%S"))
+        urls = [
+            url
+            for band in HLS_L30_BANDS
+            for url in (
+                f"https://data.lpdaac.earthdatacloud.nasa.gov/{bucket}/HLSL30.020/{granule_id}/{granule_id}.{band}.tif",
+                f"s3://{bucket}/HLSL30.020/{granule_id}/{granule_id}.{band}.tif",
+            )
+        ]
+        items.append({
+            "meta": {
+                "concept-id": f"G{1000000000 + i}-LPCLOUD",
+                "revision-id": 1,
+                "provider-id": "LPCLOUD",
+                "native-id": granule_id,
+                "revision-date": revision_dt.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            },
+            "umm": {
+                "GranuleUR": granule_id,
+                "TemporalExtent": {"RangeDateTime": {"BeginningDateTime": acquisition_dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")}},
+                "ProviderDates": [{"Type": "Insert", "Date": revision_dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")}],
+                "DataGranule": {"ProductionDateTime": revision_dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")},
+                "Platforms": [{"ShortName": "LANDSAT-8"}],
+                "SpatialExtent": {"HorizontalSpatialDomain": {"Geometry": {"GPolygons": [{"Boundary": {"Points": [
+                    {"Longitude": -118.0, "Latitude": 34.0},
+                    {"Longitude": -117.0, "Latitude": 34.0},
+                    {"Longitude": -117.0, "Latitude": 35.0},
+                    {"Longitude": -118.0, "Latitude": 34.0},
+                ]}}]}}},
+                "RelatedUrls": [{"URL": url, "Type": "GET DATA"} for url in urls],
+                "AdditionalAttributes": [
+                    {"Name": "LANDSAT_PRODUCT_ID", "Values": [f"LC08_L1TP_{i:06d}_{acquisition_dt:%Y%m%d}_02_T1"]}
+                ],
+            },
+        })
+    return items
+
+
+#######################################################################
+# Elasticsearch
+#######################################################################
+
+def _json_default(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _roundtrip(doc):
+    """Serializes and deserializes a document the way the real client/server would."""
+    return json.loads(json.dumps(doc, default=_json_default))
+
+
+def _get_field(source: dict, field: str):
+    if field.endswith(".keyword"):
+        field = field[:-len(".keyword")]
+    value = source
+    for part in field.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _values_of(source: dict, _id: str, field: str):
+    value = _id if field == "_id" else _get_field(source, field)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _comparable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _unwrap(spec, *keys):
+    """Returns the single (field, value) pair of a term/match style clause."""
+    field, value = next(iter(spec.items()))
+    if isinstance(value, dict):
+        for key in keys:
+            if key in value:
+                return field, value[key]
+    return field, value
+
+
+def matches(query: Optional[dict], source: dict, _id: str) -> bool:
+    """Evaluates the subset of the Elasticsearch query DSL used by the PCM against a single document."""
+    if not query:
+        return True
+
+    clause, spec = next(iter(query.items()))
+
+    if clause == "match_all":
+        return True
+    if clause == "bool":
+        must = spec.get("must", []) + spec.get("filter", [])
+        must = must if isinstance(must, list) else [must]
+        should = spec.get("should", [])
+        should = should if isinstance(should, list) else [should]
+        must_not = spec.get("must_not", [])
+        must_not = must_not if isinstance(must_not, list) else [must_not]
+
+        if not all(matches(q, source, _id) for q in must):
+            return False
+        if any(matches(q, source, _id) for q in must_not):
+            return False
+        if should and (not must or spec.get("minimum_should_match")):
+            return any(matches(q, source, _id) for q in should)
+        return True
+    if clause in ("term", "match", "match_phrase"):
+        field, value = _unwrap(spec, "value", "query")
+        return any(str(v) == str(value) for v in _values_of(source, _id, field))
+    if clause == "terms":
+        field, values = next(iter(spec.items()))
+        values = {str(v) for v in values}
+        return any(str(v) in values for v in _values_of(source, _id, field))
+    if clause == "ids":
+        return _id in set(spec["values"])
+    if clause == "exists":
+        return bool(_values_of(source, _id, spec["field"]))
+    if clause == "prefix":
+        field, value = _unwrap(spec, "value")
+        return any(str(v).startswith(value) for v in _values_of(source, _id, field))
+    if clause == "range":
+        field, bounds = next(iter(spec.items()))
+        for v in _values_of(source, _id, field):
+            v = _comparable(v)
+            if all((
+                "gte" not in bounds or v >= _comparable(bounds["gte"]),
+                "gt" not in bounds or v > _comparable(bounds["gt"]),
+                "lte" not in bounds or v <= _comparable(bounds["lte"]),
+                "lt" not in bounds or v < _comparable(bounds["lt"]),
+            )):
+                return True
+        return False
+
+    raise NotImplementedError(f"Unsupported query clause for FakeElasticsearch: {clause}")
+
+
+def _project(source: dict, _source):
+    if _source is None or _source is True:
+        return source
+    if _source is False or _source == "false":
+        return None
+    includes = _source.get("includes", []) if isinstance(_source, dict) else _source
+    if includes == "false":
+        return None
+    if not includes:
+        return source
+    includes = [includes] if isinstance(includes, str) else includes
+    return {field: source[field] for field in includes if field in source}
+
+
+class FakeIndicesClient:
+    def __init__(self, es: "FakeElasticsearch"):
+        self._es = es
+
+    def refresh(self, index=None, **kwargs):
+        self._es.round_trip()
+        return {"_shards": {"failed": 0}}
+
+    def exists(self, index, **kwargs):
+        self._es.round_trip()
+        return bool(self._es.resolve(index))
+
+
+class FakeElasticsearch:
+    """In-memory stand-in for the subset of elasticsearch.Elasticsearch used by the PCM."""
+
+    def __init__(self, latency: float = 0.0, shards: int = 5):
+        self.latency = latency
+        self.shards = shards
+        self.indices = FakeIndicesClient(self)
+        # elasticsearch.helpers.bulk serializes actions with the client's serializer
+        self.transport = types.SimpleNamespace(serializer=JSONSerializer())
+        self.docs: dict[str, dict[str, dict]] = defaultdict(dict)
+        self.request_counts: dict[str, int] = defaultdict(int)
+        self._scrolls: dict[str, list] = {}
+        self._lock = threading.RLock()
+        self._seq = count()
+
+    def round_trip(self, operation=None):
+        operation = operation or sys._getframe(1).f_code.co_name
+        with self._lock:
+            self.request_counts[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def request_count(self):
+        return sum(self.request_counts.values())
+
+    def resolve(self, index) -> list[str]:
+        patterns = index if isinstance(index, (list, tuple)) else str(index).split(",")
+        with self._lock:
+            return [name for name in list(self.docs) if any(fnmatch.fnmatchcase(name, p) for p in patterns)]
+
+    def _hits(self, index, body: Optional[dict]):
+        body = body or {}
+        query = body.get("query")
+        slice_ = body.get("slice")
+        hits = []
+        with self._lock:
+            for name in self.resolve(index):
+                for _id, source in self.docs[name].items():
+                    if slice_ and zlib.crc32(_id.encode()) % slice_["max"] != slice_["id"]:
+                        continue
+                    if matches(query, source, _id):
+                        hits.append({"_index": name, "_type": "_doc", "_id": _id, "_score": 1.0, "_source": source})
+
+        for sort in reversed(body.get("sort", [])):
+            field, order = next(iter(sort.items())) if isinstance(sort, dict) else (sort, "asc")
+            order = order.get("order", "asc") if isinstance(order, dict) else order
+            hits.sort(key=lambda hit: str(_get_field(hit["_source"], field) or ""), reverse=order == "desc")
+
+        projected = []
+        for hit in hits:
+            hit = dict(hit)
+            source = _project(hit["_source"], body.get("_source"))
+            if source is None:
+                del hit["_source"]
+            else:
+                hit["_source"] = copy.deepcopy(source)
+            projected.append(hit)
+        return projected
+
+    def search(self, body=None, index=None, scroll=None, size=None, from_=None, params=None, **kwargs):
+        self.round_trip()
+        body = body or {}
+        hits = self._hits(index, body)
+        total = len(hits)
+        size = size if size is not None else body.get("size", 10)
+        offset = from_ if from_ is not None else body.get("from", 0)
+
+        response = {"took": 1, "timed_out": False, "_shards": {"total": self.shards, "successful": self.shards, "skipped": 0, "failed": 0},
+                    "hits": {"total": {"value": total, "relation": "eq"}, "hits": hits[offset:offset + size]}}
+
+        if scroll:
+            scroll_id = str(uuid.uuid4())
+            with self._lock:
+                self._scrolls[scroll_id] = [hits[offset + size:], size]
+            response["_scroll_id"] = scroll_id
+        return response
+
+    def scroll(self, body=None, scroll_id=None, scroll=None, **kwargs):
+        self.round_trip()
+        scroll_id = scroll_id or (body or {}).get("scroll_id")
+        with self._lock:
+            remaining, size = self._scrolls[scroll_id]
+            page, self._scrolls[scroll_id][0] = remaining[:size], remaining[size:]
+        return {"_scroll_id": scroll_id, "_shards": {"total": self.shards, "successful": self.shards, "skipped": 0, "failed": 0},
+                "hits": {"total": {"value": len(page), "relation": "eq"}, "hits": page}}
+
+    def clear_scroll(self, body=None, scroll_id=None, **kwargs):
+        self.round_trip()
+        scroll_ids = scroll_id or (body or {}).get("scroll_id") or []
+        scroll_ids = [scroll_ids] if isinstance(scroll_ids, str) else scroll_ids
+        with self._lock:
+            for _id in scroll_ids:
+                self._scrolls.pop(_id, None)
+        return {"succeeded": True}
+
+    def search_shards(self, index=None, **kwargs):
+        self.round_trip()
+        return {"shards": [[{"index": index, "shard": i, "primary": True}] for i in range(self.shards)]}
+
+    def count(self, body=None, index=None, **kwargs):
+        self.round_trip()
+        return {"count": len(self._hits(index, body))}
+
+    def index(self, index, body, id=None, **kwargs):
+        self.round_trip()
+        return self._index(index, body, id)
+
+    def _index(self, index, body, _id=None):
+        _id = _id or str(next(self._seq))
+        with self._lock:
+            result = "updated" if _id in self.docs[index] else "created"
+            self.docs[index][_id] = _roundtrip(body)
+        return {"_index": index, "_id": _id, "result": result}
+
+    def update(self, index, id, body, **kwargs):
+        self.round_trip()
+        return self._update(index, id, body)
+
+    def _update(self, index, _id, body):
+        with self._lock:
+            existing = self.docs[index].get(_id)
+            if existing is None:
+                if not body.get("doc_as_upsert"):
+                    raise KeyError(f"document_missing_exception [{index}][{_id}]")
+                self.docs[index][_id] = _roundtrip(body["doc"])
+                return {"_index": index, "_id": _id, "result": "created"}
+            _deep_merge(existing, _roundtrip(body["doc"]))
+        return {"_index": index, "_id": _id, "result": "updated"}
+
+    def get(self, index, id, **kwargs):
+        self.round_trip()
+        with self._lock:
+            for name in self.resolve(index):
+                if id in self.docs[name]:
+                    return {"_index": name, "_id": id, "found": True, "_source": copy.deepcopy(self.docs[name][id])}
+        return {"_index": index, "_id": id, "found": False}
+
+    def mget(self, body, index=None, **kwargs):
+        self.round_trip()
+        docs = []
+        with self._lock:
+            for doc in body["docs"]:
+                name, _id = doc.get("_index", index), doc["_id"]
+                if _id in self.docs.get(name, {}):
+                    docs.append({"_index": name, "_id": _id, "found": True,
+                                 "_source": copy.deepcopy(self.docs[name][_id])})
+                else:
+                    docs.append({"_index": name, "_id": _id, "found": False})
+        return {"docs": docs}
+
+    def delete(self, index, id, **kwargs):
+        self.round_trip()
+        with self._lock:
+            self.docs[index].pop(id, None)
+        return {"_index": index, "_id": id, "result": "deleted"}
+
+    def update_by_query(self, index, body=None, refresh=None, **kwargs):
+        """Supports scripts of the form `ctx._source.<field> = '<value>'`, as used by the product catalogs."""
+        self.round_trip()
+        assignments = re.findall(r"ctx\._source\.(\w+)\s*=\s*'([^']*)'", body["script"]["source"])
+        hits = self._hits(index, {"query": body.get("query"), "_source": False})
+        with self._lock:
+            for hit in hits:
+                for field, value in assignments:
+                    self.docs[hit["_index"]][hit["_id"]][field] = value
+        return {"total": len(hits), "updated": len(hits), "failures": []}
+
+    def bulk(self, body, index=None, **kwargs):
+        self.round_trip()
+        lines = [json.loads(line) for line in (body if isinstance(body, str) else "\n".join(body)).splitlines() if line]
+        items = []
+        errors = False
+        i = 0
+        while i < len(lines):
+            op_type, meta = next(iter(lines[i].items()))
+            name, _id = meta.get("_index", index), meta.get("_id")
+            try:
+                if op_type in ("index", "create"):
+                    result = self._index(name, lines[i + 1], _id)
+                    i += 2
+                elif op_type == "update":
+                    result = self._update(name, _id, lines[i + 1])
+                    i += 2
+                elif op_type == "delete":
+                    with self._lock:
+                        self.docs[name].pop(_id, None)
+                    result = {"_index": name, "_id": _id, "result": "deleted"}
+                    i += 1
+                else:
+                    raise NotImplementedError(op_type)
+                items.append({op_type: {**result, "status": 200}})
+            except KeyError as err:
+                errors = True
+                items.append({op_type: {"_index": name, "_id": _id, "status": 404, "error": {"reason": str(err)}}})
+                i += 2
+        return {"took": 1, "errors": errors, "items": items}
+
+
+def _deep_merge(target: dict, updates: dict):
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = value
+
+
+class FakeElasticsearchUtility:
+    """Stand-in for hysds_commons.elasticsearch_utils.ElasticsearchUtility, backed by FakeElasticsearch."""
+
+    def __init__(self, es_url=None, logger=None, latency: float = 0.0, **kwargs):
+        self.es = FakeElasticsearch(latency=latency)
+        self.es_url = es_url
+        self.logger = logger
+
+    def index_document(self, index, body, id=None, **kwargs):
+        return self.es.index(index=index, body=body, id=id)
+
+    def update_document(self, id, body, index, **kwargs):
+        return self.es.update(index=index, id=id, body=body)
+
+    def get_by_id(self, index, id, **kwargs):
+        return self.es.get(index=index, id=id)
+
+    def delete_by_id(self, index, id, **kwargs):
+        return self.es.delete(index=index, id=id)
+
+    def search(self, index=None, body=None, **kwargs):
+        return self.es.search(index=index, body=body, **kwargs)
+
+    def get_count(self, index=None, body=None, **kwargs):
+        return self.es.count(index=index, body=body)["count"]
+
+    def query(self, index=None, body=None, **kwargs):
+        """Returns all hits, paging with a scroll like ElasticsearchUtility.query"""
+        response = self.es.search(index=index, body=body, scroll="2m", size=1000)
+        documents = response["hits"]["hits"]
+        while response["hits"]["hits"]:
+            response = self.es.scroll(scroll_id=response["_scroll_id"], scroll="2m")
+            documents.extend(response["hits"]["hits"])
+        self.es.clear_scroll(scroll_id=response["_scroll_id"])
+        return documents
+
+    @staticmethod
+    def construct_bool_query(conditions: dict):
+        return [{"match": {field: value}} for field, value in conditions.items()]
+
+
+#######################################################################
+# HySDS
+#######################################################################
+
+def _calculate_checksum_from_localized_file(file_name, hash_algo):
+    """Stand-in for hysds.utils.calculate_checksum_from_localized_file"""
+    hash_tool = hashlib.new(hash_algo)
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hash_tool.update(chunk)
+    return hash_tool.hexdigest()
+
+
+def install_hysds_stand_ins():
+    """
+    Registers minimal stand-ins for the HySDS modules imported by the data subscriber, when HySDS itself is not
+    installed, so the offline benchmarks can run on a laptop or in CI. Real modules are left untouched.
+    """
+    def _missing(module_name):
+        try:
+            __import__(module_name)
+            return False
+        except ImportError:
+            return True
+
+    def _package(package_name):
+        # submodules can only be imported from modules registered as packages
+        package = sys.modules.setdefault(package_name, types.ModuleType(package_name))
+        if not hasattr(package, "__path__"):
+            package.__path__ = []
+        return package
+
+    if _missing("hysds.celery"):
+        hysds = _package("hysds")
+        celery = types.ModuleType("hysds.celery")
+        celery.app = types.SimpleNamespace(conf={
+            "GRQ_AWS_ES": False, "GRQ_ES_HOST": None, "GRQ_ES_URL": None, "AWS_REGION": "us-west-2"
+        })
+        hysds.celery = celery
+        sys.modules["hysds.celery"] = celery
+
+    if _missing("hysds.utils"):
+        hysds = _package("hysds")
+        utils = types.ModuleType("hysds.utils")
+        utils.calculate_checksum_from_localized_file = _calculate_checksum_from_localized_file
+        hysds.utils = utils
+        sys.modules["hysds.utils"] = utils
+
+    if _missing("hysds_commons.elasticsearch_utils"):
+        hysds_commons = _package("hysds_commons")
+        elasticsearch_utils = types.ModuleType("hysds_commons.elasticsearch_utils")
+        elasticsearch_utils.ElasticsearchUtility = FakeElasticsearchUtility
+        hysds_commons.elasticsearch_utils = elasticsearch_utils
+        sys.modules["hysds_commons.elasticsearch_utils"] = elasticsearch_utils
+
+    if _missing("hysds_commons.job_utils"):
+        hysds_commons = _package("hysds_commons")
+        job_utils = types.ModuleType("hysds_commons.job_utils")
+        job_utils.submit_mozart_job = lambda *args, **kwargs: str(uuid.uuid4())
+        hysds_commons.job_utils = job_utils
+        sys.modules["hysds_commons.job_utils"] = job_utils
@@ -0,0 +1,183 @@
+"""
+Offline throughput benchmarks for the data subscriber's query, catalog, evaluation and download paths.
+
+Runs against in-process CMR, Elasticsearch and S3 stand-ins (see fakes.py). See README.md for configuration.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import boto3
+import pytest
+
+import data_subscriber.cmr
+from data_subscriber.hls.hls_catalog import HLSProductCatalog
+from data_subscriber.hls.hls_query import HlsCmrQuery
+from data_subscriber.lpdaac_download import DaacDownloadLpdaac
+from data_subscriber.parser import create_parser
+from tools.ops.cmr_audit import cmr_client
+from util.conf_util import get_settings_conf
+from .bench_util import run_benchmark
+from .fakes import FakeCmrServer, make_hls_l30_umm_items
+
+logger = logging.getLogger(__name__)
+
+NOW = datetime.utcnow().replace(microsecond=0)
+START = NOW - timedelta(days=1)
+CMR_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+@pytest.fixture
+def http_cmr(monkeypatch):
+    """The subscriber always queries CMR over https. Route those requests to the plain-http FakeCmrServer instead."""
+    async def async_cmr_posts(url, request_bodies, session=None):
+        return await cmr_client.async_cmr_posts(url.replace("https://", "http://", 1), request_bodies, session)
+
+    monkeypatch.setattr(data_subscriber.cmr, "async_cmr_posts", async_cmr_posts)
+
+
+def catalog_hls_items(catalog: HLSProductCatalog, items: list[dict], job_id="job-benchmark-query"):
+    """Catalogs each band of the given UMM-JSON items, the same way a query job does"""
+    args = create_parser().parse_args(["query", "-c", "HLSL30"])
+    granules = data_subscriber.cmr.response_jsons_to_cmr_granules(args, [{"items": items}])
+    for granule in granules:
+        granule["filtered_urls"] = data_subscriber.cmr._filter_granules(granule, args)
+    HlsCmrQuery(args, "token", catalog, "cmr", job_id, {}).catalog_granules(granules, NOW)
+    return granules
+
+
+def test_cmr_query_run_query(benchmark_config, benchmark_results, fake_es, http_cmr):
+    scale = benchmark_config["scale"]
+    items = make_hls_l30_umm_items(scale, start_dt=START, revision_dt=NOW - timedelta(hours=1))
+    settings = get_settings_conf().cfg
+
+    with FakeCmrServer(items, latency=benchmark_config["cmr_latency"]) as cmr_server:
+        args = create_parser().parse_args([
+            "query", "-c", "HLSL30", "--no-schedule-download", "--chunk-size=1",
+            f"--start-date={START:{CMR_TIME_FORMAT}}", f"--end-date={NOW:{CMR_TIME_FORMAT}}"
+        ])
+        catalog = HLSProductCatalog(logger)
+        query = HlsCmrQuery(args, "token", catalog, cmr_server.netloc, "job-benchmark-query", settings)
+
+        def setup():
+            fake_es.es.docs.clear()
+            fake_es.es.request_counts.clear()
+            cmr_server.request_count = 0
+
+        def run():
+            results = query.run_query(args, "token", catalog, cmr_server.netloc, "job-benchmark-query", settings)
+            assert len(results["download_granules"]) == scale
+
+        benchmark_results.append(run_benchmark(
+            "CmrQuery.run_query[HLSL30]", run, scale=scale, operations_per_iteration=scale,
+            iterations=benchmark_config["iterations"], setup=setup,
+            round_trips=lambda: {"cmr": cmr_server.request_count, "es": fake_es.es.request_count}
+        ))
+
+
+def test_product_catalog_writes(benchmark_config, benchmark_results, fake_es):
+    scale = benchmark_config["scale"]
+    items = make_hls_l30_umm_items(scale, start_dt=START, revision_dt=NOW)
+    catalog = HLSProductCatalog(logger)
+    granules = catalog_hls_items(catalog, items)
+
+    def setup():
+        fake_es.es.docs.clear()
+        fake_es.es.request_counts.clear()
+
+    def run():
+        HlsCmrQuery(create_parser().parse_args(["query", "-c", "HLSL30"]), "token", catalog, "cmr", "job-benchmark-catalog", {}).catalog_granules(
+            granules, NOW, force_es_conn=catalog
+        )
+        for granule in granules:
+            catalog.mark_download_job_id(f'{granule["granule_id"]}-r1', "job-benchmark-download")
+
+    benchmark_results.append(run_benchmark(
+        "ProductCatalog.process_url[HLS]", run, scale=scale, operations_per_iteration=scale,
+        iterations=benchmark_config["iterations"], setup=setup,
+        round_trips=lambda: {"es": fake_es.es.request_count}
+    ))
+
+
+def test_rtc_evaluator(benchmark_config, benchmark_results, fake_es):
+    mgrs_db_filepath = Path(os.environ.get("MGRS_TILE_COLLECTION_DB_FILEPATH", "~/Downloads/MGRS_tile_collection_v0.3.sqlite"))
+    if not mgrs_db_filepath.expanduser().exists():
+        pytest.skip(f"MGRS tile collection DB not found at {mgrs_db_filepath}. Set MGRS_TILE_COLLECTION_DB_FILEPATH.")
+
+    from data_subscriber.rtc import evaluator
+    from data_subscriber.rtc import mgrs_bursts_collection_db_client as mbc_client
+
+    mgrs = mbc_client.cached_load_mgrs_burst_db(filter_land=True)
+
+    # one RTC product per burst of as many MGRS sets as needed to reach the requested scale
+    scale = benchmark_config["scale"]
+    acquisition_dt = START
+    creation_timestamp = (NOW - timedelta(days=1)).isoformat(timespec="seconds")
+    products = 0
+    for mgrs_set_id, bursts in zip(mgrs["mgrs_set_id"], mgrs["bursts_parsed"]):
+        for mapping_burst_id in sorted(bursts):
+            product_burst_id = mbc_client.mapping_burst_id_to_product_burst_id(mapping_burst_id)
+            product_id = f"OPERA_L2_RTC-S1_{product_burst_id}_{acquisition_dt:%Y%m%dT%H%M%S}Z_{NOW:%Y%m%dT%H%M%S}Z_S1A_30_v1.0"
+            fake_es.es.index(index=f"rtc_catalog-{NOW:%Y.%m}", id=f"{product_id}.h5", body={
+                "granule_id": product_id,
+                "creation_timestamp": creation_timestamp,
+                "mgrs_set_id": mgrs_set_id,
+                "mgrs_set_id_acquisition_ts_cycle_index": f"{mgrs_set_id}$0",
+            })
+            products += 1
+        if products >= scale:
+            break
+
+    fake_es.es.request_counts.clear()
+
+    def run():
+        evaluator.main(coverage_target=100)
+
+    benchmark_results.append(run_benchmark(
+        "rtc.evaluator.main", run, scale=products, operations_per_iteration=products,
+        iterations=benchmark_config["iterations"],
+        setup=fake_es.es.request_counts.clear,
+        round_trips=lambda: {"es": fake_es.es.request_count}
+    ))
+
+
+def test_daac_download_run_download(benchmark_config, benchmark_results, fake_es, s3, monkeypatch):
+    # downloads are far more expensive per granule than queries. benchmark a tenth of the configured scale
+    scale = max(1, benchmark_config["scale"] // 10)
+    items = make_hls_l30_umm_items(scale, start_dt=START, revision_dt=NOW)
+    catalog = HLSProductCatalog(logger)
+    granules = catalog_hls_items(catalog, items)
+
+    s3_client = boto3.client("s3", region_name="us-west-2")
+    s3_client.create_bucket(Bucket="lp-prod-protected", CreateBucketConfiguration={"LocationConstraint": "us-west-2"})
+    body = os.urandom(benchmark_config["file_size"])
+    s3_urls = [url for granule in granules for url in granule["filtered_urls"] if url.startswith("s3://")]
+    for s3_url in s3_urls:
+        bucket, key = s3_url[len("s3://"):].split("/", 1)
+        s3_client.put_object(Bucket=bucket, Key=key, Body=body)
+
+    # product extraction reads real HLS metadata from the downloaded files. only measure transfer and bookkeeping
+    monkeypatch.setattr(DaacDownloadLpdaac, "extract_many_to_one", lambda self, products, group_dataset_id, settings_cfg: None)
+
+    args = create_parser().parse_args([
+        "download", "-p", "LPCLOUD", "-x", "s3",
+        f"--start-date={START:{CMR_TIME_FORMAT}}", f"--end-date={(NOW + timedelta(days=1)):{CMR_TIME_FORMAT}}"
+    ])
+    downloader = None
+
+    def setup():
+        nonlocal downloader
+        downloader = DaacDownloadLpdaac("LPCLOUD")
+        downloader.cfg = {**downloader.cfg, "USE_DAAC_S3_CREDENTIALS": False}
+        fake_es.es.request_counts.clear()
+
+    def run():
+        downloader.run_download(args, "token", catalog, "urs.earthdata.nasa.gov", "username", "password", "cmr",
+                                "job-benchmark-download")
+
+    benchmark_results.append(run_benchmark(
+        "DaacDownload.run_download[HLS, s3]", run, scale=scale, operations_per_iteration=len(s3_urls),
+        iterations=benchmark_config["iterations"], setup=setup,
+        round_trips=lambda: {"es": fake_es.es.request_count}
+    ))
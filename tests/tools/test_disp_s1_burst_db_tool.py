@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+from data_subscriber.cslc_utils import _HistBursts
+from tools.disp_s1_burst_db_tool import validate_frame
+
+FRAME_ID = 46800
+BURST_IDS = {"T175-374393-IW1", "T175-374393-IW2", "T175-374393-IW3"}
+
+
+def generate_disp_burst_map():
+    hist_bursts = _HistBursts()
+    hist_bursts.frame_number = FRAME_ID
+    hist_bursts.burst_ids = set(BURST_IDS)
+    hist_bursts.sensing_datetime_days_index = [0, 12]
+    return {FRAME_ID: hist_bursts}
+
+
+def generate_granules(acquisition_cycle, burst_ids, polarization="VV"):
+    return [{"acquisition_cycle": acquisition_cycle,
+             "burst_id": burst_id,
+             "granule_id": f"OPERA_L2_CSLC-S1_{burst_id}_{acquisition_cycle}_{polarization}_v1.1"}
+            for burst_id in sorted(burst_ids)]
+
+
+def test_validate_frame_valid():
+    all_granules = generate_granules(0, BURST_IDS) + generate_granules(12, BURST_IDS)
+
+    result = validate_frame(FRAME_ID, all_granules, generate_disp_burst_map())
+
+    assert result == {
+        "frame_id": FRAME_ID,
+        "granules_found": 6,
+        "valid": True,
+        "missing_cycles": {},
+        "unexpected_cycles": {}
+    }
+
+
+def test_validate_frame_missing_bursts():
+    incomplete_granules = generate_granules(12, {"T175-374393-IW1"})
+    all_granules = generate_granules(0, BURST_IDS) + incomplete_granules
+
+    result = validate_frame(FRAME_ID, all_granules, generate_disp_burst_map())
+
+    assert result["valid"] is False
+    assert result["missing_cycles"] == {
+        12: {"missing_bursts": ["T175-374393-IW2", "T175-374393-IW3"],
+             "granules": [granule["granule_id"] for granule in incomplete_granules]}
+    }
+    assert result["unexpected_cycles"] == {}
+
+
+def test_validate_frame_unexpected_complete_cycle():
+    unexpected_granules = generate_granules(24, BURST_IDS)
+    all_granules = generate_granules(0, BURST_IDS) + generate_granules(12, BURST_IDS) + unexpected_granules
+
+    # An incomplete cycle that isn't in the database is not unexpected
+    all_granules += generate_granules(36, {"T175-374393-IW1"})
+
+    result = validate_frame(FRAME_ID, all_granules, generate_disp_burst_map())
+
+    assert result["valid"] is False
+    assert result["missing_cycles"] == {}
+    assert result["unexpected_cycles"] == {
+        24: {"granules": [granule["granule_id"] for granule in unexpected_granules]}
+    }
+
+
+def test_validate_frame_excludes_hh_cycles():
+    all_granules = generate_granules(0, BURST_IDS) + generate_granules(12, BURST_IDS)
+
+    # HH polarization is not processed, so it is left out of the database on purpose
+    all_granules += generate_granules(24, BURST_IDS, polarization="HH")
+
+    result = validate_frame(FRAME_ID, all_granules, generate_disp_burst_map())
+
+    assert result["valid"] is True
+    assert result["granules_found"] == 9
+    assert result["unexpected_cycles"] == {}
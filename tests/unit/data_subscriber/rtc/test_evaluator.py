@@ -29,7 +29,7 @@ def test_grace_period__when_bursts_out_of_grace_period__then_kept_in_evaluator_r
     # ARRANGE
     evaluation_dt.return_value = dateutil.parser.parse("2024-01-01T00:00:00")
     grace_period_mins = 2
-    es_conn_util.get_es_connection().query.return_value = [
+    es_conn_util.sliced_scan.return_value = [
         {
             "_source": {
                 "granule_id": test_granule_id,
@@ -67,7 +67,7 @@ def test_grace_period__when_bursts_in_grace_period__then_omitted_from_evaluator_
     # ARRANGE
     evaluation_dt.return_value = dateutil.parser.parse("2024-01-01T00:00:00")
     grace_period_mins = 2
-    es_conn_util.get_es_connection().query.return_value = [
+    es_conn_util.sliced_scan.return_value = [
         {
             "_source": {
                 "granule_id": test_granule_id,
@@ -104,7 +104,7 @@ def test_coverage_target__when_bursts_out_of_grace_period__then_kept_in_evaluato
     # ARRANGE
     evaluation_dt.return_value = dateutil.parser.parse("2024-01-01T00:00:00")
     grace_period_mins = 2
-    es_conn_util.get_es_connection().query.return_value = [
+    es_conn_util.sliced_scan.return_value = [
         {
             "_source": {
                 "granule_id": test_granule_id,
@@ -142,7 +142,7 @@ def test_coverage_target__when_bursts_in_grace_period__then_omitted_from_evaluat
     # ARRANGE
     evaluation_dt.return_value = dateutil.parser.parse("2024-01-01T00:00:00")
     grace_period_mins = 2
-    es_conn_util.get_es_connection().query.return_value = [
+    es_conn_util.sliced_scan.return_value = [
         {
             "_source": {
                 "granule_id": test_granule_id,
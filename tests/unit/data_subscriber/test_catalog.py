@@ -169,7 +169,7 @@ def test_hls_product_catalog():
         assert mock_update_by_query.call_args.kwargs["body"]["script"]["source"] == "ctx._source.download_job_id = 'test_job_id'"
         assert mock_update_by_query.call_args.kwargs["body"]["query"]["bool"]["must"][0]["term"]["download_batch_id"] == "test_batch_id"
 
-    with patch("tests.unit.conftest.MockElasticsearchUtility.query") as mock_query:
+    with patch("data_subscriber.catalog.es_conn_util.sliced_scan") as mock_query:
         # Tests for ProductCatalog.get_all_between()
         start_dt = datetime.now()
         end_dt = start_dt + timedelta(seconds=30)
@@ -204,6 +204,35 @@ def test_hls_spatial_product_catalog():
     assert isinstance(hls_spatial_product_catalog.generate_es_index_name(), str)
     assert hls_spatial_product_catalog.generate_es_index_name().startswith("hls_spatial_catalog-")
 
+def test_mark_products_as_downloaded():
+    """Tests that ProductCatalog.mark_products_as_downloaded() resolves indexes in one query and marks in one bulk request"""
+    hls_product_catalog = HLSProductCatalog()
+
+    def mock_query(self, **kwargs):
+        assert kwargs["body"]["query"] == {"ids": {"values": ["HLS.S30.T56MPU.2022152T000741.v2.0.B01.tif",
+                                                             "HLS.S30.T56MPU.2022152T000741.v2.0.B02.tif"]}}
+        return [
+            {"_id": "HLS.S30.T56MPU.2022152T000741.v2.0.B01.tif", "_index": "hls_catalog-2022.06"},
+            {"_id": "HLS.S30.T56MPU.2022152T000741.v2.0.B01.tif", "_index": "hls_catalog-2022.05"},
+        ]
+
+    with patch("tests.unit.conftest.MockElasticsearchUtility.query", new=mock_query):
+        with patch("elasticsearch.helpers.bulk", return_value=(2, [])) as mock_bulk:
+            hls_product_catalog.mark_products_as_downloaded(
+                ["s3://path/to/HLS.S30.T56MPU.2022152T000741.v2.0.B01.tif",
+                 "s3://path/to/HLS.S30.T56MPU.2022152T000741.v2.0.B02.tif"],
+                job_id="test_hls_job_id"
+            )
+
+    mock_bulk.assert_called_once()
+    operations = mock_bulk.call_args.args[1]
+    assert [operation["_index"] for operation in operations] == [
+        "hls_catalog-2022.06", hls_product_catalog.generate_es_index_name()
+    ]
+    assert all(operation["doc"]["downloaded"] for operation in operations)
+    assert all(operation["doc"]["download_job_id"] == "test_hls_job_id" for operation in operations)
+
+
 def test_slc_product_catalog():
     """Tests for functionality specifc to the SLCProductCatalog class"""
     slc_product_catalog = SLCProductCatalog()
@@ -411,6 +440,35 @@ def test_clsc_product_catalog():
         assert mock_update_document.call_args.kwargs["body"]["doc"]["metadata"] == {"FileSize": 321}
         assert "latest_download_job_ts" in mock_update_document.call_args.kwargs["body"]["doc"]
 
+def test_cslc_product_catalog_batched_downloads():
+    """Tests the batched download resolution and marking functions of CSLCProductCatalog"""
+    cslc_product_catalog = CSLCProductCatalog()
+
+    def mock_query(self, **kwargs):
+        assert kwargs["index"] == "cslc_catalog*,k_cslc_catalog*"
+        assert kwargs["body"]["query"]["bool"]["must"] == [
+            {"terms": {"download_batch_id": ["f831_a0", "f831_a12"]}}
+        ]
+        return [{"_index": "k_cslc_catalog", "_source": {"download_batch_id": "f831_a0"}}]
+
+    with patch("tests.unit.conftest.MockElasticsearchUtility.query", new=mock_query):
+        downloads = cslc_product_catalog.get_download_granule_revisions(
+            ["f831_a0", "f831_a12", "f831_a0"], index="cslc_catalog*,k_cslc_catalog*"
+        )
+
+    assert downloads == [{"_index": "k_cslc_catalog", "_source": {"download_batch_id": "f831_a0"}}]
+
+    with patch("tests.unit.conftest.MockElasticsearchUtility.query", return_value=[]):
+        with patch("elasticsearch.helpers.bulk", return_value=(2, [])) as mock_bulk:
+            cslc_product_catalog.mark_products_as_downloaded(
+                ["f831_a0_T042-088905-IW1", "f831_a0_T042-088906-IW1"], "test_cslc_job_id", filesizes=[10, 20]
+            )
+
+    operations = mock_bulk.call_args.args[1]
+    assert [operation["doc"]["metadata"]["FileSize"] for operation in operations] == [10, 20]
+    assert all("latest_download_job_ts" in operation["doc"] for operation in operations)
+
+
 def test_cslc_static_product_catalog():
     """Tests for functionality specific to the CSLCStaticProductCatalog class"""
     cslc_static_product_catalog = CSLCStaticProductCatalog()
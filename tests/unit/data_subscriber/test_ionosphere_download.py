@@ -0,0 +1,172 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from moto import mock_aws
+from pytest_mock import MockerFixture
+
+from data_subscriber import ionosphere_download
+from tools.stage_ionosphere_file import IonosphereFileNotFoundException
+
+DAY_1_PRODUCT_IDS = ["S1A_IW_SLC__1SDV_20240503T104507_20240503T104535_053770_068AEE_919F",
+                     "S1A_IW_SLC__1SDV_20240503T104532_20240503T104559_053770_068AEE_8E4B"]
+DAY_2_PRODUCT_ID = "S1A_IW_SLC__1SDV_20240504T015035_20240504T015102_053775_068B1A_42CC"
+
+
+def slc_dataset(product_id):
+    return {
+        "_id": product_id,
+        "_index": "grq_1_l1_s1_slc-2024.05",
+        "_source": {
+            "metadata": {"id": product_id, "intersects_north_america": True, "processing_mode": "forward"},
+            "urls": [f"https://example.com/products/{product_id}",
+                     f"s3://s3-us-west-2.amazonaws.com:80/bucket/products/{product_id}"],
+        },
+    }
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-west-2")
+
+    with mock_aws():
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(Bucket="bucket", CreateBucketConfiguration={"LocationConstraint": "us-west-2"})
+        yield s3_client
+
+
+@pytest.fixture
+def mock_resolver(mocker: MockerFixture, tmp_path):
+    """Stands in for the IonosphereResolver, resolving every day to a local file named after the day"""
+    resolver = MagicMock()
+
+    def resolve(product_id):
+        day = ionosphere_download.IonosphereDayCache.day_key(product_id)
+        if day in missing_days:
+            raise IonosphereFileNotFoundException(f"no file for {day}")
+        output_ionosphere_filepath = tmp_path / f"jplg{day}.i"
+        output_ionosphere_filepath.write_text(day)
+        return str(output_ionosphere_filepath)
+
+    missing_days = set()
+    resolver.resolve.side_effect = resolve
+    resolver.source_url.side_effect = lambda product_id: f"https://cddis.example.com/{product_id}"
+    resolver.missing_days = missing_days
+
+    mocker.patch("tools.stage_ionosphere_file.IonosphereResolver", return_value=resolver)
+    return resolver
+
+
+def test_ionosphere_day_cache_upload(s3_client, mock_resolver, mocker: MockerFixture, tmp_path):
+    # ARRANGE
+    ionosphere_cache = ionosphere_download.IonosphereDayCache(tmp_path / "ionosphere")
+    upload_file = mocker.spy(s3_client, "upload_file")
+    copy_object = mocker.spy(s3_client, "copy_object")
+
+    # ACT
+    for product_id in DAY_1_PRODUCT_IDS + [DAY_2_PRODUCT_ID]:
+        ionosphere_cache.upload(product_id, slc_dataset(product_id)["_source"]["urls"][1], s3_client=s3_client)
+
+    # ASSERT
+    # the first product of each day uploads the file, later ones copy it server-side
+    assert upload_file.call_count == 2
+    assert copy_object.call_count == 1
+    assert copy_object.call_args.kwargs["CopySource"] == {
+        "Bucket": "bucket", "Key": f"products/{DAY_1_PRODUCT_IDS[0]}/jplg20240503.i"
+    }
+
+    keys = sorted(s3_object["Key"] for s3_object in s3_client.list_objects_v2(Bucket="bucket")["Contents"])
+    assert keys == [f"products/{DAY_1_PRODUCT_IDS[0]}/jplg20240503.i",
+                    f"products/{DAY_1_PRODUCT_IDS[1]}/jplg20240503.i",
+                    f"products/{DAY_2_PRODUCT_ID}/jplg20240504.i"]
+    body = s3_client.get_object(Bucket="bucket", Key=f"products/{DAY_1_PRODUCT_IDS[1]}/jplg20240503.i")["Body"]
+    assert body.read() == b"20240503"
+
+
+def test_process_slc_dataset_remembers_days_without_file(s3_client, mocker: MockerFixture, tmp_path):
+    # ARRANGE
+    mocker.patch("tools.stage_ionosphere_file.netrc.netrc").return_value.authenticators.return_value = \
+        ("user", None, "pass")
+    mock_find = mocker.patch("tools.stage_ionosphere_file.find_ionosphere_archive_url",
+                             side_effect=IonosphereFileNotFoundException("not found"))
+    mock_submit_mozart_job = mocker.patch("data_subscriber.ionosphere_download.submit_mozart_job")
+
+    ionosphere_cache = ionosphere_download.IonosphereDayCache(tmp_path / "ionosphere")
+
+    # ACT
+    cslc_job_ids = [
+        ionosphere_download.process_slc_dataset(slc_dataset(product_id), args=MagicMock(),
+                                                ionosphere_cache=ionosphere_cache, s3_client=s3_client)
+        for product_id in DAY_1_PRODUCT_IDS
+    ]
+
+    # ASSERT
+    assert cslc_job_ids == [None, None]
+    # CDDIS is only asked once per ionosphere type for the day
+    assert mock_find.call_count == 2
+    mock_submit_mozart_job.assert_not_called()
+    assert "Contents" not in s3_client.list_objects_v2(Bucket="bucket")
+
+
+def test_run(s3_client, mock_resolver, mocker: MockerFixture, tmp_path, monkeypatch):
+    # ARRANGE
+    monkeypatch.chdir(tmp_path)
+    mocker.patch("time.sleep")  # skip backoff delays
+
+    product_ids = DAY_1_PRODUCT_IDS + [DAY_2_PRODUCT_ID]
+    mocker.patch("data_subscriber.ionosphere_download.get_pending_slc_datasets",
+                 side_effect=lambda args: iter([slc_dataset(product_id) for product_id in product_ids]))
+    mock_submit_mozart_job = mocker.patch("data_subscriber.ionosphere_download.submit_mozart_job",
+                                          side_effect=lambda product, **kwargs: f"job-{product['_id']}")
+    mock_update = mocker.patch("data_subscriber.ionosphere_download.try_update_slc_dataset_with_ionosphere_metadata")
+
+    # ACT
+    results = ionosphere_download.run(["ionosphere_download.py", "--release-version=v1"])
+
+    # ASSERT
+    assert sorted(results["success"]) == sorted(f"job-{product_id}" for product_id in product_ids)
+    assert mock_submit_mozart_job.call_count == 3
+    assert mock_update.call_count == 3
+    assert mock_update.call_args.kwargs["ionosphere_metadata"]["ionosphere"]["s3_url"].startswith("s3://bucket/products/")
+    assert not Path("downloads").exists()
+
+
+def test_run_collects_exceptions(s3_client, mock_resolver, mocker: MockerFixture, tmp_path, monkeypatch):
+    # ARRANGE
+    monkeypatch.chdir(tmp_path)
+    mocker.patch("time.sleep")  # skip backoff delays
+
+    # no ionosphere file yet for the second day, which is skipped rather than failed
+    mock_resolver.missing_days.add("20240504")
+
+    product_ids = DAY_1_PRODUCT_IDS + [DAY_2_PRODUCT_ID]
+    mocker.patch("data_subscriber.ionosphere_download.get_pending_slc_datasets",
+                 side_effect=lambda args: iter([slc_dataset(product_id) for product_id in product_ids]))
+
+    submission_error = RuntimeError("mozart is unavailable")
+
+    def submit_mozart_job(product, **kwargs):
+        if product["_id"] == DAY_1_PRODUCT_IDS[1]:
+            raise submission_error
+        return f"job-{product['_id']}"
+
+    mock_submit_mozart_job = mocker.patch("data_subscriber.ionosphere_download.submit_mozart_job",
+                                          side_effect=submit_mozart_job)
+    mock_update = mocker.patch("data_subscriber.ionosphere_download.try_update_slc_dataset_with_ionosphere_metadata")
+
+    # ACT
+    with pytest.raises(Exception) as exc_info:
+        ionosphere_download.run(["ionosphere_download.py", "--release-version=v1"])
+
+    # ASSERT
+    # the cause of the JobSubmissionException is collected, not the wrapper
+    assert exc_info.value.args[0] == [submission_error]
+    # the failed submission was retried
+    assert mock_submit_mozart_job.call_count == 1 + 3
+    # only the submitted job's dataset is marked as having ionosphere data
+    mock_update.assert_called_once()
+    assert mock_update.call_args.kwargs["product_id"] == DAY_1_PRODUCT_IDS[0]
+
@@ -1,5 +1,5 @@
 from geo.geo_util import does_bbox_intersect_north_america, does_bbox_intersect_california, Coordinate
-from util.geo_util import polygon_from_bounding_box, polygon_from_mgrs_tile
+from util.geo_util import epsg_from_polygon, point2epsg, points2epsg, polygon_from_bounding_box, polygon_from_mgrs_tile
 
 from shapely.geometry import Polygon
 
@@ -116,3 +116,36 @@ def test_polygon_from_mgrs_tile_antimeridian():
                                         ymax=63.16076767648831)
 
     assert poly.bounds == expected_poly.bounds
+
+def test_do_bboxes_intersect_region():
+    """Vectorized region test agrees with the per-bbox test, including bboxes given without a closing coordinate"""
+    import geo.geo_util
+
+    bboxes: list[list[Coordinate]] = [
+        # Colorado bbox
+        [{"lon": -109.060253, "lat": 36.992426}, {"lon": -109.060253, "lat": 41.003444},
+         {"lon": -102.041524, "lat": 41.003444}, {"lon": -102.041524, "lat": 36.992426}],
+        # Pacific Ocean, off of Central America
+        [{"lon": -91.324852, "lat": 11.026079}, {"lon": -90.954483, "lat": 9.222121},
+         {"lon": -88.683533, "lat": 9.676103}, {"lon": -89.040413, "lat": 11.475266},
+         {"lon": -91.324852, "lat": 11.026079}],
+    ]
+    mask = geo.geo_util.do_bboxes_intersect_region(bboxes, geo.geo_util._NORTH_AMERICA)
+
+    assert mask.tolist() == [True, False]
+    assert mask.tolist() == [does_bbox_intersect_north_america(bbox) for bbox in bboxes]
+    assert geo.geo_util.do_bboxes_intersect_region([], geo.geo_util._NORTH_AMERICA).tolist() == []
+
+def test_points2epsg_matches_point2epsg():
+    """Vectorized EPSG selection agrees with the scalar version across UTM zones, both poles and the antimeridian"""
+    import numpy as np
+
+    lon = np.array([-180., -177., -118.2, -3., 0., 3., 179.9, 180., 200., 359.9, 10.])
+    lat = np.array([1., -1., 34.2, 10., 80., -80., 62., -30., 45., -74.9, 75.])
+
+    assert points2epsg(lon, lat).tolist() == [point2epsg(x, y) for x, y in zip(lon, lat)]
+
+def test_epsg_from_polygon():
+    polys = [Polygon.from_bounds(-118.5, 33.5, -117., 35.), Polygon.from_bounds(170., 60., 179.9, 80.)]
+
+    assert epsg_from_polygon(polys) == [32611, 32660]
@@ -0,0 +1,37 @@
+import logging
+from unittest.mock import MagicMock
+
+import pytest
+
+from job_accountability.catalog import HEADER, JobAccountabilityCatalog
+
+
+def test_post_indexes_records_in_bulk(monkeypatch):
+    mock_bulk = MagicMock(return_value=(3, []))
+    monkeypatch.setattr("job_accountability.catalog.elasticsearch.helpers.bulk", mock_bulk)
+
+    catalog = JobAccountabilityCatalog()
+    catalog.logger = logging.getLogger(__name__)
+    records = [{"refrec_id": f"id-{i}"} for i in range(3)]
+
+    assert catalog.post(records, header={"job_id": "job-1"}) == 3
+
+    mock_bulk.assert_called_once()
+    operations = mock_bulk.call_args.args[1]
+    assert [operation["_id"] for operation in operations] == ["id-0", "id-1", "id-2"]
+    assert all(operation["_source"][HEADER] == {"job_id": "job-1"} for operation in operations)
+    assert len({operation["_index"] for operation in operations}) == 1
+
+
+def test_post_reports_partial_failures(monkeypatch):
+    errors = [{"index": {"_id": "id-1", "status": 400, "error": {"type": "mapper_parsing_exception"}}}]
+    monkeypatch.setattr("job_accountability.catalog.elasticsearch.helpers.bulk", MagicMock(return_value=(2, errors)))
+
+    catalog = JobAccountabilityCatalog()
+    catalog.logger = logging.getLogger(__name__)
+    records = [{"refrec_id": f"id-{i}"} for i in range(3)]
+
+    with pytest.raises(RuntimeError, match=r"Failed to index 1 of 3 records: \['id-1'\]"):
+        catalog.post(records)
+
+    assert all(record[HEADER] == {} for record in records)
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from opera_chimera.precondition_executor import ALL_PRECEDING, depends_on, get_dependencies, run_preconditions
+
+
+class Preconditions:
+    def get_product_version(self):
+        return {"product_version": "1.0"}
+
+    def get_slc_s1_safe_file(self):
+        return {"safe_file_path": "safe.zip"}
+
+    @depends_on("get_slc_s1_safe_file")
+    def get_slc_s1_dem(self):
+        return {"dem_file": "dem.vrt"}
+
+    def get_slc_s1_burst_database(self):
+        return {"burst_database_file": "burst_db.sqlite3"}
+
+    @depends_on(ALL_PRECEDING)
+    def set_daac_product_type(self):
+        return {"daac_product_type": "OPERA_L2_CSLC-S1"}
+
+    def get_cnm_version(self):
+        return {"cnm_version": "1.6.1"}
+
+
+def test_get_dependencies():
+    preconditions = Preconditions()
+    function_list = ["get_product_version", "get_slc_s1_safe_file", "get_slc_s1_dem", "get_slc_s1_burst_database",
+                     "set_daac_product_type", "get_cnm_version"]
+
+    dependencies = get_dependencies(function_list, lambda function_name: getattr(preconditions, function_name))
+
+    assert dependencies == [set(), set(), {1}, set(), {0, 1, 2, 3}, {4}]
+
+
+def test_run_preconditions_concurrently():
+    function_list = ["get_slc_s1_safe_file", "get_slc_s1_dem", "get_slc_s1_burst_database", "get_cnm_version"]
+    dependencies = [set(), {0}, set(), set()]
+    started = {}
+    finished = {}
+    completed = []
+    lock = threading.Lock()
+
+    def run_function(function_name):
+        with lock:
+            started[function_name] = time.perf_counter()
+        time.sleep(0.2)
+        with lock:
+            finished[function_name] = time.perf_counter()
+        return {"last": function_name, function_name: True}
+
+    wall_t1 = time.perf_counter()
+    results = run_preconditions(function_list, dependencies, run_function,
+                                on_complete=lambda function_name, _: completed.append(function_name), max_workers=4)
+    wall_time = time.perf_counter() - wall_t1
+
+    # results are returned in list order, regardless of completion order
+    assert [result["last"] for result in results] == function_list
+    assert sorted(completed) == sorted(function_list)
+    assert started["get_slc_s1_dem"] >= finished["get_slc_s1_safe_file"]
+    # the DEM waits for the SAFE file, everything else runs alongside them
+    assert wall_time < 0.6
+
+
+def test_run_preconditions_raises_first_failure():
+    function_list = ["get_slc_s1_safe_file", "get_slc_s1_dem"]
+    calls = []
+
+    def run_function(function_name):
+        calls.append(function_name)
+        raise RuntimeError(f"{function_name} failed")
+
+    with pytest.raises(RuntimeError, match="get_slc_s1_safe_file failed"):
+        run_preconditions(function_list, [set(), {0}], run_function)
+
+    assert calls == ["get_slc_s1_safe_file"]
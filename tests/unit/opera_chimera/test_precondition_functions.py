@@ -8,18 +8,20 @@ from os.path import exists, join
 from unittest.mock import patch, MagicMock
 from zipfile import ZipFile
 
-import boto3.resources.collection
 import boto3.s3.inject
 import botocore.client
 import botocore.exceptions
 
 import tools.stage_ancillary_map
 import tools.stage_dem
+import tools.stage_ionosphere_file
 import tools.stage_worldcover
+import util.aws_util
 from opera_chimera.constants.opera_chimera_const import (
     OperaChimeraConstants as oc_const,
 )
 from opera_chimera.precondition_functions import OperaPreConditionFunctions
+from util.ecmwf_util import get_ecmwf_availability_index
 
 
 class MockGdal:
@@ -63,6 +65,10 @@ class MockGdal:
         return MockGdal.MockGdalDataset()
 
 
+SLC_DATASET_ID = "S1A_IW_SLC__1SDV_20220501T015035_20220501T015102_043011_0522A4_42CC"
+"""Name of the SLC dataset used with tests of the SLC-based precondition functions"""
+
+
 def _check_aws_connection_patch(bucket, key):
     """
     No-op patch function for use with testing precondition functions that attempt
@@ -78,22 +84,17 @@ def _object_download_file_patch(self, Filename, ExtraArgs=None, Callback=None, C
         outfile.write("fake ancillary data\n__PATTERN1__\n__PATTERN2__")
 
 
-class MockCollectionManager:
+def _list_prefix_patch(self, bucket, prefix):
     """
-    Mock class for boto3.resources.collection.CollectionManager for use with
+    Patch for util.aws_util.S3PrefixInventory._list_prefix for use with
     tests that filter on s3 objects to locate an ancillary file
     """
-    class MockS3Object:
-        def __init__(self):
-            self.key = None
-
-    def __init__(self, collection_model, parent, factory, service_context):
-        self.s3_object = self.MockS3Object()
-
-    def filter(self, **kwargs):
-        self.s3_object.key = "fake/key/to/S1A_OPER_AUX_RESORB_OPOD.EOF"
-
-        return [self.s3_object]
+    return {
+        f"s3://{bucket}/{prefix}/S1A_OPER_AUX_RESORB_OPOD.EOF": {"ContentLength": 1, "ETag": '"etag"'},
+        f"s3://{bucket}/{prefix}/S1A_IW_SLC__1SDV_20220501T015035_20220501T015102_043011_0522A4_42CC.zip": {
+            "ContentLength": 1, "ETag": '"etag"'
+        },
+    }
 
 
 class TestOperaPreConditionFunctions(unittest.TestCase):
@@ -205,7 +206,7 @@ class TestOperaPreConditionFunctions(unittest.TestCase):
         expected_polarization = 'co-pol'
         self.assertEqual(rc_params[oc_const.POLARIZATION], expected_polarization)
 
-    @patch.object(boto3.resources.collection, "CollectionManager", MockCollectionManager)
+    @patch.object(util.aws_util.S3PrefixInventory, "_list_prefix", _list_prefix_patch)
     def test_get_slc_s1_orbit_file(self):
         """Unit tests for the get_slc_s1_orbit_file() function"""
 
@@ -237,6 +238,72 @@ class TestOperaPreConditionFunctions(unittest.TestCase):
         expected_s3_paths = ["s3://opera-bucket/fake/key/to/S1A_OPER_AUX_RESORB_OPOD.EOF"]
         self.assertListEqual(rc_params[oc_const.ORBIT_FILE_PATH], expected_s3_paths)
 
+    @patch.object(util.aws_util.S3PrefixInventory, "_list_prefix",
+                  MagicMock(return_value={f"s3://opera-bucket/fake/key/to/{SLC_DATASET_ID}/jprg1210.22i": {
+                      "ContentLength": 1, "ETag": '"etag"'
+                  }}))
+    def test_get_slc_s1_tec_file(self):
+        """Unit tests for the get_slc_s1_tec_file() function"""
+
+        # Set up the arguments to OperaPreConditionFunctions
+        context = {
+            "product_path": f"s3://s3-us-west-2.amazonaws.com:80/opera-bucket/fake/key/to/{SLC_DATASET_ID}",
+        }
+
+        # These are not used by get_slc_s1_tec_file
+        pge_config = {}
+        settings = None
+        job_params = None
+
+        def find_ionosphere_archive_url(session, ionosphere_file_type, year, doy, download_endpoint):
+            if not final_file_available:
+                raise tools.stage_ionosphere_file.IonosphereFileNotFoundException("not found")
+            return f"{download_endpoint}/{year}/{doy}/{ionosphere_file_type}{doy}0.{year[2:]}i.Z"
+
+        def download_ionosphere_archive(request_url, username, password, output_directory, session=None):
+            output_ionosphere_archive_path = join(output_directory, os.path.basename(request_url))
+            with open(output_ionosphere_archive_path, 'w') as outfile:
+                outfile.write("fake ionosphere data")
+            return output_ionosphere_archive_path
+
+        def uncompress_ionosphere_archive(output_ionosphere_archive_path):
+            extraction_path = os.path.splitext(output_ionosphere_archive_path)[0]
+            with open(extraction_path, 'w') as outfile:
+                outfile.write("fake ionosphere data")
+            return extraction_path
+
+        with patch.object(tools.stage_ionosphere_file, "find_ionosphere_archive_url",
+                          side_effect=find_ionosphere_archive_url) as mock_find, \
+                patch.object(tools.stage_ionosphere_file, "download_ionosphere_archive",
+                             side_effect=download_ionosphere_archive), \
+                patch.object(tools.stage_ionosphere_file, "uncompress_ionosphere_archive",
+                             side_effect=uncompress_ionosphere_archive), \
+                patch.object(tools.stage_ionosphere_file.netrc, "netrc") as mock_netrc, \
+                patch.object(tools.stage_ionosphere_file, "boto3") as mock_boto3:
+            mock_netrc.return_value.authenticators.return_value = ("user", None, "pass")
+
+            # Only a rapid file was staged by the download job, and the final
+            # file is still unavailable from CDDIS
+            final_file_available = False
+            precondition_functions = OperaPreConditionFunctions(context, pge_config, settings, job_params)
+            rc_params = precondition_functions.get_slc_s1_tec_file()
+
+            self.assertEqual(rc_params[oc_const.TEC_FILE], f"s3://opera-bucket/fake/key/to/{SLC_DATASET_ID}/jprg1210.22i")
+            mock_boto3.client.return_value.upload_file.assert_not_called()
+
+            # The final file has since been published to CDDIS, so it is
+            # staged alongside the rapid one and used instead
+            final_file_available = True
+            precondition_functions = OperaPreConditionFunctions(context, pge_config, settings, job_params)
+            rc_params = precondition_functions.get_slc_s1_tec_file()
+
+            self.assertEqual(rc_params[oc_const.TEC_FILE], f"s3://opera-bucket/fake/key/to/{SLC_DATASET_ID}/jplg1210.22i")
+            mock_boto3.client.return_value.upload_file.assert_called_once()
+
+        # Only the final file type was ever requested from CDDIS
+        self.assertListEqual([call.args[1] for call in mock_find.call_args_list],
+                             [tools.stage_ionosphere_file.IONOSPHERE_TYPE_JPLG] * 2)
+
     @patch.object(tools.stage_dem, "check_aws_connection", _check_aws_connection_patch)
     @patch.object(tools.stage_dem, "gdal", MockGdal)
     def test_get_slc_s1_dem(self):
@@ -932,12 +999,25 @@ class TestOperaPreConditionFunctions(unittest.TestCase):
             context, pge_config, settings, job_params
         )
 
-        # Test with valid result from s3_client.head_object()
-        mock_head_object = MagicMock()
+        ecmwf_keys = ['ecmwf/20231018/D10180000101800001.subset.zz.nc',
+                      'ecmwf/20230805/D08050000080500001.subset.zz.nc',
+                      'ecmwf/20231006/D10061800100618001.subset.zz.nc']
 
-        with patch.object(botocore.client.BaseClient, "_make_api_call", mock_head_object):
+        def _list_objects_v2(operation_name, kwargs):
+            return {"Contents": [{"Key": key} for key in ecmwf_keys if key.startswith(kwargs["Prefix"])],
+                    "IsTruncated": False}
+
+        # Test with all expected files returned by s3_client.list_objects_v2()
+        mock_list_objects = MagicMock(side_effect=_list_objects_v2)
+        ecmwf_index = get_ecmwf_availability_index("s3://opera-ancillaries/ecmwf")
+        ecmwf_index.invalidate()
+
+        with patch.object(botocore.client.BaseClient, "_make_api_call", mock_list_objects):
             rc_params = precondition_functions.get_disp_s1_troposphere_files()
 
+        # One listing per month covered by the acquisition dates (202308 and 202310)
+        self.assertEqual(mock_list_objects.call_count, 2)
+
         expected_troposphere_s3_paths = ['s3://opera-ancillaries/ecmwf/20231018/D10180000101800001.subset.zz.nc',
                                          's3://opera-ancillaries/ecmwf/20230805/D08050000080500001.subset.zz.nc',
                                          's3://opera-ancillaries/ecmwf/20231006/D10061800100618001.subset.zz.nc']
@@ -947,12 +1027,11 @@ class TestOperaPreConditionFunctions(unittest.TestCase):
         self.assertTrue(all(expected_troposphere_s3_path in rc_params[oc_const.TROPOSPHERE_FILES]
                             for expected_troposphere_s3_path in expected_troposphere_s3_paths))
 
-        # Test with 404 not found result from s3_client.head_object()
-        mock_head_object = MagicMock(
-            side_effect=botocore.exceptions.ClientError({"Error": {"Code": "404"}}, "head_object")
-        )
+        # Test with a file missing from the s3_client.list_objects_v2() results
+        ecmwf_keys.pop()
+        ecmwf_index.invalidate()
 
-        with patch.object(botocore.client.BaseClient, "_make_api_call", mock_head_object):
+        with patch.object(botocore.client.BaseClient, "_make_api_call", mock_list_objects):
             with self.assertRaises(RuntimeError) as err:
                 precondition_functions.get_disp_s1_troposphere_files()
 
@@ -967,7 +1046,7 @@ class TestOperaPreConditionFunctions(unittest.TestCase):
             context, pge_config, settings, job_params
         )
 
-        with patch.object(botocore.client.BaseClient, "_make_api_call", mock_head_object):
+        with patch.object(botocore.client.BaseClient, "_make_api_call", mock_list_objects):
             with self.assertLogs("opera_pcm", level="WARNING") as logger:
                 rc_params = precondition_functions.get_disp_s1_troposphere_files()
 
@@ -1,3 +1,4 @@
+import pytest
 from pytest_mock import MockerFixture
 
 from purge_ISL import purge_isl
@@ -108,3 +109,41 @@ def test_main_when_empty_string_isl_url(mocker: MockerFixture):
     # ASSERT
     pass
 
+
+def test_purge_isl_urls_batches_by_region_and_bucket(mocker: MockerFixture):
+    # ARRANGE
+    mock_get_cached_s3_client = mocker.patch("purge_ISL.purge_isl.get_cached_s3_client")
+    mock_get_cached_s3_client.return_value.delete_objects.return_value = {}
+
+    # ACT
+    purge_isl.purge_isl_urls(
+        [f"s3://s3-us-west-2.amazonaws.com/my-bucket/dir1/file{i}" for i in range(1001)]
+        + ["s3://s3-us-east-1.amazonaws.com/my-other-bucket/dir1/file1"]
+    )
+
+    # ASSERT
+    delete_objects_calls = mock_get_cached_s3_client.return_value.delete_objects.call_args_list
+    assert len(delete_objects_calls) == 3
+    assert sorted(len(call.kwargs["Delete"]["Objects"]) for call in delete_objects_calls) == [1, 1, 1000]
+    assert {call.kwargs["Bucket"] for call in delete_objects_calls} == {"my-bucket", "my-other-bucket"}
+    # one client per region, created up front rather than from the worker threads
+    assert sorted(call.args[0] for call in mock_get_cached_s3_client.call_args_list) == ["us-east-1", "us-west-2"]
+
+
+def test_purge_isl_urls_when_key_fails(mocker: MockerFixture):
+    # ARRANGE
+    mock_get_cached_s3_client = mocker.patch("purge_ISL.purge_isl.get_cached_s3_client")
+    mock_get_cached_s3_client.return_value.delete_objects.return_value = {
+        "Errors": [{"Key": "dir1/file2", "Code": "AccessDenied", "Message": "Access Denied"}]
+    }
+
+    # ACT
+    with pytest.raises(Exception) as e:
+        purge_isl.purge_isl_urls([
+            "s3://s3-us-west-2.amazonaws.com/my-bucket/dir1/file1",
+            "s3://s3-us-west-2.amazonaws.com/my-bucket/dir1/file2"
+        ])
+
+    # ASSERT
+    assert "s3://my-bucket/dir1/file2" in str(e.value)
+    assert "s3://my-bucket/dir1/file1" not in str(e.value)
@@ -0,0 +1,126 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from commons.constants import product_metadata as pm
+from timer import timer_handler
+
+
+def es_record(_id, index="grq_1_dswx_s1-state-config"):
+    return {
+        "_index": index,
+        "_id": f"{_id}_state-config",
+        "_source": {
+            "metadata": {"mgrs_set_id": _id},
+            pm.START_TIME: "2024-01-01T00:00:00.000000Z",
+            pm.END_TIME: "2024-01-01T01:00:00.000000Z",
+        },
+    }
+
+
+@pytest.fixture
+def mock_es(mocker: MockerFixture):
+    mock_ancillary_es = MagicMock()
+    mock_ancillary_es.construct_bool_query.side_effect = lambda conditions: [
+        {"term": {field: value}} for field, value in conditions.items()
+    ]
+    mocker.patch("timer.timer_handler.ancillary_es", mock_ancillary_es)
+    return mock_ancillary_es
+
+
+def test_filter_existing_expired_state_configs(mock_es):
+    # ARRANGE
+    mock_es.es.mget.return_value = {
+        "docs": [
+            {"_index": "grq_1_dswx_s1-expired-state-config", "_id": "a_expired-state-config", "found": True},
+            {"_index": "grq_1_dswx_s1-expired-state-config", "_id": "b_expired-state-config", "found": False},
+        ]
+    }
+
+    # ACT
+    remaining_records = timer_handler.filter_existing_expired_state_configs([es_record("a"), es_record("b")])
+
+    # ASSERT
+    assert remaining_records == [es_record("b")]
+    mock_es.es.mget.assert_called_once_with(body={"docs": [
+        {"_index": "grq_1_dswx_s1-expired-state-config", "_id": "a_expired-state-config", "_source": False},
+        {"_index": "grq_1_dswx_s1-expired-state-config", "_id": "b_expired-state-config", "_source": False},
+    ]})
+
+
+def test_update_state_configs(mock_es, mocker: MockerFixture):
+    # ARRANGE
+    mock_bulk = mocker.patch("elasticsearch.helpers.bulk", return_value=(1, [
+        {"update": {"_index": "grq_1_dswx_s1-state-config", "_id": "b_state-config", "status": 409}}
+    ]))
+    mocker.patch("timer.timer_handler.convert_datetime", return_value="2024-01-02T00:00:00.000000Z")
+
+    # ACT
+    updated_records = timer_handler.update_state_configs([es_record("a"), es_record("b")])
+
+    # ASSERT
+    assert updated_records == [es_record("a")]
+
+    mock_bulk.assert_called_once()
+    es, operations = mock_bulk.call_args.args
+    assert es is mock_es.es
+    assert operations == [
+        {
+            "_op_type": "update",
+            "_index": "grq_1_dswx_s1-state-config",
+            "_id": f"{_id}_state-config",
+            "doc_as_upsert": True,
+            "doc": {"metadata": {pm.SUBMITTED_BY_TIMER: "2024-01-02T00:00:00.000000Z"}},
+        }
+        for _id in ("a", "b")
+    ]
+    assert mock_bulk.call_args.kwargs == {"raise_on_error": False, "raise_on_exception": False}
+
+
+def test_evaluate(mock_es, mocker: MockerFixture, tmp_path, monkeypatch):
+    # ARRANGE
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "_context.json").write_text(json.dumps({"dataset_type": "dswx_s1-state-config", "notify_arn": None}))
+
+    mock_scan = mocker.patch("elasticsearch.helpers.scan", return_value=iter([es_record("a"), es_record("b")]))
+
+    # an expired-state-config was already created for "a" by a previous sweep
+    mock_es.es.mget.return_value = {"docs": [{"_index": "i", "_id": "a_expired-state-config", "found": True},
+                                             {"_index": "i", "_id": "b_expired-state-config", "found": False}]}
+    mock_bulk = mocker.patch("elasticsearch.helpers.bulk", return_value=(1, []))
+    mock_create_state_config_dataset = mocker.patch("timer.timer_handler.create_state_config_dataset")
+
+    # ACT
+    with pytest.raises(SystemExit):
+        timer_handler.evaluate()
+
+    # ASSERT
+    assert mock_scan.call_args.kwargs["index"] == "grq_*_dswx_s1-state-config"
+
+    _, operations = mock_bulk.call_args.args
+    assert [operation["_id"] for operation in operations] == ["b_state-config"]
+
+    mock_create_state_config_dataset.assert_called_once_with(
+        "b_expired-state-config", {"mgrs_set_id": "b"}, "2024-01-01T00:00:00.000000Z", "2024-01-01T01:00:00.000000Z"
+    )
+    assert not (tmp_path / "_alt_msg.txt").exists()
+
+
+def test_evaluate_without_expired_state_configs(mock_es, mocker: MockerFixture, tmp_path, monkeypatch):
+    # ARRANGE
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "_context.json").write_text(json.dumps({"dataset_type": "dswx_s1-state-config", "notify_arn": None}))
+
+    mocker.patch("elasticsearch.helpers.scan", return_value=iter([]))
+    mock_bulk = mocker.patch("elasticsearch.helpers.bulk")
+
+    # ACT
+    with pytest.raises(SystemExit):
+        timer_handler.evaluate()
+
+    # ASSERT
+    mock_es.es.mget.assert_not_called()
+    mock_bulk.assert_not_called()
+    assert (tmp_path / "_alt_msg.txt").exists()
@@ -0,0 +1,49 @@
+from tools.ops.pcm_audit.pcm_audit_utils import AuditIdSet, index_pattern
+
+
+def test_audit_id_set_in_memory():
+    # ARRANGE
+    a = AuditIdSet(["a", "b", "c"])
+    b = AuditIdSet(["b"])
+
+    # ACT
+    diff = a - b
+    union = diff.union(["d"], AuditIdSet(["e"]))
+
+    # ASSERT
+    assert not diff.spilled
+    assert set(diff) == {"a", "c"}
+    assert set(union) == {"a", "c", "d", "e"}
+    assert len(union) == 4
+
+
+def test_audit_id_set_spilled():
+    # ARRANGE
+    a = AuditIdSet((f"HLS.L30.T27XVF.{i:04}.B03-r1" for i in range(100)), spill_threshold=10)
+    b = AuditIdSet((f"HLS.L30.T27XVF.{i:04}.B03-r1" for i in range(0, 100, 2)), spill_threshold=10)
+
+    # ACT
+    diff = a - b
+    granules = a.map(lambda file_id: file_id.split(".")[2])
+
+    # ASSERT
+    assert a.spilled
+    assert diff.spilled
+    assert len(a) == 100
+    assert "HLS.L30.T27XVF.0001.B03-r1" in diff
+    assert "HLS.L30.T27XVF.0002.B03-r1" not in diff
+    assert len(diff) == 50
+    assert list(diff) == sorted(diff)
+    assert set(granules) == {"T27XVF"}
+
+    a.add("HLS.L30.T27XVF.0001.B03-r1")
+    assert len(a) == 100
+
+
+def test_index_pattern():
+    # ACT
+    static_layer_index = index_pattern("grq_*_l2_rtc_s1_static")
+
+    # ASSERT
+    # indices are comma-separated. A "." would have produced a single index name that matches nothing
+    assert static_layer_index == "grq_*_l2_rtc_s1_static,grq_*_l2_rtc_s1_static-*"
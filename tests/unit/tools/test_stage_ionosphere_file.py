@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+import os.path
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+import tools.stage_ionosphere_file
+from tools.stage_ionosphere_file import IonosphereFileNotFoundException, IonosphereResolver
+
+
+@mock_aws
+class TestIonosphereResolver(unittest.TestCase):
+    """Unit tests for the IonosphereResolver class of the stage_ionosphere_file.py script"""
+
+    def setUp(self) -> None:
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+
+        self.working_dir = tempfile.TemporaryDirectory(suffix="_temp", prefix="test_stage_ionosphere_file_")
+        self.s3_client = boto3.client("s3")
+        self.s3_client.create_bucket(Bucket="bucket", CreateBucketConfiguration={"LocationConstraint": "us-west-2"})
+
+    def tearDown(self) -> None:
+        self.working_dir.cleanup()
+
+    def _mock_download(self, request_url, username, password, output_directory, session=None):
+        output_ionosphere_archive_path = os.path.join(output_directory, os.path.basename(request_url))
+        with open(output_ionosphere_archive_path, "w") as outfile:
+            outfile.write(request_url)
+        return output_ionosphere_archive_path
+
+    def _mock_uncompress(self, output_ionosphere_archive_path):
+        extraction_path = os.path.splitext(output_ionosphere_archive_path)[0]
+        shutil.copyfile(output_ionosphere_archive_path, extraction_path)
+        return extraction_path
+
+    def test_resolve_all_fetches_each_day_once(self):
+        """Tests that IonosphereResolver.resolve_all() only fetches distinct days, and only once per resolver"""
+        resolver = IonosphereResolver(self.working_dir.name, username="user", password="pass",
+                                      s3_url_prefix="s3://bucket/tmp/disp_s1/ionosphere")
+
+        cslc_files = [
+            "OPERA_L2_CSLC-S1_T042-088905-IW1_20231119T140507Z_20231120T073215Z_S1A_VV_v1.0.h5",
+            "OPERA_L2_CSLC-S1_T042-088906-IW1_20231119T140510Z_20231120T073215Z_S1A_VV_v1.0.h5",
+            "OPERA_L2_CSLC-S1_T042-088905-IW1_20231201T140507Z_20231202T073215Z_S1A_VV_v1.0.h5",
+        ]
+
+        with patch.object(tools.stage_ionosphere_file, "find_ionosphere_archive_url",
+                          side_effect=lambda session, ionosphere_file_type, year, doy, download_endpoint:
+                          f"{download_endpoint}/{year}/{doy}/{ionosphere_file_type}{doy}0.{year[2:]}i.Z") as mock_find, \
+                patch.object(tools.stage_ionosphere_file, "download_ionosphere_archive", side_effect=self._mock_download), \
+                patch.object(tools.stage_ionosphere_file, "uncompress_ionosphere_archive", side_effect=self._mock_uncompress):
+            s3_urls = resolver.resolve_all(cslc_files)
+
+            # a later batch sharing a day with an earlier one
+            self.assertEqual(resolver.resolve_all(cslc_files[:1]), s3_urls[:1])
+
+        self.assertEqual(mock_find.call_count, 2)
+        self.assertListEqual(s3_urls, ["s3://bucket/tmp/disp_s1/ionosphere/jplg3230.23i",
+                                       "s3://bucket/tmp/disp_s1/ionosphere/jplg3350.23i"])
+        self.assertTrue(resolver.source_url(cslc_files[0]).endswith("/2023/323/jplg3230.23i.Z"))
+
+        keys = [s3_object["Key"] for s3_object in self.s3_client.list_objects_v2(Bucket="bucket")["Contents"]]
+        self.assertListEqual(sorted(keys), ["tmp/disp_s1/ionosphere/jplg3230.23i", "tmp/disp_s1/ionosphere/jplg3350.23i"])
+
+    def test_resolve_uses_staged_file(self):
+        """Tests that IonosphereResolver.resolve() prefers a final file already staged under the S3 prefix over CDDIS"""
+        self.s3_client.put_object(Bucket="bucket", Key="products/SLC/jplg1240.24i", Body=b"")
+
+        resolver = IonosphereResolver(self.working_dir.name, username="user", password="pass",
+                                      s3_url_prefix="s3://s3-us-west-2.amazonaws.com:80/bucket/products/SLC")
+
+        with patch.object(tools.stage_ionosphere_file, "find_ionosphere_archive_url") as mock_find:
+            s3_url = resolver.resolve("S1A_IW_SLC__1SDV_20240503T104507_20240503T104535_053770_068AEE_919F.zip")
+
+        mock_find.assert_not_called()
+        self.assertEqual(s3_url, "s3://bucket/products/SLC/jplg1240.24i")
+        self.assertEqual(resolver.find_staged_file(), "s3://bucket/products/SLC/jplg1240.24i")
+
+    def test_resolve_staged_file_without_credentials(self):
+        """Tests that IonosphereResolver only reads EarthData Login credentials when it has to download from CDDIS"""
+        self.s3_client.put_object(Bucket="bucket", Key="products/SLC/jplg1240.24i", Body=b"")
+
+        with patch.object(tools.stage_ionosphere_file.netrc, "netrc", side_effect=FileNotFoundError) as mock_netrc:
+            resolver = IonosphereResolver(self.working_dir.name, s3_url_prefix="s3://bucket/products/SLC")
+            s3_url = resolver.resolve("S1A_IW_SLC__1SDV_20240503T104507_20240503T104535_053770_068AEE_919F.zip")
+
+        mock_netrc.assert_not_called()
+        self.assertEqual(s3_url, "s3://bucket/products/SLC/jplg1240.24i")
+
+    def test_resolve_replaces_staged_rapid_file(self):
+        """Tests that IonosphereResolver.resolve() only uses a staged rapid file if CDDIS has no final file"""
+        self.s3_client.put_object(Bucket="bucket", Key="products/SLC/jprg1240.24i", Body=b"")
+        safe_file = "S1A_IW_SLC__1SDV_20240503T104507_20240503T104535_053770_068AEE_919F.zip"
+
+        def find_ionosphere_archive_url(session, ionosphere_file_type, year, doy, download_endpoint):
+            self.assertEqual(ionosphere_file_type, tools.stage_ionosphere_file.IONOSPHERE_TYPE_JPLG)
+            if not final_file_available:
+                raise IonosphereFileNotFoundException("not found")
+            return f"{download_endpoint}/{year}/{doy}/{ionosphere_file_type}{doy}0.{year[2:]}i.Z"
+
+        with patch.object(tools.stage_ionosphere_file, "find_ionosphere_archive_url",
+                          side_effect=find_ionosphere_archive_url) as mock_find, \
+                patch.object(tools.stage_ionosphere_file, "download_ionosphere_archive", side_effect=self._mock_download), \
+                patch.object(tools.stage_ionosphere_file, "uncompress_ionosphere_archive", side_effect=self._mock_uncompress):
+            for final_file_available, expected_s3_url in ((False, "s3://bucket/products/SLC/jprg1240.24i"),
+                                                          (True, "s3://bucket/products/SLC/jplg1240.24i")):
+                resolver = IonosphereResolver(self.working_dir.name, username="user", password="pass",
+                                              s3_url_prefix="s3://bucket/products/SLC")
+
+                self.assertEqual(resolver.resolve(safe_file), expected_s3_url)
+
+        # only the final file was ever requested from CDDIS
+        self.assertEqual(mock_find.call_count, 2)
+
+    def test_resolve_remembers_missing_days(self):
+        """Tests that IonosphereResolver.resolve() only asks CDDIS once for a day without an Ionosphere file"""
+        resolver = IonosphereResolver(self.working_dir.name, username="user", password="pass")
+
+        with patch.object(tools.stage_ionosphere_file, "find_ionosphere_archive_url",
+                          side_effect=IonosphereFileNotFoundException("not found")) as mock_find:
+            for _ in range(2):
+                with self.assertRaises(IonosphereFileNotFoundException):
+                    resolver.resolve("S1A_IW_SLC__1SDV_20240503T104507_20240503T104535_053770_068AEE_919F.zip")
+
+        # one request per ionosphere type
+        self.assertEqual(mock_find.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ import json
 import os.path
 import tempfile
 import unittest
+from datetime import timedelta
 from io import BytesIO
 from unittest.mock import MagicMock, patch
 
@@ -212,3 +213,169 @@ class TestStageOrbitFile(unittest.TestCase):
             orbit_file_contents = infile.read()
 
         self.assertEqual(b'orbit file contents', orbit_file_contents)
+
+    def test_orbit_file_catalog(self):
+        """Tests for the OrbitFileCatalog class"""
+        query_results = [
+            {
+                "Id": "5ae6bb3b-0f19-41c0-ba1e-28988ed93842",
+                "Name": "S1A_OPER_AUX_RESORB_OPOD_20230825T223851_V20230825T185010_20230825T220740.EOF"
+            },
+            {
+                "Id": "b36a07ec-fc8a-444d-9270-dfd2b9463200",
+                "Name": "S1A_OPER_AUX_RESORB_OPOD_20230825T205555_V20230825T171126_20230825T202856.EOF"
+            },
+            {
+                "Id": "6c264b9c-6646-4e3d-92d6-862ef96ee2e8",
+                "Name": "S1A_OPER_AUX_RESORB_OPOD_20230825T190955_V20230825T153241_20230825T185011.EOF"
+            },
+            {
+                "Id": "unparseable",
+                "Name": "not_an_orbit_file.EOF"
+            }
+        ]
+
+        catalog = tools.stage_orbit_file.OrbitFileCatalog(self.working_dir.name)
+        catalog.add(query_results)
+
+        # Selection should agree with select_orbit_file() for the same time ranges
+        for sensing_start_range, sensing_stop_range in (("20230825T184942", "20230825T185210"),
+                                                        ("20230825T171057", "20230825T171257")):
+            self.assertEqual(
+                catalog.select("S1A", ORBIT_TYPE_RES, sensing_start_range, sensing_stop_range),
+                tools.stage_orbit_file.select_orbit_file(query_results, sensing_start_range, sensing_stop_range)
+            )
+
+        # No single cataloged file envelops this range
+        self.assertIsNone(catalog.select("S1A", ORBIT_TYPE_RES, "20230825T171057", "20230825T185210"))
+
+        # Other missions and orbit types are cataloged separately
+        self.assertIsNone(catalog.select("S1A", ORBIT_TYPE_POE, "20230825T184942", "20230825T185210"))
+        self.assertIsNone(catalog.select("S1B", ORBIT_TYPE_RES, "20230825T184942", "20230825T185210"))
+
+        # The catalog is persisted for use by other processes
+        other_catalog = tools.stage_orbit_file.OrbitFileCatalog(self.working_dir.name)
+        self.assertEqual(
+            other_catalog.select("S1A", ORBIT_TYPE_RES, "20230825T184942", "20230825T185210"),
+            ("S1A_OPER_AUX_RESORB_OPOD_20230825T205555_V20230825T171126_20230825T202856.EOF",
+             "b36a07ec-fc8a-444d-9270-dfd2b9463200")
+        )
+
+    def test_main_reuses_catalog_and_cache(self):
+        """Tests that back-to-back requests for the same orbit file are served from the local catalog and cache"""
+        orbit_file_name = "S1A_OPER_AUX_RESORB_OPOD_20230825T205555_V20230825T171126_20230825T202856.EOF"
+        query_results = [{"Id": "b36a07ec-fc8a-444d-9270-dfd2b9463200", "Name": orbit_file_name}]
+
+        def download_orbit_file(request_url, output_directory, orbit_file_name, access_token):
+            output_orbit_file_path = os.path.join(output_directory, orbit_file_name)
+            with open(output_orbit_file_path, 'wb') as outfile:
+                outfile.write(b'orbit file contents')
+            return output_orbit_file_path
+
+        mock_query = MagicMock(return_value=query_results)
+        mock_download = MagicMock(side_effect=download_orbit_file)
+        mock_get_access_token = MagicMock(return_value=("token", "session", timedelta(minutes=10)))
+        mock_delete_access_token = MagicMock()
+
+        cache_directory = os.path.join(self.working_dir.name, "cache")
+
+        with patch.object(tools.stage_orbit_file, "query_orbit_file_service", mock_query), \
+             patch.object(tools.stage_orbit_file, "_download_orbit_file", mock_download), \
+             patch.object(tools.stage_orbit_file, "get_access_token", mock_get_access_token), \
+             patch.object(tools.stage_orbit_file, "delete_access_token", mock_delete_access_token):
+            for job in range(2):
+                output_directory = os.path.join(self.working_dir.name, f"job_{job}")
+                os.makedirs(output_directory)
+
+                args = tools.stage_orbit_file.get_parser().parse_args(
+                    [
+                        f"--output-directory={output_directory}",
+                        f"--orbit-type={ORBIT_TYPE_RES}",
+                        "--username=user",
+                        "--password=pass",
+                        "--sensing-start-range=20230825T184942",
+                        "--sensing-stop-range=20230825T185210",
+                        f"--cache-directory={cache_directory}",
+                        "S1A_IW_SLC__1SDV_20230825T185042_20230825T185110_050036_060529_C8A2"
+                    ]
+                )
+                tools.stage_orbit_file.main(args)
+
+                with open(os.path.join(output_directory, orbit_file_name), 'rb') as infile:
+                    self.assertEqual(b'orbit file contents', infile.read())
+
+            tools.stage_orbit_file.delete_access_tokens()
+
+        # Only the first job should have queried, authenticated and downloaded
+        self.assertEqual(mock_query.call_count, 1)
+        self.assertEqual(mock_download.call_count, 1)
+        self.assertEqual(mock_get_access_token.call_count, 1)
+        mock_delete_access_token.assert_called_once()
+
+    def test_orbit_file_catalog_is_bounded(self):
+        """Tests that the OrbitFileCatalog only retains the most recent entries"""
+        query_results = [
+            {
+                "Id": "6c264b9c-6646-4e3d-92d6-862ef96ee2e8",
+                "Name": "S1A_OPER_AUX_RESORB_OPOD_20230825T190955_V20230825T153241_20230825T185011.EOF"
+            },
+            {
+                "Id": "b36a07ec-fc8a-444d-9270-dfd2b9463200",
+                "Name": "S1A_OPER_AUX_RESORB_OPOD_20230825T205555_V20230825T171126_20230825T202856.EOF"
+            }
+        ]
+
+        with patch.object(tools.stage_orbit_file, "MAX_CATALOG_ENTRIES", 1):
+            tools.stage_orbit_file.OrbitFileCatalog(self.working_dir.name).add(query_results)
+
+        with open(os.path.join(self.working_dir.name, "orbit_file_catalog.json")) as infile:
+            catalog = json.load(infile)
+
+        self.assertEqual([entry[3] for entry in catalog["S1A_RESORB"]], ["b36a07ec-fc8a-444d-9270-dfd2b9463200"])
+
+    def test_reusable_access_token(self):
+        """Tests expiration and invalidation of reused access tokens"""
+        response_401 = Response()
+        response_401.status_code = 401
+        response_200 = Response()
+        response_200.status_code = 200
+        response_200.raw = BytesIO(b'orbit file contents')
+
+        mock_requests_get = MagicMock(side_effect=[response_401, response_200])
+        mock_get_access_token = MagicMock(
+            side_effect=[("token_1", "session_1", timedelta(minutes=10)),
+                         ("token_2", "session_2", timedelta(minutes=10)),
+                         ("token_3", "session_3", timedelta(minutes=1)),
+                         ("token_4", "session_4", timedelta(minutes=1))]
+        )
+        mock_delete_access_token = MagicMock()
+
+        with patch.object(Session, "get", mock_requests_get), \
+             patch.object(tools.stage_orbit_file, "get_access_token", mock_get_access_token), \
+             patch.object(tools.stage_orbit_file, "delete_access_token", mock_delete_access_token), \
+             patch("time.sleep"):
+            tools.stage_orbit_file.download_orbit_file_with_reusable_token(
+                'http://fakeurl.com', self.working_dir.name, 'orbit_file.EOF',
+                'http://auth', 'http://session', 'user', 'pass'
+            )
+
+            # The rejected token is dropped, and the retry uses a new one
+            self.assertEqual(mock_requests_get.call_args_list[0].kwargs["headers"]["Authorization"], "Bearer token_1")
+            self.assertEqual(mock_requests_get.call_args_list[1].kwargs["headers"]["Authorization"], "Bearer token_2")
+            mock_delete_access_token.assert_called_once_with('http://session', 'token_1', 'session_1')
+
+            # The new token is reused until it nears expiration
+            self.assertEqual(
+                tools.stage_orbit_file.get_reusable_access_token('http://auth', 'http://session', 'user', 'pass'),
+                "token_2"
+            )
+
+            # A token whose lifetime is within the safety margin is never reused
+            tools.stage_orbit_file.invalidate_access_token('http://auth', 'user')
+            for _ in range(2):
+                tools.stage_orbit_file.get_reusable_access_token('http://auth', 'http://session', 'user', 'pass')
+
+            tools.stage_orbit_file.delete_access_tokens()
+
+        self.assertEqual(mock_get_access_token.call_count, 4)
+        self.assertEqual(mock_delete_access_token.call_count, 4)
@@ -0,0 +1,60 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from util.aws_util import S3PrefixInventory, get_s3_objects_metadata
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-west-2")
+    with mock_aws():
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(Bucket="bucket", CreateBucketConfiguration={"LocationConstraint": "us-west-2"})
+        yield s3_client
+
+
+def test_get_s3_objects_metadata(s3_client):
+    s3_client.put_object(Bucket="bucket", Key="CSLC/granule_1/granule_1.h5", Body=b"x" * 10)
+    s3_client.put_object(Bucket="bucket", Key="CSLC/granule_1/granule_1.iso.xml", Body=b"x" * 20)
+    s3_client.put_object(Bucket="bucket", Key="CSLC/granule_2/granule_2.h5", Body=b"x" * 30)
+
+    s3_urls = [
+        "s3://bucket/CSLC/granule_1/granule_1.h5",
+        "s3://bucket/CSLC/granule_1/granule_1.iso.xml",
+        "s3://bucket/CSLC/granule_2/granule_2.h5",
+    ]
+    s3_objects_metadata = get_s3_objects_metadata(s3_urls, s3_client=s3_client)
+
+    assert {s3_url: metadata["ContentLength"] for s3_url, metadata in s3_objects_metadata.items()} == dict(zip(s3_urls, [10, 20, 30]))
+    assert s3_objects_metadata[s3_urls[0]]["ETag"] == s3_client.head_object(Bucket="bucket", Key="CSLC/granule_1/granule_1.h5")["ETag"]
+
+
+def test_get_s3_objects_metadata_missing_object(s3_client):
+    s3_client.put_object(Bucket="bucket", Key="CSLC/granule_1/granule_1.h5", Body=b"x" * 10)
+
+    with pytest.raises(ClientError):
+        get_s3_objects_metadata(
+            ["s3://bucket/CSLC/granule_1/granule_1.h5", "s3://bucket/CSLC/granule_1/missing.h5"],
+            s3_client=s3_client
+        )
+
+
+def test_s3_prefix_inventory_lists_each_prefix_once(s3_client):
+    for key in ["products/SLC/granule/granule.zip", "products/SLC/granule/orbit_1.EOF",
+                "products/SLC/granule/orbit_2.EOF", "products/SLC/granule/jplg3230.23i"]:
+        s3_client.put_object(Bucket="bucket", Key=key, Body=b"x")
+
+    list_calls = []
+    s3_client.meta.events.register("before-call.s3.ListObjectsV2", lambda **kwargs: list_calls.append(kwargs))
+    s3_inventory = S3PrefixInventory(s3_client)
+
+    s3_url_prefix = "s3://s3-us-west-2.amazonaws.com:80/bucket/products/SLC/granule"
+    assert s3_inventory.find(s3_url_prefix, suffix=".EOF") == ["s3://bucket/products/SLC/granule/orbit_1.EOF",
+                                                              "s3://bucket/products/SLC/granule/orbit_2.EOF"]
+    assert s3_inventory.find(s3_url_prefix, pattern=r"jp[lr]g") == ["s3://bucket/products/SLC/granule/jplg3230.23i"]
+    assert s3_inventory.list_objects(s3_url_prefix)["s3://bucket/products/SLC/granule/granule.zip"]["ContentLength"] == 1
+    assert len(list_calls) == 1
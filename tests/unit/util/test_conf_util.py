@@ -0,0 +1,30 @@
+import os
+
+from util import conf_util
+from util.conf_util import get_settings_conf
+
+
+def test_get_settings_conf_is_memoized_until_file_changes(tmp_path, mocker):
+    settings_file = tmp_path / "settings.yaml"
+    settings_file.write_text("RELEASE_VERSION: 1.0.0\n")
+    spy = mocker.spy(conf_util.yaml, "safe_load")
+
+    first = get_settings_conf(str(settings_file))
+    assert get_settings_conf(str(settings_file)) is first
+    assert first.cfg["RELEASE_VERSION"] == "1.0.0"
+    assert spy.call_count == 1
+
+    settings_file.write_text("RELEASE_VERSION: 2.0.0\n")
+    stat = os.stat(settings_file)
+    os.utime(settings_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    reloaded = get_settings_conf(str(settings_file))
+    assert reloaded is not first
+    assert reloaded.cfg["RELEASE_VERSION"] == "2.0.0"
+    assert spy.call_count == 2
+    assert get_settings_conf(str(settings_file)) is reloaded
+
+
+def test_get_settings_conf_default_settings_file():
+    assert get_settings_conf() is get_settings_conf()
+    assert get_settings_conf().file.endswith(os.path.join("conf", "settings.yaml"))
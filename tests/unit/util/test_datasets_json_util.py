@@ -0,0 +1,39 @@
+import json
+import os
+import re
+
+from util import datasets_json_util
+from util.datasets_json_util import get_datasets_json, get_match_pattern
+
+
+def _write_datasets_json(path, match_pattern):
+    path.write_text(json.dumps({"datasets": [{"type": "L2_TEST", "match_pattern": match_pattern}]}))
+
+
+def test_get_datasets_json_is_memoized_until_file_changes(tmp_path, mocker):
+    datasets_json_file = tmp_path / "datasets.json"
+    _write_datasets_json(datasets_json_file, r"(?P<id>TEST_\d+)$")
+    spy = mocker.spy(datasets_json_util.json, "load")
+
+    first = get_datasets_json(str(datasets_json_file))
+    assert get_datasets_json(str(datasets_json_file)) is first
+    assert spy.call_count == 1
+
+    pattern = get_match_pattern("L2_TEST", str(datasets_json_file))
+    assert isinstance(pattern, re.Pattern)
+    assert pattern.match("TEST_1").group("id") == "TEST_1"
+    assert get_match_pattern("L2_TEST", str(datasets_json_file)) is pattern
+
+    _write_datasets_json(datasets_json_file, r"(?P<id>OTHER_\d+)$")
+    stat = os.stat(datasets_json_file)
+    os.utime(datasets_json_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    reloaded = get_datasets_json(str(datasets_json_file))
+    assert reloaded is not first
+    assert spy.call_count == 2
+    assert get_match_pattern("L2_TEST", str(datasets_json_file)).match("OTHER_1")
+
+
+def test_get_match_pattern_default_datasets_json():
+    burst_id_pattern = get_match_pattern("L2_CSLC_S1")
+    assert burst_id_pattern.pattern == get_datasets_json().get("L2_CSLC_S1")["match_pattern"]
@@ -7,7 +7,8 @@ import botocore.client
 import botocore.exceptions
 import pytest
 
-from util.ecmwf_util import (check_s3_for_ecmwf,
+from util.ecmwf_util import (EcmwfAvailabilityIndex,
+                             check_s3_for_ecmwf,
                              ecmwf_key_for_datetime,
                              find_ecmwf_for_datetime)
 
@@ -97,3 +98,48 @@ def test_find_ecmwf_for_datetime():
             ecmwf_uri = find_ecmwf_for_datetime(dt)
 
             assert ecmwf_uri is None
+
+
+def test_ecmwf_availability_index():
+    available_keys = [
+        "ecmwf/20230202/D02020000020200001.subset.zz.nc",
+        "ecmwf/20230214/D02141200021412001.subset.zz.nc",
+        "ecmwf/20240101/D01010600010106001.subset.zz.nc",
+    ]
+
+    def _list_objects_v2(operation_name, kwargs):
+        assert operation_name == "ListObjectsV2"
+        assert kwargs["Bucket"] == "opera-ancillaries"
+        return {"Contents": [{"Key": key} for key in available_keys if key.startswith(kwargs["Prefix"])],
+                "IsTruncated": False}
+
+    mock_list_objects = MagicMock(side_effect=_list_objects_v2)
+
+    ecmwf_index = EcmwfAvailabilityIndex("s3://opera-ancillaries/ecmwf")
+
+    datetimes = [datetime.strptime(dt, "%Y%m%dT%H%M%S")
+                 for dt in ("20230202T031035", "20230214T151515", "20240101T103022")]
+    missing_datetime = datetime.strptime("20230220T000000", "%Y%m%dT%H%M%S")
+
+    with patch.object(botocore.client.BaseClient, "_make_api_call", mock_list_objects):
+        ecmwf_s3_paths = ecmwf_index.find_ecmwf_for_datetimes(datetimes + [missing_datetime])
+
+        # One listing per month, regardless of the number of datetimes
+        assert mock_list_objects.call_count == 2
+
+        assert ecmwf_s3_paths[datetimes[0]] == "s3://opera-ancillaries/ecmwf/20230202/D02020000020200001.subset.zz.nc"
+        assert ecmwf_s3_paths[datetimes[1]] == "s3://opera-ancillaries/ecmwf/20230214/D02141200021412001.subset.zz.nc"
+        assert ecmwf_s3_paths[datetimes[2]] == "s3://opera-ancillaries/ecmwf/20240101/D01010600010106001.subset.zz.nc"
+        assert ecmwf_s3_paths[missing_datetime] is None
+
+        # Listings are cached until the TTL expires or the index is invalidated
+        assert ecmwf_index.all_available(datetimes)
+        assert not ecmwf_index.all_available([missing_datetime])
+        assert mock_list_objects.call_count == 2
+
+        ecmwf_index.invalidate()
+        assert ecmwf_index.all_available(datetimes)
+        assert mock_list_objects.call_count == 4
+
+    with pytest.raises(ValueError):
+        EcmwfAvailabilityIndex("opera-ancillaries/ecmwf")
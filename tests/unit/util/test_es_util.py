@@ -0,0 +1,100 @@
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from util import es_util
+
+BODY = {"query": {"match_all": {}}, "from": 0, "size": 10_000, "sort": [{"creation_timestamp": "asc"}], "aggs": {}}
+
+
+def stub_es(shard_count):
+    es = MagicMock()
+    es.search_shards.return_value = {"shards": [[{"index": "grq"}] for _ in range(shard_count)]}
+    return es
+
+
+def slice_hits(slice_id, count=3):
+    return [{"_id": f"{slice_id}-{i}"} for i in range(count)]
+
+
+def test_sliced_scan(mocker: MockerFixture):
+    # ARRANGE
+    es = stub_es(shard_count=3)
+
+    def helpers_scan(es, body, index, scroll, size):
+        yield from slice_hits(body["slice"]["id"])
+
+    mock_helpers_scan = mocker.patch("util.es_util.helpers.scan", side_effect=helpers_scan)
+
+    # ACT
+    hits = list(es_util.sliced_scan(es, BODY, index="grq", source_includes=["metadata"], size=100))
+
+    # ASSERT
+    # one slice per shard, with every slice's hits merged into the results
+    assert sorted(hit["_id"] for hit in hits) == sorted(hit["_id"] for i in range(3) for hit in slice_hits(i))
+
+    slice_bodies = [call.args[1] for call in mock_helpers_scan.call_args_list]
+    assert sorted(body["slice"]["id"] for body in slice_bodies) == [0, 1, 2]
+    for body in slice_bodies:
+        assert body["slice"]["max"] == 3
+        assert body["_source"] == {"includes": ["metadata"], "excludes": []}
+        assert not {"from", "size", "sort", "aggs"} & body.keys()
+    assert {call.kwargs["size"] for call in mock_helpers_scan.call_args_list} == {100}
+
+    # the caller's body is left untouched
+    assert BODY["size"] == 10_000
+
+
+def test_sliced_scan_caps_slices(mocker: MockerFixture):
+    # ARRANGE
+    es = stub_es(shard_count=20)
+    mock_helpers_scan = mocker.patch("util.es_util.helpers.scan", return_value=iter([]))
+
+    # ACT
+    hits = list(es_util.sliced_scan(es, BODY, index="grq"))
+
+    # ASSERT
+    assert hits == []
+    assert mock_helpers_scan.call_count == es_util.MAX_SCAN_SLICES
+    assert {call.args[1]["slice"]["max"] for call in mock_helpers_scan.call_args_list} == {es_util.MAX_SCAN_SLICES}
+
+
+@pytest.mark.parametrize("search_shards", [
+    {"return_value": {"shards": [[{"index": "grq"}]]}},
+    {"side_effect": Exception("search_shards is not permitted")},
+])
+def test_sliced_scan_single_slice(mocker: MockerFixture, search_shards):
+    # ARRANGE
+    es = MagicMock()
+    es.search_shards.configure_mock(**search_shards)
+    mock_helpers_scan = mocker.patch("util.es_util.helpers.scan", return_value=iter(slice_hits(0)))
+
+    # ACT
+    hits = list(es_util.sliced_scan(es, BODY, index="grq"))
+
+    # ASSERT
+    # a single, unsliced scroll, since Elasticsearch requires more than one slice
+    assert hits == slice_hits(0)
+    mock_helpers_scan.assert_called_once()
+    assert "slice" not in mock_helpers_scan.call_args.args[1]
+
+
+def test_sliced_scan_raises_slice_error(mocker: MockerFixture):
+    # ARRANGE
+    es = stub_es(shard_count=2)
+    slice_error = RuntimeError("scroll context expired")
+
+    def helpers_scan(es, body, index, scroll, size):
+        yield from slice_hits(body["slice"]["id"])
+        if body["slice"]["id"] == 1:
+            raise slice_error
+
+    mocker.patch("util.es_util.helpers.scan", side_effect=helpers_scan)
+
+    # ACT
+    with pytest.raises(RuntimeError) as exc_info:
+        list(es_util.sliced_scan(es, BODY, index="grq", size=10))
+
+    # ASSERT
+    assert exc_info.value is slice_error
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from pytest_mock import MockerFixture
+
+from util import grq_client
+
+
+def test_scan(mocker: MockerFixture):
+    # ARRANGE
+    mock_es = mocker.patch("util.grq_client.es_conn_util.get_es_connection").return_value.es
+    hits_pulled = []
+
+    def helpers_scan(es, body, index, scroll, size):
+        for i in range(3):
+            hits_pulled.append(i)
+            yield {"_id": str(i)}
+
+    mock_helpers_scan = mocker.patch("util.grq_client.helpers.scan", side_effect=helpers_scan)
+    body = grq_client.get_body()
+
+    # ACT
+    hits = grq_client.scan(body, index="grq_*_l1_s1_slc*", source_includes=["metadata"], page_size=50, scroll="10m")
+
+    # ASSERT
+    # nothing is requested until the first hit is consumed, and hits are yielded as they arrive
+    mock_helpers_scan.assert_not_called()
+    assert next(hits) == {"_id": "0"}
+    assert hits_pulled == [0]
+    assert [hit["_id"] for hit in hits] == ["1", "2"]
+
+    es, scan_body = mock_helpers_scan.call_args.args
+    assert es is mock_es
+    assert mock_helpers_scan.call_args.kwargs == {"index": "grq_*_l1_s1_slc*", "scroll": "10m", "size": 50}
+    assert scan_body["size"] == 50
+    assert "from" not in scan_body
+    assert scan_body["_source"] == {"includes": ["metadata"], "excludes": []}
+
+    # the caller's body is left untouched
+    assert body["size"] == 10_000
+    assert body["from"] == 0
+
+
+def test_get_slc_datasets_without_ionosphere_data(mocker: MockerFixture):
+    # ARRANGE
+    mocker.patch("util.grq_client.es_conn_util.get_es_connection")
+    mock_helpers_scan = mocker.patch("util.grq_client.helpers.scan", return_value=iter([{"_id": "slc"}]))
+
+    # ACT
+    slc_datasets = list(grq_client.get_slc_datasets_without_ionosphere_data(
+        datetime(2024, 5, 3), datetime(2024, 5, 4), page_size=100))
+
+    # ASSERT
+    assert slc_datasets == [{"_id": "slc"}]
+
+    _, scan_body = mock_helpers_scan.call_args.args
+    assert mock_helpers_scan.call_args.kwargs == {
+        "index": "grq_*_l1_s1_slc*", "scroll": grq_client.DEFAULT_SCROLL_KEEP_ALIVE, "size": 100
+    }
+    assert scan_body["_source"]["includes"] == grq_client.SLC_DATASET_SOURCE_INCLUDES
+    assert "browse_urls" not in scan_body["_source"]["includes"]
+    assert scan_body["sort"] == []
+    assert {"exists": {"field": "metadata.ionosphere.s3_url"}} in scan_body["query"]["bool"]["must_not"]
@@ -2,8 +2,10 @@ from pathlib import Path
 
 import os
 import glob
+import boto3
 import pytest
 import yaml
+from moto import mock_aws
 
 from os.path import abspath, dirname, join
 from util import pge_util
@@ -451,3 +453,36 @@ def test_simulate_disp_s1_pge():
         for path in glob.iglob('/tmp/OPERA_L2_COMPRESSED-CSLC-S1*.*'):
             Path(path).unlink(missing_ok=True)
 
+
+@mock_aws
+def test_download_cached_object_from_s3(tmp_path, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-west-2")
+    pge_util.get_s3_client.cache_clear()
+
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(Bucket="bucket", CreateBucketConfiguration={"LocationConstraint": "us-west-2"})
+    s3_client.put_object(Bucket="bucket", Key="ancillary/opera_burst_database.sqlite3", Body=b"v1")
+
+    cache_directory = str(tmp_path / "cache")
+    job_dirs = [tmp_path / "job1", tmp_path / "job2", tmp_path / "job3"]
+    cache_hits = []
+    for i, job_dir in enumerate(job_dirs):
+        if i == 2:
+            # a new version of the object supersedes the cached copy
+            s3_client.put_object(Bucket="bucket", Key="ancillary/opera_burst_database.sqlite3", Body=b"v2")
+
+        job_dir.mkdir()
+        cache_hits.append(pge_util.download_cached_object_from_s3(
+            "bucket", "ancillary/opera_burst_database.sqlite3", str(job_dir / "opera_burst_database.sqlite3"),
+            cache_directory=cache_directory
+        ))
+
+    assert cache_hits == [False, True, False]
+    assert [(job_dir / "opera_burst_database.sqlite3").read_bytes() for job_dir in job_dirs] == [b"v1", b"v1", b"v2"]
+
+    cached_files = [path for path in (tmp_path / "cache").rglob("*") if path.is_file() and path.suffix != ".lock"]
+    assert len(cached_files) == 1 and cached_files[0].read_bytes() == b"v2"
+
+    pge_util.get_s3_client.cache_clear()
@@ -0,0 +1,116 @@
+import concurrent.futures
+import json
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from util.telemetry_util import TELEMETRY_FILE_NAME, JobTelemetry, instrument_boto3
+
+
+@pytest.fixture
+def job_telemetry(monkeypatch):
+    job_telemetry = JobTelemetry()
+    monkeypatch.setattr("util.telemetry_util._job_telemetry", job_telemetry)
+    return job_telemetry
+
+
+def test_stages_record_nested_counters(job_telemetry):
+    with job_telemetry.stage("get_dem", category="precondition") as outer:
+        job_telemetry.record_request("es")
+        with job_telemetry.stage("download", category="precondition") as inner:
+            job_telemetry.record_request("s3", retries=2)
+            job_telemetry.record_transfer(downloaded=100)
+
+    with pytest.raises(RuntimeError):
+        with job_telemetry.stage("failing", category="wrapper") as failed:
+            raise RuntimeError("boom")
+
+    # counters outside any stage are ignored
+    job_telemetry.record_request("s3")
+
+    assert inner.parent == "get_dem"
+    assert inner.requests == {"s3": 1} and inner.retries == 2 and inner.bytes_downloaded == 100
+    assert outer.requests == {"es": 1, "s3": 1} and outer.retries == 2 and outer.bytes_downloaded == 100
+    assert outer.status == inner.status == "succeeded"
+    assert outer.wall_time >= inner.wall_time >= 0
+    assert failed.status == "failed" and failed.error == "boom"
+
+
+def test_concurrent_stages_record_their_own_cpu_time(job_telemetry):
+    def busy_stage():
+        with job_telemetry.stage("busy", category="precondition") as metrics:
+            t1 = time.thread_time()
+            while time.thread_time() - t1 < 0.3:
+                pass
+        return metrics
+
+    def idle_stage():
+        with job_telemetry.stage("idle", category="precondition") as metrics:
+            time.sleep(0.3)
+        return metrics
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        busy_future, idle_future = executor.submit(busy_stage), executor.submit(idle_stage)
+        busy, idle = busy_future.result(), idle_future.result()
+
+    assert busy.cpu_time >= 0.3
+    # the idle stage is not charged for the CPU of the busy stage running alongside it
+    assert idle.cpu_time < 0.1
+
+
+def test_write_appends_to_existing_telemetry(job_telemetry, tmp_path):
+    with job_telemetry.stage("precondition_a", category="precondition"):
+        pass
+    job_telemetry.write(str(tmp_path))
+
+    with job_telemetry.stage("run_pge", category="wrapper"):
+        pass
+    telemetry_path = job_telemetry.write(str(tmp_path))
+
+    with open(telemetry_path) as infile:
+        telemetry = json.load(infile)
+
+    assert telemetry_path == str(tmp_path / TELEMETRY_FILE_NAME)
+    assert [stage["name"] for stage in telemetry["stages"]] == ["precondition_a", "run_pge"]
+    assert job_telemetry.stages == []
+
+
+@mock_aws
+def test_instrument_boto3_counts_s3_requests_and_bytes(job_telemetry, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    session = boto3.Session(region_name="us-west-2")
+    instrument_boto3(session)
+
+    s3 = session.client("s3")
+    with job_telemetry.stage("stage_ancillary", category="precondition") as metrics:
+        s3.create_bucket(Bucket="bucket", CreateBucketConfiguration={"LocationConstraint": "us-west-2"})
+        s3.put_object(Bucket="bucket", Key="key", Body=b"x" * 1024)
+        s3.get_object(Bucket="bucket", Key="key")["Body"].read()
+
+    assert metrics.requests == {"s3": 3}
+    assert metrics.bytes_uploaded == 1024
+    assert metrics.bytes_downloaded == 1024
+
+
+@mock_aws
+def test_instrument_boto3_counts_managed_transfers(job_telemetry, monkeypatch, tmp_path):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    session = boto3.Session(region_name="us-west-2")
+    instrument_boto3(session)
+
+    s3 = session.client("s3")
+    s3.create_bucket(Bucket="bucket", CreateBucketConfiguration={"LocationConstraint": "us-west-2"})
+    source_path = tmp_path / "source.bin"
+    source_path.write_bytes(b"x" * 20 * 1024 * 1024)  # large enough for multipart, threaded transfers
+
+    with job_telemetry.stage("stage_safe", category="precondition") as metrics:
+        s3.upload_file(str(source_path), "bucket", "key")
+        s3.download_file("bucket", "key", str(tmp_path / "downloaded.bin"))
+
+    assert metrics.bytes_uploaded == 20 * 1024 * 1024
+    assert metrics.bytes_downloaded == 20 * 1024 * 1024
+    assert metrics.requests["s3"] > 2
@@ -4,9 +4,14 @@ to any that are past the expiration time.
 """
 
 # !/usr/bin/env python
+import concurrent.futures
 import os
 import json
+import time
+
 import boto3
+import elasticsearch.helpers
+from more_itertools import chunked
 
 from commons.es_connection import get_grq_es
 
@@ -23,6 +28,9 @@ from datetime import datetime
 
 BASE_PATH = os.path.dirname(__file__)
 
+SWEEP_BATCH_SIZE = 500
+"""Number of expired state config records processed per batch of bulk requests"""
+
 ancillary_es = get_grq_es(logger)  # getting GRQ's es connection
 
 
@@ -55,7 +63,7 @@ def notify_operator(sns_arn, subject, message):
 #    notify_operator(sns_arn, subject=subject, message=message)
 
 
-def update_state_config(es_record):
+def update_state_configs(es_records):
     # NOTE: disabled the following original code since the expired-state-config
     # generation will force the subsequent PGE job; leaving it here uncommented as
     # we may need to add this back when we start integrating urgent response via
@@ -68,17 +76,61 @@ def update_state_config(es_record):
     create_state_config_dataset(es_record.get("_id"), metadata, source.get(pm.START_TIME), source.get(pm.END_TIME))
     """
 
-    # update state config that a timer has already ran for it
-    ancillary_es.update_document(
-        id=es_record.get("_id"),
-        index=es_record.get("_index"),
-        body={
+    # update state configs that a timer has already ran for them, in bulk
+    submitted_by_timer = convert_datetime(datetime.utcnow())
+    operations = [
+        {
+            "_op_type": "update",
+            "_index": es_record.get("_index"),
+            "_id": es_record.get("_id"),
             "doc_as_upsert": True,
-            "doc": {
-                "metadata": {pm.SUBMITTED_BY_TIMER: convert_datetime(datetime.utcnow())}
-            },
-        },
+            "doc": {"metadata": {pm.SUBMITTED_BY_TIMER: submitted_by_timer}},
+        }
+        for es_record in es_records
+    ]
+    _, errors = elasticsearch.helpers.bulk(
+        ancillary_es.es, operations, raise_on_error=False, raise_on_exception=False
+    )
+
+    failed_ids = set()
+    for error in errors:
+        logger.error("Failed to update state config: {}".format(json.dumps(error)))
+        failed_ids.add(next(iter(error.values())).get("_id"))
+
+    return [es_record for es_record in es_records if es_record.get("_id") not in failed_ids]
+
+
+def get_expired_state_config_location(es_record):
+    expired_state_config_index = es_record.get("_index").replace(
+        "-state-config", "-expired-state-config"
+    )
+    expired_state_config_id = es_record.get("_id").replace(
+        "_state-config", "_expired-state-config"
     )
+    return expired_state_config_index, expired_state_config_id
+
+
+def filter_existing_expired_state_configs(es_records):
+    """Returns the records that do not yet have an expired-state-config, using a single mget request"""
+    docs = []
+    for es_record in es_records:
+        expired_state_config_index, expired_state_config_id = get_expired_state_config_location(es_record)
+        docs.append({"_index": expired_state_config_index, "_id": expired_state_config_id, "_source": False})
+
+    response = ancillary_es.es.mget(body={"docs": docs})
+
+    remaining_records = []
+    for es_record, expired_state_config in zip(es_records, response["docs"]):
+        if expired_state_config.get("found", False) is True:
+            logger.info(
+                "Found expire-state-config record {} in {}. Skipping.".format(
+                    expired_state_config["_id"], expired_state_config["_index"]
+                )
+            )
+            continue
+        remaining_records.append(es_record)
+
+    return remaining_records
 
 
 def create_expired_state_config(es_record):
@@ -135,17 +187,50 @@ def evaluate():
     )
 
     index = "grq_*_{}".format(dataset_type.lower())
-    scroll_ids = set()
     logger.info(
         "Querying against the index {} using the following query: {}".format(
             index, json.dumps(query, indent=2)
         )
     )
-    paged_result = ancillary_es.es.search(
-        body=query, index=index, scroll="2m", ignore=404
+
+    sweep_start = time.monotonic()
+    metrics = {"expired": 0, "skipped": 0, "update_failed": 0, "submitted": 0}
+
+    records = elasticsearch.helpers.scan(
+        ancillary_es.es, query=query, index=index, scroll="2m", size=SWEEP_BATCH_SIZE, ignore_unavailable=True
     )
-    records = paged_result.get("hits", {}).get("hits", [])
-    if len(records) == 0:
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, os.cpu_count() + 4)) as executor:
+        for records_batch in chunked(records, SWEEP_BATCH_SIZE):
+            logger.info("Processing {} expired records".format(len(records_batch)))
+            metrics["expired"] += len(records_batch)
+
+            # skip records for which an expired-state-config already exists
+            pending_records = filter_existing_expired_state_configs(records_batch)
+            metrics["skipped"] += len(records_batch) - len(pending_records)
+
+            # update state-configs with submitted_by_timer timestamp
+            updated_records = update_state_configs(pending_records) if pending_records else []
+            metrics["update_failed"] += len(pending_records) - len(updated_records)
+
+            # create expired-state-configs
+            list(executor.map(create_expired_state_config, updated_records))
+            metrics["submitted"] += len(updated_records)
+
+            # NOTE: disabled along with the LDF state config type (pm.LDF_STATE_CONFIG)
+            # it applied to, as send_missing_nen_message no longer exists
+            #for record in updated_records:
+            #    # extract metadata
+            #    metadata = record.get("_source", {}).get("metadata", {})
+            #
+            #    # Notify the operator if needed
+            #    if dataset_type == pm.LDF_STATE_CONFIG:
+            #        send_missing_nen_message(sns_arn, metadata)
+
+    metrics["duration_seconds"] = round(time.monotonic() - sweep_start, 3)
+    logger.info("Timer sweep metrics for {}: {}".format(dataset_type, json.dumps(metrics)))
+
+    if metrics["expired"] == 0:
         logger.info(
             "No records found in index {} with the following query: {}".format(
                 index, json.dumps(query, indent=2)
@@ -156,53 +241,12 @@ def evaluate():
             msg_details="No expired state configs found for type {}".format(dataset_type)
         )
 
-    while len(records) > 0:
-        scroll_id = paged_result["_scroll_id"]
-        for record in records:
-            logger.info("Processing record {}".format(record.get("_id")))
-
-            # check if expired-state-config exists; if so, skip
-            expired_state_config_index = record.get("_index").replace(
-                "-state-config", "-expired-state-config"
-            )
-            expired_state_config_id = record.get("_id").replace(
-                "_state-config", "_expired-state-config"
+    if metrics["update_failed"]:
+        raise RuntimeError(
+            "Failed to update {} of {} expired state configs. See logs for details.".format(
+                metrics["update_failed"], metrics["expired"]
             )
-            expired_state_config = ancillary_es.get_by_id(
-                index=expired_state_config_index,
-                id=expired_state_config_id,
-                ignore=[404]
-            )
-            if expired_state_config.get("found", False) is True:
-                logger.info(
-                    "Found expire-state-config record {} in {}. Skipping.".format(
-                        expired_state_config_id, expired_state_config_index
-                    )
-                )
-                continue
-
-            # update state-config with submitted_by_timer timestamp
-            update_state_config(record)
-
-            # create expired-state-config
-            create_expired_state_config(record)
-
-            # extract metadata
-            metadata = record.get("_source", {}).get("metadata", {})
-
-            # Notify the operator if needed
-            if dataset_type == pm.LDF_STATE_CONFIG:
-                send_missing_nen_message(sns_arn, metadata)
-
-        if scroll_id:
-            scroll_ids.add(scroll_id)
-            paged_result = ancillary_es.es.scroll(scroll_id=scroll_id, scroll="2m")
-            records = paged_result["hits"]["hits"]
-        else:
-            records = []
-
-    for scroll_id in scroll_ids:
-        ancillary_es.es.clear_scroll(scroll_id=scroll_id)
+        )
 
 
 if __name__ == "__main__":
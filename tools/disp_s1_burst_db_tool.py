@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 
+import asyncio
 from collections import defaultdict
+import json
 import logging
 from data_subscriber import cslc_utils
 from data_subscriber.cslc_utils import CSLCDependency
 from datetime import datetime, timedelta
 import argparse
+import aiohttp
 from util.conf_util import SettingsConf
 from data_subscriber.cmr import get_cmr_token
 from data_subscriber.parser import create_parser
@@ -47,9 +50,10 @@ server_parser.add_argument("date_time", help="The Acquisition Datetime looks lik
 server_parser = subparsers.add_parser("validate", help="Validates the burst database file against the CMR")
 server_parser.add_argument("frame_id", help="The frame id to validate")
 
-args = parser.parse_args()
-
-disp_burst_map, burst_to_frames, day_indices_to_frames = cslc_utils.localize_disp_frame_burst_hist(cslc_utils.DISP_FRAME_BURST_MAP_HIST)
+server_parser = subparsers.add_parser("validate_all", help="Validates all frames, or the selected ones, of the burst database file against the CMR")
+server_parser.add_argument("--frame-ids", dest="frame_ids", nargs="+", type=int, help="The frame ids to validate. Defaults to all frames", required=False)
+server_parser.add_argument("--max-workers", dest="max_workers", type=int, help="The maximum number of frames queried from the CMR at the same time", required=False, default=8)
+server_parser.add_argument("--output", dest="output", help="Path of the JSON summary file to write. The summary is printed if not provided", required=False)
 
 def get_k_cycle(acquisition_dts, frame_id, disp_burst_map, k, verbose):
 
@@ -63,109 +67,28 @@ def get_k_cycle(acquisition_dts, frame_id, disp_burst_map, k, verbose):
 
     return k_cycle
 
-if args.subparser_name == "list":
-    l = list(disp_burst_map.keys())
-    print("Frame numbers (%d): \n" % len(l), l)
-
-elif args.subparser_name == "summary":
-    l = list(disp_burst_map.keys())
-    print([(f, len(disp_burst_map[f].burst_ids), len(disp_burst_map[f].sensing_datetimes))  for f in l])
-
-    print("Frame numbers: %d" % len(l))
-
-    # Add up all the sensing times and print it out
-    total_sensing_times = 0
-    for f in l:
-        total_sensing_times += len(disp_burst_map[f].sensing_datetimes)
-    print("Total sensing times: ", total_sensing_times)
-
-    # Add up and print out the total number of granules.
-    total_granules = 0
-    for f in l:
-        total_granules += len(disp_burst_map[f].burst_ids) * len(disp_burst_map[f].sensing_datetimes)
-    print("Total granules: ", total_granules)
-
-elif args.subparser_name == "native_id":
-    burst_id, acquisition_dts, acquisition_cycles, frame_ids = cslc_utils.parse_cslc_native_id(args.id, burst_to_frames, disp_burst_map)
-    print("Burst id: ", burst_id)
-    print("Acquisition datetime: ", acquisition_dts)
-    print("Acquisition cycles: ", acquisition_cycles)
-    print("Frame ids: ", frame_ids)
-
-    if len(frame_ids) == 0:
-        print("Frame ids not found for burst id: ", burst_id, " this burst likely is not valid for DISP-S1 processing")
-        exit(-1)
-
-    if args.k:
-        k = int(args.k)
-
-        k_cycle = get_k_cycle(acquisition_dts, frame_ids[0], disp_burst_map, k, args.verbose)
-        if (k_cycle >= 0):
-            print(f"K-cycle: {k_cycle} out of {k}")
-        else:
-            print("K-cycle can not computed")
-
-elif args.subparser_name == "frame":
-    frame_number = int(args.number)
-    if frame_number not in disp_burst_map.keys():
-        print("Frame number: ", frame_number, "does not exist")
-        exit(-1)
-
-    print("Frame number: ", frame_number)
-    print("Burst ids (%d): " % len(disp_burst_map[frame_number].burst_ids))
-    print(disp_burst_map[frame_number].burst_ids)
-    print("Sensing datetimes (%d): " % len(disp_burst_map[frame_number].sensing_datetimes))
-    print([t.isoformat() for t in disp_burst_map[frame_number].sensing_datetimes])
-    print("Day indices: ", disp_burst_map[frame_number].sensing_datetime_days_index)
-
-elif args.subparser_name == "burst":
-    burst_id = args.burst_id
-    if burst_id not in burst_to_frames.keys():
-        print("Burst id: ", burst_id, "does not exist")
-        exit(-1)
-
-    print("Burst id: ", burst_id)
-    frame_numbers = burst_to_frames[burst_id]
-    print("Frame numbers: ", frame_numbers)
-    print("Sensing datetimes: ")
-    for f in frame_numbers:
-        print("(%d): " % len(disp_burst_map[f].sensing_datetimes))
-        print([t.isoformat() for t in disp_burst_map[f].sensing_datetimes])
-
-elif args.subparser_name == "time_range":
-    start_time = datetime.fromisoformat(args.start_time)
-    end_time = datetime.fromisoformat(args.end_time)
-
-    for frame_number in disp_burst_map.keys():
-        for t in disp_burst_map[frame_number].sensing_datetimes:
-            if start_time <= t <= end_time:
-                print("Frame number: ", frame_number)
-                print("\tSensing datetime: ", t.isoformat())
-                print("\tBurst ids (%d):" % len(disp_burst_map[frame_number].burst_ids))
-                print("\t", disp_burst_map[frame_number].burst_ids)
-
-elif args.subparser_name == "unique_id":
-    print("This feature is not implemented yet")
-
-elif args.subparser_name == "validate":
-    frame_id = int(args.frame_id)
-    if frame_id not in disp_burst_map.keys():
-        print("Frame id: ", frame_id, "does not exist")
-        exit(-1)
-
-    start_date = (disp_burst_map[frame_id].sensing_datetimes[0]-timedelta(minutes=30)).strftime("%Y-%m-%dT%H:%M:%SZ")
-    end_date = (disp_burst_map[frame_id].sensing_datetimes[-1]+timedelta(minutes=30)).strftime("%Y-%m-%dT%H:%M:%SZ")
-    query_timerange = DateTimeRange(start_date, end_date)
-
-    # Query the CMR for the frame_id between the first and the last sensing datetime
+def get_validation_cmr_query():
     subs_args = create_parser().parse_args(["query", "-c", "OPERA_L2_CSLC-S1_V1", "--k=1", "--m=1", "--use-temporal", "--processing-mode=forward"])
-    subs_args.frame_id = frame_id
     settings = SettingsConf().cfg
     cmr, token, username, password, edl = get_cmr_token(subs_args.endpoint, settings)
     cslc_query = CslcCmrQuery(subs_args, token, None, cmr, None, settings)
-    all_granules = cslc_query.query_cmr_by_frame_and_dates(subs_args, token, cmr, settings, datetime.now(), query_timerange)
 
-    print(len(all_granules), " granules found in the CMR")
+    return subs_args, settings, cmr, token, cslc_query
+
+def get_frame_query_timerange(frame_id, disp_burst_map):
+    start_date = (disp_burst_map[frame_id].sensing_datetimes[0]-timedelta(minutes=30)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    end_date = (disp_burst_map[frame_id].sensing_datetimes[-1]+timedelta(minutes=30)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return DateTimeRange(start_date, end_date)
+
+def validate_frame(frame_id, all_granules, disp_burst_map):
+    '''
+    Validation fails if the following conditions are true. Otherwise, it succeeds
+    1. If we did not find any complete acquisition cycle that is in the expected list
+    2. If we found any complete acquisition cycle that is not in the expected list
+        Complete acq cycle is the one that has all the bursts according to the burst pattern
+
+    Returns a dict with the acquisition cycles missing bursts (and which), and the unexpected complete acquisition cycles
+    '''
 
     # Group them by acquisition cycle
     acq_cycles = defaultdict(set)
@@ -174,42 +97,205 @@ elif args.subparser_name == "validate":
         acq_cycles[g["acquisition_cycle"]].add(g["burst_id"])
         granules_map[g["acquisition_cycle"]].append(g["granule_id"])
 
-    '''
-    Validation fails if the following conditions are true. Otherwise, it succeeds
-    1. If we did not find any complete acquisition cycle that is in the expected list
-    2. If we found any complete acquisition cycle that is not in the expected list
-        Complete acq cycle is the one that has all the bursts according to the burst pattern 
-    '''
-    missing_cycles = False
-    unexpected_cycles = False
+    missing_cycles = {}
     bursts_expected = disp_burst_map[frame_id].burst_ids
     for i in disp_burst_map[frame_id].sensing_datetime_days_index:
-        bursts_found = acq_cycles[i]
-        delta = bursts_expected - bursts_found
+        delta = bursts_expected - acq_cycles[i]
         if delta:
-            missing_cycles = True
-            print(f"Acquisition cycle {i} is missing {len(delta)} bursts: ", delta)
-            print(f"Granules for acquisition cycle {i} found:", granules_map[i])
-        else:
-            print(f"Acquisition cycle {i} is good")
+            missing_cycles[i] = {"missing_bursts": sorted(delta), "granules": granules_map[i]}
 
+    unexpected_cycles = {}
     new_cycles = acq_cycles.keys() - disp_burst_map[frame_id].sensing_datetime_days_index
-    for i in new_cycles:
+    for i in sorted(new_cycles):
         if acq_cycles[i].issuperset(bursts_expected):
             if ("HH" in granules_map[i][0]): # We don't process HH polarization so it's not in the database on purpose
                 pass
             else:
-                unexpected_cycles = True
-                print(f"Complete acquisition cycle {i} was found in CMR but was not in the database json")
-                print(f"Granules for acquisition cycle {i} found:", granules_map[i])
+                unexpected_cycles[i] = {"granules": granules_map[i]}
+
+    return {
+        "frame_id": frame_id,
+        "granules_found": len(all_granules),
+        "valid": not missing_cycles and not unexpected_cycles,
+        "missing_cycles": missing_cycles,
+        "unexpected_cycles": unexpected_cycles
+    }
+
+async def async_validate_frames(frame_ids, disp_burst_map, max_workers):
+    '''Validates the given frames with one CMR token and one HTTP session, whose connections are reused for every
+    CMR page of every frame. Up to max_workers frames are queried from the CMR at the same time'''
+    subs_args, settings, cmr, token, cslc_query = get_validation_cmr_query()
+    now = datetime.now()
+    sem = asyncio.Semaphore(max_workers)
+
+    async def async_validate_frame(frame_id, session):
+        async with sem:
+            try:
+                all_granules = await cslc_query.async_query_cmr_by_frame_and_dates(
+                    frame_id, subs_args, token, cmr, settings, now, get_frame_query_timerange(frame_id, disp_burst_map),
+                    silent=True, session=session)
+            except Exception as e:
+                logger.error(f"Failed to query the CMR for frame {frame_id}: {e}")
+                return {"frame_id": frame_id, "valid": False, "error": str(e)}
+
+        result = validate_frame(frame_id, all_granules, disp_burst_map)
+        logger.info(f"Frame {frame_id} {'passed' if result['valid'] else 'FAILED'} validation")
+        return result
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max_workers)) as session:
+        return await asyncio.gather(*[async_validate_frame(frame_id, session) for frame_id in frame_ids])
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    disp_burst_map, burst_to_frames, day_indices_to_frames = cslc_utils.localize_disp_frame_burst_hist(cslc_utils.DISP_FRAME_BURST_MAP_HIST)
+
+    if args.subparser_name == "list":
+        l = list(disp_burst_map.keys())
+        print("Frame numbers (%d): \n" % len(l), l)
+
+    elif args.subparser_name == "summary":
+        l = list(disp_burst_map.keys())
+        print([(f, len(disp_burst_map[f].burst_ids), len(disp_burst_map[f].sensing_datetimes))  for f in l])
+
+        print("Frame numbers: %d" % len(l))
+
+        # Add up all the sensing times and print it out
+        total_sensing_times = 0
+        for f in l:
+            total_sensing_times += len(disp_burst_map[f].sensing_datetimes)
+        print("Total sensing times: ", total_sensing_times)
+
+        # Add up and print out the total number of granules.
+        total_granules = 0
+        for f in l:
+            total_granules += len(disp_burst_map[f].burst_ids) * len(disp_burst_map[f].sensing_datetimes)
+        print("Total granules: ", total_granules)
+
+    elif args.subparser_name == "native_id":
+        burst_id, acquisition_dts, acquisition_cycles, frame_ids = cslc_utils.parse_cslc_native_id(args.id, burst_to_frames, disp_burst_map)
+        print("Burst id: ", burst_id)
+        print("Acquisition datetime: ", acquisition_dts)
+        print("Acquisition cycles: ", acquisition_cycles)
+        print("Frame ids: ", frame_ids)
+
+        if len(frame_ids) == 0:
+            print("Frame ids not found for burst id: ", burst_id, " this burst likely is not valid for DISP-S1 processing")
+            exit(-1)
+
+        if args.k:
+            k = int(args.k)
+
+            k_cycle = get_k_cycle(acquisition_dts, frame_ids[0], disp_burst_map, k, args.verbose)
+            if (k_cycle >= 0):
+                print(f"K-cycle: {k_cycle} out of {k}")
+            else:
+                print("K-cycle can not computed")
+
+    elif args.subparser_name == "frame":
+        frame_number = int(args.number)
+        if frame_number not in disp_burst_map.keys():
+            print("Frame number: ", frame_number, "does not exist")
+            exit(-1)
+
+        print("Frame number: ", frame_number)
+        print("Burst ids (%d): " % len(disp_burst_map[frame_number].burst_ids))
+        print(disp_burst_map[frame_number].burst_ids)
+        print("Sensing datetimes (%d): " % len(disp_burst_map[frame_number].sensing_datetimes))
+        print([t.isoformat() for t in disp_burst_map[frame_number].sensing_datetimes])
+        print("Day indices: ", disp_burst_map[frame_number].sensing_datetime_days_index)
+
+    elif args.subparser_name == "burst":
+        burst_id = args.burst_id
+        if burst_id not in burst_to_frames.keys():
+            print("Burst id: ", burst_id, "does not exist")
+            exit(-1)
+
+        print("Burst id: ", burst_id)
+        frame_numbers = burst_to_frames[burst_id]
+        print("Frame numbers: ", frame_numbers)
+        print("Sensing datetimes: ")
+        for f in frame_numbers:
+            print("(%d): " % len(disp_burst_map[f].sensing_datetimes))
+            print([t.isoformat() for t in disp_burst_map[f].sensing_datetimes])
+
+    elif args.subparser_name == "time_range":
+        start_time = datetime.fromisoformat(args.start_time)
+        end_time = datetime.fromisoformat(args.end_time)
+
+        for frame_number in disp_burst_map.keys():
+            for t in disp_burst_map[frame_number].sensing_datetimes:
+                if start_time <= t <= end_time:
+                    print("Frame number: ", frame_number)
+                    print("\tSensing datetime: ", t.isoformat())
+                    print("\tBurst ids (%d):" % len(disp_burst_map[frame_number].burst_ids))
+                    print("\t", disp_burst_map[frame_number].burst_ids)
+
+    elif args.subparser_name == "unique_id":
+        print("This feature is not implemented yet")
+
+    elif args.subparser_name == "validate":
+        frame_id = int(args.frame_id)
+        if frame_id not in disp_burst_map.keys():
+            print("Frame id: ", frame_id, "does not exist")
+            exit(-1)
+
+        query_timerange = get_frame_query_timerange(frame_id, disp_burst_map)
+
+        # Query the CMR for the frame_id between the first and the last sensing datetime
+        subs_args, settings, cmr, token, cslc_query = get_validation_cmr_query()
+        subs_args.frame_id = frame_id
+        all_granules = cslc_query.query_cmr_by_frame_and_dates(subs_args, token, cmr, settings, datetime.now(), query_timerange)
+
+        print(len(all_granules), " granules found in the CMR")
+
+        result = validate_frame(frame_id, all_granules, disp_burst_map)
+        for i in disp_burst_map[frame_id].sensing_datetime_days_index:
+            if i in result["missing_cycles"]:
+                missing_bursts = result["missing_cycles"][i]["missing_bursts"]
+                print(f"Acquisition cycle {i} is missing {len(missing_bursts)} bursts: ", set(missing_bursts))
+                print(f"Granules for acquisition cycle {i} found:", result["missing_cycles"][i]["granules"])
+            else:
+                print(f"Acquisition cycle {i} is good")
 
-    if not missing_cycles:
-        print("All acquisition cycles in the database json are complete in CMR")
-    if not unexpected_cycles:
-        print("Did not find any complete acquisition cycles in CMR that is not in the database json")
+        for i, unexpected_cycle in result["unexpected_cycles"].items():
+            print(f"Complete acquisition cycle {i} was found in CMR but was not in the database json")
+            print(f"Granules for acquisition cycle {i} found:", unexpected_cycle["granules"])
 
-    if missing_cycles or unexpected_cycles:
-        print(f"FAIL: frame_id {frame_id} validation failed")
-    else:
-        print(f"SUCCESS: frame_id {frame_id} validation succeeded!")
+        if not result["missing_cycles"]:
+            print("All acquisition cycles in the database json are complete in CMR")
+        if not result["unexpected_cycles"]:
+            print("Did not find any complete acquisition cycles in CMR that is not in the database json")
 
+        if not result["valid"]:
+            print(f"FAIL: frame_id {frame_id} validation failed")
+        else:
+            print(f"SUCCESS: frame_id {frame_id} validation succeeded!")
+
+    elif args.subparser_name == "validate_all":
+        frame_ids = args.frame_ids if args.frame_ids else sorted(disp_burst_map.keys())
+        unknown_frame_ids = [frame_id for frame_id in frame_ids if frame_id not in disp_burst_map.keys()]
+        if unknown_frame_ids:
+            print("Frame ids: ", unknown_frame_ids, "do not exist")
+            exit(-1)
+
+        results = asyncio.run(async_validate_frames(frame_ids, disp_burst_map, args.max_workers))
+
+        summary = {
+            "frames_validated": len(results),
+            "frames_failed": [result["frame_id"] for result in results if not result["valid"]],
+            "frames": {result["frame_id"]: result for result in results}
+        }
+
+        if args.output:
+            with open(args.output, "w") as outfile:
+                json.dump(summary, outfile, indent=2)
+            print("Validation summary written to ", args.output)
+        else:
+            print(json.dumps(summary, indent=2))
+
+        if summary["frames_failed"]:
+            print(f"FAIL: {len(summary['frames_failed'])} of {len(results)} frames failed validation: ", summary["frames_failed"])
+            exit(-1)
+        else:
+            print(f"SUCCESS: all {len(results)} frames validated successfully!")
@@ -15,11 +15,14 @@ from requests.exceptions import HTTPError
 logger = logging.getLogger(__name__)
 
 
-async def async_cmr_posts(url, request_bodies: list):
-    """Given a list of request bodies, performs CMR queries asynchronously, returning  the response JSONs."""
+async def async_cmr_posts(url, request_bodies: list, session: Optional[aiohttp.ClientSession] = None):
+    """
+    Given a list of request bodies, performs CMR queries asynchronously, returning  the response JSONs.
+    If a session is provided, its connection pool is reused. Otherwise, a new session is opened for these queries.
+    """
     logger.info("Querying CMR")
 
-    async with aiohttp.ClientSession() as session:
+    async with contextlib.nullcontext(session) if session is not None else aiohttp.ClientSession() as session:
         tasks = []
         sem = asyncio.Semaphore(1)
        # async with asyncio.Semaphore(1) as sem:
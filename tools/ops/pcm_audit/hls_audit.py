@@ -8,11 +8,11 @@ from pathlib import PurePath
 from pprint import pprint
 
 import elasticsearch
-import more_itertools
 from dotenv import dotenv_values
-from elasticsearch import RequestsHttpConnection, helpers
+from elasticsearch import RequestsHttpConnection
 
-from util.grq_client import get_body
+from tools.ops.pcm_audit.pcm_audit_utils import AuditIdSet, DEFAULT_SPILL_THRESHOLD, index_pattern, scan_hits
+from util.es_util import get_body
 
 logging.getLogger("elasticsearch").setLevel(level=logging.WARNING)
 logging.basicConfig(
@@ -61,6 +61,18 @@ argparser.add_argument(
     default="9999-01-01T00:00:00.000000",
     help=f'ISO formatted datetime string. Must be compatible with Python Elasticsearch Client. Defaults to "%(default)s".'
 )
+argparser.add_argument(
+    "--spill-threshold",
+    type=int,
+    default=DEFAULT_SPILL_THRESHOLD,
+    help=f'Number of IDs to hold in memory per set before spilling to a temporary on-disk index. Defaults to "%(default)s".'
+)
+argparser.add_argument(
+    "--scan-size",
+    type=int,
+    default=10_000,
+    help=f'Elasticsearch scroll page size. Defaults to "%(default)s".'
+)
 
 logger.info(f'{sys.argv=}')
 args = argparser.parse_args(sys.argv[1:])
@@ -80,46 +92,42 @@ def get_range(
         }
     }
 
-def files_to_granules(files):
+def new_id_set(ids=()):
+    return AuditIdSet(ids, spill_threshold=args.spill_threshold)
+
+def file_to_granule(file_id):
     # from HLS.L30.T27XVF.2023202T212144.v2.0.B03-r1 to
     #      HLS.L30.T27XVF.2023202T212144.v2.0-r1
-    queried_or_downloaded_granules = more_itertools.map_reduce(
-        files,
-        lambda k: '.'.join(k.split('.')[:-1]) + '-' + k.split('.')[-1].split('-')[1])
+    return '.'.join(file_id.split('.')[:-1]) + '-' + file_id.split('.')[-1].split('-')[1]
 
-    return set(queried_or_downloaded_granules.keys())
+def files_to_granules(files):
+    return files.map(file_to_granule)
 
 def get_ingested_files(index):
     '''from _source.metadata.Files.Filename, get rid of .tif and then append the revision string'''
-    ingested_files = set()
     body = get_body()
-    body["sort"] = []
-    body["_source"]["includes"] = ["metadata.Files"]
     body["query"]["bool"]["must"].append(get_range("creation_timestamp"))
-    search_results = list(helpers.scan(es, body, index=index, scroll="5m", size=10_000))
-    for hit in search_results:
-        for file in hit["_source"]["metadata"]["Files"]:
-            filename = file["FileName"].removesuffix(".tif")
-            file_id = filename + '-' + hit['_id'].split('-')[1]
-            ingested_files.add(file_id)
-
-    return ingested_files
+    hits = scan_hits(es, body, index=index, source_includes=["metadata.Files.FileName"], size=args.scan_size)
+    return new_id_set(
+        file["FileName"].removesuffix(".tif") + '-' + hit['_id'].split('-')[1]
+        for hit in hits
+        for file in hit["_source"]["metadata"]["Files"]
+    )
 
 #######################################################################
 # GET MASTER LIST. THIS IS THE LIST OF QUERIED/DOWNLOADED FILES
 #######################################################################
 
 body = get_body()
-body["sort"] = []
-body["_source"]["includes"] = "false"
 body["query"]["bool"]["must"].append(get_range("query_datetime"))
-search_results = list(helpers.scan(es, body, index=",".join(["hls_catalog", "hls_catalog-*"]), scroll="5m", size=10_000))
 # from HLS.L30.T27XVF.2023202T212144.v2.0.B03.tif-r1 to
 #      HLS.L30.T27XVF.2023202T212144.v2.0.B03-r1
-queried_or_downloaded_files = {''.join(hit["_id"].split(".tif")) for hit in search_results}
-logger.debug(f'{pstr(queried_or_downloaded_files)=!s}')
+queried_or_downloaded_files = new_id_set(
+    ''.join(hit["_id"].split(".tif"))
+    for hit in scan_hits(es, body, index=index_pattern("hls_catalog"), size=args.scan_size)
+)
 
-logger.info(f'Data queried or downloaded (files): {len(search_results)=:,}')
+logger.info(f'Data queried or downloaded (files): {len(queried_or_downloaded_files)=:,}')
 logger.debug(f'{pstr(queried_or_downloaded_files)=!s}')
 
 queried_or_downloaded_granules = files_to_granules(queried_or_downloaded_files)
@@ -131,14 +139,14 @@ logger.debug(f'{pstr(queried_or_downloaded_granules)=!s}')
 # logger.debug(f'{pstr(missing_queried_or_downloaded_granules)=!s}')
 
 body = get_body()
-body["sort"] = []
-body["_source"]["includes"] = "false"
 body["query"]["bool"]["must"].append(get_range("query_datetime"))
 body["query"]["bool"]["must"].append({"term": {"downloaded": "true"}})
-search_results = list(helpers.scan(es, body, index=",".join(["hls_catalog", "hls_catalog-*"]), scroll="5m", size=10_000))
-downloaded_files = {''.join(hit["_id"].split(".tif")) for hit in search_results}
+downloaded_files = new_id_set(
+    ''.join(hit["_id"].split(".tif"))
+    for hit in scan_hits(es, body, index=index_pattern("hls_catalog"), size=args.scan_size)
+)
 
-logger.info(f'Data downloaded (files): {len(search_results)=:,}')
+logger.info(f'Data downloaded (files): {len(downloaded_files)=:,}')
 logger.debug(f'{pstr(downloaded_files)=!s}')
 
 downloaded_granules = files_to_granules(downloaded_files)
@@ -157,10 +165,10 @@ logger.debug(f'{pstr(missing_download_granules)=!s}')
 # GET L2 products (data ingested)
 #######################################################################
 
-l30_ingested_files = get_ingested_files(",".join(["grq_*_l2_hls_l30", "grq_*_l2_hls_l30-*"]))
+l30_ingested_files = get_ingested_files(index_pattern("grq_*_l2_hls_l30"))
 logger.info(f'Data ingested (L30): {len(l30_ingested_files)=:,}')
 
-s30_ingested_files = get_ingested_files(",".join(["grq_*_l2_hls_s30", "grq_*_l2_hls_s30-*"]))
+s30_ingested_files = get_ingested_files(index_pattern("grq_*_l2_hls_s30"))
 logger.info(f'Data ingested (S30): {len(s30_ingested_files)=:,}')
 
 all_ingested_files = l30_ingested_files.union(s30_ingested_files)
@@ -184,22 +192,49 @@ logger.debug(f'{pstr(missing_data_ingest_granules)=!s}')
 #  Similarly, it is possible for a L3 data product record to not have CNM-R information if PO.DAAC has not responded yet.
 #######################################################################
 
+def get_file_granule(hit, files, granules):
+    granule = hit["_source"]["metadata"]["accountability"]["L3_DSWx_HLS"]["trigger_dataset_id"]
+    revision = granule.split('-')[1]
+    granules.add(granule)
+
+    files.update(
+        PurePath(input).name.removesuffix(".tif") + '-' + revision
+        for input in hit["_source"]["metadata"]["accountability"]["L3_DSWx_HLS"]["metadata"]["filenames"]
+    )
+
 body = get_body()
-body["sort"] = []
-body["_source"]["includes"] = ["metadata.runconfig.localize", "metadata.accountability", "daac_CNM_S_status", "daac_delivery_status"]
 body["query"]["bool"]["must"].append(get_range("creation_timestamp"))
 # body["query"]["bool"]["must"].append({"wildcard": {"daac_CNM_S_status": "*"}})
 
-search_results = list(helpers.scan(es, body, index=",".join(["grq_*_l3_dswx_hls", "grq_*_l3_dswx_hls-*"]), scroll="5m", size=10_000))
-pge_input_files = set()
-for hit in search_results:
+# PGE inputs and CNM-S/CNM-R inputs are collected in a single pass over the L3 products
+pge_input_files = new_id_set()
+pge_output_granules = new_id_set()
+cnm_s_input_files = new_id_set()
+cnm_s_input_granules = new_id_set()
+cnm_r_input_files = new_id_set()
+cnm_r_input_granules = new_id_set()
+for hit in scan_hits(
+        es, body, index=index_pattern("grq_*_l3_dswx_hls"),
+        source_includes=["metadata.runconfig.localize", "metadata.accountability", "daac_CNM_S_status", "daac_delivery_status"],
+        size=args.scan_size
+):
+    pge_output_granules.add(hit["_id"])
+
     for input in hit["_source"]["metadata"]["runconfig"]["localize"]:
         # input looks like "s3://s3-us-west-2.amazonaws.com:80/opera-dev-rs-fwd-pyoon/inputs/HLS_S30/HLS.S30.T43VEL.2023208T064629.v2.0-r2/HLS.S30.T43VEL.2023208T064629.v2.0.B02.tif"
         revision = input.split('/')[-2].split('-')[1]
         file_id = PurePath(input).name.removesuffix(".tif") + '-' + revision
         pge_input_files.add(file_id)
 
-pge_output_granules = {hit["_id"] for hit in search_results}
+    #######################################################################
+    # CNM-S & CNM-R
+    #######################################################################
+    if hit["_source"].get("daac_CNM_S_status") == "SUCCESS":
+        get_file_granule(hit, cnm_s_input_files, cnm_s_input_granules)
+
+        if hit["_source"].get("daac_delivery_status") == "SUCCESS":
+            get_file_granule(hit, cnm_r_input_files, cnm_r_input_granules)
+
 logger.info(f'Data produced by PGE(s) (DSWx): {len(pge_output_granules)}')
 
 logger.info(f'Data processed through PGE(s): {len(pge_input_files)}')
@@ -213,31 +248,6 @@ logger.info(f'Inputs Missing PGE: {len(missing_pge_granules)=:,}')
 
 pge_input_granules = files_to_granules(pge_input_files)
 
-#######################################################################
-# CNM-S & CNM-R
-#######################################################################
-
-def get_file_granule(hit, files, granules):
-    if hit["_source"].get("daac_CNM_S_status") == "SUCCESS":
-        granule = hit["_source"]["metadata"]["accountability"]["L3_DSWx_HLS"]["trigger_dataset_id"]
-        revision = granule.split('-')[1]
-        granules.add(granule)
-
-        for input in hit["_source"]["metadata"]["accountability"]["L3_DSWx_HLS"]["metadata"]["filenames"]:
-            file_id = PurePath(input).name.removesuffix(".tif") + '-' + revision
-            files.add(file_id)
-
-cnm_s_input_files = set()
-cnm_s_input_granules = set()
-cnm_r_input_files = set()
-cnm_r_input_granules = set()
-for hit in search_results:
-    if hit["_source"].get("daac_CNM_S_status") == "SUCCESS":
-        get_file_granule(hit, cnm_s_input_files, cnm_s_input_granules)
-
-    if hit["_source"].get("daac_delivery_status") == "SUCCESS":
-        get_file_granule(hit, cnm_r_input_files, cnm_r_input_granules)
-
 missing_cnm_s_files = pge_input_files - cnm_s_input_files
 logger.info(f'Inputs Missing successful CNM-S (files): {len(missing_cnm_s_files)=:,}')
 missing_cnm_s_granules = pge_input_granules - cnm_s_input_granules
@@ -0,0 +1,129 @@
+"""Streaming building blocks for the PCM audit scripts."""
+import logging
+import os
+import sqlite3
+import tempfile
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from elasticsearch import Elasticsearch
+from more_itertools import chunked
+
+from util.es_util import sliced_scan
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPILL_THRESHOLD = 5_000_000
+"""Number of IDs an AuditIdSet holds in memory before spilling to disk."""
+
+
+class AuditIdSet:
+    """
+    A set of IDs that supports the subset of set operations used by the audits.
+
+    IDs are held in an in-memory set until `spill_threshold` is exceeded, after which they are moved into a temporary,
+    indexed SQLite database on disk. Set operations stream the left-hand operand and probe the right-hand operand, so
+    memory use stays bounded by the spill threshold regardless of the audit window.
+    Iterating a spilled set yields IDs in sorted order.
+    """
+
+    def __init__(self, ids: Iterable[str] = (), spill_threshold: Optional[int] = DEFAULT_SPILL_THRESHOLD):
+        self.spill_threshold = spill_threshold
+        self._ids = set()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_path = None
+        self.update(ids)
+
+    @property
+    def spilled(self):
+        return self._db is not None
+
+    def add(self, id_: str):
+        self.update((id_,))
+
+    def update(self, ids: Iterable[str]):
+        for ids_chunk in chunked(ids, 10_000):
+            if self.spilled:
+                self._db.executemany("INSERT OR IGNORE INTO ids VALUES (?)", ((id_,) for id_ in ids_chunk))
+            else:
+                self._ids.update(ids_chunk)
+                if self.spill_threshold is not None and len(self._ids) > self.spill_threshold:
+                    self._spill()
+        return self
+
+    def _spill(self):
+        fd, self._db_path = tempfile.mkstemp(prefix="pcm_audit_", suffix=".sqlite3")
+        os.close(fd)
+        logger.info(f"Spilling {len(self._ids):,} IDs to {self._db_path}")
+
+        self._db = sqlite3.connect(self._db_path)
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute("CREATE TABLE ids (id TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._db.executemany("INSERT OR IGNORE INTO ids VALUES (?)", ((id_,) for id_ in self._ids))
+        self._ids = set()
+
+    def __contains__(self, id_: str):
+        if self.spilled:
+            return self._db.execute("SELECT 1 FROM ids WHERE id = ?", (id_,)).fetchone() is not None
+        return id_ in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        if self.spilled:
+            return (row[0] for row in self._db.execute("SELECT id FROM ids ORDER BY id"))
+        return iter(self._ids)
+
+    def __len__(self):
+        if self.spilled:
+            return self._db.execute("SELECT COUNT(*) FROM ids").fetchone()[0]
+        return len(self._ids)
+
+    def __sub__(self, other: Union["AuditIdSet", set]) -> "AuditIdSet":
+        return self.difference(other)
+
+    def difference(self, other: Union["AuditIdSet", set]) -> "AuditIdSet":
+        return AuditIdSet((id_ for id_ in self if id_ not in other), spill_threshold=self.spill_threshold)
+
+    def union(self, *others: Iterable[str]) -> "AuditIdSet":
+        result = AuditIdSet(self, spill_threshold=self.spill_threshold)
+        for other in others:
+            result.update(other)
+        return result
+
+    def map(self, func: Callable[[str], str]) -> "AuditIdSet":
+        """Returns a new set containing the distinct results of applying `func` to each ID. e.g. file IDs to granule IDs"""
+        return AuditIdSet((func(id_) for id_ in self), spill_threshold=self.spill_threshold)
+
+    def close(self):
+        if self.spilled:
+            self._db.close()
+            os.remove(self._db_path)
+            self._db = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __repr__(self):
+        if self.spilled:
+            return f"AuditIdSet(<{len(self):,} IDs spilled to {self._db_path}>)"
+        return f"AuditIdSet({self._ids!r})"
+
+
+def index_pattern(index: str) -> str:
+    """Returns the comma-separated index expression matching `index` and its rolled-over `index-*` indices."""
+    return ",".join([index, f"{index}-*"])
+
+
+def scan_hits(es: Elasticsearch, body: dict, index: str, source_includes: Union[str, list[str]] = "false", size=10_000) -> Iterator[dict]:
+    """
+    Streams the hits of a parallel sliced scroll search, projecting `_source` to `source_includes`.
+    Pass "false" (the default) to omit the document entirely when only hit IDs are needed.
+    """
+    logger.info(f"Scanning {index=}")
+    count = 0
+    for hit in sliced_scan(es, body, index=index, source_includes=source_includes, size=size):
+        count += 1
+        yield hit
+    logger.info(f"Scanned {count:,} hits. {index=}")
@@ -8,11 +8,11 @@ from pathlib import PurePath
 from pprint import pprint
 
 import elasticsearch
-import more_itertools
 from dotenv import dotenv_values
-from elasticsearch import RequestsHttpConnection, helpers
+from elasticsearch import RequestsHttpConnection
 
-from util.grq_client import get_body
+from tools.ops.pcm_audit.pcm_audit_utils import AuditIdSet, DEFAULT_SPILL_THRESHOLD, index_pattern, scan_hits
+from util.es_util import get_body
 
 logging.getLogger("elasticsearch").setLevel(level=logging.WARNING)
 logging.basicConfig(
@@ -61,6 +61,18 @@ argparser.add_argument(
     default="9999-01-01T00:00:00.000000",
     help=f'ISO formatted datetime string. Must be compatible with Python Elasticsearch Client. Defaults to "%(default)s".'
 )
+argparser.add_argument(
+    "--spill-threshold",
+    type=int,
+    default=DEFAULT_SPILL_THRESHOLD,
+    help=f'Number of IDs to hold in memory per set before spilling to a temporary on-disk index. Defaults to "%(default)s".'
+)
+argparser.add_argument(
+    "--scan-size",
+    type=int,
+    default=10_000,
+    help=f'Elasticsearch scroll page size. Defaults to "%(default)s".'
+)
 
 logger.info(f'{sys.argv=}')
 args = argparser.parse_args(sys.argv[1:])
@@ -80,22 +92,27 @@ def get_range(
         }
     }
 
+def new_id_set(ids=()):
+    return AuditIdSet(ids, spill_threshold=args.spill_threshold)
+
 def to_dataset_id(catalog_id):
     return ''.join(catalog_id.split('.zip'))
 
+def to_granule_id(file_id):
+    return PurePath(file_id).with_suffix("").name
+
 #######################################################################
 # GET MASTER LIST. THIS IS THE LIST OF QUERIED/DOWNLOADED FILES
 #######################################################################
 
 body = get_body()
-body["sort"] = []
-body["_source"]["includes"] = "false"
 body["query"]["bool"]["must"].append(get_range("query_datetime"))
-search_results = list(helpers.scan(es, body, index=",".join(["slc_catalog", "slc_catalog-*"]), scroll="5m", size=10_000))
-queried_or_downloaded_files = {to_dataset_id(hit["_id"]) for hit in search_results}
-logger.debug(f'{pstr(queried_or_downloaded_files)=!s}')
+queried_or_downloaded_files = new_id_set(
+    to_dataset_id(hit["_id"])
+    for hit in scan_hits(es, body, index=index_pattern("slc_catalog"), size=args.scan_size)
+)
 
-logger.info(f'Data queried or downloaded (files): {len(search_results)=:,}')
+logger.info(f'Data queried or downloaded (files): {len(queried_or_downloaded_files)=:,}')
 logger.debug(f'{pstr(queried_or_downloaded_files)=!s}')
 
 queried_or_downloaded_granules = queried_or_downloaded_files
@@ -107,21 +124,17 @@ logger.debug(f'{pstr(queried_or_downloaded_granules)=!s}')
 # logger.debug(f'{pstr(missing_queried_or_downloaded_granules)=!s}')
 
 body = get_body()
-body["sort"] = []
-body["_source"]["includes"] = "false"
 body["query"]["bool"]["must"].append(get_range("query_datetime"))
 body["query"]["bool"]["must"].append({"term": {"downloaded": "true"}})
-search_results = list(helpers.scan(es, body, index=",".join(["slc_catalog", "slc_catalog-*"]), scroll="5m", size=10_000))
-downloaded_files = {to_dataset_id(hit["_id"]) for hit in search_results}
+downloaded_files = new_id_set(
+    to_dataset_id(hit["_id"])
+    for hit in scan_hits(es, body, index=index_pattern("slc_catalog"), size=args.scan_size)
+)
 
-logger.info(f'Data downloaded (files): {len(search_results)=:,}')
+logger.info(f'Data downloaded (files): {len(downloaded_files)=:,}')
 logger.debug(f'{pstr(downloaded_files)=!s}')
 
-downloaded_granules = more_itertools.map_reduce(
-    downloaded_files,
-    lambda k: PurePath(k).with_suffix("").name
-)
-downloaded_granules = set(downloaded_granules.keys())
+downloaded_granules = downloaded_files.map(to_granule_id)
 logger.info(f'Data downloaded (granules): {len(downloaded_granules)=:,}')
 logger.debug(f'{pstr(downloaded_granules)=!s}')
 
@@ -138,34 +151,25 @@ logger.debug(f'{pstr(missing_download_granules)=!s}')
 #######################################################################
 
 body = get_body()
-body["sort"] = []
-body["_source"]["includes"] = ["metadata.FileName"]
 body["query"]["bool"]["must"].append(get_range("creation_timestamp"))
-search_results = list(helpers.scan(es, body, index=",".join(["grq_*_l1_s1_slc", "grq_*_l1_s1_slc-*"]), scroll="5m", size=10_000))
-slc_ingested_files = {to_dataset_id(hit["_id"])
-                      for hit in search_results}
+slc_ingested_files = new_id_set(
+    to_dataset_id(hit["_id"])
+    for hit in scan_hits(es, body, index=index_pattern("grq_*_l1_s1_slc"), size=args.scan_size)
+)
 
-logger.info(f'Data ingested (SLC): {len(search_results)=:,}')
+logger.info(f'Data ingested (SLC): {len(slc_ingested_files)=:,}')
 
 all_ingested_files = slc_ingested_files
 logger.info(f'Data ingested (total) (files): {len(all_ingested_files)=:,}')
 
-all_ingested_granules = more_itertools.map_reduce(
-    all_ingested_files,
-    lambda k: PurePath(k).with_suffix("").name
-)
-all_ingested_granules = set(all_ingested_granules.keys())
+all_ingested_granules = all_ingested_files.map(to_granule_id)
 logger.info(f'Data ingested (total) (granules): {len(all_ingested_granules)=:,}')
 
 missing_data_ingest_files = downloaded_files - all_ingested_files
 logger.info(f'Missing data ingest (files): {len(missing_data_ingest_files)=:,}')
 logger.debug(f'{pstr(missing_data_ingest_files)=!s}')
 
-missing_data_ingest_granules = more_itertools.map_reduce(
-    missing_data_ingest_files,
-    lambda k: PurePath(k).with_suffix("").name
-)
-missing_data_ingest_granules = set(missing_data_ingest_granules.keys())
+missing_data_ingest_granules = missing_data_ingest_files.map(to_granule_id)
 logger.info(f'Missing data ingest (granules): {len(missing_data_ingest_granules)=:,}')
 logger.debug(f'{pstr(missing_data_ingest_granules)=!s}')
 
@@ -176,28 +180,40 @@ logger.debug(f'{pstr(missing_data_ingest_granules)=!s}')
 #  Similarly, it is possible for a L3 data product record to not have CNM-R information if PO.DAAC has not responded yet.
 #######################################################################
 
-pge_input_files = set()
-search_resultss = {}
+# PGE inputs and CNM-S/CNM-R inputs are collected in a single pass over the products of each PGE
+pge_input_files = new_id_set()
+pge_output_granuless = {}
+cnm_s_input_files = new_id_set()
+cnm_r_input_files = new_id_set()
 
 body = get_body()
-body["sort"] = []
-body["_source"]["includes"] = ["metadata.runconfig.input_file_group.safe_file_path", "metadata.accountability", "daac_CNM_S_status", "daac_delivery_status"]
 body["query"]["bool"]["must"].append(get_range("creation_timestamp"))
 # body["query"]["bool"]["must"].append({"wildcard": {"daac_CNM_S_status": "*"}})
 
-search_results = list(helpers.scan(es, body, index=",".join(["grq_*_l2_cslc_s1", "grq_*_l2_cslc_s1-*"]), scroll="5m", size=10_000)); search_resultss["L2_CSLC_S1"] = search_results
-pge_input_files.update({hit["_source"]["metadata"]["accountability"]["L2_CSLC_S1"]["trigger_dataset_id"]
-                        for hit in search_results})
-
-pge_output_granules = {hit["_id"] for hit in search_results}
-logger.info(f'Data produced by PGE(s) (CSLC): {len(pge_output_granules)}')
-
-search_results = list(helpers.scan(es, body, index=",".join(["grq_*_l2_rtc_s1", "grq_*_l2_rtc_s1-*"]), scroll="5m", size=10_000)); search_resultss["L2_RTC_S1"] = search_results
-pge_input_files.update({hit["_source"]["metadata"]["accountability"]["L2_RTC_S1"]["trigger_dataset_id"]
-                        for hit in search_results})
+for data_t, index, label in [
+    ("L2_CSLC_S1", index_pattern("grq_*_l2_cslc_s1"), "CSLC"),
+    ("L2_RTC_S1", index_pattern("grq_*_l2_rtc_s1"), "RTC"),
+]:
+    pge_output_granules = new_id_set()
+    for hit in scan_hits(
+            es, body, index=index,
+            source_includes=[f"metadata.accountability.{data_t}.trigger_dataset_id", "daac_CNM_S_status", "daac_delivery_status"],
+            size=args.scan_size
+    ):
+        trigger_dataset_id = hit["_source"]["metadata"]["accountability"][data_t]["trigger_dataset_id"]
+        pge_input_files.add(trigger_dataset_id)
+        pge_output_granules.add(hit["_id"])
+
+        #######################################################################
+        # CNM-S & CNM-R
+        #######################################################################
+        if hit["_source"].get("daac_CNM_S_status") == "SUCCESS":
+            cnm_s_input_files.add(trigger_dataset_id)
+        if hit["_source"].get("daac_delivery_status") == "SUCCESS":
+            cnm_r_input_files.add(trigger_dataset_id)
 
-pge_output_granules = {hit["_id"] for hit in search_results}
-logger.info(f'Data produced by PGE(s) (RTC): {len(pge_output_granules)}')
+    pge_output_granuless[data_t] = pge_output_granules
+    logger.info(f'Data produced by PGE(s) ({label}): {len(pge_output_granules)}')
 
 logger.info(f'Data processed through PGE(s): {len(pge_input_files)}')
 
@@ -205,44 +221,23 @@ missing_pge_files = all_ingested_files - pge_input_files
 logger.info(f'Inputs Missing PGE: {len(missing_pge_files)=:,}')
 logger.debug(f'{pstr(missing_pge_files)=!s}')
 
-missing_pge_granules = more_itertools.map_reduce(
-    missing_pge_files,
-    lambda k: PurePath(k).with_suffix("").name
-)
-missing_pge_granules = set(missing_pge_granules.keys())
+missing_pge_granules = missing_pge_files.map(to_granule_id)
 logger.info(f'Inputs Missing PGE: {len(missing_pge_granules)=:,}')
 
-pge_input_granules = more_itertools.map_reduce(
-    pge_input_files,
-    lambda k: PurePath(k).with_suffix("").name
-)
-pge_input_granules = set(pge_input_granules.keys())
+pge_input_granules = pge_input_files.map(to_granule_id)
 
 # VALIDATE STATIC LAYER GENERATION
 body = get_body()
-body["sort"] = []
 body["query"]["bool"]["must"].append(get_range("creation_timestamp"))
-body["_source"]["includes"] = "false"
-search_results = list(helpers.scan(es, body, index=".".join(["grq_*_l2_rtc_s1_static", "grq_*_l2_rtc_s1_static-*"]), scroll="5m", size=10_000))
-rtc_having_static_layers = {result["_id"].replace("_static", "") for result in search_results}
-rtc = {x["_id"] for x in search_resultss["L2_RTC_S1"]}
+rtc_having_static_layers = new_id_set(
+    result["_id"].replace("_static", "")
+    for result in scan_hits(es, body, index=index_pattern("grq_*_l2_rtc_s1_static"), size=args.scan_size)
+)
+rtc = pge_output_granuless["L2_RTC_S1"]
 rtc_missing_static_layers = rtc - rtc_having_static_layers
 logger.info(f"RTC Missing static layers: {len(rtc_missing_static_layers)}")
 #logger.info(f'{pstr(rtc_missing_static_layers)=!s}')
 
-
-#######################################################################
-# CNM-S & CNM-R
-#######################################################################
-cnm_s_input_files = set()
-cnm_r_input_files = set()
-for data_t in ["L2_CSLC_S1", "L2_RTC_S1"]:
-    for hit in search_resultss[data_t]:
-        if hit["_source"].get("daac_CNM_S_status") == "SUCCESS":
-            cnm_s_input_files.add(hit["_source"]["metadata"]["accountability"][data_t]["trigger_dataset_id"])
-        if hit["_source"].get("daac_delivery_status") == "SUCCESS":
-            cnm_r_input_files.add(hit["_source"]["metadata"]["accountability"][data_t]["trigger_dataset_id"])
-
 # For SLC data granules are the same as files for audit purposes
 cnm_s_input_granules = cnm_s_input_files
 cnm_r_input_granules = cnm_r_input_files
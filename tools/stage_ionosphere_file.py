@@ -11,19 +11,27 @@ to the start date of an input SLC SAFE archive.
 """
 
 import argparse
+import concurrent.futures
 import datetime
 import netrc
 import os
 import re
 import subprocess
 import sys
+import threading
 
-from os.path import abspath, join
+from collections import defaultdict
+from os.path import abspath, basename, join, splitext
+from typing import Optional
 
+import backoff
+import boto3
 import requests
+import requests.adapters
 
 from commons.logger import logger
 from commons.logger import LogLevels
+from util.aws_util import S3PrefixInventory, split_s3_url
 
 DEFAULT_DOWNLOAD_ENDPOINT = "https://cddis.nasa.gov/archive/gnss/products/ionex"
 """Default URL endpoint for Ionosphere download requests"""
@@ -36,6 +44,9 @@ IONOSPHERE_TYPE_JPRG = "jprg"
 VALID_IONOSPHERE_TYPES = [IONOSPHERE_TYPE_JPLG, IONOSPHERE_TYPE_JPRG]
 """The valid Ionosphere file types that this script can download"""
 
+MAX_WORKERS = min(8, os.cpu_count() + 4)
+"""Maximum number of days an IonosphereResolver fetches concurrently"""
+
 class IonosphereFileNotFoundException(Exception):
     """Exception to identify no result found (404) for a requested Ionosphere archive"""
     pass
@@ -308,7 +319,63 @@ def get_new_archive_name(ionosphere_file_type, doy, year):
 
     return archive_name
 
-def download_ionosphere_archive(request_url, username, password, output_directory):
+def find_ionosphere_archive_url(session, ionosphere_file_type, year, doy,
+                                download_endpoint=DEFAULT_DOWNLOAD_ENDPOINT):
+    """
+    Determines the URL of the Ionosphere archive of the given type and day.
+
+    There are two file-naming conventions we need to account for, so the
+    first of the two that is available from the endpoint is returned.
+
+    Parameters
+    ----------
+    session : requests.Session
+        Session authenticated with EarthData Login to make requests with.
+    ionosphere_file_type : str
+        One of VALID_IONOSPHERE_TYPES.
+    year : str
+        Year of the requested day.
+    doy : str
+        Zero-padded Julian day of year of the requested day.
+    download_endpoint : str, optional
+        URL endpoint to search for the archive.
+
+    Returns
+    -------
+    request_url : str
+        The URL to the available Ionosphere archive.
+
+    Raises
+    ------
+    IonosphereFileNotFoundException
+        If no archive of the requested type is available for the day.
+
+    """
+    legacy_archive_name = get_legacy_archive_name(ionosphere_file_type, doy, year)
+    new_archive_name = get_new_archive_name(ionosphere_file_type, doy, year)
+
+    # Check for the first available of the two naming conventions
+    for archive_name in (legacy_archive_name, new_archive_name):
+        request_url = join(download_endpoint, year, doy, archive_name)
+
+        # Only the status code is needed here, so avoid reading the body of the archive
+        with session.get(request_url, stream=True) as response:
+            get_response_code = response.status_code
+
+        if get_response_code == 404:
+            logger.debug(f"Request URL {request_url} is not reachable (returned 404)")
+            continue
+
+        logger.debug(f"Request URL {request_url} is reachable")
+        return request_url
+
+    raise IonosphereFileNotFoundException(
+        f'Could not find an Ionosphere file under '
+        f'{join(download_endpoint, year, doy)} matching either '
+        f'{legacy_archive_name} or {new_archive_name}'
+    )
+
+def download_ionosphere_archive(request_url, username, password, output_directory, session=None):
     """
     Downloads an Ionosphere Correction archive using the provided credentials
     for EarthData Login.
@@ -323,6 +390,9 @@ def download_ionosphere_archive(request_url, username, password, output_director
         The EDL password to authenticate the request.
     output_directory : str
         Path to the location to download the archive to.
+    session : requests.Session, optional
+        An already authenticated session to reuse for the request. When
+        provided, username and password are ignored.
 
     Returns
     -------
@@ -338,29 +408,29 @@ def download_ionosphere_archive(request_url, username, password, output_director
 
     """
     # Create a session with the user credentials that are used to authenticate
-    # access to EarthData Login
-    session = SessionWithHeaderRedirection(username, password)
+    # access to EarthData Login, unless an authenticated session was provided
+    if session is None:
+        session = SessionWithHeaderRedirection(username, password)
 
     # Make the HTTP GET request to obtain the Ionosphere archive
-    response = session.get(request_url, stream=True)
-
-    logger.debug(f'response.url: {response.url}')
-    logger.debug(f'response.status_code: {response.status_code}')
+    with session.get(request_url, stream=True) as response:
+        logger.debug(f'response.url: {response.url}')
+        logger.debug(f'response.status_code: {response.status_code}')
 
-    try:
-        response.raise_for_status()
-    except requests.exceptions.HTTPError as err:
-        raise RuntimeError(
-            f'Failed to download Ionosphere file from {response.url}, reason: {str(err)}'
-        )
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as err:
+            raise RuntimeError(
+                f'Failed to download Ionosphere file from {response.url}, reason: {str(err)}'
+            )
 
-    # Write the contents to disk
-    archive_name = request_url[request_url.rfind('/') + 1:]
-    output_ionosphere_archive_path = os.path.join(output_directory, archive_name)
+        # Write the contents to disk
+        archive_name = request_url[request_url.rfind('/') + 1:]
+        output_ionosphere_archive_path = os.path.join(output_directory, archive_name)
 
-    with open(output_ionosphere_archive_path, 'wb') as outfile:
-        for chunk in response.iter_content(chunk_size=1024 * 1024):
-            outfile.write(chunk)
+        with open(output_ionosphere_archive_path, 'wb') as outfile:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                outfile.write(chunk)
 
     return output_ionosphere_archive_path
 
@@ -389,19 +459,256 @@ def uncompress_ionosphere_archive(output_ionosphere_archive_path):
 
     logger.info(f'Unzipping archive {archive_name} to {extraction_dir}...')
 
-    result = subprocess.run(
-        ['gunzip', '-c', output_ionosphere_archive_path],
-        check=True, capture_output=True
-    )
-
     logger.info(f'Writing uncompressed Ionosphere data to {extraction_path}...')
 
+    # Stream the uncompressed data straight to disk rather than buffering it in memory
     with open(extraction_path, 'wb') as outfile:
-        outfile.write(result.stdout)
+        subprocess.run(
+            ['gunzip', '-c', output_ionosphere_archive_path],
+            check=True, stdout=outfile, stderr=subprocess.PIPE
+        )
 
     return extraction_path
 
 
+class IonosphereResolver:
+    """
+    Resolves the Ionosphere Correction files for any number of SLC or CSLC
+    archives, such as every batch of a download job.
+
+    The file for each day is resolved at most once per resolver. If an S3
+    prefix is configured, a copy of the file already staged under that prefix
+    is used when present, unless it is a rapid (JPRG) file and the final (JPLG)
+    file has since become available. Otherwise, the file is downloaded from
+    CDDIS (JPLG preferred over JPRG) with a single authenticated EarthData Login session
+    shared by all requests, and then uploaded to the S3 prefix, if any.
+    Distinct days may be resolved concurrently with resolve_all().
+
+    Parameters
+    ----------
+    output_directory : str
+        Path to the directory to download Ionosphere files to.
+    username : str, optional
+        EarthData Login user name. Obtained from the local .netrc file if
+        neither a username or password is provided. Credentials are only read,
+        and the session only created, on the first download from CDDIS, so
+        resolving already staged files only requires S3 access.
+    password : str, optional
+        EarthData Login password.
+    download_endpoint : str, optional
+        URL endpoint to download Ionosphere files from.
+    s3_url_prefix : str, optional
+        S3 URL prefix (s3://bucket/prefix) to check for already staged
+        Ionosphere files, and to stage downloaded files to. When provided,
+        resolved files are returned as S3 URLs rather than local paths.
+    s3_inventory : util.aws_util.S3PrefixInventory, optional
+        Inventory used to look up files already staged under the S3 prefix.
+        Pass a shared inventory to reuse listings made by other lookups
+        within the same job.
+
+    """
+
+    def __init__(self, output_directory, username=None, password=None,
+                 download_endpoint=DEFAULT_DOWNLOAD_ENDPOINT, s3_url_prefix=None, s3_inventory=None):
+        if bool(username) ^ bool(password):
+            raise ValueError('Both a username and password must be supplied')
+
+        self.output_directory = output_directory
+        self.download_endpoint = download_endpoint
+        self.s3_url_prefix = s3_url_prefix
+
+        self._username = username
+        self._password = password
+        self._session = None
+
+        self._s3_client = boto3.client("s3") if s3_url_prefix else None
+        self._s3_inventory = s3_inventory or S3PrefixInventory(self._s3_client)
+        self._source_urls = {}
+        self._resolved = {}
+        self._lock = threading.Lock()
+        self._date_locks = defaultdict(threading.Lock)
+
+    @property
+    def session(self):
+        """The EarthData Login session shared by all CDDIS requests, created on first use"""
+        with self._lock:
+            if self._session is None:
+                username, password = self._username, self._password
+                if username is None and password is None:
+                    username, _, password = netrc.netrc().authenticators(DEFAULT_EDL_ENDPOINT)
+
+                self._session = SessionWithHeaderRedirection(username, password)
+                self._session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=MAX_WORKERS))
+
+            return self._session
+
+    def _date_lock(self, start_date):
+        with self._lock:
+            return self._date_locks[start_date]
+
+    def _list_staged_files(self):
+        """Returns a mapping of file name to S3 URL of the files under the S3 prefix, listing them only once"""
+        return {basename(s3_url): s3_url for s3_url in self._s3_inventory.list_objects(self.s3_url_prefix)}
+
+    def find_staged_file(self, start_date=None, ionosphere_file_types=VALID_IONOSPHERE_TYPES) -> Optional[str]:
+        """
+        Returns the S3 URL of an Ionosphere file already staged under the S3
+        prefix, or None if there is none.
+
+        Parameters
+        ----------
+        start_date : str, optional
+            Day (YYYYMMDD) of the file to look for. If not provided, a staged
+            Ionosphere file of any day is returned.
+        ionosphere_file_types : list of str, optional
+            The types of file to look for, in order of preference.
+
+        """
+        staged_files = self._list_staged_files()
+
+        if start_date is None:
+            for ionosphere_file_type in ionosphere_file_types:
+                # Match either naming convention, see get_new_archive_name()
+                product_type = "RAP" if ionosphere_file_type == IONOSPHERE_TYPE_JPRG else "FIN"
+                for file_name, s3_url in staged_files.items():
+                    if ionosphere_file_type in file_name or f"JPL0OPS{product_type}" in file_name:
+                        return s3_url
+            return None
+
+        year, doy = safe_start_date_to_julian_day(start_date)
+        for ionosphere_file_type in ionosphere_file_types:
+            for archive_name in (get_legacy_archive_name(ionosphere_file_type, doy, year),
+                                 get_new_archive_name(ionosphere_file_type, doy, year)):
+                # Staged files are stored uncompressed
+                s3_url = staged_files.get(splitext(archive_name)[0])
+                if s3_url:
+                    return s3_url
+
+        return None
+
+    def source_url(self, input_filename) -> Optional[str]:
+        """Returns the CDDIS URL the Ionosphere file for the given archive was downloaded from, if it was downloaded"""
+        return self._source_urls.get(parse_start_date_from_archive(input_filename))
+
+    def resolve(self, input_filename) -> str:
+        """
+        Returns the path (or S3 URL, if an S3 prefix is configured) to the
+        Ionosphere file for the start date of the given SLC or CSLC archive.
+
+        Raises
+        ------
+        IonosphereFileNotFoundException
+            If no Ionosphere file is available for the start date.
+
+        """
+        start_date = parse_start_date_from_archive(input_filename)
+
+        with self._date_lock(start_date):
+            if start_date not in self._resolved:
+                try:
+                    self._resolved[start_date] = self._resolve_date(start_date)
+                except IonosphereFileNotFoundException as err:
+                    # Remember unavailable days too, so they are only requested once
+                    self._resolved[start_date] = err
+            else:
+                logger.debug(f'Ionosphere file for {start_date} already resolved')
+
+            resolved = self._resolved[start_date]
+
+        if isinstance(resolved, IonosphereFileNotFoundException):
+            raise resolved
+
+        return resolved
+
+    def resolve_all(self, input_filenames) -> list:
+        """
+        Resolves the Ionosphere files for all of the given archives, fetching
+        distinct days concurrently.
+
+        Returns
+        -------
+        resolved : list of str
+            The distinct resolved paths (or S3 URLs), in order of first use.
+
+        """
+        archives_by_date = {}
+        for input_filename in input_filenames:
+            archives_by_date.setdefault(parse_start_date_from_archive(input_filename), input_filename)
+
+        logger.info(f'Resolving Ionosphere files for {len(archives_by_date)} distinct day(s)')
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            resolved = list(executor.map(self.resolve, archives_by_date.values()))
+
+        return list(dict.fromkeys(resolved))
+
+    def _resolve_date(self, start_date):
+        staged_rapid_s3_url = None
+
+        if self.s3_url_prefix:
+            s3_url = self.find_staged_file(start_date, [IONOSPHERE_TYPE_JPLG])
+            if s3_url:
+                logger.info(f'Using Ionosphere file for {start_date} already staged at {s3_url}')
+                return s3_url
+
+            # A staged rapid (JPRG) file is only used if the final (JPLG) file
+            # has still not been published to CDDIS
+            staged_rapid_s3_url = self.find_staged_file(start_date, [IONOSPHERE_TYPE_JPRG])
+
+        try:
+            output_ionosphere_file_path = self._download(
+                start_date, [IONOSPHERE_TYPE_JPLG] if staged_rapid_s3_url else VALID_IONOSPHERE_TYPES
+            )
+        except IonosphereFileNotFoundException:
+            if not staged_rapid_s3_url:
+                raise
+
+            logger.info(f'Using rapid Ionosphere file for {start_date} already staged at {staged_rapid_s3_url}')
+            return staged_rapid_s3_url
+
+        if not self.s3_url_prefix:
+            return output_ionosphere_file_path
+
+        bucket, key_prefix = split_s3_url(self.s3_url_prefix)
+        key = join(key_prefix.strip('/'), basename(output_ionosphere_file_path))
+
+        logger.info(f'Staging Ionosphere file {output_ionosphere_file_path} to s3://{bucket}/{key}')
+        self._s3_client.upload_file(Filename=output_ionosphere_file_path, Bucket=bucket, Key=key)
+        os.unlink(output_ionosphere_file_path)
+
+        return f"s3://{bucket}/{key}"
+
+    @backoff.on_exception(backoff.expo, exception=Exception, max_tries=3, jitter=None,
+                          giveup=lambda err: isinstance(err, IonosphereFileNotFoundException))
+    def _download(self, start_date, ionosphere_file_types=VALID_IONOSPHERE_TYPES):
+        year, doy = safe_start_date_to_julian_day(start_date)
+
+        for ionosphere_file_type in ionosphere_file_types:
+            try:
+                request_url = find_ionosphere_archive_url(
+                    self.session, ionosphere_file_type, year, doy, self.download_endpoint
+                )
+                break
+            except IonosphereFileNotFoundException:
+                logger.warning(f'{ionosphere_file_type} file type could not be found for {start_date}')
+        else:
+            raise IonosphereFileNotFoundException(
+                f'Could not find any Ionosphere Correction file for {start_date}'
+            )
+
+        logger.info(f'Downloading Ionosphere Correction archive file from {request_url}')
+
+        output_ionosphere_archive_path = download_ionosphere_archive(
+            request_url, None, None, self.output_directory, session=self.session
+        )
+        output_ionosphere_file_path = uncompress_ionosphere_archive(output_ionosphere_archive_path)
+        os.unlink(output_ionosphere_archive_path)
+
+        self._source_urls[start_date] = request_url
+
+        return output_ionosphere_file_path
+
+
 def main(args):
     """
     Main script to execute Orbit file staging.
@@ -438,31 +745,12 @@ def main(args):
     year, doy = safe_start_date_to_julian_day(start_date)
 
     # Formulate the archive name and URL location based on the file type and
-    # the Julian date of the SLC archive. There are two file-naming conventions
-    # we need to account for.
-    legacy_archive_name = get_legacy_archive_name(args.type, doy, year)
-    new_archive_name = get_new_archive_name(args.type, doy, year)
-
-    # Check for the first available of the two naming conventions
-    for archive_name in (legacy_archive_name, new_archive_name):
-        request_url = join(args.download_endpoint, year, doy, archive_name)
-
-        session = SessionWithHeaderRedirection(args.username, args.password)
+    # the Julian date of the SLC archive.
+    session = SessionWithHeaderRedirection(args.username, args.password)
 
-        get_response_code = session.get(request_url).status_code
-
-        if get_response_code == 404:
-            logger.debug(f"Request URL {request_url} is not reachable (returned 404)")
-            continue
-
-        logger.debug(f"Request URL {request_url} is reachable")
-        break
-    else:
-        raise IonosphereFileNotFoundException(
-            f'Could not find an Ionosphere file under '
-            f'{join(args.download_endpoint, year, doy)} matching either '
-            f'{legacy_archive_name} or {new_archive_name}'
-        )
+    request_url = find_ionosphere_archive_url(
+        session, args.type, year, doy, args.download_endpoint
+    )
 
     # If user request the URL only, print it to standard out and the log
     if args.url_only:
@@ -476,7 +764,8 @@ def main(args):
                 f"endpoint {request_url}")
 
     output_ionosphere_archive_path = download_ionosphere_archive(
-        request_url, args.username, args.password, args.output_directory
+        request_url, args.username, args.password, args.output_directory,
+        session=session
     )
 
     logger.info(f'Ionosphere archive downloaded to {output_ionosphere_archive_path}')
@@ -11,17 +11,24 @@ range covered by an input SLC SAFE archive.
 """
 
 import argparse
+import atexit
+import bisect
+import json
 import os
 import re
+import shutil
+import tempfile
 import requests
 
 from datetime import datetime, timedelta
+from itertools import accumulate
 from os.path import abspath
 
 import backoff
 
 from commons.logger import logger
 from commons.logger import LogLevels
+from util.os_util import file_lock
 
 DEFAULT_QUERY_ENDPOINT = 'https://catalogue.dataspace.copernicus.eu/odata/v1/Products'
 """Default URL endpoint for the Copernicus Data Space Ecosystem (CDSE) query REST service"""
@@ -65,6 +72,37 @@ Temporal margin to apply to the stop time of a frame to make sure that the
 ascending node crossing is included when choosing the orbit file
 """
 
+DEFAULT_CACHE_DIRECTORY = os.environ.get(
+    "OPERA_ORBIT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "opera_orbit_cache")
+)
+"""
+Default directory of the local orbit file catalog and content cache. Should be
+a location shared by all jobs running on the same node.
+"""
+
+DEFAULT_ACCESS_TOKEN_LIFETIME = timedelta(minutes=10)
+"""Lifetime of a CDSE access token, used when the authentication response does not provide one"""
+
+ACCESS_TOKEN_EXPIRATION_MARGIN = timedelta(minutes=2)
+"""
+Safety margin subtracted from the lifetime of a CDSE access token, so a reused
+token never expires while a request made with it is in flight
+"""
+
+MAX_CATALOG_ENTRIES = 10_000
+"""
+Maximum number of Orbit files retained in the local catalog for each mission
+and orbit type. The entries with the latest validity start times are kept.
+"""
+
+ORBIT_REGEX = re.compile(
+    r'(?P<mission_id>S1A|S1B)_(?P<file_class>OPER)_(?P<category>AUX)_'
+    r'(?P<semantic_desc>POEORB|RESORB)_(?P<site>OPOD)_'
+    r'(?P<creation_ts>\d{8}T\d{6})_V(?P<valid_start_ts>\d{8}T\d{6})_'
+    r'(?P<valid_stop_ts>\d{8}T\d{6})[.](?P<format>EOF)$'
+)
+"""Regular expression for Orbit file names, used to parse their validity time range"""
+
 class NoQueryResultsException(Exception):
     """Custom exception to identify empty results from a query"""
     pass
@@ -135,6 +173,15 @@ def get_parser():
                         help="Datetime of the sensing range stop time used to select "
                              "an overlapping orbit file. If not provided, the "
                              "sensing stop time of the input SAFE file is used.")
+    parser.add_argument("--cache-directory", type=str, action='store',
+                        default=DEFAULT_CACHE_DIRECTORY, metavar='DIR',
+                        help="Specify the directory of the local Orbit file catalog "
+                             "and content cache, shared by jobs on the same node.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always query and download from the remote service, "
+                             "bypassing the local Orbit file catalog and cache, and "
+                             "delete the authenticated session once the download "
+                             "completes rather than reusing it.")
     parser.add_argument("--log-level",
                         type=lambda log_level: LogLevels[log_level].value,
                         choices=LogLevels.list(),
@@ -371,14 +418,6 @@ def select_orbit_file(query_results, req_start_time, req_stop_time):
         orbit file.
 
     """
-    orbit_regex_pattern = (
-        r'(?P<mission_id>S1A|S1B)_(?P<file_class>OPER)_(?P<category>AUX)_'
-        r'(?P<semantic_desc>POEORB|RESORB)_(?P<site>OPOD)_'
-        r'(?P<creation_ts>\d{8}T\d{6})_V(?P<valid_start_ts>\d{8}T\d{6})_'
-        r'(?P<valid_stop_ts>\d{8}T\d{6})[.](?P<format>EOF)$'
-    )
-    orbit_regex = re.compile(orbit_regex_pattern)
-
     # Parse each result from the query, and look for a suitable orbit file
     # candidate among the results
     for query_result in query_results:
@@ -397,7 +436,7 @@ def select_orbit_file(query_results, req_start_time, req_stop_time):
             continue
 
         # Parse the validity time range from the orbit file name
-        match = orbit_regex.match(orbit_file_name)
+        match = ORBIT_REGEX.match(orbit_file_name)
 
         if not match:
             logger.warning(
@@ -434,6 +473,140 @@ def select_orbit_file(query_results, req_start_time, req_stop_time):
             "No suitable orbit file could be found within the results of the query"
         )
 
+class OrbitFileCatalog:
+    """
+    Persistent catalog of the Orbit files returned by previous queries, shared
+    by all processes using the same cache directory.
+
+    For each mission and orbit type, entries are held sorted by the start of
+    their validity time range, alongside the running maximum of their stop
+    times, so selecting an Orbit file that envelops a time range is a binary
+    search rather than a remote query.
+
+    Parameters
+    ----------
+    cache_directory : str
+        Directory to store the catalog in.
+
+    """
+
+    CATALOG_FILE_NAME = 'orbit_file_catalog.json'
+
+    def __init__(self, cache_directory):
+        os.makedirs(cache_directory, exist_ok=True)
+
+        self.catalog_path = os.path.join(cache_directory, self.CATALOG_FILE_NAME)
+        self.lock_path = self.catalog_path + '.lock'
+        self._catalog_mtime_ns = None
+        self._entries = {}
+        self._starts = {}
+        self._max_stops = {}
+
+    def _refresh(self):
+        """(Re)loads the catalog from disk if another process has modified it"""
+        try:
+            mtime_ns = os.stat(self.catalog_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+
+        if mtime_ns == self._catalog_mtime_ns:
+            return
+
+        with open(self.catalog_path, 'r') as infile:
+            entries = json.load(infile)
+
+        self._catalog_mtime_ns = mtime_ns
+        self._index(entries)
+
+    def _index(self, entries):
+        self._entries = {key: sorted(map(tuple, key_entries)) for key, key_entries in entries.items()}
+        self._starts = {key: [entry[0] for entry in key_entries] for key, key_entries in self._entries.items()}
+        self._max_stops = {key: list(accumulate((entry[1] for entry in key_entries), max))
+                           for key, key_entries in self._entries.items()}
+
+    def add(self, query_results):
+        """
+        Adds the Orbit files from the results of an Orbit file query to the
+        catalog. Results that cannot be parsed are ignored.
+        """
+        new_entries = []
+        for query_result in query_results:
+            match = ORBIT_REGEX.match(query_result.get('Name', ''))
+
+            if not match or 'Id' not in query_result:
+                continue
+
+            key = f"{match.group('mission_id')}_{match.group('semantic_desc')}"
+            new_entries.append(
+                (key, (match.group('valid_start_ts'), match.group('valid_stop_ts'),
+                       query_result['Name'], query_result['Id']))
+            )
+
+        if not new_entries:
+            return
+
+        with file_lock(self.lock_path):
+            self._refresh()
+
+            entries = {key: set(key_entries) for key, key_entries in self._entries.items()}
+            for key, entry in new_entries:
+                entries.setdefault(key, set()).add(entry)
+            # Only the most recent Orbit files are kept, so the catalog (which
+            # is reloaded by every job) does not grow without bound
+            entries = {key: sorted(key_entries)[-MAX_CATALOG_ENTRIES:] for key, key_entries in entries.items()}
+
+            # Write to a temporary file first so readers never see a partial catalog
+            tmp_catalog_path = f'{self.catalog_path}.{os.getpid()}.tmp'
+            with open(tmp_catalog_path, 'w') as outfile:
+                json.dump(entries, outfile)
+            os.replace(tmp_catalog_path, self.catalog_path)
+
+            self._catalog_mtime_ns = os.stat(self.catalog_path).st_mtime_ns
+            self._index(entries)
+
+    def select(self, mission_id, orbit_type, req_start_time, req_stop_time):
+        """
+        Selects the earliest-starting cataloged Orbit file whose validity time
+        range fully envelops the required time range, using the same criteria
+        as select_orbit_file().
+
+        Parameters
+        ----------
+        mission_id : str
+            The mission ID of the Orbit file, one of S1A or S1B.
+        orbit_type : str
+            The type of Orbit file, one of POEORB or RESORB.
+        req_start_time : str
+            The required start time that the orbit file must start before,
+            in YYYYmmddTHHMMSS format.
+        req_stop_time : str
+            The required stop time that the orbit file must end after,
+            in YYYYmmddTHHMMSS format.
+
+        Returns
+        -------
+        orbit_file : tuple of (str, str) or None
+            Name and request ID of the selected orbit file, or None if no
+            cataloged orbit file is suitable.
+
+        """
+        self._refresh()
+
+        key = f'{mission_id}_{orbit_type}'
+        if key not in self._entries:
+            return None
+
+        # Timestamps in YYYYmmddTHHMMSS format sort chronologically as strings.
+        # The first entry to push the running maximum stop time past the
+        # required stop time is the earliest-starting one that ends late enough.
+        idx = bisect.bisect_right(self._max_stops[key], req_stop_time)
+
+        if idx < len(self._entries[key]) and self._starts[key][idx] < req_start_time:
+            _, _, orbit_file_name, orbit_file_request_id = self._entries[key][idx]
+            return orbit_file_name, orbit_file_request_id
+
+        return None
+
 @backoff.on_exception(backoff.constant,
                       requests.exceptions.RequestException,
                       max_time=600,
@@ -462,6 +635,9 @@ def get_access_token(endpoint_url, username, password):
     session_id : str
         The ID associated with the authenticated session. Should be used to
         request deletion of the session once the desired orbit file(s) is downloaded.
+    lifetime : timedelta
+        How long the access token remains valid for, as reported by the
+        authentication response.
 
     Raises
     ------
@@ -490,7 +666,10 @@ def get_access_token(endpoint_url, username, password):
             f'Failed to parsed expected field "{str(err)}" from authentication response.'
         )
 
-    return access_token, session_id
+    expires_in = response.json().get("expires_in")
+    lifetime = timedelta(seconds=expires_in) if expires_in else DEFAULT_ACCESS_TOKEN_LIFETIME
+
+    return access_token, session_id, lifetime
 
 @backoff.on_exception(backoff.constant,
                       requests.exceptions.RequestException,
@@ -529,6 +708,86 @@ def delete_access_token(endpoint_url, access_token, session_id):
 
     response.raise_for_status()
 
+_access_tokens = {}
+"""Access tokens issued to this process, keyed by authentication endpoint and username"""
+
+
+def get_reusable_access_token(auth_endpoint_url, session_endpoint_url, username, password):
+    """
+    Returns an access token for the provided credentials, reusing the token
+    issued by a previous call from this process until it expires.
+
+    Tokens are considered expired ACCESS_TOKEN_EXPIRATION_MARGIN before the
+    end of the lifetime reported by the authentication service. The
+    authenticated sessions of all issued tokens are deleted when the process
+    exits, or when a token is replaced.
+
+    Parameters
+    ----------
+    auth_endpoint_url : str
+        URL to the authentication endpoint to provide credentials to.
+    session_endpoint_url : str
+        URL to the session deletion endpoint, used once a token is no longer needed.
+    username : str
+        Username of the account to authenticate with.
+    password : str
+        Password of the account to authenticate with.
+
+    Returns
+    -------
+    access_token : str
+        A valid access token for the provided credentials.
+
+    """
+    key = (auth_endpoint_url, username)
+
+    if key in _access_tokens:
+        access_token, session_id, expiration, _ = _access_tokens[key]
+
+        if datetime.now() < expiration:
+            logger.info("Reusing existing authentication session")
+            return access_token
+
+        logger.info("Authentication session expired, requesting deletion")
+        invalidate_access_token(auth_endpoint_url, username)
+
+    logger.info("Authenticating to orbit file service provider")
+    access_token, session_id, lifetime = get_access_token(auth_endpoint_url, username, password)
+    expiration = datetime.now() + lifetime - ACCESS_TOKEN_EXPIRATION_MARGIN
+    _access_tokens[key] = (access_token, session_id, expiration, session_endpoint_url)
+
+    return access_token
+
+
+def invalidate_access_token(auth_endpoint_url, username):
+    """
+    Drops the access token issued to this process for the provided credentials,
+    if any, and deletes its authenticated session, so that the next call to
+    get_reusable_access_token() authenticates again.
+    """
+    if (auth_endpoint_url, username) in _access_tokens:
+        access_token, session_id, _, session_endpoint_url = _access_tokens.pop((auth_endpoint_url, username))
+        _delete_session_quietly(session_endpoint_url, access_token, session_id)
+
+
+def _delete_session_quietly(session_endpoint_url, access_token, session_id):
+    try:
+        delete_access_token(session_endpoint_url, access_token, session_id)
+    except requests.exceptions.RequestException as err:
+        logger.warning(f"Failed to delete authentication session: {str(err)}")
+
+
+@atexit.register
+def delete_access_tokens():
+    """
+    Deletes the authenticated sessions of all access tokens issued to this
+    process, to avoid hitting the limit of active concurrent sessions.
+    """
+    while _access_tokens:
+        _, (access_token, session_id, _, session_endpoint_url) = _access_tokens.popitem()
+        logger.info("Requesting deletion of open authentication session")
+        _delete_session_quietly(session_endpoint_url, access_token, session_id)
+
 @backoff.on_exception(backoff.constant,
                       requests.exceptions.RequestException,
                       max_time=300,
@@ -565,6 +824,11 @@ def download_orbit_file(request_url, output_directory, orbit_file_name, access_t
         The full path to where the resulting Orbit file was downloaded to.
 
     """
+    return _download_orbit_file(request_url, output_directory, orbit_file_name, access_token)
+
+
+def _download_orbit_file(request_url, output_directory, orbit_file_name, access_token):
+    """Makes a single attempt at downloading an Orbit file, see download_orbit_file()"""
     # Make the HTTP GET request to obtain the Orbit file contents
     headers = {"Authorization": f"Bearer {access_token}"}
     session = requests.Session()
@@ -587,6 +851,108 @@ def download_orbit_file(request_url, output_directory, orbit_file_name, access_t
     return output_orbit_file_path
 
 
+def is_unauthorized(err: requests.exceptions.RequestException) -> bool:
+    """Returns True if the request failed because its credentials were rejected"""
+    return err.response is not None and err.response.status_code == 401
+
+
+@backoff.on_exception(backoff.constant,
+                      requests.exceptions.RequestException,
+                      max_time=300,
+                      giveup=fatal_code,
+                      on_backoff=backoff_logger,
+                      interval=15)
+def download_orbit_file_with_reusable_token(request_url, output_directory, orbit_file_name,
+                                            auth_endpoint_url, session_endpoint_url, username, password):
+    """
+    Downloads an Orbit file as download_orbit_file() does, authenticating with
+    an access token reused across calls made by this process.
+
+    If the download is rejected as unauthorized (401), the reused token is
+    dropped, so the retry authenticates again rather than repeating the
+    request with the same token.
+
+    Parameters
+    ----------
+    request_url : str
+        The full request URL, which includes the download endpoint, as well as
+        a payload that contains the product ID for the Orbit file to be downloaded.
+    output_directory : str
+        The directory to store the downloaded Orbit file to.
+    orbit_file_name : str
+        The file name to assign to the Orbit file once downloaded to disk.
+    auth_endpoint_url : str
+        URL to the authentication endpoint to provide credentials to.
+    session_endpoint_url : str
+        URL to the session deletion endpoint, used once a token is no longer needed.
+    username : str
+        Username of the account to authenticate with.
+    password : str
+        Password of the account to authenticate with.
+
+    Returns
+    -------
+    output_orbit_file_path : str
+        The full path to where the resulting Orbit file was downloaded to.
+
+    """
+    access_token = get_reusable_access_token(auth_endpoint_url, session_endpoint_url, username, password)
+
+    try:
+        return _download_orbit_file(request_url, output_directory, orbit_file_name, access_token)
+    except requests.exceptions.RequestException as err:
+        if is_unauthorized(err):
+            logger.warning("Access token was rejected, re-authenticating before retrying")
+            invalidate_access_token(auth_endpoint_url, username)
+        raise
+
+
+def stage_orbit_file_from_cache(cache_directory, orbit_file_name, output_directory, download_func):
+    """
+    Copies an Orbit file from the shared on-disk content cache to the output
+    directory, first downloading it into the cache if not already present.
+
+    Orbit files are immutable once published, so a cached copy never needs to
+    be revalidated. A per-file lock ensures that concurrent jobs requesting the
+    same Orbit file download it only once.
+
+    Parameters
+    ----------
+    cache_directory : str
+        Directory of the content cache.
+    orbit_file_name : str
+        Name of the Orbit file to stage.
+    output_directory : str
+        The directory to copy the Orbit file to.
+    download_func : callable
+        Called with a directory path to download the Orbit file into on a cache
+        miss. Must return the path of the downloaded file.
+
+    Returns
+    -------
+    output_orbit_file_path : str
+        The full path to where the resulting Orbit file was staged to.
+
+    """
+    os.makedirs(cache_directory, exist_ok=True)
+    cached_orbit_file_path = os.path.join(cache_directory, orbit_file_name)
+
+    with file_lock(cached_orbit_file_path + '.lock'):
+        if os.path.exists(cached_orbit_file_path):
+            logger.info(f"Orbit file {orbit_file_name} found in cache {cache_directory}")
+        else:
+            # Download to a private directory, then move into place, so a
+            # failed download never leaves a partial file in the cache
+            with tempfile.TemporaryDirectory(dir=cache_directory) as download_directory:
+                downloaded_orbit_file_path = download_func(download_directory)
+                os.replace(downloaded_orbit_file_path, cached_orbit_file_path)
+
+    output_orbit_file_path = os.path.join(output_directory, orbit_file_name)
+    shutil.copyfile(cached_orbit_file_path, output_orbit_file_path)
+
+    return output_orbit_file_path
+
+
 def main(args):
     """
     Main script to execute Orbit file staging.
@@ -614,21 +980,38 @@ def main(args):
     search_start_time = args.sensing_start_range or safe_start_time
     search_stop_time = args.sensing_stop_range or safe_stop_time
 
-    # Construct the query based on the time range parsed from the input file
-    query = construct_orbit_file_query(
-        mission_id, args.orbit_type, search_start_time, search_stop_time
-    )
+    orbit_file_catalog = None if args.no_cache else OrbitFileCatalog(args.cache_directory)
 
-    # Make the query to determine what Orbit files are available for the time
-    # range
-    logger.info(f"Querying for Orbit file(s) from endpoint {args.query_endpoint}")
+    # Check for a suitable orbit file returned by a previous query before
+    # querying the remote service
+    selected_orbit_file = None
+    if orbit_file_catalog:
+        selected_orbit_file = orbit_file_catalog.select(
+            mission_id, args.orbit_type, search_start_time, search_stop_time
+        )
 
-    query_results = query_orbit_file_service(args.query_endpoint, query)
+    if selected_orbit_file:
+        logger.info(f"Selected Orbit file {selected_orbit_file[0]} from local catalog")
+        orbit_file_name, orbit_file_request_id = selected_orbit_file
+    else:
+        # Construct the query based on the time range parsed from the input file
+        query = construct_orbit_file_query(
+            mission_id, args.orbit_type, search_start_time, search_stop_time
+        )
 
-    # Select an appropriate orbit file from the list returned from the query
-    orbit_file_name, orbit_file_request_id = select_orbit_file(
-        query_results, search_start_time, search_stop_time
-    )
+        # Make the query to determine what Orbit files are available for the time
+        # range
+        logger.info(f"Querying for Orbit file(s) from endpoint {args.query_endpoint}")
+
+        query_results = query_orbit_file_service(args.query_endpoint, query)
+
+        if orbit_file_catalog:
+            orbit_file_catalog.add(query_results)
+
+        # Select an appropriate orbit file from the list returned from the query
+        orbit_file_name, orbit_file_request_id = select_orbit_file(
+            query_results, search_start_time, search_stop_time
+        )
 
     # Construct the URL used to download the Orbit file
     download_url = f"{args.download_endpoint}({orbit_file_request_id})/$value"
@@ -638,13 +1021,13 @@ def main(args):
         logger.info('URL-only requested')
         logger.info(download_url)
         print(download_url)
-    # Otherwise, download the Orbit file using the file name parsed from the
-    # query result to the directory specified by the user
-    else:
+    # If caching is disabled, download the Orbit file using the file name parsed
+    # from the query result directly to the directory specified by the user
+    elif args.no_cache:
         # Obtain an access token for use with the download request from the provided
         # credentials
         logger.info("Authenticating to orbit file service provider")
-        access_token, session_id = get_access_token(args.auth_endpoint, args.username, args.password)
+        access_token, session_id, _ = get_access_token(args.auth_endpoint, args.username, args.password)
 
         try:
             logger.info(
@@ -661,7 +1044,25 @@ def main(args):
             # hitting the limit of active concurrent sessions
             logger.info("Requesting deletion of open authentication session")
             delete_access_token(args.session_endpoint, access_token, session_id)
+    # Otherwise, stage the Orbit file through the local cache, downloading it
+    # on a cache miss with an access token reused for the life of the process.
+    # Sessions of reused tokens are deleted on exit.
+    else:
+        def download(output_directory):
+            logger.info(
+                f"Downloading Orbit file {orbit_file_name} from service endpoint "
+                f"{args.download_endpoint}"
+            )
+            return download_orbit_file_with_reusable_token(
+                download_url, output_directory, orbit_file_name,
+                args.auth_endpoint, args.session_endpoint, args.username, args.password
+            )
+
+        output_orbit_file_path = stage_orbit_file_from_cache(
+            args.cache_directory, orbit_file_name, args.output_directory, download
+        )
 
+        logger.info(f"Orbit file downloaded to {output_orbit_file_path}")
 
 if __name__ == '__main__':
     parser = get_parser()
@@ -4,12 +4,18 @@ import contextlib
 import logging
 import threading
 import os
+import re
+import urllib.parse
+from collections import defaultdict
+from functools import partial
 from pathlib import Path
-from typing import Collection
+from typing import Collection, Union
 
 import backoff
 import boto3
 from boto3.exceptions import Boto3Error
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from more_itertools import chunked
 from mypy_boto3_s3 import S3Client
 
@@ -66,4 +72,152 @@ def try_s3_client_try_upload_file(s3_client: S3Client = None, sem: threading.Sem
         logger.info(f'Uploading to {s3path}')
         s3_client.upload_file(**kwargs)
         logger.info(f'Uploaded to {s3path}')
-        return s3path
\ No newline at end of file
+        return s3path
+
+
+def get_s3_objects_metadata(s3_urls: Collection[str], s3_client: S3Client = None) -> dict[str, dict]:
+    """
+    Resolve the size and ETag of many S3 objects at once, returning a mapping of each S3 URL to a dict with
+    "ContentLength" and "ETag" keys.
+
+    Objects that share a key prefix (e.g. the files of one granule) are resolved with a single list_objects_v2 request
+    for that prefix. Any others, or those whose prefix cannot be listed (e.g. without s3:ListBucket permission), are
+    resolved with concurrent head_object requests on one pooled client.
+
+    Note that the CSLC download (asf_cslc_download) passes one .h5 file per granule prefix, so its objects are always
+    resolved with head_object requests; the listing path only applies to callers with several objects per prefix.
+    """
+    s3_urls = list(dict.fromkeys(s3_urls))
+    max_workers = min(8, os.cpu_count() + 4)
+    if s3_client is None:
+        s3_client = boto3.session.Session().client("s3", config=Config(max_pool_connections=max_workers))
+
+    prefix_to_s3_urls = defaultdict(list)
+    for s3_url in s3_urls:
+        bucket, key = split_s3_url(s3_url)
+        prefix_to_s3_urls[(bucket, key.rpartition("/")[0] + "/")].append(s3_url)
+
+    s3_url_to_metadata = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        listed_prefixes = {
+            prefix: executor.submit(_try_list_s3_objects_metadata, s3_client, *prefix)
+            for prefix, prefix_s3_urls in prefix_to_s3_urls.items()
+            if len(prefix_s3_urls) > 1
+        }
+        for prefix, future in listed_prefixes.items():
+            listed = future.result()
+            for s3_url in prefix_to_s3_urls[prefix]:
+                if s3_url in listed:
+                    s3_url_to_metadata[s3_url] = listed[s3_url]
+
+        s3_urls_to_head = [s3_url for s3_url in s3_urls if s3_url not in s3_url_to_metadata]
+        logger.info(f"Resolved metadata of {len(s3_url_to_metadata)} S3 objects from {len(listed_prefixes)} listings. "
+                    f"Requesting {len(s3_urls_to_head)} individually")
+        for s3_url, metadata in zip(s3_urls_to_head, executor.map(partial(_head_s3_object_metadata, s3_client), s3_urls_to_head)):
+            s3_url_to_metadata[s3_url] = metadata
+
+    return s3_url_to_metadata
+
+
+class S3PrefixInventory:
+    """
+    Job-scoped, in-memory inventory of S3 prefixes.
+
+    Each prefix is listed once (following pagination) the first time it is needed. Every later lookup under that
+    prefix, from any thread, is answered from memory, so precondition functions looking for different files under the
+    same product location share a single listing.
+    """
+
+    def __init__(self, s3_client: S3Client = None):
+        self._s3_client = s3_client
+        self._listings: dict[tuple[str, str], dict[str, dict]] = {}
+        self._lock = threading.Lock()
+        self._prefix_locks = defaultdict(threading.Lock)
+
+    @property
+    def s3_client(self) -> S3Client:
+        """The client used for listings. Created on first use when not provided, so it picks up any event hooks
+        registered on the default session in the meantime."""
+        with self._lock:
+            if self._s3_client is None:
+                self._s3_client = boto3.client("s3")
+            return self._s3_client
+
+    def list_objects(self, s3_url_prefix: str) -> dict[str, dict]:
+        """
+        Returns a mapping of the S3 URL of each object under the given prefix (s3://bucket/prefix, or the HySDS
+        s3://endpoint:port/bucket/prefix form) to a dict with "ContentLength" and "ETag" keys.
+        """
+        prefix = split_s3_url(s3_url_prefix)
+
+        with self._lock:
+            prefix_lock = self._prefix_locks[prefix]
+
+        with prefix_lock:
+            if prefix not in self._listings:
+                self._listings[prefix] = self._list_prefix(*prefix)
+
+        return dict(self._listings[prefix])
+
+    def find(self, s3_url_prefix: str, pattern: Union[str, re.Pattern] = None, suffix: str = None) -> list[str]:
+        """
+        Returns the sorted S3 URLs of the objects under the given prefix whose file name matches the given regular
+        expression and ends with the given suffix.
+        """
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern)
+
+        return sorted(
+            s3_url for s3_url in self.list_objects(s3_url_prefix)
+            if (pattern is None or pattern.match(s3_url.rpartition("/")[2]))
+            and (suffix is None or s3_url.endswith(suffix))
+        )
+
+    def _list_prefix(self, bucket: str, prefix: str) -> dict[str, dict]:
+        logger.info(f"Listing s3://{bucket}/{prefix}")
+
+        s3_url_to_metadata = {}
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for s3_object in page.get("Contents", []):
+                s3_url_to_metadata[f"s3://{bucket}/{s3_object['Key']}"] = {
+                    "ContentLength": s3_object["Size"],
+                    "ETag": s3_object["ETag"]
+                }
+        return s3_url_to_metadata
+
+
+def split_s3_url(s3_url: str) -> tuple[str, str]:
+    """Splits an S3 URL into its bucket and key. Both the s3://bucket/key and s3://endpoint:port/bucket/key forms are supported."""
+    parsed_url = urllib.parse.urlparse(s3_url)
+    if parsed_url.netloc.endswith("amazonaws.com") or ":" in parsed_url.netloc:
+        bucket, _, key = parsed_url.path.lstrip("/").partition("/")
+        return bucket, key
+    return parsed_url.netloc, parsed_url.path.lstrip("/")
+
+
+def _try_list_s3_objects_metadata(s3_client: S3Client, bucket: str, prefix: str, max_pages=1) -> dict[str, dict]:
+    """List the objects directly under the given prefix. Returns whatever could be listed, and nothing upon failure."""
+    s3_url_to_metadata = {}
+    try:
+        paginator = s3_client.get_paginator("list_objects_v2")
+        pages = paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/", PaginationConfig={"MaxItems": 1000 * max_pages})
+        for page in pages:
+            for s3_object in page.get("Contents", []):
+                s3_url_to_metadata[f"s3://{bucket}/{s3_object['Key']}"] = {
+                    "ContentLength": s3_object["Size"],
+                    "ETag": s3_object["ETag"]
+                }
+    except ClientError as e:
+        logger.warning(f"Failed to list s3://{bucket}/{prefix}. Falling back to individual requests. {e}")
+    return s3_url_to_metadata
+
+
+def _head_s3_object_metadata(s3_client: S3Client, s3_url: str) -> dict:
+    bucket, key = split_s3_url(s3_url)
+    try:
+        head_object = s3_client.head_object(Bucket=bucket, Key=key)
+    except Exception:
+        logger.error(f"Failed when accessing the S3 object: {s3_url}")
+        raise
+    return {"ContentLength": int(head_object["ContentLength"]), "ETag": head_object["ETag"]}
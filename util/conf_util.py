@@ -5,6 +5,7 @@ import json
 import logging
 import os
 import re
+import threading
 from builtins import object
 from typing import Optional
 
@@ -91,6 +92,34 @@ class SettingsConf(YamlConf):
         super(SettingsConf, self).__init__(file)
 
 
+_settings_conf_cache = {}
+_settings_conf_cache_lock = threading.Lock()
+
+
+def get_settings_conf(file: Optional[str] = None) -> SettingsConf:
+    """Returns a process-wide SettingsConf for the given settings file.
+
+    The file is parsed once and reused until its modification time changes, so repeated lookups in per-granule code
+    paths cost a dictionary lookup rather than a YAML parse. The returned configuration is shared and must not be
+    mutated by callers.
+
+    :param file: filepath to the settings config file. Defaults to "../conf/settings.yaml", relative to this module.
+    """
+    if file is None:
+        file = norm_path(os.path.join(os.path.dirname(__file__), "..", "conf", "settings.yaml"))
+    key = (os.path.abspath(file), os.stat(file).st_mtime_ns)
+
+    with _settings_conf_cache_lock:
+        settings_conf = _settings_conf_cache.get(key)
+        if settings_conf is None:
+            settings_conf = SettingsConf(file)
+            # drop entries for stale versions of the same file
+            for cached_key in [k for k in _settings_conf_cache if k[0] == key[0]]:
+                del _settings_conf_cache[cached_key]
+            _settings_conf_cache[key] = settings_conf
+    return settings_conf
+
+
 class RunConfig(object):
     """PGE run configuration class."""
 
@@ -3,6 +3,8 @@ from typing import Optional
 from util.os_util import norm_path
 import os
 import json
+import re
+import threading
 
 
 class DatasetsJson:
@@ -23,11 +25,53 @@ class DatasetsJson:
         with open(file) as f:
             datasets = json.load(f)["datasets"]
             self._datasets_json = {dataset["type"]: dataset for dataset in datasets}
+        self._match_patterns = {}
 
     def get(self, key):
         '''Returns the dataset with the given key. Key is the dataset type.'''
         return self._datasets_json[key]
 
+    def get_match_pattern(self, key) -> re.Pattern:
+        '''Returns the compiled match_pattern of the dataset with the given key. Key is the dataset type.'''
+        pattern = self._match_patterns.get(key)
+        if pattern is None:
+            pattern = self._match_patterns[key] = re.compile(self.get(key)["match_pattern"])
+        return pattern
+
+
+_datasets_json_cache = {}
+_datasets_json_cache_lock = threading.Lock()
+
+
+def get_datasets_json(file: Optional[str] = None) -> DatasetsJson:
+    """Returns a process-wide DatasetsJson for the given datasets.json file.
+
+    The file is parsed once and reused until its modification time changes, so repeated lookups in per-granule code
+    paths cost a dictionary lookup rather than a JSON parse. The returned object is shared and must not be mutated.
+
+    :param file: filepath to datasets.json. Defaults to "../conf/sds/files/datasets.json", relative to this module.
+    """
+    if file is None:
+        file = norm_path(
+            os.path.join(os.path.dirname(__file__), "..", "conf", "sds", "files", "datasets.json")
+        )
+    key = (os.path.abspath(file), os.stat(file).st_mtime_ns)
+
+    with _datasets_json_cache_lock:
+        datasets_json = _datasets_json_cache.get(key)
+        if datasets_json is None:
+            datasets_json = DatasetsJson(file)
+            # drop entries for stale versions of the same file
+            for cached_key in [k for k in _datasets_json_cache if k[0] == key[0]]:
+                del _datasets_json_cache[cached_key]
+            _datasets_json_cache[key] = datasets_json
+    return datasets_json
+
+
+def get_match_pattern(dataset_type, file: Optional[str] = None) -> re.Pattern:
+    """Returns the compiled match_pattern for the given dataset type from the process-wide datasets.json registry."""
+    return get_datasets_json(file).get_match_pattern(dataset_type)
+
 # TODO: Refactor so that all the functions below are methods of DatasetsJson
 
 def find_publish_location_s3(datasets_json, dataset_type):
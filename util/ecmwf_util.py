@@ -8,7 +8,12 @@ Contains utility functions for working with ECMWF (Troposphere) weather files.
 
 """
 
+import concurrent.futures
+import os
+import threading
+import time
 from datetime import datetime
+from typing import Dict, Iterable, Optional
 from urllib.parse import urlparse
 
 from commons.logger import logger
@@ -18,6 +23,11 @@ import boto3
 
 s3_client = boto3.client("s3")
 
+DEFAULT_ECMWF_S3_PREFIX = "s3://opera-ancillaries/ecmwf"
+"""Default root S3 location of the ECMWF (troposphere) files"""
+
+ECMWF_INDEX_TTL_SECONDS = 300
+"""Number of seconds a cached listing of an ECMWF month prefix is considered current"""
 
 
 def check_s3_for_ecmwf(ecmwf_s3_uri: str):
@@ -134,4 +144,120 @@ def find_ecmwf_for_datetime(dt : datetime, s3_prefix="s3://opera-ancillaries/ecm
 
     ecmwf_s3_path = "/".join([s3_prefix, ecmwf_key])
 
-    return ecmwf_s3_path if check_s3_for_ecmwf(ecmwf_s3_path) else None
\ No newline at end of file
+    return ecmwf_s3_path if check_s3_for_ecmwf(ecmwf_s3_path) else None
+
+
+class EcmwfAvailabilityIndex:
+    """
+    Answers ECMWF file availability for many datetimes at once.
+
+    Rather than issuing a head_object request per file, the index lists each
+    needed month of the ECMWF S3 location (e.g. ecmwf/202302) once with
+    list_objects_v2 and caches the resulting set of keys for ttl seconds.
+    A DISP-S1 job spanning hundreds of acquisition dates therefore costs one
+    paginated listing per calendar month covered, rather than one request per file.
+
+    """
+
+    def __init__(self, s3_prefix=DEFAULT_ECMWF_S3_PREFIX, ttl=ECMWF_INDEX_TTL_SECONDS):
+        if not s3_prefix.startswith("s3://"):
+            raise ValueError(f"Invalid S3 prefix ({s3_prefix}) provided. Must begin with \"s3://\"")
+
+        parsed_uri = urlparse(s3_prefix)
+
+        self.s3_prefix = s3_prefix.rstrip("/")
+        self.bucket = parsed_uri.netloc
+        self.key_prefix = parsed_uri.path.strip("/")
+        self.ttl = ttl
+
+        self._listings: Dict[str, tuple] = {}  # month key prefix -> (listing time, set of keys)
+        self._lock = threading.Lock()
+
+    def _month_key_prefix(self, dt: datetime):
+        return "/".join(filter(None, [self.key_prefix, dt.strftime("%Y%m")]))
+
+    def _list_keys(self, month_key_prefix):
+        """Lists all keys under the provided month prefix, following pagination"""
+        logger.debug("Listing ECMWF files under s3://%s/%s", self.bucket, month_key_prefix)
+
+        keys = set()
+        paginator = s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=month_key_prefix):
+            keys.update(obj["Key"] for obj in page.get("Contents", []))
+
+        return keys
+
+    def _get_listings(self, month_key_prefixes: Iterable[str]) -> Dict[str, set]:
+        now = time.monotonic()
+
+        with self._lock:
+            listings = {
+                prefix: self._listings[prefix][1]
+                for prefix in month_key_prefixes
+                if prefix in self._listings and now - self._listings[prefix][0] < self.ttl
+            }
+
+        stale_prefixes = sorted(set(month_key_prefixes) - set(listings))
+
+        if stale_prefixes:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, os.cpu_count() + 4)) as executor:
+                for prefix, keys in zip(stale_prefixes, executor.map(self._list_keys, stale_prefixes)):
+                    listings[prefix] = keys
+
+            with self._lock:
+                for prefix in stale_prefixes:
+                    self._listings[prefix] = (now, listings[prefix])
+
+        return listings
+
+    def find_ecmwf_for_datetimes(self, datetimes: Iterable[datetime]) -> Dict[datetime, Optional[str]]:
+        """
+        Returns a mapping of each provided datetime to the S3 URI of its
+        corresponding ECMWF file, or None if the file does not exist.
+
+        """
+        datetimes = set(datetimes)
+
+        listings = self._get_listings({self._month_key_prefix(dt) for dt in datetimes})
+
+        ecmwf_s3_paths = {}
+
+        for dt in datetimes:
+            ecmwf_key = ecmwf_key_for_datetime(dt)
+            full_key = "/".join(filter(None, [self.key_prefix, ecmwf_key]))
+
+            if full_key in listings[self._month_key_prefix(dt)]:
+                ecmwf_s3_paths[dt] = "/".join([self.s3_prefix, ecmwf_key])
+            else:
+                logger.warning("ECMWF file %s does not exist in bucket %s", full_key, self.bucket)
+                ecmwf_s3_paths[dt] = None
+
+        return ecmwf_s3_paths
+
+    def all_available(self, datetimes: Iterable[datetime]) -> bool:
+        """Returns True if an ECMWF file exists for every provided datetime, False otherwise"""
+        return all(self.find_ecmwf_for_datetimes(datetimes).values())
+
+    def invalidate(self):
+        """Discards all cached listings"""
+        with self._lock:
+            self._listings.clear()
+
+
+_ecmwf_availability_indexes: Dict[str, EcmwfAvailabilityIndex] = {}
+_ecmwf_availability_indexes_lock = threading.Lock()
+
+
+def get_ecmwf_availability_index(s3_prefix=DEFAULT_ECMWF_S3_PREFIX):
+    """
+    Returns the process-wide EcmwfAvailabilityIndex for the provided S3 prefix,
+    so listings are shared between all callers in the same process.
+
+    """
+    s3_prefix = s3_prefix.rstrip("/")
+
+    with _ecmwf_availability_indexes_lock:
+        if s3_prefix not in _ecmwf_availability_indexes:
+            _ecmwf_availability_indexes[s3_prefix] = EcmwfAvailabilityIndex(s3_prefix)
+
+        return _ecmwf_availability_indexes[s3_prefix]
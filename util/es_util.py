@@ -0,0 +1,136 @@
+"""Elasticsearch helpers that only depend on elasticsearch-py, so they can be used outside HySDS (e.g. by the audit tools)."""
+import concurrent.futures
+import copy
+import logging
+import queue
+import threading
+from typing import Iterator, Optional, Union
+
+from elasticsearch import Elasticsearch, helpers
+
+MAX_SCAN_SLICES = 8
+
+_logger = logging.getLogger(__name__)
+
+
+def get_scan_slice_count(es: Elasticsearch, index: str, max_slices: int = MAX_SCAN_SLICES) -> int:
+    """Returns the number of slices to use when scanning the given index: one per shard, up to max_slices."""
+    try:
+        shard_count = len(es.search_shards(index=index)["shards"])
+    except Exception:
+        _logger.warning(f"Failed to get shard count. Scanning without slices. {index=}", exc_info=True)
+        return 1
+    return max(1, min(shard_count, max_slices))
+
+
+def sliced_scan(es: Elasticsearch, body: dict, index: str, slices: Optional[int] = None,
+                source_includes: Optional[Union[str, list[str]]] = None, size=1000, scroll="5m") -> Iterator[dict]:
+    """
+    Streams all hits matching the query, reading slices of a sliced scroll in parallel.
+
+    Each slice is scrolled on its own thread and hits are yielded as they arrive, so results are unordered.
+    Defaults to one slice per shard (see get_scan_slice_count). Any sort, pagination and aggregations in the body are
+    ignored. When source_includes is given, `_source` is filtered to those fields ("false" omits `_source`).
+
+    :param es: the raw elasticsearch-py client. e.g. `get_es_connection(logger).es`
+    :param body: the search body. Not modified.
+    """
+    body = copy.deepcopy(body)
+    for key in ("from", "size", "sort", "aggs"):
+        body.pop(key, None)
+    if source_includes is not None:
+        body["_source"] = {"includes": source_includes, "excludes": []}
+
+    slices = slices if slices is not None else get_scan_slice_count(es, index)
+    if slices <= 1:  # Elasticsearch requires slice.max > 1
+        yield from helpers.scan(es, body, index=index, scroll=scroll, size=size)
+        return
+
+    hits_queue = queue.Queue(maxsize=slices * size)  # bounded, so slow consumers apply backpressure to scrolling
+    done = object()
+    cancelled = threading.Event()
+
+    def put(item):
+        while not cancelled.is_set():
+            try:
+                hits_queue.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def scan_slice(slice_id):
+        try:
+            slice_body = {**body, "slice": {"id": slice_id, "max": slices}}
+            for hit in helpers.scan(es, slice_body, index=index, scroll=scroll, size=size):
+                if not put(hit):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=slices) as executor:
+        for slice_id in range(slices):
+            executor.submit(scan_slice, slice_id)
+
+        try:
+            remaining_slices = slices
+            while remaining_slices:
+                hit = hits_queue.get()
+                if hit is done:
+                    remaining_slices -= 1
+                elif isinstance(hit, Exception):
+                    raise hit
+                else:
+                    yield hit
+        finally:
+            # stop any slices still scrolling if the consumer exits early
+            cancelled.set()
+
+
+def get_body(match_all=True) -> dict:
+    """
+    Returns a generic Elasticsearch query body for use with a raw elasticsearch-py client.
+    By default, it includes a match_all query and will sort results by "creation_timestamp".
+    $.size is set to 10_000.
+
+    Clients should override $.query.bool.must[] and $.sort[] as needed.
+    Clients may set $._source_includes = "false" to omit the document in the Elasticsearch response.
+    """
+    return {
+        "query": {
+            "bool": {
+                "must": [{"match_all": {}}] if match_all else [],
+                "must_not": [],
+                "should": []
+            }
+        },
+        "from": 0,
+        "size": 10_000,
+        "sort": [{
+            "creation_timestamp": {"order": "asc"}
+        }],
+        "aggs": {},
+        "_source": {"includes": [], "excludes": []}
+    }
+
+
+def get_range(
+        datetime_fieldname="creation_timestamp",
+        start_dt_iso="1970-01-01",
+        end_dt_iso="9999-12-31T23:59:59.999"
+) -> dict:
+    """
+    Returns a query range filter typically set in an Elasticsearch body's $.query.bool.must[] section.
+    The default range is from 1970 to the year 10,000.
+    The "from" datetime uses "gte" and the "to" datetime uses "lt".
+    """
+    return {
+        "range": {
+            datetime_fieldname: {
+                "gte": start_dt_iso,
+                "lt": end_dt_iso
+            }
+        }
+    }
@@ -7,11 +7,12 @@ from lxml import etree as ET
 
 import mgrs
 import numpy as np
+import shapely
 import shapely.ops
 import shapely.wkt
 
 from osgeo import osr
-from shapely.geometry import box, LinearRing, Point, Polygon
+from shapely.geometry import box, LinearRing, Polygon
 
 
 EARTH_APPROX_CIRCUMFERENCE = 40075017.
@@ -349,6 +350,45 @@ def point2epsg(lon, lat):
         raise ValueError(f'Could not determine projection for {lat},{lon}')
 
 
+def points2epsg(lon, lat):
+    """
+    Vectorized form of point2epsg. Return the EPSG code of each of the
+    provided lat/lon points.
+
+    Parameters
+    ----------
+    lon: numpy.ndarray
+        Longitude coordinates of the points
+    lat: numpy.ndarray
+        Latitude coordinates of the points
+
+    Returns
+    -------
+    numpy.ndarray of EPSG codes corresponding to each point lat/lon coordinates.
+
+    Raises
+    ------
+    ValueError
+        If the EPSG code cannot be determined for any of the provided lat/lon.
+
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+
+    if np.any(lat == 0):
+        i = np.flatnonzero(lat == 0)[0]
+        raise ValueError(f'Could not determine projection for {lat[i]},{lon[i]}')
+
+    lon = np.where(lon >= 180.0, lon - 360.0, lon)
+    utm_zone_offset = np.round((lon + 177) / 6.0).astype(int)
+
+    return np.select(
+        [lat >= 75.0, lat <= -75.0, lat > 0],
+        [3413, 3031, 32601 + utm_zone_offset],
+        default=32701 + utm_zone_offset
+    )
+
+
 def epsg_from_polygon(polys):
     """
     Determine EPSG code for each polygon in polys.
@@ -377,15 +417,9 @@ def epsg_from_polygon(polys):
         x = xx.flatten()
         y = yy.flatten()
 
-        # Query to determine the zone
-        zones = []
-        for lx, ly in zip(x, y):
-            # Create a point with grid coordinates
-            pp = Point(lx, ly)
-
-            # If Point is in polys, compute EPSG
-            if pp.within(p):
-                zones.append(point2epsg(lx, ly))
+        # Query to determine the zone of each grid point within polys
+        in_poly = shapely.contains_xy(p, x, y)
+        zones = points2epsg(x[in_poly], y[in_poly])
 
         # Count different EPSGs
         vals, counts = np.unique(zones, return_counts=True)
@@ -431,10 +465,9 @@ def transform_polygon_coords_to_epsg(polys, epsgs):
         tgt.ImportFromEPSG(int(epsg))
         trans = osr.CoordinateTransformation(llh, tgt)
 
-        for lx, ly in zip(x, y):
-            dummy_x, dummy_y, dummy_z = trans.TransformPoint(ly, lx, 0)
-            tgt_x.append(dummy_x)
-            tgt_y.append(dummy_y)
+        tgt_points = np.asarray(trans.TransformPoints([(ly, lx, 0) for lx, ly in zip(x, y)]))
+        tgt_x.extend(tgt_points[:, 0])
+        tgt_y.extend(tgt_points[:, 1])
 
         x_min.append(min(tgt_x))
         y_min.append(min(tgt_y))
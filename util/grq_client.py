@@ -1,19 +1,63 @@
 """Helper functions for interacting with GRQ."""
 import logging
 from datetime import datetime
+from typing import Iterator, Optional
 
 import backoff
 from elasticsearch import Elasticsearch
 from elasticsearch import helpers
 
 from data_subscriber import es_conn_util
+from util.es_util import get_body, get_range  # noqa: F401 (re-exported for existing callers)
 
 logger = logging.getLogger(__name__)
 
 
-def get_slc_datasets_without_ionosphere_data(creation_timestamp_start_dt: datetime, creation_timestamp_end_dt: datetime):
+DEFAULT_SCAN_PAGE_SIZE = 1_000
+"""Number of documents fetched per scroll page by scan(). Larger pages mean fewer round trips, but more memory held at once."""
+
+DEFAULT_SCROLL_KEEP_ALIVE = "30m"
+"""
+How long GRQ keeps a scan()'s scroll context alive between page requests. The next page is only requested once the
+caller has consumed the current one, so this must cover the time taken to process a full page (page size divided by
+processing rate), or the scan fails with an expired scroll context part way through.
+"""
+
+SLC_DATASET_SOURCE_INCLUDES = ["id", "dataset", "urls", "metadata"]
+"""
+The SLC dataset fields read by the ionosphere download job, including those the triggered CSLC job reads through its
+hysds-io (urls, dataset, metadata). The whole metadata object is needed, since the hysds-io forwards it as the CSLC
+job's product_metadata, from which the PGE preconditions read many fields.
+"""
+
+
+def scan(body: dict, index: str, source_includes: Optional[list[str]] = None, page_size=DEFAULT_SCAN_PAGE_SIZE,
+         scroll=DEFAULT_SCROLL_KEEP_ALIVE) -> Iterator[dict]:
+    """
+    Lazily yields every hit matching the given query body, one scroll page at a time, so that callers may start
+    processing as soon as the first page arrives and only ever hold one page in memory.
+
+    :param source_includes: the `_source` fields to return. When omitted, the body's `_source` filtering is used as-is.
+    :param page_size: the number of hits fetched per scroll request.
+    :param scroll: how long the scroll context is kept alive between page requests. See DEFAULT_SCROLL_KEEP_ALIVE.
+    """
     es: Elasticsearch = es_conn_util.get_es_connection(logger).es
 
+    body = {**body, "size": page_size}
+    body.pop("from", None)
+    if source_includes is not None:
+        body["_source"] = {"includes": source_includes, "excludes": []}
+
+    yield from helpers.scan(es, body, index=index, scroll=scroll, size=page_size)
+
+
+def get_slc_datasets_without_ionosphere_data(creation_timestamp_start_dt: datetime, creation_timestamp_end_dt: datetime,
+                                             page_size=DEFAULT_SCAN_PAGE_SIZE,
+                                             scroll=DEFAULT_SCROLL_KEEP_ALIVE) -> Iterator[dict]:
+    """
+    Lazily yields the forward processing SLC datasets covering North America, created within the given time range,
+    that have no ionosphere metadata yet. Only the fields in SLC_DATASET_SOURCE_INCLUDES are returned.
+    """
     body = get_body()
     body["sort"] = []
     body["query"]["bool"]["must"].append(get_range("creation_timestamp", creation_timestamp_start_dt.isoformat(), creation_timestamp_end_dt.isoformat()))
@@ -27,59 +71,11 @@ def get_slc_datasets_without_ionosphere_data(creation_timestamp_start_dt: dateti
     body["query"]["bool"]["must_not"].append({"exists": {"field": "metadata.ionosphere.FileSize"}})
     body["query"]["bool"]["must_not"].append({"exists": {"field": "metadata.ionosphere.FileLocation"}})
 
-    search_results = list(helpers.scan(es, body, index="grq_*_l1_s1_slc*", scroll="5m", size=10_000))
-
-    return search_results
+    yield from scan(body, index="grq_*_l1_s1_slc*", source_includes=SLC_DATASET_SOURCE_INCLUDES, page_size=page_size,
+                    scroll=scroll)
 
 
 @backoff.on_exception(backoff.expo, exception=Exception, max_tries=3, jitter=None)
 def try_update_slc_dataset_with_ionosphere_metadata(index, product_id, ionosphere_metadata):
     es: Elasticsearch = es_conn_util.get_es_connection(logger).es
     es.update(index, product_id, body={"doc": {"metadata": ionosphere_metadata}})
-
-
-def get_body(match_all=True) -> dict:
-    """
-    Returns a generic Elasticsearch query body for use with a raw elasticsearch-py client.
-    By default, it includes a match_all query and will sort results by "creation_timestamp".
-    $.size is set to 10_000.
-
-    Clients should override $.query.bool.must[] and $.sort[] as needed.
-    Clients may set $._source_includes = "false" to omit the document in the Elasticsearch response.
-    """
-    return {
-        "query": {
-            "bool": {
-                "must": [{"match_all": {}}] if match_all else [],
-                "must_not": [],
-                "should": []
-            }
-        },
-        "from": 0,
-        "size": 10_000,
-        "sort": [{
-            "creation_timestamp": {"order": "asc"}
-        }],
-        "aggs": {},
-        "_source": {"includes": [], "excludes": []}
-    }
-
-
-def get_range(
-        datetime_fieldname="creation_timestamp",
-        start_dt_iso="1970-01-01",
-        end_dt_iso="9999-12-31T23:59:59.999"
-) -> dict:
-    """
-    Returns a query range filter typically set in an Elasticsearch body's $.query.bool.must[] section.
-    The default range is from 1970 to the year 10,000.
-    The "from" datetime uses "gte" and the "to" datetime uses "lt".
-    """
-    return {
-        "range": {
-            datetime_fieldname: {
-                "gte": start_dt_iso,
-                "lt": end_dt_iso
-            }
-        }
-    }
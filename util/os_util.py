@@ -1,6 +1,8 @@
 #!/usr/bin/env python
+import fcntl
 import os
 import logging
+from contextlib import contextmanager
 
 logger = logging.getLogger(os.path.splitext(os.path.basename(__file__))[0])
 
@@ -8,3 +10,14 @@ logger = logging.getLogger(os.path.splitext(os.path.basename(__file__))[0])
 def norm_path(path):
     """Normalize path."""
     return os.path.abspath(os.path.normpath(path))
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Holds an exclusive advisory lock on the provided path, shared across processes"""
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -8,16 +8,24 @@ Contains utility functions for executing a PGE, including simulation mode.
 
 """
 
+from contextlib import suppress
 from datetime import datetime
+from functools import lru_cache
+import fcntl
+import hashlib
 import os
 import json
 import re
+import shutil
 import subprocess
+import tempfile
+import threading
 from typing import Dict, List
 
 import boto3
 
 from commons.logger import logger
+from util.os_util import file_lock
 
 from opera_chimera.constants.opera_chimera_const import OperaChimeraConstants as oc_const
 
@@ -55,6 +63,21 @@ CCSLC_BURST_IDS = [
 ]
 """List of sample burst ID's to simulate multiple Compressed CSLC outputs"""
 
+ANCILLARY_CACHE_DIRECTORY = os.environ.get(
+    "OPERA_ANCILLARY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "opera_ancillary_cache")
+)
+"""
+Default directory of the worker-local cache of static ancillary files, used
+when the ANCILLARY_CACHE_DIRECTORY setting is not provided. Should be a
+location shared by all jobs running on the same node, ideally on the same file
+system as the job work directories so that cached files can be linked into them.
+"""
+
+_pge_metrics_lock = threading.Lock()
+
+_FICLONE = 0x40049409
+"""ioctl request code to clone (reflink) a file on copy-on-write file systems such as XFS and Btrfs"""
+
 DSWX_TILES = ['T18MVA', 'T18MVT', 'T18MVU', 'T18MVV', 'T18MWA', 'T18MWT',
               'T18MWU', 'T18MWV', 'T18MXA', 'T18MXT', 'T18MXU', 'T18MXV']
 """List of sample MGRS tile ID's to simulate DSWx-S1/NI multi-product output"""
@@ -156,8 +179,90 @@ def check_aws_connection(bucket, key):
         raise RuntimeError(errmsg)
 
 
-def download_object_from_s3(s3_bucket, s3_key, output_filepath, filetype="Ancillary"):
-    """Helper function to download an arbitrary file from S3"""
+@lru_cache(maxsize=None)
+def get_s3_client():
+    """Returns an S3 client shared by all downloads of this process"""
+    return boto3.client('s3')
+
+
+def _link_or_copy(src, dst):
+    """
+    Places a cached file at dst, preferring a reflink, then a hard link, and
+    falling back to a plain copy (e.g. when src and dst are on different file
+    systems).
+    """
+    if os.path.lexists(dst):
+        os.unlink(dst)
+
+    try:
+        with open(src, 'rb') as infile, open(dst, 'wb') as outfile:
+            fcntl.ioctl(outfile.fileno(), _FICLONE, infile.fileno())
+        return
+    except OSError:
+        # open() itself may have failed, in which case there is no partial reflink to remove
+        with suppress(FileNotFoundError):
+            os.unlink(dst)
+
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def download_cached_object_from_s3(s3_bucket, s3_key, output_filepath, cache_directory=ANCILLARY_CACHE_DIRECTORY):
+    """
+    Places a copy of an S3 object at output_filepath through a worker-local
+    cache that is keyed by bucket, key and ETag.
+
+    The cached copy is revalidated with a single HEAD request. The object is
+    only downloaded if the cache holds no copy with the current ETag, in which
+    case superseded copies are removed. Concurrent jobs on the same node are
+    serialized per object with a file lock. Cached files are read-only, since
+    they may be hard linked into the job work directory.
+
+    Returns
+    -------
+    cache_hit : bool
+        True if the object was served from the cache.
+
+    """
+    s3_client = get_s3_client()
+    etag = s3_client.head_object(Bucket=s3_bucket, Key=s3_key)['ETag']
+
+    object_directory = os.path.join(
+        cache_directory, hashlib.sha256(f"{s3_bucket}/{s3_key}".encode()).hexdigest()
+    )
+    os.makedirs(object_directory, exist_ok=True)
+    cached_filename = re.sub(r'[^\w-]', '', etag)
+    cached_filepath = os.path.join(object_directory, cached_filename)
+
+    with file_lock(f"{object_directory}.lock"):
+        cache_hit = os.path.exists(cached_filepath)
+
+        if not cache_hit:
+            partial_filepath = f"{cached_filepath}.partial"
+            s3_client.download_file(s3_bucket, s3_key, partial_filepath)
+            os.chmod(partial_filepath, 0o444)
+            os.replace(partial_filepath, cached_filepath)
+
+            for filename in os.listdir(object_directory):
+                if filename != cached_filename:
+                    logger.info(f'Removing superseded cached copy of s3://{s3_bucket}/{s3_key}: {filename}')
+                    os.unlink(os.path.join(object_directory, filename))
+
+        _link_or_copy(cached_filepath, output_filepath)
+
+    return cache_hit
+
+
+def download_object_from_s3(s3_bucket, s3_key, output_filepath, filetype="Ancillary", cache=False,
+                            cache_directory=ANCILLARY_CACHE_DIRECTORY):
+    """
+    Helper function to download an arbitrary file from S3. Static ancillary
+    files shared by many jobs should set cache=True to be served from the
+    worker-local ancillary cache at cache_directory (see
+    download_cached_object_from_s3).
+    """
     if not s3_bucket or not s3_key:
         raise RuntimeError(
             f"Incomplete S3 location for {filetype} file.\n"
@@ -166,15 +271,19 @@ def download_object_from_s3(s3_bucket, s3_key, output_filepath, filetype="Ancill
             f"section of the PGE config."
         )
 
-    s3 = boto3.resource('s3')
-
     pge_metrics = {"download": [], "upload": []}
 
     loc_t1 = datetime.utcnow()
 
     try:
-        logger.info(f'Downloading {filetype} file s3://{s3_bucket}/{s3_key} to {output_filepath}')
-        s3.Object(s3_bucket, s3_key).download_file(output_filepath)
+        if cache:
+            logger.info(f'Fetching {filetype} file s3://{s3_bucket}/{s3_key} to {output_filepath} '
+                        f'through the ancillary cache at {cache_directory}')
+            cache_hit = download_cached_object_from_s3(s3_bucket, s3_key, output_filepath, cache_directory)
+            logger.info(f'Ancillary cache {"hit" if cache_hit else "miss"} for s3://{s3_bucket}/{s3_key}')
+        else:
+            logger.info(f'Downloading {filetype} file s3://{s3_bucket}/{s3_key} to {output_filepath}')
+            get_s3_client().download_file(s3_bucket, s3_key, output_filepath)
     except Exception as err:
         errmsg = f'Failed to download {filetype} file from S3, reason: {str(err)}'
         raise RuntimeError(errmsg)
@@ -191,7 +300,7 @@ def download_object_from_s3(s3_bucket, s3_key, output_filepath, filetype="Ancill
             "time_start": loc_t1.isoformat() + "Z",
             "time_end": loc_t2.isoformat() + "Z",
             "duration": loc_dur,
-            "transfer_rate": path_disk_usage / loc_dur,
+            "transfer_rate": path_disk_usage / loc_dur if loc_dur else 0.0,
         }
     )
     logger.info(json.dumps(pge_metrics, indent=2))
@@ -200,17 +309,19 @@ def download_object_from_s3(s3_bucket, s3_key, output_filepath, filetype="Ancill
 
 
 def write_pge_metrics(metrics_path, pge_metrics):
-    # Merge any existing metrics with the metrics about to be written
-    if os.path.exists(metrics_path):
-        with open(metrics_path, "r") as infile:
-            old_pge_metrics = json.load(infile)
-
-        pge_metrics["download"].extend(old_pge_metrics["download"])
-        pge_metrics["upload"].extend(old_pge_metrics["upload"])
-
-    # Commit the new metrics to disk
-    with open(metrics_path, "w") as f:
-        json.dump(pge_metrics, f, indent=2)
+    # Preconditions may run concurrently, so serialize the read-merge-write below
+    with _pge_metrics_lock:
+        # Merge any existing metrics with the metrics about to be written
+        if os.path.exists(metrics_path):
+            with open(metrics_path, "r") as infile:
+                old_pge_metrics = json.load(infile)
+
+            pge_metrics["download"].extend(old_pge_metrics["download"])
+            pge_metrics["upload"].extend(old_pge_metrics["upload"])
+
+        # Commit the new metrics to disk
+        with open(metrics_path, "w") as f:
+            json.dump(pge_metrics, f, indent=2)
 
 
 def simulate_run_pge(runconfig: Dict, pge_config: Dict, context: Dict, output_dir: str):
@@ -0,0 +1,200 @@
+"""
+Lightweight in-process telemetry for PGE jobs.
+
+Records wall time, CPU time, bytes transferred, request counts and retries for each named stage of a job (e.g. each
+precondition function or wrapper phase), and writes them as structured metrics next to the job's pge_metrics.json.
+
+Requests made through boto3 are counted automatically, including their retries and the bytes of GetObject and
+PutObject/UploadPart bodies. This includes the requests that managed transfers (`download_file`, `upload_file`) issue
+from their worker threads. Other I/O is reported by the caller via `record_request` and `record_transfer`.
+"""
+import concurrent.futures
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_FILE_NAME = "pge_telemetry.json"
+"""Name of the telemetry file written to the job's working directory, next to pge_metrics.json"""
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    category: str
+    """Kind of stage. e.g. "precondition" or "wrapper" """
+    parent: Optional[str] = None
+    """Name of the enclosing stage, if any. Counters of nested stages are included in their parents' counters."""
+    time_start: Optional[str] = None
+    time_end: Optional[str] = None
+    wall_time: float = 0.0
+    """Elapsed seconds"""
+    cpu_time: float = 0.0
+    """
+    CPU seconds used by the thread running the stage, plus those of child processes waited for while it ran.
+    Stages may run concurrently on other threads, so the CPU of other threads (including boto3 transfer workers) is
+    not included, while that of child processes is process-wide and may include children of concurrent stages.
+    """
+    bytes_downloaded: int = 0
+    bytes_uploaded: int = 0
+    requests: dict = field(default_factory=dict)
+    """Number of requests issued, keyed by service. e.g. {"s3": 3, "es": 1}"""
+    retries: int = 0
+    status: str = "running"
+    error: Optional[str] = None
+
+
+def _cpu_seconds():
+    times = os.times()
+    return time.thread_time() + times.children_user + times.children_system
+
+
+class JobTelemetry:
+    """
+    Collects StageMetrics for the current process.
+
+    Active stages are tracked in a context variable. Threads start with no active stage, so work done in a thread
+    pool is attributed to the stage that thread is running, if any. The exception is boto3 managed transfers, whose
+    worker threads inherit the context of the thread that started the transfer (see `instrument_boto3`).
+    Use the process-wide instance returned by `get_job_telemetry()`.
+    """
+
+    def __init__(self):
+        self.stages: list[StageMetrics] = []
+        self._lock = threading.Lock()
+        self._active_stages_var = contextvars.ContextVar(f"active_stages_{id(self)}", default=())
+
+    def _active_stages(self) -> tuple[StageMetrics, ...]:
+        return self._active_stages_var.get()
+
+    @contextmanager
+    def stage(self, name: str, category: str):
+        """Measures the enclosed block as a stage. Failed stages are recorded with their error and the error re-raised."""
+        active_stages = self._active_stages()
+        metrics = StageMetrics(
+            name=name,
+            category=category,
+            parent=active_stages[-1].name if active_stages else None,
+            time_start=datetime.utcnow().isoformat() + "Z"
+        )
+        with self._lock:
+            self.stages.append(metrics)
+        token = self._active_stages_var.set(active_stages + (metrics,))
+
+        wall_t1, cpu_t1 = time.perf_counter(), _cpu_seconds()
+        try:
+            yield metrics
+            metrics.status = "succeeded"
+        except BaseException as e:
+            metrics.status = "failed"
+            metrics.error = str(e)
+            raise
+        finally:
+            metrics.wall_time = time.perf_counter() - wall_t1
+            metrics.cpu_time = _cpu_seconds() - cpu_t1
+            metrics.time_end = datetime.utcnow().isoformat() + "Z"
+            self._active_stages_var.reset(token)
+            logger.info(f"Stage {name} {metrics.status} in {metrics.wall_time:.3f}s "
+                        f"(cpu={metrics.cpu_time:.3f}s, downloaded={metrics.bytes_downloaded:,}B, "
+                        f"uploaded={metrics.bytes_uploaded:,}B, requests={metrics.requests}, retries={metrics.retries})")
+
+    def record_request(self, service: str, count=1, retries=0):
+        with self._lock:  # transfer worker threads may record towards the same stage concurrently
+            for metrics in self._active_stages():
+                metrics.requests[service] = metrics.requests.get(service, 0) + count
+                metrics.retries += retries
+
+    def record_transfer(self, downloaded=0, uploaded=0):
+        with self._lock:
+            for metrics in self._active_stages():
+                metrics.bytes_downloaded += downloaded
+                metrics.bytes_uploaded += uploaded
+
+    def to_dict(self):
+        with self._lock:
+            return {"stages": [asdict(stage) for stage in self.stages]}
+
+    def write(self, working_dir: str) -> str:
+        """
+        Writes the collected stages to the telemetry file in the given directory, appending to any stages already
+        written there (e.g. by an earlier process of the same job). Written stages are cleared from memory.
+        """
+        telemetry_path = os.path.join(working_dir, TELEMETRY_FILE_NAME)
+        telemetry = self.to_dict()
+
+        if os.path.exists(telemetry_path):
+            with open(telemetry_path, "r") as infile:
+                telemetry["stages"] = json.load(infile)["stages"] + telemetry["stages"]
+
+        with open(telemetry_path, "w") as outfile:
+            json.dump(telemetry, outfile, indent=2)
+
+        with self._lock:
+            self.stages = [stage for stage in self.stages if stage.status == "running"]
+
+        return telemetry_path
+
+
+_job_telemetry = JobTelemetry()
+
+
+def get_job_telemetry() -> JobTelemetry:
+    return _job_telemetry
+
+
+def _on_boto3_after_call(http_response=None, parsed=None, model=None, **kwargs):
+    parsed = parsed or {}
+    service = model.service_model.endpoint_prefix if model is not None else "aws"
+    retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+    _job_telemetry.record_request(service, retries=retries)
+
+    if model is not None and model.name == "GetObject":
+        _job_telemetry.record_transfer(downloaded=parsed.get("ContentLength") or 0)
+
+
+def _on_boto3_before_call(params=None, model=None, **kwargs):
+    if model is not None and model.name in ("PutObject", "UploadPart"):
+        body = (params or {}).get("body")
+        if isinstance(body, (bytes, bytearray)):
+            _job_telemetry.record_transfer(uploaded=len(body))
+        elif hasattr(body, "seek") and hasattr(body, "tell"):
+            position = body.tell()
+            body.seek(0, os.SEEK_END)
+            _job_telemetry.record_transfer(uploaded=body.tell() - position)
+            body.seek(position)
+
+
+class _ContextPropagatingThreadPoolExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Runs each task in a copy of the context of the thread that submitted it"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def instrument_boto3(session=None):
+    """
+    Counts the requests, retries and bytes transferred by the boto3 clients of the given session (by default, the
+    default session used by `boto3.client` and `boto3.resource`) towards the active stage. Safe to call repeatedly.
+
+    Managed transfers (`download_file`, `upload_file` and friends) issue their requests from s3transfer worker threads,
+    which would otherwise have no active stage. Those threads are made to run in the context of the thread that
+    started the transfer, so their requests count towards its stage.
+    """
+    import boto3
+    from s3transfer.futures import BoundedExecutor
+
+    if session is None:
+        session = boto3.DEFAULT_SESSION or boto3.setup_default_session() or boto3.DEFAULT_SESSION
+
+    session.events.register("before-call", _on_boto3_before_call, unique_id="opera-telemetry-before-call")
+    session.events.register("after-call", _on_boto3_after_call, unique_id="opera-telemetry-after-call")
+
+    BoundedExecutor.EXECUTOR_CLS = _ContextPropagatingThreadPoolExecutor
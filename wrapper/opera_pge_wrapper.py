@@ -26,6 +26,7 @@ from util import pge_util
 from util.conf_util import RunConfig
 from util.ctx_util import JobContext, DockerParams
 from util.exec_util import exec_wrapper, call_noerr
+from util.telemetry_util import JobTelemetry, get_job_telemetry, instrument_boto3
 
 to_json = partial(json.dumps, indent=2)
 
@@ -84,63 +85,81 @@ def run_pipeline(job_json_dict: Dict, work_dir: str) -> List[Union[bytes, str]]:
     """
     logger.info(f"Starting OPERA PGE wrapper with job_context={to_json(job_json_dict)}")
 
+    job_telemetry = get_job_telemetry()
+    instrument_boto3()
+
+    try:
+        return _run_pipeline(job_json_dict, work_dir, job_telemetry)
+    finally:
+        try:
+            job_telemetry.write(work_dir)
+        except Exception as err:
+            logger.warning(f"Failed to write wrapper telemetry: {str(err)}")
+
+
+def _run_pipeline(job_json_dict: Dict, work_dir: str, job_telemetry: JobTelemetry) -> List[Union[bytes, str]]:
     logger.info(f"Preparing Working Directory: {work_dir}")
     logger.debug(f"{list(Path(work_dir).iterdir())=}")
 
-    input_dir, output_dir, scratch_dir, runconfig_dir = create_required_directories(work_dir, job_json_dict)
+    with job_telemetry.stage("create_required_directories", category="wrapper"):
+        input_dir, output_dir, scratch_dir, runconfig_dir = create_required_directories(work_dir, job_json_dict)
 
     run_config: Dict = job_json_dict.get("run_config")
     pge_config: Dict = job_json_dict.get("pge_config")
     pge_name = pge_config.get(opera_chimera_const.PGE_NAME)
 
-    try:
-        lineage_metadata = lineage_metadata_functions[pge_name](job_json_dict, work_dir)
-    except KeyError as err:
-        raise RuntimeError(f'No lineage metadata function available for PGE {str(err)}')
+    with job_telemetry.stage("lineage_metadata", category="wrapper"):
+        try:
+            lineage_metadata = lineage_metadata_functions[pge_name](job_json_dict, work_dir)
+        except KeyError as err:
+            raise RuntimeError(f'No lineage metadata function available for PGE {str(err)}')
 
     logger.info(f'Derived lineage metadata: {lineage_metadata}')
 
     logger.info("Moving input files to input directories.")
-    for local_input_filepath in lineage_metadata:
-        try:
-            shutil.move(local_input_filepath, input_dir)
-        except shutil.Error as err:
-            logger.warning(
-                f"Failed to move {local_input_filepath} to {input_dir}, "
-                f"reason: {str(err)}"
-            )
-
-    if pge_name in runconfig_update_functions:
-        logger.info("Updating run config for use with PGE.")
-        run_config = runconfig_update_functions[pge_name](job_json_dict, work_dir)
-
-    # create RunConfig.yaml
-    logger.info(f"Run config to transform to YAML is: {to_json(run_config)}")
-    logger.info(f"PGE Config: {to_json(pge_config)}")
-
-    rc = RunConfig(run_config, pge_name)
-    rc_file = os.path.join(work_dir, 'RunConfig.yaml')
-    rc.dump(rc_file)
-
-    logger.info("Copying run config to run config input directory.")
-    shutil.copy(rc_file, runconfig_dir)
+    with job_telemetry.stage("move_inputs", category="wrapper"):
+        for local_input_filepath in lineage_metadata:
+            try:
+                shutil.move(local_input_filepath, input_dir)
+            except shutil.Error as err:
+                logger.warning(
+                    f"Failed to move {local_input_filepath} to {input_dir}, "
+                    f"reason: {str(err)}"
+                )
+
+    with job_telemetry.stage("create_runconfig", category="wrapper"):
+        if pge_name in runconfig_update_functions:
+            logger.info("Updating run config for use with PGE.")
+            run_config = runconfig_update_functions[pge_name](job_json_dict, work_dir)
+
+        # create RunConfig.yaml
+        logger.info(f"Run config to transform to YAML is: {to_json(run_config)}")
+        logger.info(f"PGE Config: {to_json(pge_config)}")
+
+        rc = RunConfig(run_config, pge_name)
+        rc_file = os.path.join(work_dir, 'RunConfig.yaml')
+        rc.dump(rc_file)
+
+        logger.info("Copying run config to run config input directory.")
+        shutil.copy(rc_file, runconfig_dir)
 
     # Run the PGE
     should_simulate_pge = job_json_dict.get(opera_chimera_const.SIMULATE_OUTPUTS)
 
-    if should_simulate_pge:
-        logger.info("Simulating PGE run....")
-        pge_util.simulate_run_pge(run_config, pge_config, job_json_dict, output_dir)
-    else:
-        logger.info("Running PGE...")
-        exec_pge_command(
-            context=job_json_dict,
-            work_dir=work_dir,
-            input_dir=input_dir,
-            runconfig_dir=runconfig_dir,
-            output_dir=output_dir,
-            scratch_dir=scratch_dir
-        )
+    with job_telemetry.stage("run_pge", category="wrapper"):
+        if should_simulate_pge:
+            logger.info("Simulating PGE run....")
+            pge_util.simulate_run_pge(run_config, pge_config, job_json_dict, output_dir)
+        else:
+            logger.info("Running PGE...")
+            exec_pge_command(
+                context=job_json_dict,
+                work_dir=work_dir,
+                input_dir=input_dir,
+                runconfig_dir=runconfig_dir,
+                output_dir=output_dir,
+                scratch_dir=scratch_dir
+            )
     logger.debug(f"{os.listdir(output_dir)=}")
 
     extra_met = {
@@ -151,10 +170,11 @@ def run_pipeline(job_json_dict: Dict, work_dir: str) -> List[Union[bytes, str]]:
     product_metadata: Dict = pge_util.get_product_metadata(job_json_dict)
 
     logger.info("Converting output product to HySDS-style datasets")
-    created_datasets = product2dataset.convert(
-        work_dir, output_dir, pge_name, rc_file, extra_met=extra_met,
-        product_metadata=product_metadata
-    )
+    with job_telemetry.stage("product2dataset", category="wrapper"):
+        created_datasets = product2dataset.convert(
+            work_dir, output_dir, pge_name, rc_file, extra_met=extra_met,
+            product_metadata=product_metadata
+        )
 
     return created_datasets
 